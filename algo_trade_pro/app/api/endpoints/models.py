@@ -0,0 +1,47 @@
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException
+
+from app.services.inference import find_inference_service, reload_inference_service
+from app.services.logger import get_logger
+from app.services.model_registry import get_model_registry
+
+router = APIRouter()
+logger = get_logger(__name__)
+
+
+@router.get("/models/{name}/versions")
+def model_versions(name: str):
+    """Published versions of a model set (newest first) and the version scoring live signals."""
+    registry = get_model_registry(name)
+    service = find_inference_service(name)
+    return {
+        "name": name,
+        "current": registry.current(),
+        "live": service.version if service is not None else None,
+        "versions": registry.versions(),
+    }
+
+
+@router.post("/models/{name}/activate/{version}")
+def activate_model_version(name: str, version: str):
+    """Make ``version`` active; live services load it in the background and swap it in."""
+    try:
+        get_model_registry(name).activate(version)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    reload_inference_service(name)
+    return {"name": name, "current": version}
+
+
+@router.post("/models/{name}/rollback")
+def rollback_model_version(name: str, version: Optional[str] = None):
+    """Re-activate the previous version (or ``version``)."""
+    service = find_inference_service(name)
+    try:
+        current = service.rollback(version) if service is not None else get_model_registry(name).rollback(version)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"name": name, "current": current}
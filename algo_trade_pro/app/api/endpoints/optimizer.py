@@ -0,0 +1,23 @@
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException
+
+from app.backtest.optimizer import RESULT_COLUMNS, ResultCache
+from app.services.logger import get_logger
+
+router = APIRouter()
+logger = get_logger(__name__)
+
+
+@router.get("/optimizer/results")
+def optimizer_results(strategy: Optional[str] = None, data_hash: Optional[str] = None,
+                      sort_by: str = "sharpe", limit: int = 100):
+    """Cached parameter sweep / walk-forward backtests, best ``sort_by`` first."""
+    if sort_by not in RESULT_COLUMNS:
+        raise HTTPException(status_code=400, detail=f"sort_by must be one of {RESULT_COLUMNS}")
+    cache = ResultCache()
+    try:
+        results = cache.table(strategy, data_hash, sort_by, limit)
+    finally:
+        cache.close()
+    return {"count": len(results), "sort_by": sort_by, "results": results}
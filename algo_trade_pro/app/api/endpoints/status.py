@@ -2,6 +2,10 @@
 
 from fastapi import APIRouter, Request
 
+from app.queue.signal_queue import MONITORED_QUEUES
+from app.services.inference import get_inference_stats
+from app.services.logger import get_log_stats
+
 router = APIRouter()
 
 @router.get("/broker/status")
@@ -13,3 +17,22 @@ async def broker_status(request: Request):
          return {"connected": False, "broker": "None"}
 
     return {"connected": True, "broker": type(broker).__name__}
+
+@router.get("/pipeline/status")
+async def pipeline_status(request: Request):
+    """Market data pipeline counters (queues, tick persistence, strategy dispatch and latency)."""
+    controller = getattr(request.app.state, "controller", None)
+    data_collector = getattr(controller, "data_collector", None)
+
+    queues = {name: queue.get_stats() for name, queue in MONITORED_QUEUES.items()}
+    if data_collector is None:
+        return {"running": False, "queues": queues, "logging": get_log_stats()}
+
+    return {
+        "running": bool(getattr(controller, "is_running", False)),
+        "queues": queues,
+        "tick_writer": data_collector.tick_writer.get_stats(),
+        "strategy_engine": controller.strategy_engine.get_dispatch_stats(),
+        "inference": get_inference_stats(),
+        "logging": get_log_stats(),
+    }
@@ -116,4 +116,4 @@ async def get_live_market_data():
 @router.get("/api/signals/live")
 async def get_live_signals():
     from app.queue.signal_queue import latest_signals
-    return {"success": True, "signals": latest_signals}
+    return {"success": True, "signals": list(latest_signals)}
@@ -0,0 +1,12 @@
+"""
+app/backtest
+
+Historical backtesting of the trading strategies.
+"""
+
+from app.backtest.optimizer import ParameterOptimizer
+from app.backtest.replay import ReplayBacktest, diff_reports
+from app.backtest.vectorized import BacktestResult, VectorizedBacktester, load_bars, run_backtest
+
+__all__ = ["BacktestResult", "ParameterOptimizer", "ReplayBacktest", "VectorizedBacktester", "diff_reports",
+           "load_bars", "run_backtest"]
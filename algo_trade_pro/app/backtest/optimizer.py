@@ -0,0 +1,446 @@
+"""
+app/backtest/optimizer.py
+
+Parameter sweeps and walk-forward optimization over the vectorized backtester.
+
+A search space maps constructor arguments of a strategy class to candidate values
+(every combination: grid search) or to candidates / (low, high) ranges sampled at
+random. Each parameter set is backtested in a ProcessPoolExecutor; the bar history
+is written once to a .npy memmap that every worker maps read-only instead of
+loading its own copy. Results are cached in SQLite by (strategy, params, data hash,
+window, backtest settings), so re-running a sweep only computes what is new, and
+the cached table is served at GET /api/v1/optimizer/results.
+
+Walk-forward: the history is cut into rolling train/test windows; every parameter
+set is scored on the train window, and the best one (by ``metric``) is run on the
+following test window. Test windows are backtested with the full history before
+them as warmup, so indicators and open positions carry in as they would live.
+
+Usage:
+    with ParameterOptimizer(load_bars()) as optimizer:
+        table = optimizer.sweep("MA_CrossOver")                      # SEARCH_SPACES grid
+        table = optimizer.sweep("RSI_MeanReversion", samples=40)     # random search
+        windows = optimizer.walk_forward("BB_Breakout", train="730D", test="180D")
+
+    python -m app.backtest.optimizer --strategy MA_CrossOver --walk-forward --train 730D --test 180D
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import multiprocessing as mp
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from app.backtest.vectorized import OHLCV_COLUMNS, VectorizedBacktester, load_bars, simulate
+from app.config.settings import get_settings
+from app.services.logger import get_logger
+from app.strategies.registry import DEFAULT_STRATEGY_SPECS, StrategySpec
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+# Default search spaces per strategy class. CPR's atm_offset only picks the option
+# strike, which a backtest on the underlying does not price, so CPR has none.
+SEARCH_SPACES: Dict[str, Dict[str, Sequence]] = {
+    "app.strategies.moving_average.MovingAverageStrategy": {
+        "short_window": [3, 5, 8, 10, 15, 20],
+        "long_window": [20, 30, 50, 100, 150, 200],
+    },
+    "app.strategies.rsi_strategy.RSIStrategy": {
+        "rsi_period": [7, 10, 14, 21],
+        "oversold_threshold": [20, 25, 30, 35],
+        "overbought_threshold": [65, 70, 75, 80],
+    },
+    "app.strategies.bollinger_bands.BollingerBandsStrategy": {
+        "period": [10, 15, 20, 30, 40],
+        "std_dev": [1.5, 2.0, 2.5, 3.0],
+    },
+}
+
+# Parameter sets that make no sense for a class (skipped before backtesting)
+PARAM_CONSTRAINTS: Dict[str, Callable[[Dict[str, Any]], bool]] = {
+    "app.strategies.moving_average.MovingAverageStrategy": lambda p: p["short_window"] < p["long_window"],
+    "app.strategies.rsi_strategy.RSIStrategy": lambda p: p["oversold_threshold"] < p["overbought_threshold"],
+}
+
+RESULT_COLUMNS = ["sharpe", "total_pnl", "return_pct", "max_drawdown", "max_drawdown_pct", "trades",
+                  "win_rate", "avg_trade_pnl", "exposure"]
+
+
+# ---------- search spaces ----------
+
+def grid_search_space(space: Dict[str, Sequence]) -> List[Dict[str, Any]]:
+    """Every combination of the candidate values."""
+    names = list(space)
+    return [dict(zip(names, values)) for values in itertools.product(*(space[name] for name in names))]
+
+
+def random_search_space(space: Dict[str, Union[Sequence, Tuple]], samples: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    ``samples`` distinct draws. A list is sampled as candidates; a (low, high) tuple
+    uniformly (integers if both ends are ints).
+    """
+    rng = np.random.default_rng(seed)
+    draws, seen = [], set()
+    for _ in range(samples * 20):
+        if len(draws) == samples:
+            break
+        params = {}
+        for name, values in space.items():
+            if isinstance(values, tuple):
+                low, high = values
+                if isinstance(low, int) and isinstance(high, int):
+                    params[name] = int(rng.integers(low, high + 1))
+                else:
+                    params[name] = round(float(rng.uniform(low, high)), 4)
+            else:
+                params[name] = list(values)[int(rng.integers(len(values)))]
+        key = json.dumps(params, sort_keys=True, default=str)
+        if key not in seen:
+            seen.add(key)
+            draws.append(params)
+    return draws
+
+
+def resolve_strategy(strategy: Union[str, StrategySpec]) -> StrategySpec:
+    """A StrategySpec from a DEFAULT_STRATEGY_SPECS name, a class path or a class name."""
+    if isinstance(strategy, StrategySpec):
+        return strategy
+    for spec in DEFAULT_STRATEGY_SPECS:
+        if strategy in (spec.name, spec.class_path, spec.class_path.rsplit(".", 1)[1]):
+            return spec
+    if "." in strategy:
+        return StrategySpec(strategy.rsplit(".", 1)[1], strategy)
+    raise ValueError(f"Unknown strategy {strategy!r}")
+
+
+def walk_forward_windows(index: pd.DatetimeIndex, train: str, test: str,
+                         step: Optional[str] = None) -> List[Tuple[pd.Timestamp, pd.Timestamp, pd.Timestamp, pd.Timestamp]]:
+    """(train_start, train_end, test_start, test_end) windows rolling forward by ``step`` (default: ``test``)."""
+    index = pd.DatetimeIndex(index).as_unit("ns")
+    train, test = pd.Timedelta(train), pd.Timedelta(test)
+    step = pd.Timedelta(step) if step else test
+    windows = []
+    if not len(index):
+        return windows
+    start, last = index[0], index[-1]
+    while start + train < last:
+        train_end = start + train
+        test_end = min(train_end + test, last + pd.Timedelta(1, "ns"))
+        if index.searchsorted(train_end) < index.searchsorted(test_end):
+            windows.append((start, train_end, train_end, test_end))
+        if train_end + test > last:
+            break
+        start = start + step
+    return windows
+
+
+# ---------- shared bar history ----------
+
+def data_hash(bars: pd.DataFrame) -> str:
+    """Content hash of the bar history (index and OHLCV)."""
+    digest = hashlib.blake2b(digest_size=8)
+    digest.update(np.ascontiguousarray(bars.index.as_unit("ns").asi8).tobytes())
+    digest.update(np.ascontiguousarray(bars[OHLCV_COLUMNS].to_numpy("float64")).tobytes())
+    return digest.hexdigest()
+
+
+class SharedBars:
+    """The bar history as .npy memmaps, mapped read-only by the sweep workers."""
+
+    def __init__(self, bars: pd.DataFrame, directory: Optional[str] = None):
+        self._owned = directory is None
+        self.path = directory or tempfile.mkdtemp(prefix="optimizer_bars_")
+        os.makedirs(self.path, exist_ok=True)
+        np.save(os.path.join(self.path, "index.npy"), bars.index.as_unit("ns").asi8)
+        np.save(os.path.join(self.path, "ohlcv.npy"), bars[OHLCV_COLUMNS].to_numpy("float64"))
+
+    @staticmethod
+    def load(path: str) -> pd.DataFrame:
+        index = pd.DatetimeIndex(np.load(os.path.join(path, "index.npy")))
+        ohlcv = np.load(os.path.join(path, "ohlcv.npy"), mmap_mode="r")
+        return pd.DataFrame(ohlcv, index=index, columns=OHLCV_COLUMNS, copy=False)
+
+    def close(self):
+        if self._owned:
+            shutil.rmtree(self.path, ignore_errors=True)
+
+
+# ---------- evaluation (runs in the workers) ----------
+
+_worker_bars: Optional[pd.DataFrame] = None
+
+
+def _use_bars(bars: pd.DataFrame):
+    global _worker_bars
+    _worker_bars = bars
+
+
+def _init_worker(path: str):
+    _use_bars(SharedBars.load(path))
+
+
+def evaluate_params(bars: pd.DataFrame, spec: StrategySpec, start=None, end=None,
+                    backtest_kwargs: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Backtest ``spec`` on the bars in [start, end), with everything before ``start``
+    as warmup. Returns the backtest stats.
+    """
+    index = bars.index
+    lo = index.searchsorted(pd.Timestamp(start)) if start is not None else 0
+    hi = index.searchsorted(pd.Timestamp(end)) if end is not None else len(index)
+    backtester = VectorizedBacktester(spec.build(), **(backtest_kwargs or {}))
+    positions = backtester.positions(bars.iloc[:hi])[lo:]
+    window = bars.iloc[lo:hi]
+    result = simulate(window, positions, backtester.quantity, backtester.slippage_bps, backtester.brokerage_perc,
+                      backtester.fill_on, backtester.initial_capital)
+    return result.stats
+
+
+def _evaluate_task(task: Tuple[str, str, Dict[str, Any], Any, Any, Dict[str, Any]]) -> Dict[str, Any]:
+    name, class_path, kwargs, start, end, backtest_kwargs = task
+    try:
+        return evaluate_params(_worker_bars, StrategySpec(name, class_path, kwargs), start, end, backtest_kwargs)
+    except Exception as e:
+        return {"error": f"{type(e).__name__}: {e}"}
+
+
+# ---------- result cache ----------
+
+class ResultCache:
+    """Backtest stats in SQLite, keyed by a hash of (strategy, params, data, window, settings)."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or settings.OPTIMIZER_CACHE_PATH
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS optimizer_results (
+                key TEXT PRIMARY KEY,
+                strategy TEXT,
+                class_path TEXT,
+                params TEXT,
+                data_hash TEXT,
+                window_start TEXT,
+                window_end TEXT,
+                backtest TEXT,
+                stats TEXT,
+                created_at TEXT
+            )
+        """)
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(class_path: str, params: Dict[str, Any], digest: str, start, end,
+                 backtest_kwargs: Dict[str, Any]) -> str:
+        raw = json.dumps([class_path, params, digest, str(start), str(end), backtest_kwargs], sort_keys=True, default=str)
+        return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        found = {}
+        with self._lock:
+            for i in range(0, len(keys), 500):
+                chunk = list(keys[i:i + 500])
+                rows = self._conn.execute(
+                    f"SELECT key, stats FROM optimizer_results WHERE key IN ({','.join('?' * len(chunk))})", chunk)
+                found.update((key, json.loads(stats)) for key, stats in rows)
+        # Failures cached by older versions are retried, not served
+        return {key: stats for key, stats in found.items() if "error" not in stats}
+
+    def put_many(self, rows: Sequence[Tuple]):
+        """
+        rows: (key, strategy, class_path, params, data_hash, start, end, backtest_kwargs, stats).
+        Failed backtests (stats with an "error") are not cached, so the next run retries them.
+        """
+        rows = [row for row in rows if "error" not in row[-1]]
+        if not rows:
+            return
+        now = datetime.now().isoformat(timespec="seconds")
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO optimizer_results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(key, strategy, class_path, json.dumps(params, sort_keys=True, default=str), digest,
+                  str(start) if start is not None else None, str(end) if end is not None else None,
+                  json.dumps(backtest_kwargs, sort_keys=True, default=str), json.dumps(stats, default=str), now)
+                 for key, strategy, class_path, params, digest, start, end, backtest_kwargs, stats in rows])
+            self._conn.commit()
+
+    def table(self, strategy: Optional[str] = None, digest: Optional[str] = None, sort_by: str = "sharpe",
+              limit: Optional[int] = 100) -> List[Dict[str, Any]]:
+        """Cached results, flattened (params + stats) and sorted best first."""
+        query = ("SELECT strategy, class_path, params, data_hash, window_start, window_end, stats, created_at "
+                 "FROM optimizer_results WHERE 1=1")
+        args = []
+        if strategy:
+            query += " AND (strategy = ? OR class_path = ?)"
+            args += [strategy, strategy]
+        if digest:
+            query += " AND data_hash = ?"
+            args.append(digest)
+        with self._lock:
+            rows = self._conn.execute(query, args).fetchall()
+        records = []
+        for name, class_path, params, row_hash, start, end, stats, created_at in rows:
+            stats = json.loads(stats)
+            records.append({"strategy": name, "class_path": class_path, "params": json.loads(params),
+                            "data_hash": row_hash, "window_start": start, "window_end": end,
+                            **{column: stats.get(column) for column in RESULT_COLUMNS},
+                            "error": stats.get("error"), "created_at": created_at})
+        records.sort(key=lambda r: r.get(sort_by) if isinstance(r.get(sort_by), (int, float)) else float("-inf"),
+                     reverse=True)
+        return records[:limit] if limit else records
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# ---------- optimizer ----------
+
+class ParameterOptimizer:
+    """Runs cached, parallel parameter sweeps and walk-forward optimizations over one bar history."""
+
+    def __init__(self, bars: Optional[pd.DataFrame] = None, workers: Optional[int] = None,
+                 cache: Optional[ResultCache] = None, **backtest_kwargs):
+        bars = load_bars() if bars is None else bars
+        # Nanosecond index, as the workers see it (window bounds are compared against it)
+        self.bars = bars.set_axis(bars.index.as_unit("ns"))
+        self.workers = workers if workers is not None else (settings.OPTIMIZER_WORKERS or os.cpu_count() or 1)
+        self.cache = cache or ResultCache()
+        self.backtest_kwargs = backtest_kwargs
+        self.data_hash = data_hash(self.bars)
+        self._shared: Optional[SharedBars] = None
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def __enter__(self) -> "ParameterOptimizer":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        if self._shared is not None:
+            self._shared.close()
+            self._shared = None
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._shared = SharedBars(self.bars)
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=mp.get_context("spawn"),
+                                             initializer=_init_worker, initargs=(self._shared.path,))
+        return self._pool
+
+    def candidates(self, spec: StrategySpec, space: Optional[Dict[str, Sequence]] = None,
+                   samples: Optional[int] = None, seed: int = 0) -> List[Dict[str, Any]]:
+        """Parameter sets from ``space`` (default: SEARCH_SPACES), grid or ``samples`` random draws."""
+        space = space if space is not None else SEARCH_SPACES.get(spec.class_path)
+        if not space:
+            raise ValueError(f"No search space for {spec.class_path}; pass one explicitly")
+        params = random_search_space(space, samples, seed) if samples else grid_search_space(space)
+        valid = PARAM_CONSTRAINTS.get(spec.class_path)
+        return [p for p in params if valid is None or valid(p)]
+
+    def evaluate(self, spec: StrategySpec, param_sets: List[Dict[str, Any]], start=None,
+                 end=None) -> List[Dict[str, Any]]:
+        """Stats for every parameter set on [start, end), from the cache where possible."""
+        keys = [ResultCache.make_key(spec.class_path, {**spec.kwargs, **params, "name": None}, self.data_hash,
+                                     start, end, self.backtest_kwargs) for params in param_sets]
+        results = self.cache.get_many(keys)
+        todo = [i for i, key in enumerate(keys) if key not in results]
+        if todo:
+            tasks = [(spec.name, spec.class_path, {**spec.kwargs, **param_sets[i]}, start, end, self.backtest_kwargs)
+                     for i in todo]
+            if self.workers > 1 and len(tasks) > 1:
+                chunksize = max(1, len(tasks) // (self.workers * 4))
+                computed = list(self._executor().map(_evaluate_task, tasks, chunksize=chunksize))
+            else:
+                _use_bars(self.bars)
+                computed = [_evaluate_task(task) for task in tasks]
+            self.cache.put_many([(keys[i], spec.name, spec.class_path, param_sets[i], self.data_hash, start, end,
+                                  self.backtest_kwargs, stats) for i, stats in zip(todo, computed)])
+            results.update((keys[i], stats) for i, stats in zip(todo, computed))
+        logger.info(f"Optimizer {spec.name}: {len(param_sets)} parameter sets, {len(todo)} backtested, "
+                    f"{len(param_sets) - len(todo)} from cache")
+        return [results[key] for key in keys]
+
+    def sweep(self, strategy: Union[str, StrategySpec], space: Optional[Dict[str, Sequence]] = None,
+              samples: Optional[int] = None, seed: int = 0, start=None, end=None,
+              metric: str = "sharpe") -> pd.DataFrame:
+        """One row per parameter set (params + stats), best ``metric`` first."""
+        spec = resolve_strategy(strategy)
+        param_sets = self.candidates(spec, space, samples, seed)
+        stats = self.evaluate(spec, param_sets, start, end)
+        rows = [{**params, **{column: s.get(column) for column in RESULT_COLUMNS}, "error": s.get("error")}
+                for params, s in zip(param_sets, stats)]
+        table = pd.DataFrame(rows)
+        return table.sort_values(metric, ascending=False, na_position="last", ignore_index=True)
+
+    def walk_forward(self, strategy: Union[str, StrategySpec], space: Optional[Dict[str, Sequence]] = None,
+                     train: str = "730D", test: str = "180D", step: Optional[str] = None,
+                     samples: Optional[int] = None, seed: int = 0, metric: str = "sharpe") -> pd.DataFrame:
+        """
+        One row per window: the best train-window parameters and their out-of-sample
+        stats on the test window.
+        """
+        spec = resolve_strategy(strategy)
+        param_sets = self.candidates(spec, space, samples, seed)
+        rows = []
+        for train_start, train_end, test_start, test_end in walk_forward_windows(self.bars.index, train, test, step):
+            scored = self.evaluate(spec, param_sets, train_start, train_end)
+            ranked = [(s.get(metric), i) for i, s in enumerate(scored) if isinstance(s.get(metric), (int, float))]
+            if not ranked:
+                continue
+            best_score, best = max(ranked)
+            oos = self.evaluate(spec, [param_sets[best]], test_start, test_end)[0]
+            rows.append({
+                "train_start": train_start, "train_end": train_end,
+                "test_start": test_start, "test_end": test_end,
+                "params": param_sets[best], f"train_{metric}": best_score,
+                **{f"test_{column}": oos.get(column) for column in RESULT_COLUMNS},
+            })
+        return pd.DataFrame(rows)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Parameter sweep / walk-forward optimization")
+    parser.add_argument("--strategy", required=True, help="strategy name (e.g. MA_CrossOver) or class path")
+    parser.add_argument("--bars", default=None, help="OHLCV csv (default: SESSION_OHLC_CSV)")
+    parser.add_argument("--space", default=None, help='JSON search space, e.g. {"short_window": [5, 10]}')
+    parser.add_argument("--samples", type=int, default=None, help="random search draws (default: full grid)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--metric", default="sharpe")
+    parser.add_argument("--walk-forward", action="store_true")
+    parser.add_argument("--train", default="730D")
+    parser.add_argument("--test", default="180D")
+    parser.add_argument("--step", default=None)
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    space = json.loads(args.space) if args.space else None
+    with ParameterOptimizer(load_bars(args.bars), workers=args.workers) as optimizer:
+        if args.walk_forward:
+            table = optimizer.walk_forward(args.strategy, space, args.train, args.test, args.step,
+                                           args.samples, args.seed, args.metric)
+        else:
+            table = optimizer.sweep(args.strategy, space, args.samples, args.seed, metric=args.metric).head(args.top)
+    with pd.option_context("display.width", 200, "display.max_columns", 30):
+        print(table.to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,386 @@
+"""
+app/backtest/replay.py
+
+Event-driven replay backtest: recorded ticks are pushed through the real
+StrategyEngine, TradeExecutor and SLTargetMonitor under a SimulatedClock, as fast
+as the CPU allows, with CustomBroker as the exchange.
+
+For every tick frame the clock is moved to the tick time, CustomBroker's price is
+set to the tick close and the engine folds the tick in (dispatching any bars it
+closed); then bars due on the clock are closed and the tick strategies run. Every
+``executor_interval`` seconds of simulated time the executor drains the signal
+queue and checks its pending orders and the monitor checks SL/target levels, as
+their live loops do once a second. Trades go to an isolated SQLite file, and the
+state strategies write or learn from (FeatureStore rows such as cpr_meta_signals,
+the session index fed by replayed daily bars, the instrument cache) is pointed at
+a per-run directory, so a replay never reaches the production training set.
+
+The report has throughput (ticks/s), per-stage latency, the engine's dispatch
+stats and the generated signals and trades; diff_reports() compares a run against
+a baseline report.
+
+Usage:
+    report = ReplayBacktest(journal_frames(days=["2025-08-20"]), trade_db="replay_trades.db").run()
+    diff = diff_reports(report, json.load(open("baseline.json")))
+
+    python -m app.backtest.replay --source journal --days 2025-08-20 --output run.json --baseline baseline.json
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from collections import Counter
+from itertools import chain
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from app.config.settings import get_settings
+from app.models.tick import Tick
+from app.services.clock import SimulatedClock, use_clock
+from app.services.isolation import isolated_state
+from app.services.logger import get_logger
+from app.services.tick_journal import TickJournal
+from app.services.tick_replay import DEFAULT_SYMBOLS, TickFrame, db_frames, journal_frames, synthetic_frames
+from app.strategies.registry import DEFAULT_STRATEGY_SPECS, STRATEGY_REGISTRY, StrategySpec
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+NS_PER_SECOND = 1_000_000_000
+STAGES = ("ticks", "bars_on_clock", "tick_strategies", "executor", "monitor")
+
+
+class _PriceBook:
+    """Last replayed close per symbol, in place of the DataCollector cache the monitor reads."""
+
+    def __init__(self):
+        self.prices: Dict[str, float] = {}
+
+    def get_latest_price(self, symbol: str) -> float:
+        return self.prices.get(symbol, 0.0)
+
+
+def _latency_summary(samples: List[float]) -> Dict[str, Any]:
+    if not samples:
+        return {"calls": 0, "total_ms": 0.0, "mean_us": 0.0, "p50_us": 0.0, "p99_us": 0.0, "max_us": 0.0}
+    values = np.asarray(samples) * 1e6
+    return {
+        "calls": len(samples),
+        "total_ms": round(float(values.sum()) / 1000, 3),
+        "mean_us": round(float(values.mean()), 2),
+        "p50_us": round(float(np.percentile(values, 50)), 2),
+        "p99_us": round(float(np.percentile(values, 99)), 2),
+        "max_us": round(float(values.max()), 2),
+    }
+
+
+def _signal_record(signal: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "time": signal["timestamp"].isoformat(),
+        "strategy": signal.get("strategy"),
+        "symbol": signal.get("symbol"),
+        "action": signal.get("action"),
+        "price": round(float(signal.get("price") or 0.0), 4),
+        "quantity": signal.get("quantity"),
+    }
+
+
+def _trade_records() -> List[Dict[str, Any]]:
+    """Trades in the bound database, without the run-specific ids."""
+    from app.models.database import get_db_session
+    from app.models.trade import Trade
+
+    def _round(value):
+        return round(value, 2) if value is not None else None
+
+    with get_db_session() as db:
+        trades = db.query(Trade).order_by(Trade.timestamp, Trade.symbol).all()
+        return [
+            {
+                "time": trade.timestamp.isoformat() if trade.timestamp else None,
+                "strategy": trade.strategy,
+                "symbol": trade.symbol,
+                "side": trade.side.value,
+                "quantity": trade.quantity,
+                "price": _round(trade.price),
+                "filled_price": _round(trade.filled_price),
+                "status": getattr(trade.status, "value", trade.status),
+                "exit_price": _round(trade.exit_price),
+                "exit_reason": trade.exit_reason,
+            }
+            for trade in trades
+        ]
+
+
+def _drain(queue) -> int:
+    dropped = 0
+    while not queue.empty():
+        queue.get_nowait()
+        dropped += 1
+    return dropped
+
+
+class ReplayBacktest:
+    """
+    Replays tick frames through the live engine/executor/monitor objects.
+
+    The components are the production classes; the harness calls the same methods
+    their run() loops call, on the simulated clock instead of the wall clock. The
+    strategies are built fresh from ``specs`` for every run (and enabled), so two
+    runs over the same frames with the same ``seed`` produce the same signals and
+    trades. Nothing else in the process should use trade_signal_queue meanwhile.
+
+    Without ``trade_db`` the trades go to a database in the run directory. An
+    existing ``trade_db`` file is only emptied with ``overwrite=True``.
+    """
+
+    def __init__(self, frames: Iterable[TickFrame], specs: Optional[List[StrategySpec]] = None,
+                 trade_db: Optional[str] = None, executor_interval: float = 1.0, seed: int = 0,
+                 overwrite: bool = False, run_dir: Optional[str] = None):
+        self.frames = frames
+        self.specs = list(DEFAULT_STRATEGY_SPECS if specs is None else specs)
+        self.run_dir = run_dir or tempfile.mkdtemp(prefix="replay_backtest_")
+        self.trade_db = trade_db or os.path.join(self.run_dir, "trades.db")
+        # The harness owns (and may empty) its own database; a given file only when told to
+        self.overwrite = overwrite or trade_db is None
+        self.executor_interval = executor_interval
+        self.seed = seed
+
+    def _check_trade_db(self) -> str:
+        from app.models import database
+
+        path = os.path.abspath(self.trade_db)
+        live = database.DATABASE_URL
+        if live.startswith("sqlite:///") and os.path.abspath(live[len("sqlite:///"):]) == path:
+            raise ValueError(f"Refusing to replay into the live trade database {database.DATABASE_URL}")
+        if os.path.exists(path) and not self.overwrite:
+            raise FileExistsError(f"Trade database {path} already exists; pass overwrite=True (--overwrite) "
+                                  f"to empty it for the replay")
+        return path
+
+    def _bind_trade_db(self) -> str:
+        from app.models import database
+
+        path = self._check_trade_db()
+        existing = os.path.exists(path)
+        previous = database.bind_database(f"sqlite:///{path}", create_tables=False)
+        if existing:
+            # A fresh trade book for every run
+            database.Base.metadata.drop_all(bind=database.engine)
+        database.init_database()
+        return previous
+
+    def run(self) -> Dict[str, Any]:
+        """Replay every frame and return the report."""
+        from app.brokers.custom_broker import CustomBroker
+        from app.core.sl_target_monitor import SLTargetMonitor
+        from app.core.strategy_engine import StrategyEngine
+        from app.core.trade_executor import TradeExecutor
+        from app.models.database import bind_database
+        from app.queue.trade_queue import trade_signal_queue
+
+        self._check_trade_db()
+        frames = iter(self.frames)
+        first = next(frames, None)
+        if first is None:
+            raise ValueError("No ticks to replay")
+        start_ns = first[0]
+
+        stale = _drain(trade_signal_queue)
+        if stale:
+            logger.warning(f"Dropped {stale} queued trade signals before the replay")
+
+        random.seed(self.seed)
+        strategies = [spec.build() for spec in self.specs]
+        for strategy in strategies:
+            strategy.enable()
+        registered = {s.name: STRATEGY_REGISTRY.get(s.name) for s in strategies}
+        signals: List[Dict[str, Any]] = []
+
+        def sink(signal: Dict[str, Any]):
+            signals.append(_signal_record(signal))
+            trade_signal_queue.put(signal)
+
+        broker = CustomBroker()
+        prices = _PriceBook()
+        engine = StrategyEngine(strategies=strategies, signal_sink=sink)
+        executor = TradeExecutor(broker)
+        monitor = SLTargetMonitor(broker, prices)
+        clock = SimulatedClock(start_ns)
+        timings: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+        tick_times = timings["ticks"]
+        perf = time.perf_counter
+        interval_ns = int(self.executor_interval * NS_PER_SECOND)
+        next_poll = start_ns + interval_ns
+        ticks = 0
+        frame_count = 0
+
+        def poll():
+            t0 = perf()
+            executor._process_signals()
+            executor._check_pending_orders()
+            t1 = perf()
+            monitor._update_monitored_trades()
+            monitor._check_price_levels()
+            timings["executor"].append(t1 - t0)
+            timings["monitor"].append(perf() - t1)
+
+        previous_url = self._bind_trade_db()
+        try:
+            for strategy in strategies:
+                STRATEGY_REGISTRY[strategy.name] = strategy
+            with isolated_state(self.run_dir), use_clock(clock):
+                started = perf()
+                for _, rows in chain([first], frames):
+                    for symbol, ts, open_, high, low, close, volume in rows:
+                        clock.advance_to(ts)
+                        broker.current_prices[symbol] = close
+                        prices.prices[symbol] = close
+                        t0 = perf()
+                        engine._handle_tick(Tick(symbol, ts, open_, high, low, close, volume, t0))
+                        tick_times.append(perf() - t0)
+                    ticks += len(rows)
+                    frame_count += 1
+
+                    t0 = perf()
+                    engine._close_due_bars(clock.now())
+                    t1 = perf()
+                    engine._execute_strategies()
+                    timings["bars_on_clock"].append(t1 - t0)
+                    timings["tick_strategies"].append(perf() - t1)
+
+                    if clock.ns >= next_poll:
+                        poll()
+                        next_poll = clock.ns + interval_ns
+
+                # Signals from the last frames execute one poll later, as they would live
+                clock.advance(self.executor_interval)
+                poll()
+                wall = max(perf() - started, 1e-9)
+            trades = _trade_records()
+        finally:
+            for name, strategy in registered.items():
+                if strategy is None:
+                    STRATEGY_REGISTRY.pop(name, None)
+                else:
+                    STRATEGY_REGISTRY[name] = strategy
+            _drain(trade_signal_queue)
+            bind_database(previous_url, create_tables=False)
+
+        report = {
+            "ticks": ticks,
+            "frames": frame_count,
+            "wall_seconds": round(wall, 3),
+            "ticks_per_second": round(ticks / wall, 1),
+            "simulated_seconds": round((clock.ns - start_ns) / NS_PER_SECOND, 3),
+            "seed": self.seed,
+            "strategies": [spec.name for spec in self.specs],
+            "trade_db": os.path.abspath(self.trade_db),
+            "run_dir": os.path.abspath(self.run_dir),
+            "latency": {stage: _latency_summary(samples) for stage, samples in timings.items()},
+            "strategy_engine": engine.get_dispatch_stats(),
+            "signals": signals,
+            "trades": trades,
+        }
+        logger.info(
+            f"Replay backtest finished: {ticks} ticks in {report['wall_seconds']}s "
+            f"({report['ticks_per_second']} ticks/s), {len(signals)} signals, {len(trades)} trades"
+        )
+        return report
+
+
+def _record_key(record: Dict[str, Any]) -> str:
+    return json.dumps(record, sort_keys=True, default=str)
+
+
+def _diff_records(run: List[Dict[str, Any]], baseline: List[Dict[str, Any]], limit: int) -> Dict[str, Any]:
+    ours = Counter(_record_key(r) for r in run)
+    theirs = Counter(_record_key(r) for r in baseline)
+    added = list((ours - theirs).elements())
+    removed = list((theirs - ours).elements())
+    return {
+        "run": len(run),
+        "baseline": len(baseline),
+        "added": len(added),
+        "removed": len(removed),
+        "added_examples": [json.loads(key) for key in sorted(added)[:limit]],
+        "removed_examples": [json.loads(key) for key in sorted(removed)[:limit]],
+    }
+
+
+def diff_reports(report: Dict[str, Any], baseline: Dict[str, Any], limit: int = 20) -> Dict[str, Any]:
+    """
+    Signals and trades present in one report but not the other (as multisets, so a
+    duplicated signal counts), plus the throughput change.
+    """
+    signals = _diff_records(report["signals"], baseline["signals"], limit)
+    trades = _diff_records(report["trades"], baseline["trades"], limit)
+    return {
+        "identical": not (signals["added"] or signals["removed"] or trades["added"] or trades["removed"]),
+        "signals": signals,
+        "trades": trades,
+        "ticks_per_second": {
+            "run": report["ticks_per_second"],
+            "baseline": baseline["ticks_per_second"],
+            "ratio": round(report["ticks_per_second"] / baseline["ticks_per_second"], 3)
+            if baseline["ticks_per_second"] else None,
+        },
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Replay ticks through the engine, executor and SL/target monitor")
+    parser.add_argument("--source", choices=["synthetic", "db", "journal"], default="journal")
+    parser.add_argument("--symbols", default=None, help="comma separated symbols (default: all recorded)")
+    parser.add_argument("--rate", type=float, default=1000.0, help="synthetic ticks per second (all symbols)")
+    parser.add_argument("--duration", type=float, default=600.0, help="synthetic feed seconds")
+    parser.add_argument("--db", default=None, help="ticks.db to replay (source=db)")
+    parser.add_argument("--journal-dir", default=None, help="tick journal directory (source=journal)")
+    parser.add_argument("--days", default=None, help="comma separated journal days (source=journal)")
+    parser.add_argument("--start", default=None)
+    parser.add_argument("--end", default=None)
+    parser.add_argument("--strategies", default=None, help="comma separated strategy names (default: all)")
+    parser.add_argument("--trade-db", default=None, help="SQLite file the replayed trades are written to")
+    parser.add_argument("--overwrite", action="store_true", help="empty an existing --trade-db file")
+    parser.add_argument("--run-dir", default=None, help="directory for the run's feature store and caches")
+    parser.add_argument("--executor-interval", type=float, default=1.0, help="simulated seconds between executor polls")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", default=None, help="report JSON of an earlier run to diff against")
+    parser.add_argument("--output", default=None, help="write the JSON report here")
+    args = parser.parse_args(argv)
+
+    symbols = [s.strip().upper() for s in args.symbols.split(",") if s.strip()] if args.symbols else None
+    if args.source == "synthetic":
+        frames = synthetic_frames(symbols or DEFAULT_SYMBOLS, args.rate, args.duration, start=args.start)
+    elif args.source == "db":
+        frames = db_frames(args.db, symbols=symbols, start=args.start, end=args.end)
+    else:
+        frames = journal_frames(TickJournal(args.journal_dir), args.days.split(",") if args.days else None,
+                                symbols=symbols)
+
+    specs = DEFAULT_STRATEGY_SPECS
+    if args.strategies:
+        names = {name.strip() for name in args.strategies.split(",")}
+        specs = [spec for spec in DEFAULT_STRATEGY_SPECS if spec.name in names]
+
+    report = ReplayBacktest(frames, specs=specs, trade_db=args.trade_db, executor_interval=args.executor_interval,
+                            seed=args.seed, overwrite=args.overwrite, run_dir=args.run_dir).run()
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+
+    summary = {key: value for key, value in report.items() if key not in ("signals", "trades")}
+    summary["signals"] = len(report["signals"])
+    summary["trades"] = len(report["trades"])
+    if args.baseline:
+        with open(args.baseline) as f:
+            summary["diff"] = diff_reports(report, json.load(f))
+    print(json.dumps(summary, indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
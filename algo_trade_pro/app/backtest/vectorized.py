@@ -0,0 +1,297 @@
+"""
+app/backtest/vectorized.py
+
+Vectorized historical backtests for BaseStrategy subclasses.
+
+Signals come from ``strategy.vectorized_signals(bars)``, computed over the whole
+history with NumPy arrays instead of calling ``generate_signals`` bar by bar.
+They become positions in one of two ways:
+    +1/-1 array       BUY/SELL flip a position of ``quantity`` (long_short), or
+                      enter/leave a long one (long_only); held until the next signal
+    bracket frame     (signal, target, stop columns) one position at a time, closed
+                      on the first close through the target or the stop (or at the
+                      end of the session for intraday bars)
+Fills are at the signal bar's close (or the next bar's open), moved against the
+trade by ``slippage_bps``. Brokerage is charged on both legs as in PnLCalculator.
+
+Usage:
+    bars = load_bars()                                   # bundled NIFTY daily csv
+    result = VectorizedBacktester(MovingAverageStrategy("MA", 10, 50, ["NIFTY 50"])).run(bars)
+    result.stats["sharpe"], result.equity, result.drawdown, result.trades
+"""
+
+import os
+from typing import Any, Dict, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from app.config.settings import get_settings
+from app.services.logger import get_logger
+from app.services.pnl_calculator import PnLCalculator
+from app.strategies.base import BaseStrategy
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+OHLCV_COLUMNS = ["open", "high", "low", "close", "volume"]
+MODES = ("long_short", "long_only")
+FILLS = ("close", "next_open")
+TRADING_DAYS_PER_YEAR = 252
+TRADE_COLUMNS = ["entry_time", "exit_time", "side", "quantity", "entry_price", "exit_price", "pnl",
+                 "bars_held", "open"]
+
+
+def load_bars(source: Any = None, symbol: Optional[str] = None, timeframe: Optional[str] = None,
+              start=None, end=None) -> pd.DataFrame:
+    """
+    OHLCV bars indexed by timestamp from a csv path (SESSION_OHLC_CSV by default),
+    a DataFrame, or any bar store with ``to_frame(symbol, timeframe)`` (BarBuilder).
+    Daily bars are indexed by their session date.
+    """
+    source = settings.SESSION_OHLC_CSV if source is None else source
+    if isinstance(source, (str, os.PathLike)):
+        df = pd.read_csv(source)
+    elif isinstance(source, pd.DataFrame):
+        df = source
+    elif hasattr(source, "to_frame"):
+        df = source.to_frame(symbol, timeframe)
+        if timeframe == "1D" and len(df):
+            # The bar store labels a daily bar with its close (next midnight)
+            df = df.set_axis(df.index - pd.Timedelta(days=1))
+    else:
+        raise TypeError(f"Cannot load bars from {type(source).__name__}")
+
+    if not isinstance(df.index, pd.DatetimeIndex):
+        column = next((c for c in ("date", "timestamp", "datetime") if c in df.columns), None)
+        if column is None:
+            raise ValueError("Bars need a DatetimeIndex or a date/timestamp column")
+        stamps = pd.to_datetime(df[column], errors="coerce", format="mixed")
+        df = df.assign(**{column: stamps})[stamps.notna()].set_index(column)
+    if df.index.tz is not None:
+        # Exchange wall-clock time, like the rest of the system
+        df = df.set_axis(df.index.tz_localize(None))
+    if "volume" not in df:
+        df = df.assign(volume=0.0)
+    df = df[OHLCV_COLUMNS].astype("float64").sort_index()
+    df.index.name = "timestamp"
+    return df.loc[start:end] if start is not None or end is not None else df
+
+
+def periods_per_year(index: pd.DatetimeIndex) -> float:
+    """Bars per year: trading days times the typical number of bars in a session."""
+    if len(index) < 2:
+        return float(TRADING_DAYS_PER_YEAR)
+    days = index.normalize()
+    bars_per_day = len(index) / max(len(days.unique()), 1)
+    return TRADING_DAYS_PER_YEAR * max(bars_per_day, 1.0)
+
+
+def _last_bar_of_session(index: pd.DatetimeIndex) -> np.ndarray:
+    codes, _ = pd.factorize(index.normalize())
+    ends = np.r_[np.flatnonzero(np.diff(codes)), len(codes) - 1]
+    return ends[codes]
+
+
+def bracket_positions(close: np.ndarray, signal: np.ndarray, target: np.ndarray, stop: np.ndarray,
+                      session_end: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Position (+1/-1/0) held after each bar's close for level-exit signals: one
+    trade at a time, exiting at the first close at/through the target or beyond
+    the stop, or at ``session_end[entry]`` (the last bar by default).
+    """
+    n = len(close)
+    held = np.zeros(n)
+    free_from = 0
+    for entry in np.flatnonzero(signal):
+        if entry < free_from:
+            continue
+        direction = signal[entry]
+        last = n - 1 if session_end is None else session_end[entry]
+        window = close[entry + 1:last + 1]
+        if direction > 0:
+            hit = (window >= target[entry]) | (window < stop[entry])
+        else:
+            hit = (window <= target[entry]) | (window > stop[entry])
+        exit_ix = entry + 1 + int(np.argmax(hit)) if hit.any() else last
+        held[entry:exit_ix] = direction
+        free_from = max(exit_ix, entry + 1)
+    return held
+
+
+class BacktestResult:
+    """Equity curve, drawdown, trade list and summary statistics of one run."""
+
+    def __init__(self, equity: pd.Series, drawdown: pd.Series, positions: pd.Series,
+                 trades: pd.DataFrame, stats: Dict[str, Any]):
+        self.equity = equity
+        self.drawdown = drawdown
+        self.positions = positions
+        self.trades = trades
+        self.stats = stats
+
+    def summary(self) -> Dict[str, Any]:
+        return dict(self.stats)
+
+    def __repr__(self) -> str:
+        s = self.stats
+        return (f"BacktestResult(pnl={s['total_pnl']:.2f}, trades={s['trades']}, "
+                f"sharpe={s['sharpe']:.3f}, max_dd={s['max_drawdown']:.2f})")
+
+
+def simulate(bars: pd.DataFrame, position: np.ndarray, quantity: float, slippage_bps: float = 0.0,
+             brokerage_perc: Optional[float] = None, fill_on: str = "close",
+             initial_capital: float = 100_000.0) -> BacktestResult:
+    """
+    Mark ``position`` (units of ``quantity`` wanted after each bar's close) to
+    market bar by bar, all in array operations.
+    """
+    if fill_on not in FILLS:
+        raise ValueError(f"fill_on must be one of {FILLS}, got {fill_on!r}")
+    calculator = PnLCalculator() if brokerage_perc is None else PnLCalculator(brokerage_perc)
+    brokerage = calculator.brokerage_percent
+    slip = slippage_bps / 10_000.0
+
+    close = bars["close"].to_numpy("float64")
+    n = len(close)
+    position = np.asarray(position, dtype="float64")
+    if fill_on == "close":
+        held, base = position, close
+    else:
+        # Decided at the close, executed at the next bar's open
+        held = np.r_[0.0, position[:-1]] if n else position
+        base = bars["open"].to_numpy("float64")
+
+    trade = np.diff(held, prepend=0.0)
+    fill = base * (1.0 + slip * np.sign(trade))
+    units = held * quantity
+    prev_units = np.r_[0.0, units[:-1]] if n else units
+    prev_close = np.r_[close[:1], close[:-1]] if n else close
+    costs = np.abs(trade) * quantity * fill * brokerage
+    pnl = prev_units * (close - prev_close) + trade * quantity * (close - fill) - costs
+
+    equity = initial_capital + np.cumsum(pnl)
+    peak = np.maximum.accumulate(equity) if n else equity
+    drawdown = equity - peak
+    start_equity = np.r_[initial_capital, equity[:-1]] if n else equity
+    returns = pnl / start_equity
+    std = returns.std(ddof=1) if n > 1 else 0.0
+    sharpe = float(returns.mean() / std * np.sqrt(periods_per_year(bars.index))) if std > 0 else 0.0
+
+    trades = _trade_list(bars.index, held, fill, close, quantity, brokerage)
+    closed = trades[~trades["open"]] if len(trades) else trades
+    stats = {
+        "start": bars.index[0] if n else None,
+        "end": bars.index[-1] if n else None,
+        "bars": n,
+        "initial_capital": initial_capital,
+        "final_equity": round(float(equity[-1]), 2) if n else initial_capital,
+        "total_pnl": round(float(pnl.sum()), 2),
+        "return_pct": round(float(pnl.sum()) / initial_capital * 100, 4),
+        "sharpe": round(sharpe, 3),
+        "max_drawdown": round(float(-drawdown.min()), 2) if n else 0.0,
+        "max_drawdown_pct": round(float(-(drawdown / peak).min()) * 100, 4) if n else 0.0,
+        "trades": len(closed),
+        "win_rate": round(float((closed["pnl"] > 0).mean()), 4) if len(closed) else 0.0,
+        "avg_trade_pnl": round(float(closed["pnl"].mean()), 2) if len(closed) else 0.0,
+        "brokerage": round(float(costs.sum()), 2),
+        "exposure": round(float((held != 0).mean()), 4) if n else 0.0,
+    }
+    return BacktestResult(
+        equity=pd.Series(equity, index=bars.index, name="equity"),
+        drawdown=pd.Series(drawdown, index=bars.index, name="drawdown"),
+        positions=pd.Series(units, index=bars.index, name="position"),
+        trades=trades,
+        stats=stats,
+    )
+
+
+def _trade_list(index: pd.DatetimeIndex, held: np.ndarray, fill: np.ndarray, close: np.ndarray,
+                quantity: float, brokerage: float) -> pd.DataFrame:
+    """One row per position segment, P&L as PnLCalculator.calculate_trade_pnl computes it."""
+    changes = np.flatnonzero(np.diff(held, prepend=0.0) != 0)
+    entries = changes[held[changes] != 0]
+    if not len(entries):
+        return pd.DataFrame(columns=TRADE_COLUMNS).astype({"pnl": "float64", "open": bool})
+    nxt = np.searchsorted(changes, entries, side="right")
+    is_open = nxt >= len(changes)
+    exits = np.where(is_open, len(held) - 1, changes[np.minimum(nxt, len(changes) - 1)])
+
+    direction = np.sign(held[entries])
+    qty = np.abs(held[entries]) * quantity
+    entry_price = fill[entries]
+    # An open position is valued at the last close
+    exit_price = np.where(is_open, close[exits], fill[exits])
+    gross = direction * (exit_price - entry_price) * qty
+    pnl = np.round(gross - (entry_price + exit_price) * qty * brokerage, 2)
+    return pd.DataFrame({
+        "entry_time": index[entries],
+        "exit_time": index[exits],
+        "side": np.where(direction > 0, "BUY", "SELL"),
+        "quantity": qty,
+        "entry_price": entry_price,
+        "exit_price": exit_price,
+        "pnl": pnl,
+        "bars_held": exits - entries,
+        "open": is_open,
+    })
+
+
+class VectorizedBacktester:
+    """Runs one strategy's vectorized signal rules over a bar history."""
+
+    def __init__(self, strategy: BaseStrategy, quantity: Optional[float] = None, mode: str = "long_short",
+                 slippage_bps: Optional[float] = None, brokerage_perc: Optional[float] = None,
+                 fill_on: str = "close", initial_capital: Optional[float] = None):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}, got {mode!r}")
+        if not strategy.supports_vectorized:
+            raise ValueError(f"{type(strategy).__name__} has no vectorized signal rules")
+        self.strategy = strategy
+        self.quantity = quantity if quantity is not None else getattr(strategy, "quantity", getattr(strategy, "qty", 1))
+        self.mode = mode
+        self.slippage_bps = settings.BACKTEST_SLIPPAGE_BPS if slippage_bps is None else slippage_bps
+        self.brokerage_perc = brokerage_perc
+        self.fill_on = fill_on
+        self.initial_capital = settings.BACKTEST_INITIAL_CAPITAL if initial_capital is None else initial_capital
+
+    def signals(self, bars: pd.DataFrame) -> Union[np.ndarray, pd.DataFrame]:
+        """The strategy's signals, silenced until it has ``min_data_points`` bars (as live)."""
+        signals = self.strategy.vectorized_signals(bars)
+        if signals is None:
+            raise ValueError(f"{type(self.strategy).__name__} returned no vectorized signals")
+        warmup = max(self.strategy.min_data_points - 1, 0)
+        if isinstance(signals, pd.DataFrame):
+            signals = signals.copy()
+            signals.iloc[:warmup, signals.columns.get_loc("signal")] = 0
+        else:
+            signals = np.array(signals, dtype=np.int8)
+            signals[:warmup] = 0
+        return signals
+
+    def positions(self, bars: pd.DataFrame) -> np.ndarray:
+        signals = self.signals(bars)
+        close = bars["close"].to_numpy("float64")
+        if isinstance(signals, pd.DataFrame):
+            intraday = len(bars.index.normalize().unique()) < len(bars)
+            return bracket_positions(close, signals["signal"].to_numpy(), signals["target"].to_numpy(),
+                                     signals["stop"].to_numpy(),
+                                     _last_bar_of_session(bars.index) if intraday else None)
+        if self.mode == "long_only":
+            signals = np.where(signals < 0, 0.0, np.where(signals > 0, 1.0, np.nan))
+        else:
+            signals = np.where(signals != 0, signals.astype("float64"), np.nan)
+        # Each signal holds until the next one
+        return pd.Series(signals).ffill().fillna(0.0).to_numpy()
+
+    def run(self, bars: Optional[pd.DataFrame] = None) -> BacktestResult:
+        bars = load_bars() if bars is None else bars
+        result = simulate(bars, self.positions(bars), self.quantity, self.slippage_bps, self.brokerage_perc,
+                          self.fill_on, self.initial_capital)
+        logger.info(f"Backtest {self.strategy.name}: {result}")
+        return result
+
+
+def run_backtest(strategy: BaseStrategy, bars: Optional[pd.DataFrame] = None, **kwargs) -> BacktestResult:
+    """Shortcut for ``VectorizedBacktester(strategy, **kwargs).run(bars)``."""
+    return VectorizedBacktester(strategy, **kwargs).run(bars)
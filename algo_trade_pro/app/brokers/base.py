@@ -64,6 +64,24 @@ class BrokerBase(ABC):
         """
         pass
 
+    def subscribe(self, tokens) -> list:
+        """
+        Optionally implement: start streaming market data for instrument tokens.
+
+        Returns:
+            list: Tokens newly subscribed
+        """
+        return []
+
+    def unsubscribe(self, tokens) -> list:
+        """
+        Optionally implement: stop streaming market data for instrument tokens.
+
+        Returns:
+            list: Tokens removed from the subscription
+        """
+        return []
+
     def cancel_order(self, order_id: str) -> Dict:
         """
         Optionally implement: Attempt to cancel a live order.
@@ -4,6 +4,7 @@ from datetime import datetime
 from typing import Dict, Optional, Any
 from app.brokers.base import BrokerBase
 from app.services.logger import get_logger
+from app.services.clock import get_clock
 
 logger = get_logger(__name__)
 
@@ -65,8 +66,8 @@ class CustomBroker(BrokerBase):
                 "filled_price": filled_price,
                 "order_type": order_type.upper(),
                 "status": status,
-                "timestamp": datetime.utcnow(),
-                "filled_timestamp": datetime.utcnow() if filled else None
+                "timestamp": get_clock().utcnow(),
+                "filled_timestamp": get_clock().utcnow() if filled else None
             }
 
             logger.info(f"[CustomBroker] Order {status}: {order_id} → {side} {quantity} {symbol} @ {filled_price or price:.2f}")
@@ -98,7 +99,7 @@ class CustomBroker(BrokerBase):
                 "volume": random.randint(10000, 500000),
                 "bid": round(ltp * 0.999, 2),
                 "ask": round(ltp * 1.001, 2),
-                "timestamp": datetime.utcnow()
+                "timestamp": get_clock().utcnow()
             }
 
         except Exception as e:
@@ -8,13 +8,19 @@ Implements BrokerBase interface for execution, quotes, and order status.
 from typing import Optional, Dict, Any
 from app.brokers.base import BrokerBase
 from app.services.logger import get_logger
-from app.services.kite import get_kite_client, get_ws_client
+from app.services.kite import get_kite_client, get_ws_pool
+from app.services.instrument_cache import InstrumentCache, get_instrument_cache
+from app.services.trading_calendar import get_trading_calendar
+from app.config.settings import get_settings
+from app.models.tick import Tick
 import yfinance as yf
 from datetime import datetime
 import pandas as pd
 from typing import List, Dict, Any
 
 import random
+import threading
+import time
 
 try:
     from kiteconnect import KiteConnect
@@ -23,6 +29,7 @@ except ImportError:
 
 logger = get_logger(__name__)
 logger.info("Logging initialized.")
+settings = get_settings()
 
 class ZerodhaBroker(BrokerBase):
     """Zerodha Kite broker implementation"""
@@ -36,14 +43,22 @@ class ZerodhaBroker(BrokerBase):
     #     super().__init__(api_key, api_secret, access_token)
     #     self.kite = self.get_kite_client()
 
-    def __init__(self, kite_client: KiteConnect = None):
+    def __init__(self, kite_client: KiteConnect = None, ws_client_factory=None,
+                 instrument_cache: Optional[InstrumentCache] = None):
         super().__init__(None, None, None)
-        self.kite = get_kite_client()
+        self.kite = kite_client or get_kite_client()
+        # Builds the ticker for create_ws_client (sharded KiteTicker pool by default, ReplayTicker for load tests)
+        self.ws_client_factory = ws_client_factory or get_ws_pool
         self.kws = None
-        self.instruments_df = pd.DataFrame()
-        self.token_map = {}
-        self.symbol_map = {}
-        self._load_instruments()
+        # instrument_token -> symbol for every subscribed instrument; replaced, never mutated,
+        # so the websocket callback can route without a lock
+        self._routes: Dict[int, str] = {}
+        self._subscription_lock = threading.Lock()
+        # Instrument master, loaded on first lookup. An injected client (replay, tests) gets a
+        # private in-memory cache so its instruments never land in the shared file.
+        if instrument_cache is None:
+            instrument_cache = get_instrument_cache() if kite_client is None else InstrumentCache(kite_client=self.kite)
+        self.instruments = instrument_cache
 
     def _connect(self):
         """Create Kite client and set session"""
@@ -218,52 +233,73 @@ class ZerodhaBroker(BrokerBase):
             logger.error(f"[Zerodha] Failed to fetch pending orders: {e}")
             return []
 
-    def _load_instruments(self):
-        try:
-            instruments = self.kite.instruments("NSE")
-            logger.info("Instruments loaded")
-            df = pd.DataFrame(instruments)
-            self.instruments_df = df
-            self.token_map = dict(zip(df.tradingsymbol.str.upper(), df.instrument_token))
-            self.symbol_map = {v: k for k, v in self.token_map.items()}
-        except Exception as e:
-            logger.error(f"Failed loading instruments: {e}")
+    @property
+    def token_map(self) -> Dict[str, int]:
+        return self.instruments.token_map()
 
-    
     def get_instrument_token(self, symbol: str) -> int:
-        return self.token_map.get(symbol.upper())
+        return self.instruments.token(symbol)
 
     def resolve_symbol(self, token: int) -> str:
-        return self.symbol_map.get(token, str(token))
+        return self.instruments.symbol(token) or str(token)
+
+    def get_next_expiry(self, symbol: str, on=None):
+        """Next listed expiry; the scheduled one from the trading calendar if the master has none."""
+        on = on or datetime.now().date()
+        return self.instruments.next_expiry(symbol, on) or get_trading_calendar().next_expiry(symbol, on)
+
+    @property
+    def subscribe_tokens(self) -> List[int]:
+        return list(self._routes)
+
+    def subscribe(self, tokens: List[int]) -> List[int]:
+        """Stream additional instruments; takes effect on the live socket immediately."""
+        with self._subscription_lock:
+            new = [t for t in dict.fromkeys(tokens) if t is not None and t not in self._routes]
+            if not new:
+                return []
+            self._routes = {**self._routes, **{t: self.resolve_symbol(t) for t in new}}
+        if self.kws is not None and self.kws.is_connected():
+            self.kws.subscribe(new)
+            self.kws.set_mode(self.kws.MODE_FULL, new)
+        logger.info(f"[Zerodha] Subscribed {len(new)} instruments ({len(self._routes)} total)")
+        return new
+
+    def unsubscribe(self, tokens: List[int]) -> List[int]:
+        """Stop streaming instruments; ticks already in flight for them are dropped by routing."""
+        with self._subscription_lock:
+            removed = [t for t in dict.fromkeys(tokens) if t in self._routes]
+            if not removed:
+                return []
+            routes = dict(self._routes)
+            for token in removed:
+                del routes[token]
+            self._routes = routes
+        if self.kws is not None and self.kws.is_connected():
+            self.kws.unsubscribe(removed)
+        logger.info(f"[Zerodha] Unsubscribed {len(removed)} instruments ({len(self._routes)} total)")
+        return removed
 
     def create_ws_client(self, out_queue):
-        from app.services.kite import get_ws_client
-        nifty_token = self.get_instrument_token("NIFTY 50")
-        self.subscribe_tokens = [nifty_token]
+        default_symbols = [s.strip() for s in settings.DEFAULT_SUBSCRIPTIONS.split(",") if s.strip()]
+        self.subscribe([self.get_instrument_token(s) for s in default_symbols])
+
         def on_ticks(ws, ticks):
+            routes = self._routes
+            received_at = time.perf_counter()  # one ingestion stamp per websocket message
             for tick in ticks:
-                if tick["instrument_token"] == nifty_token:
-                    sym = self.resolve_symbol(tick["instrument_token"])
-                    #logger.info("Inside ticks")
-                    market_data = {
-                        "symbol": sym,
-                        "timestamp": tick.get("timestamp", datetime.now()),
-                        "open": tick.get("ohlc", {}).get("open", tick["last_price"]),
-                        "high": tick.get("ohlc", {}).get("high", tick["last_price"]),
-                        "low": tick.get("ohlc", {}).get("low", tick["last_price"]),
-                        "close": tick["last_price"],
-                        "volume": tick.get("volume", 0),
-                    }
-                    #logger.info(f"Market Data for {sym} is fetched. Market data: {market_data}")
-                    out_queue.put(market_data)
+                sym = routes.get(tick["instrument_token"])
+                if sym is not None:
+                    out_queue.put(Tick.from_kite(sym, tick, received_at))
 
         def on_connect(ws, resp):
             logger.info("Zerodha WS connected, subscribing...")
-            ws.subscribe(list(self.subscribe_tokens))
-            ws.set_mode(ws.MODE_FULL, list(self.subscribe_tokens))
+            tokens = self.subscribe_tokens
+            ws.subscribe(tokens)
+            ws.set_mode(ws.MODE_FULL, tokens)
 
         def on_close(ws, code, reason):
             logger.warning(f"Zerodha WS closed: {reason}")
 
-        self.kws = get_ws_client(on_ticks=on_ticks, on_connect=on_connect, on_close=on_close)
+        self.kws = self.ws_client_factory(on_ticks=on_ticks, on_connect=on_connect, on_close=on_close)
         return self.kws
\ No newline at end of file
@@ -32,6 +32,9 @@ class Settings(BaseSettings):
     ZERODHA_PWD: Optional[str] = None
     ZERODHA_TOTP: Optional[str] = None
     chromedriver_path: Optional[str] = "C:/Chromedriver/chromedriver.exe"
+    KITE_MAX_INSTRUMENTS_PER_CONNECTION: int = 3000  # Kite websocket limit per connection
+    KITE_MAX_CONNECTIONS: int = 3  # websocket connections allowed per API key
+    DEFAULT_SUBSCRIPTIONS: str = "NIFTY 50"  # always streamed, in addition to DataCollector symbols
     
     # Trading settings
     DEFAULT_STOP_LOSS_PERCENTAGE: float = 2.0
@@ -48,11 +51,82 @@ class Settings(BaseSettings):
     # Logging settings
     LOG_LEVEL: str = "INFO"
     LOG_FILE: str = "logs/algo_trade.log"
+    LOG_FILE_FORMAT: str = "json"  # "json" (one object per line) or "text"
+    LOG_QUEUE_MAXSIZE: int = 10000  # records buffered for the writer thread; overflow is dropped and counted
     
     # Threading settings
     DATA_COLLECTION_INTERVAL: float = 1.0
-    STRATEGY_EXECUTION_INTERVAL: float = 5.0
+    STRATEGY_EXECUTION_INTERVAL: float = 1.0  # max wait for market data before checking bar closes
+    STRATEGY_ERROR_BACKOFF_SECONDS: float = 1.0  # first wait after an engine loop error, doubled per repeat
+    STRATEGY_ERROR_BACKOFF_MAX_SECONDS: float = 300.0
     RISK_MANAGEMENT_INTERVAL: float = 0.5
+
+    # Tick persistence settings
+    TICK_DB_PATH: str = "ticks.db"
+    TICK_FLUSH_INTERVAL: float = 0.5  # seconds between group commits
+    TICK_FLUSH_BATCH_SIZE: int = 1000  # max ticks per group commit
+    TICK_JOURNAL_ENABLED: bool = True  # also append ticks to the binary per-day journal
+    TICK_JOURNAL_DIR: str = "tick_journal"
+    TICK_JOURNAL_INDEX_SECONDS: float = 30.0  # max age of unwritten per-day index changes (also written on flush)
+
+    # Instrument master cache
+    INSTRUMENT_CACHE_PATH: str = "instruments.npz"  # columnar dump, refreshed once per day
+    INSTRUMENT_EXCHANGES: str = "NSE,NFO"
+    INSTRUMENT_REFRESH_TIME: str = "08:30"
+    INSTRUMENT_RETRY_SECONDS: float = 30.0  # retry after a failed first download with no dump (doubles each time)
+    INSTRUMENT_RETRY_MAX_SECONDS: float = 600.0
+
+    # Trading calendar
+    MARKET_OPEN_TIME: str = "09:15"
+    MARKET_CLOSE_TIME: str = "15:30"
+    TRADING_HOLIDAYS_EXTRA: str = ""  # comma separated YYYY-MM-DD closures not in the built-in NSE table
+
+    # Session index settings (previous-day OHLC and CPR levels)
+    SESSION_OHLC_CSV: str = "nifty_zerodha_2014-01-01_to_2025-08-20.csv"  # daily history for session levels
+    SESSION_OHLC_CSV_SYMBOL: str = "NIFTY 50"
+    SESSION_MAX_MISSING_DAYS: int = 3  # trading days a symbol's last session may lag the day before levels are refused
+
+    # Strategy engine settings
+    SYMBOL_BUFFER_CAPACITY: int = 20000  # ticks kept per symbol in the ring buffer
+    BAR_TIMEFRAMES: str = "1min,5min,15min,1D"  # bars built incrementally from ticks
+    BAR_HISTORY_SIZE: int = 2000  # completed bars kept per symbol and timeframe
+    BAR_CLOSE_ON_CLOCK: bool = True  # close bars on the wall clock, not only on the next tick
+    BAR_CLOSE_GRACE_SECONDS: float = 1.0  # wait this long past a bar boundary for late ticks
+    STRATEGY_WORKERS: int = 0  # strategy worker processes; 0 runs every strategy in the engine thread
+    STRATEGY_WORKER_PLACEMENT: str = ""  # e.g. "CPR_Meta_ML=0,MA_CrossOver=main"; others round-robin
+    STRATEGY_TICK_BUS_CAPACITY: int = 65536  # ticks held in the shared-memory ring read by workers
+    BACKTEST_SLIPPAGE_BPS: float = 2.0  # adverse slippage per fill in the vectorized backtester
+    BACKTEST_INITIAL_CAPITAL: float = 100000.0  # starting equity for backtest returns and drawdown %
+    OPTIMIZER_WORKERS: int = 0  # parameter sweep processes; 0 = one per CPU
+    OPTIMIZER_CACHE_PATH: str = "optimizer_results.db"  # backtest results keyed by (strategy, params, data hash)
+    INDICATOR_CACHE_SIZE: int = 4096  # (symbol, timeframe, indicator, params) entries shared by strategies; LRU beyond
+    ML_INFERENCE_BUDGET_MS: float = 50.0  # max wait for the CPR meta ensemble per bar; 0 waits indefinitely
+    ML_INFERENCE_FALLBACK_ACCEPT: bool = False  # decision for candidates not scored within the budget
+    ML_MODEL_MMAP: bool = True  # load model arrays with joblib mmap_mode="r" where the dump allows it
+    ML_MODEL_REGISTRY_DIR: str = "app/models/registry"  # versioned model sets (one directory per version)
+    ML_MODEL_REGISTRY_KEEP: int = 10  # versions kept per model set; older ones are deleted (0 keeps all)
+    ML_MODEL_POLL_SECONDS: float = 30.0  # how often live services check the registry for a new active version
+    FEATURE_STORE_FLUSH_ROWS: int = 256  # buffered feature rows written as soon as a dataset has this many
+    FEATURE_STORE_FLUSH_SECONDS: float = 30.0  # max age of buffered feature rows before the background flush
+    FEATURE_STORE_MAX_FLUSH_ATTEMPTS: int = 3  # failed flushes before rows that cannot be written go to _rejects/
+    FEATURE_STORE_FEATURE_DTYPE: str = "float64"  # feature column type for new datasets ("float32" halves size)
+    ML_LABELING_TIME: str = "18:00"  # nightly triple-barrier labelling of stored CPR signals (before retraining)
+    ML_LABEL_MAX_HOLDING_MINUTES: int = 60  # vertical barrier after entry (also capped at MARKET_CLOSE_TIME)
+    ML_LABEL_ENTRY_LAG_MINUTES: int = 0  # minutes from signal dt (the bar close, bars are right-labelled) to entry
+    ML_TRAINING_TIME: str = "18:30"  # nightly CPR meta-label retraining (after the close)
+    ML_TRAINING_WORKERS: int = 4  # processes fitting the base models (capped at the CPU count); 1 fits them in-thread
+    ML_TRAINING_CACHE_DIR: str = "feature_store/training_cache"  # fold splits, training arrays and the last report
+    ML_TRAINING_MIN_SAMPLES: int = 300  # labelled signals required before (re)training
+    ML_TRAINING_MAX_BOOST_ROUNDS: int = 600  # XGB warm starts stop (full refit) once the booster would exceed this
+    ML_TRAINING_MAX_WARM_REFITS: int = 7  # consecutive warm refits of a model before it is refitted from scratch
+    ML_TRAINING_FULL_REFIT_CHANGE: float = 0.25  # relative change in samples since the last version forcing a full refit
+
+    # Market data queue settings (policies: block, drop_newest, drop_oldest, conflate_latest, conflate_ohlcv)
+    WEBSOCKET_QUEUE_MAXSIZE: int = 100000  # raw ticks waiting for DataCollector
+    WEBSOCKET_QUEUE_POLICY: str = "drop_oldest"  # never stall the websocket callback thread
+    MARKET_DATA_QUEUE_MAXSIZE: int = 10000  # ticks waiting for StrategyEngine
+    MARKET_DATA_QUEUE_POLICY: str = "block"  # every tick reaches the engine; "conflate_ohlcv" is opt-in
+    QUEUE_CONFLATE_WINDOW_SECONDS: int = 60  # never conflate across this boundary (keeps bars exact)
     
     
     # Report settings
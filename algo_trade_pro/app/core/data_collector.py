@@ -1,15 +1,18 @@
 import threading
-from typing import Dict, Any, List
+from collections import deque
+from queue import Empty
+from typing import Dict, Any, List, Optional
 from datetime import datetime
 import pandas as pd
-import sqlite3
 
 from app.queue.signal_queue import market_data_queue, websocket_queue
 from app.services.logger import get_logger
 from app.config.settings import get_settings
 from app.brokers.base import BrokerBase
+from app.models.tick import Tick
 
 from app.services.websocket_collector import WebsocketCollector
+from app.services.tick_writer import TickWriter
 
 logger = get_logger(__name__)
 settings = get_settings()
@@ -18,7 +21,7 @@ settings = get_settings()
 class DataCollector:
     """Collects market data using websocket and feeds it to strategy engine."""
 
-    def __init__(self, broker: BrokerBase):
+    def __init__(self, broker: BrokerBase, tick_writer: Optional[TickWriter] = None):
         self.broker = broker
         self.is_running = False
         self.symbols = set()
@@ -29,52 +32,33 @@ class DataCollector:
         self.subscribe_tokens = set()
 
         self.ws_collector = None
-        # ---- NEW: SQLite DB connection ----
-        self.conn = sqlite3.connect('ticks.db', check_same_thread=False)
-        self.cursor = self.conn.cursor()
-        self.cursor.execute("""
-            CREATE TABLE IF NOT EXISTS ticks (
-                symbol TEXT,
-                timestamp TEXT,
-                open REAL,
-                high REAL,
-                low REAL,
-                close REAL,
-                volume REAL
-            )
-        """)
-        self.conn.commit()
-        # -----------------------------------
-    
-    def write_tick_to_db(self, tick: dict):
-        """Store single tick into the database."""
-        self.cursor.execute(
-            "INSERT INTO ticks (symbol, timestamp, open, high, low, close, volume) VALUES (?, ?, ?, ?, ?, ?, ?)",
-            (
-                tick.get("symbol"),
-                str(tick.get("timestamp")),
-                tick.get("open"),
-                tick.get("high"),
-                tick.get("low"),
-                tick.get("close"),
-                tick.get("volume", 0)
-            )
-        )
-        self.conn.commit()
+        self.ws_client = None
+        # Tick persistence runs on its own thread so forwarding never waits on disk. The default
+        # writer opens TICK_DB_PATH and TICK_JOURNAL_DIR; replays pass one on their own files
+        self.tick_writer = tick_writer or TickWriter()
+
+    def write_tick_to_db(self, tick: Tick):
+        """Queue a tick for the background writer (group-committed to ticks.db)."""
+        self.tick_writer.submit(tick)
 
 
     def add_symbols(self, symbols):
+        new_tokens = []
         with self._lock:
             for sym in symbols:
                 self.symbols.add(sym.upper())
                 token = self.broker.get_instrument_token(sym)
-                if token:
+                if token and token not in self.subscribe_tokens:
                     self.subscribe_tokens.add(token)
+                    self.token_map[token] = sym.upper()
+                    new_tokens.append(token)
+        # Picked up by the live socket if it is already connected
+        if new_tokens:
+            self.broker.subscribe(new_tokens)
         logger.info(f"Added symbols: {symbols}")
-        if hasattr(self.broker, "subscribe_tokens"):
-            self.broker.subscribe_tokens = self.subscribe_tokens
-            
+
     def remove_symbols(self, symbols):
+        removed_tokens = []
         with self._lock:
             for symbol in symbols:
                 sym = symbol.upper()
@@ -83,6 +67,9 @@ class DataCollector:
                 if token and token in self.subscribe_tokens:
                     self.subscribe_tokens.discard(token)
                     self.token_map.pop(token, None)
+                    removed_tokens.append(token)
+        if removed_tokens:
+            self.broker.unsubscribe(removed_tokens)
         logger.info(f"Removed symbols from data collection: {symbols}")
 
     def run(self):
@@ -93,6 +80,7 @@ class DataCollector:
 
         self.is_running = True
         logger.info("Starting DataCollector with websocket...")
+        self.tick_writer.start()
         
         # Create an output queue where websocket events are put
         self.out_queue = websocket_queue
@@ -107,24 +95,24 @@ class DataCollector:
                 #logger.info("Inside Try")
                 tick = self.out_queue.get(timeout=1)  # Wait for new ticks
 
-                symbol = tick["symbol"]
-                self.write_tick_to_db(tick) #Add to database
+                symbol = tick.symbol
+                self.write_tick_to_db(tick) # Handed to TickWriter, never blocks
                 #logger.info(f"tick data: {tick}")
                 with self._lock:
                     #logger.info("Inside lock")
-                    if symbol not in self.data_cache:
-                        self.data_cache[symbol] = []
-                    self.data_cache[symbol].append(tick)
-                    #logger.info("Halfway through lock")
-                    if len(self.data_cache[symbol]) > 200:
-                        self.data_cache[symbol] = self.data_cache[symbol][-200:]
+                    cache = self.data_cache.get(symbol)
+                    if cache is None:
+                        cache = self.data_cache[symbol] = deque(maxlen=200)
+                    cache.append(tick)
 
                 market_data_queue.put(tick)
-                logger.debug(f"DataCollector pushed tick for {symbol} at {tick['timestamp']}")
+                logger.debug("DataCollector pushed tick for %s at %s", symbol, tick.ts, extra={"sample": 1000})
 
+            except Empty:
+                # No tick within the timeout (market closed or feed idle)
+                continue
             except Exception as e:
-                # Timeout or other exception can be ignored/logged
-                logger.error(f"Inside Exception: websocket not available: {e}")
+                logger.error("DataCollector failed to route tick: %s", e, extra={"rate_limit": 5})
                 continue
 
     def stop(self):
@@ -132,6 +120,7 @@ class DataCollector:
         if self.ws_client:
             try: self.ws_client.close()
             except: pass
+        self.tick_writer.stop()
         logger.info("DataCollector stopping and websocket closed")
 
     def get_historical_data(self, symbol: str, periods: int = 100) -> pd.DataFrame:
@@ -139,10 +128,10 @@ class DataCollector:
         with self._lock:
             if symbol not in self.data_cache:
                 return pd.DataFrame()
-            data = self.data_cache[symbol][-periods:]
+            data = list(self.data_cache[symbol])[-periods:]
             if not data:
                 return pd.DataFrame()
-            df = pd.DataFrame(data)
+            df = pd.DataFrame([tick.to_dict() for tick in data])
             df['timestamp'] = pd.to_datetime(df['timestamp'])
             df = df.set_index('timestamp')
             return df
@@ -151,7 +140,7 @@ class DataCollector:
         with self._lock:
             if symbol not in self.data_cache or not self.data_cache[symbol]:
                 return 0.0
-            return self.data_cache[symbol][-1]['close']
+            return self.data_cache[symbol][-1].close
 
     def is_running(self) -> bool:
         return self.is_running
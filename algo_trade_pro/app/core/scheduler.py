@@ -5,6 +5,9 @@ from datetime import datetime
 
 from app.services.logger import get_logger
 from app.services.reporters import generate_daily_excel_report
+from app.services.instrument_cache import get_instrument_cache
+from app.services.labeler import run_nightly_labeling
+from app.services.training import run_nightly_training
 from app.config.settings import get_settings
 
 logger = get_logger(__name__)
@@ -27,10 +30,22 @@ class TaskScheduler:
         # Daily report generation
         schedule.every().day.at(settings.DAILY_REPORT_TIME).do(self.run_daily_report)
 
+        # Instrument master (NSE + NFO) refresh before the open
+        schedule.every().day.at(settings.INSTRUMENT_REFRESH_TIME).do(self.refresh_instruments)
+
+        # Stored CPR signals labelled from the day's prices, ahead of retraining
+        schedule.every().day.at(settings.ML_LABELING_TIME).do(self.run_signal_labeling)
+
+        # CPR meta-label models retrained after the close, off the scheduler thread
+        schedule.every().day.at(settings.ML_TRAINING_TIME).do(self.run_model_training)
+
         # Add more jobs here as needed
         # schedule.every(1).hours.do(self.clean_temp_files)
 
         logger.info(f"Scheduled task: daily report at {settings.DAILY_REPORT_TIME}")
+        logger.info(f"Scheduled task: instrument refresh at {settings.INSTRUMENT_REFRESH_TIME}")
+        logger.info(f"Scheduled task: signal labelling at {settings.ML_LABELING_TIME}")
+        logger.info(f"Scheduled task: meta-label model training at {settings.ML_TRAINING_TIME}")
 
     def run(self):
         """Scheduler loop to run in a background thread"""
@@ -73,6 +88,42 @@ class TaskScheduler:
         except Exception as e:
             logger.error(f"Failed to generate daily report: {e}")
 
+    def refresh_instruments(self):
+        """Triggered daily to download the day's instrument master"""
+        logger.info("Refreshing instrument master...")
+        try:
+            cache = get_instrument_cache()
+            cache.refresh()
+            logger.info(f"Instrument master refreshed: {len(cache)} instruments.")
+        except Exception as e:
+            logger.error(f"Failed to refresh instruments: {e}")
+
+    def run_signal_labeling(self):
+        """Triggered nightly to label stored CPR signals (triple barrier) in a background thread"""
+        threading.Thread(target=self._label_signals, name="SignalLabeling", daemon=True).start()
+
+    def _label_signals(self):
+        logger.info("Running signal labelling job...")
+        try:
+            report = run_nightly_labeling()
+            if report is not None:
+                logger.info(f"Signals labelled: {report.get('labelled', 0)}/{report.get('pending', 0)}")
+        except Exception as e:
+            logger.error(f"Failed to label signals: {e}")
+
+    def run_model_training(self):
+        """Triggered nightly to retrain the CPR meta-label ensemble in a background thread"""
+        threading.Thread(target=self._train_models, name="ModelTraining", daemon=True).start()
+
+    def _train_models(self):
+        logger.info("Running meta-label model training job...")
+        try:
+            report = run_nightly_training()
+            if report and report.get("trained"):
+                logger.info(f"Meta-label models retrained: {report['timings']}")
+        except Exception as e:
+            logger.error(f"Failed to train meta-label models: {e}")
+
     def clean_temp_files(self):
         """(Optional) Clean temporary files (example stub)"""
         logger.info("Running temporary file cleaner...")
@@ -6,6 +6,7 @@ from datetime import datetime
 from app.models.database import get_db_session
 from app.models.trade import Trade, TradeStatus
 from app.services.logger import get_logger
+from app.services.clock import get_clock
 from app.brokers.base import BrokerBase
 
 logger = get_logger(__name__)
@@ -109,14 +110,14 @@ class SLTargetMonitor:
                     db_trade = db.query(Trade).filter(Trade.id == trade.id).first()
                     if db_trade:
                         db_trade.status = TradeStatus.EXITED
-                        db_trade.exit_timestamp = datetime.utcnow()
+                        db_trade.exit_timestamp = get_clock().utcnow()
                         db_trade.pending_sl_target = trigger_price
                         db_trade.parent_trade_id=trade.id
                         db.commit()
                     parent_trade = db.query(Trade).filter(Trade.id == trade.id).first()
                     if parent_trade:
                         parent_trade.status = TradeStatus.EXITED
-                        parent_trade.exit_timestamp = datetime.utcnow()
+                        parent_trade.exit_timestamp = get_clock().utcnow()
                         parent_trade.pending_sl_target = trigger_price
                     
                     db.commit()
@@ -1,127 +1,148 @@
 import time
 import threading
-from typing import Dict, List, Optional
+from queue import Empty
+from typing import Callable, Dict, List, Optional
 from datetime import datetime, timedelta
 import pandas as pd
 
-from app.queue.signal_queue import market_data_queue
+from app.queue.signal_queue import market_data_queue, record_signal
 from app.queue.trade_queue import trade_signal_queue
 from app.strategies.base import BaseStrategy
-from app.strategies.moving_average import MovingAverageStrategy
-from app.strategies.rsi_strategy import RSIStrategy
-from app.strategies.bollinger_bands import BollingerBandsStrategy
-from app.strategies.cpr_startegy import CPRMetaMLStrategy
 from app.services.logger import get_logger
 from app.config.settings import get_settings
-from app.strategies.registry import STRATEGY_REGISTRY
-from app.services.utils import getTimeOfDay
+from app.strategies.registry import STRATEGY_REGISTRY, DEFAULT_STRATEGY_SPECS, StrategySpec
+from app.services.ring_buffer import OHLCVRingBuffer
+from app.services.bar_builder import BarBuilder, TIMEFRAMES
+from app.services.session_index import on_daily_bar
+from app.services.trading_calendar import get_trading_calendar
+from app.services.clock import get_clock
+from app.models.tick import Bar, Tick, as_tick
+from app.indicators.cache import IndicatorCache
+from app.core.strategy_workers import RemoteStrategy, StrategyWorkerPool, parse_placement
 
 
 logger = get_logger(__name__)
 settings = get_settings()
 
-def resample(df: pd.DataFrame):
-    """
-    Resample tick/second data to 5-min OHLCV bars.
-    Assumes df index is pd.DatetimeIndex.
-    """
-    if df.empty:
-        return df
-    # df = pd.read_csv(r'C:\Users\SCGBS\Downloads\Data\Data\merged\niftyinfo.csv')
-    # df["datetime"] = pd.to_datetime(df["date"] + " " + df["time"],
-    #                                 dayfirst=True, errors="coerce")
-    # df.set_index("datetime", inplace=True)
-    # df.sort_index(inplace=True)
-    # logger.info(f"print(type(df.index): {type(df.index)}")
-    # logger.info(f"print(df.index.dtype): {df.index.dtype}")
-    # logger.info(f"print(df.index[:5]): {df.index[:5]}")
-    # logger.info(f"The dataframe is as this: {df}")
-    ohlcv = df.resample("5min", label = "right", closed = "right").agg({
-        "open": "first",
-        "high": "max",
-        "low": "min",
-        "close": "last",
-        "volume": "sum"
-    })
-    
-    return ohlcv.dropna()
-
 class StrategyEngine:
     """Thread for executing trading strategies"""
     
-    def __init__(self):
+    def __init__(self, strategies: Optional[List[BaseStrategy]] = None,
+                 signal_sink: Optional[Callable[[Dict], None]] = None):
         self.running = False
         self.active_strategies: List[BaseStrategy] = []
-        self.symbol_data: Dict[str, pd.DataFrame] = {}
+        # Where generated signals go (trade_signal_queue, or the result channel inside a worker)
+        self.signal_sink = signal_sink or trade_signal_queue.put
+        self.worker_pool: Optional[StrategyWorkerPool] = None
+        # Indicators shared by the in-process strategies (one update per new row per series)
+        self.indicator_cache = IndicatorCache(maxsize=settings.INDICATOR_CACHE_SIZE)
+        self.symbol_data: Dict[str, OHLCVRingBuffer] = {}
+        self.bar_builder = BarBuilder(settings.BAR_TIMEFRAMES.split(","))
+        # Roll the session index (previous-day OHLC, CPR levels) over when a daily bar closes
+        self.bar_builder.add_listener(on_daily_bar)
         self._lock = threading.Lock()
+        # Dispatch state: symbols with new ticks (-> receive time) and bars closed by the last tick
+        self._dirty_symbols: Dict[str, float] = {}
+        self._pending_bars: List = []
+        self._last_bar_label: Dict = {}
+        # Off when replaying historical ticks whose timestamps are behind the wall clock
+        self.close_bars_on_clock = settings.BAR_CLOSE_ON_CLOCK
+        self.stats = {
+            "ticks_processed": 0,
+            "tick_dispatches": 0,
+            "bar_dispatches": 0,
+            "missed_bars": 0,
+            "signals": 0,
+            "latency_last_ms": 0.0,
+            "latency_max_ms": 0.0,
+            "latency_total_ms": 0.0,
+        }
         
-        # Initialize default strategies
-        self._initialize_strategies()
+        if strategies is None:
+            # Initialize default strategies
+            self._initialize_strategies()
+        else:
+            self.active_strategies = list(strategies)
+            for strategy in self.active_strategies:
+                self._share_indicator_cache(strategy)
 
     
-    def _initialize_strategies(self):
-        """Initialize default trading strategies"""
+    def _initialize_strategies(self, specs: Optional[List[StrategySpec]] = None):
+        """Initialize default trading strategies (in-process, or sharded over worker processes)"""
+        specs = DEFAULT_STRATEGY_SPECS if specs is None else specs
         try:
-            # Moving Average Strategy
-            ma_strategy = MovingAverageStrategy(
-                name="MA_CrossOver",
-                short_window=5,
-                long_window=20,
-                symbols=['RELIANCE', 'TCS']
-            )
-            STRATEGY_REGISTRY[ma_strategy.name] = ma_strategy
+            if settings.STRATEGY_WORKERS > 0:
+                self.worker_pool = StrategyWorkerPool(
+                    specs,
+                    workers=settings.STRATEGY_WORKERS,
+                    placement=parse_placement(settings.STRATEGY_WORKER_PLACEMENT),
+                    signal_sink=self._forward_worker_signal,
+                )
+                local_specs = self.worker_pool.local_specs
+            else:
+                local_specs = specs
 
-            # RSI Strategy
-            rsi_strategy = RSIStrategy(
-                name="RSI_MeanReversion",
-                rsi_period=14,
-                oversold_threshold=30,
-                overbought_threshold=70,
-                symbols=['HDFCBANK', 'INFY']
-            )
-            STRATEGY_REGISTRY[rsi_strategy.name] = rsi_strategy
+            strategies = {spec.name: spec.build() for spec in local_specs}
+            if self.worker_pool is not None:
+                strategies.update(self.worker_pool.remote_strategies)
 
-            # Bollinger Bands Strategy
-            bb_strategy = BollingerBandsStrategy(
-                name="BB_Breakout",
-                period=20,
-                std_dev=2,
-                symbols=['ICICIBANK']
-            )
-            STRATEGY_REGISTRY[bb_strategy.name] = bb_strategy
-
-             # CPR META ML Strategy
-            cpr_strategy = CPRMetaMLStrategy(
-                name = "CPR_Meta_ML"
-            )
-            STRATEGY_REGISTRY[cpr_strategy.name] = cpr_strategy
-    
-            # Assign all to active strategies
-            self.active_strategies = [ma_strategy, rsi_strategy, bb_strategy, cpr_strategy]
+            # Keep the configured order; remote strategies are proxies for the worker copies
+            self.active_strategies = [strategies[spec.name] for spec in specs if spec.name in strategies]
+            for strategy in self.active_strategies:
+                STRATEGY_REGISTRY[strategy.name] = strategy
+                self._share_indicator_cache(strategy)
             logger.info(f"Initialized {len(self.active_strategies)} strategies")
+            if self.worker_pool is not None:
+                logger.info(
+                    f"Strategy workers: {settings.STRATEGY_WORKERS}, in-process: "
+                    f"{[spec.name for spec in local_specs]}"
+                )
 
         except Exception as e:
             logger.error(f"Failed to initialize strategies: {e}")
             self.active_strategies = []
     
+    def _share_indicator_cache(self, strategy: BaseStrategy):
+        if not isinstance(strategy, RemoteStrategy):
+            strategy.indicator_cache = self.indicator_cache
+
     def run(self):
-        """Main strategy execution loop"""
+        """
+        Main strategy execution loop.
+
+        Event driven: the loop blocks on market_data_queue, folds every tick into the
+        symbol buffers and bar builder, then dispatches tick strategies for symbols that
+        received data and bar strategies once per completed bar.
+
+        Tick strategies run once per drained batch, not once per tick: each run gets the
+        frames (every tick up to now) of only those of its symbols that received ticks
+        since its last run. Repeated loop errors back off exponentially from
+        STRATEGY_ERROR_BACKOFF_SECONDS up to STRATEGY_ERROR_BACKOFF_MAX_SECONDS.
+        """
         self.running = True
+        if self.worker_pool is not None:
+            self.worker_pool.start()
         logger.info("Strategy engine started")
         
+        failures = 0
         while self.running:
             try:
                 self._process_market_data()
+                if self.close_bars_on_clock:
+                    self._close_due_bars(get_clock().now())
                 self._execute_strategies()
-                time.sleep(settings.STRATEGY_EXECUTION_INTERVAL)
+                failures = 0
             except Exception as e:
-                logger.error(f"Error in strategy execution: {e}")
-                time.sleep(300)  # Wait before retrying
+                failures += 1
+                delay = min(settings.STRATEGY_ERROR_BACKOFF_SECONDS * 2 ** (failures - 1),
+                            settings.STRATEGY_ERROR_BACKOFF_MAX_SECONDS)
+                logger.error(f"Error in strategy execution (retrying in {delay:.0f}s): {e}")
+                time.sleep(delay)  # Wait before retrying
         
+        if self.worker_pool is not None:
+            self.worker_pool.stop()
         logger.info("Strategy engine stopped")
     
-    
-    
     def stop(self):
         """Stop strategy execution"""
         self.running = False
@@ -131,111 +152,181 @@ class StrategyEngine:
         """Check if strategy engine is running"""
         return self.running
     
-    def _process_market_data(self):
-        """Process incoming market data"""
+    def _process_market_data(self, timeout: Optional[float] = None):
+        """Wait for market data, then drain everything queued behind it."""
+        timeout = settings.STRATEGY_EXECUTION_INTERVAL if timeout is None else timeout
+        try:
+            data = market_data_queue.get(timeout=timeout)
+        except Empty:
+            return 0
+
         processed_count = 0
-        
-        # Process all available market data
-        while not market_data_queue.empty():
+        while True:
+            self._handle_tick(data)
+            processed_count += 1
             try:
                 data = market_data_queue.get_nowait()
-                logger.info(f"Market data: {data}")
-                self._update_symbol_data(data)
-                processed_count += 1
-            except:
+            except Empty:
                 break
-        
-        if processed_count > 0:
-            logger.debug(f"Processed {processed_count} market data points")
+
+        logger.debug("Processed %d market data points", processed_count)
+        return processed_count
+
+    def _handle_tick(self, data: Tick):
+        """Fold one tick into the engine state and dispatch the bars it closed."""
+        tick = as_tick(data)
+        received_at = tick.received_at or time.perf_counter()
+        self._update_symbol_data(tick)
+        if self.worker_pool is not None and self.worker_pool.running:
+            self.worker_pool.publish(tick)
+        self.stats["ticks_processed"] += 1
+        self._dirty_symbols[tick.symbol] = received_at
+        for symbol, timeframe, bar in self._pending_bars:
+            self._dispatch_bar(symbol, timeframe, bar, received_at)
+        self._pending_bars.clear()
     
-    def _update_symbol_data(self, data: Dict):
+    def _update_symbol_data(self, tick: Tick):
         """Update symbol data for strategy analysis"""
-        symbol = data['symbol']
-        #logger.info(f"Symbol data in strategy engine: {data}")
+        symbol = tick.symbol
         with self._lock:
-            if symbol not in self.symbol_data:
-                self.symbol_data[symbol] = pd.DataFrame()
-            
-            # Create new row
-            new_row = pd.DataFrame([data])  
-            #new_row['timestamp'] = pd.to_datetime(new_row['timestamp'])
-            new_row = new_row.set_index('timestamp')
-            
-            # Append to existing data
-            self.symbol_data[symbol] = pd.concat([self.symbol_data[symbol], new_row])
-            
-            # Keep only last 100 records
-            # if len(self.symbol_data[symbol]) > 100:
-            #     self.symbol_data[symbol] = self.symbol_data[symbol].tail(100)
-    
-   
+            buffer = self.symbol_data.get(symbol)
+            if buffer is None:
+                buffer = self.symbol_data[symbol] = OHLCVRingBuffer(settings.SYMBOL_BUFFER_CAPACITY)
+            buffer.append(tick.ts, tick.open, tick.high, tick.low, tick.close, tick.volume)
+        closed = self.bar_builder.update(
+            symbol, tick.ts, tick.open, tick.high, tick.low, tick.close, tick.volume
+        )
+        self._pending_bars.extend(closed)
+
+    def warmup_from_journal(self, journal, days, symbols: Optional[List[str]] = None) -> int:
+        """Preload symbol buffers and completed bars from the tick journal without dispatching."""
+        count = 0
+        for data in journal.iter_ticks(days, symbols):
+            self._update_symbol_data(data)
+            count += 1
+        self._pending_bars.clear()
+        logger.info(f"Strategy engine warmed up with {count} journaled ticks from {list(days)}")
+        return count
+
+    def _close_due_bars(self, now: datetime):
+        """Close bars whose interval has ended even if no later tick arrived."""
+        closed = self.bar_builder.close_due(now, grace_seconds=settings.BAR_CLOSE_GRACE_SECONDS)
+        received_at = time.perf_counter()
+        for symbol, timeframe, bar in closed:
+            self._dispatch_bar(symbol, timeframe, bar, received_at)
+
+    def _dispatch_bar(self, symbol: str, timeframe: str, bar: Bar, received_at: float):
+        """Run every bar strategy subscribed to (symbol, timeframe) exactly once for this bar."""
+        subscribers = [
+            s for s in self.active_strategies
+            if s.is_enabled() and s.timeframe == timeframe and symbol in s.get_required_symbols()
+            and not isinstance(s, RemoteStrategy)
+        ]
+        if not subscribers:
+            return
+        self._track_missed_bars(symbol, timeframe, bar.timestamp)
+        frame = None
+        for strategy in subscribers:
+            if self.bar_builder.bar_count(symbol, timeframe) < strategy.min_data_points:
+                continue
+            if frame is None:
+                frame = self.bar_builder.to_frame(symbol, timeframe)
+            self.stats["bar_dispatches"] += 1
+            self._run_strategy(strategy, {symbol: frame}, received_at)
+
+    def _track_missed_bars(self, symbol: str, timeframe: str, label: pd.Timestamp):
+        """Count session bars skipped (no ticks arrived for a whole interval)."""
+        key = (symbol, timeframe)
+        previous = self._last_bar_label.get(key)
+        self._last_bar_label[key] = label
+        if previous is None or timeframe == "1D":
+            return
+        calendar = get_trading_calendar()
+        if calendar.in_range(previous.date()) and calendar.in_range(label.date()):
+            # Precomputed session boundaries: overnight gaps and holidays are not missed bars
+            gap = calendar.bars_between(previous.value, label.value, timeframe)
+        elif previous.date() == label.date():
+            gap = (label.value - previous.value) // TIMEFRAMES[timeframe] - 1
+        else:
+            return
+        if gap > 0:
+            self.stats["missed_bars"] += gap
+            logger.warning("%d %s bar(s) missed for %s between %s and %s", gap, timeframe, symbol, previous, label,
+                           extra={"rate_limit": 5})
 
-    
     def _execute_strategies(self):
-        """Execute all active strategies"""
+        """
+        Execute tick strategies for symbols that received data since the last run; a
+        strategy's other symbols are left out of ``market_data`` for this run.
+        """
+        if not self._dirty_symbols:
+            return
+        dirty, self._dirty_symbols = self._dirty_symbols, {}
+
         for strategy in self.active_strategies:
-            try:
-                if not strategy.is_enabled():
+            if not strategy.is_enabled() or strategy.timeframe is not None or isinstance(strategy, RemoteStrategy):
+                continue
+            symbol_data = {}
+            received_at = None
+            for symbol in strategy.get_required_symbols():
+                if symbol not in dirty:
                     continue
-                
-                # Get required symbols for this strategy
-                required_symbols = strategy.get_required_symbols()
-                logger.info(f"Required Symbols: {required_symbols}")
-                # Check if we have enough data
-                symbol_data = {}
-                now = datetime.now()
-                
-                if strategy.name!="CPR_Meta_ML":
-                    for symbol in required_symbols:
-                        with self._lock:
-                            if symbol in self.symbol_data and len(self.symbol_data[symbol]) >= strategy.min_data_points:
-                                symbol_data[symbol] = self.symbol_data[symbol].copy()
-                else:
-                    if now.minute % 5 != 0 or (now.second != 0 and now.second != 1):
-                        mins_to_wait = 5 - now.minute % 5
-                        logger.info("Sleeping for %d minutes", mins_to_wait)
-                        #time.sleep(timedelta.total_seconds(getTimeOfDay(hours=int(now.hour+1 if int(now.minute+mins_to_wait)==60 else now.hour), minutes=int(0 if int(now.minute+mins_to_wait)==60 else int(now.minute+mins_to_wait)),seconds=0) - now))
-                        return  
-                      
-                    for symbol in required_symbols:
-                        with self._lock:
-                            if symbol in self.symbol_data and len(self.symbol_data[symbol]) >= strategy.min_data_points:
-                                df = self.symbol_data[symbol].copy()
-                                logger.info(f"df before calling resample: {df}")
-                                # Resample to 5-min bars
-                                logger.info("Calling for resampling")
-                                if not df.index.inferred_type == 'datetime64':
-                                    df.index = pd.to_datetime(df.index)
-                                df_5min = resample(df) #resample to 5 mins
-                                logger.info(f"Resample done. This is the 5 mins data: {df_5min}")
-                                # Pass only after market open and at least 2 bars are available
-                                if len(df_5min) >= strategy.min_data_points:
-                                    symbol_data[symbol] = df_5min
+                with self._lock:
+                    buffer = self.symbol_data.get(symbol)
+                    if buffer is not None and len(buffer) >= strategy.min_data_points:
+                        symbol_data[symbol] = buffer.to_frame(strategy.lookback)
+                        received_at = min(received_at or dirty[symbol], dirty[symbol])
+            if symbol_data:
+                self.stats["tick_dispatches"] += 1
+                self._run_strategy(strategy, symbol_data, received_at)
 
-                logger.info(f"Length of Symbol data: {len(symbol_data)}")
-                logger.info(f"Length of required symbols: {len(required_symbols)}")
-                # Execute strategy if we have enough data
-                if len(symbol_data) == len(required_symbols):
-                    signals = strategy.generate_signals(symbol_data)
-                    
-                    # Process generated signals
-                    for signal in signals:
-                        self._process_signal(signal, strategy.name)
-                #time.sleep(120)
-                
-            except Exception as e:
-                logger.error(f"Error executing strategy {strategy.name}: {e}")
+    def _run_strategy(self, strategy: BaseStrategy, symbol_data: Dict[str, pd.DataFrame], received_at: float):
+        """Call generate_signals and forward the signals, recording tick-to-signal latency."""
+        try:
+            signals = strategy.generate_signals(symbol_data) or []
+        except Exception as e:
+            logger.error("Error executing strategy %s: %s", strategy.name, e, extra={"rate_limit": 5})
+            return
+        for signal in signals:
+            self._process_signal(signal, strategy.name)
+            self._record_latency(time.perf_counter() - received_at)
+
+    def _record_latency(self, seconds: float):
+        latency_ms = seconds * 1000
+        stats = self.stats
+        stats["signals"] += 1
+        stats["latency_total_ms"] += latency_ms
+        stats["latency_last_ms"] = latency_ms
+        stats["latency_max_ms"] = max(stats["latency_max_ms"], latency_ms)
+
+    def get_dispatch_stats(self) -> Dict:
+        """Dispatch counters and tick-to-signal latency for the status endpoint."""
+        stats = dict(self.stats)
+        total = stats.pop("latency_total_ms")
+        stats["latency_avg_ms"] = round(total / stats["signals"], 3) if stats["signals"] else 0.0
+        stats["latency_last_ms"] = round(stats["latency_last_ms"], 3)
+        stats["latency_max_ms"] = round(stats["latency_max_ms"], 3)
+        stats["late_ticks"] = self.bar_builder.late_ticks
+        stats["bars_closed"] = self.bar_builder.bars_closed
+        stats["indicator_cache"] = self.indicator_cache.get_stats()
+        if self.worker_pool is not None:
+            stats["workers"] = self.worker_pool.get_stats()
+        return stats
     
     def _process_signal(self, signal: Dict, strategy_name: str):
         """Process trading signal"""
         try:
             # Add metadata to signal
             signal['strategy'] = strategy_name
-            signal['timestamp'] = datetime.now()
-            signal['signal_id'] = f"{strategy_name}_{signal['symbol']}_{int(time.time())}"
+            signal['timestamp'] = get_clock().now()
+            # Strategies that log the signal to the feature store pass that row's id along; the
+            # executor stores it on the trade (Trade.signal_id) so trades join back to the store
+            signal['signal_id'] = ((signal.get('metadata') or {}).get('signal_id')
+                                   or f"{strategy_name}_{signal['symbol']}_{int(get_clock().time())}")
             
             # Add to trade signal queue
-            trade_signal_queue.put(signal)
+            self.signal_sink(signal)
+            record_signal(signal)
             
             logger.info(f"Generated signal: {signal['action']} {signal['symbol']} Quanity is {signal['quantity']} "
                        f"at {signal['price']} (Strategy: {strategy_name})")
@@ -243,9 +334,21 @@ class StrategyEngine:
         except Exception as e:
             logger.error(f"Error processing signal: {e}")
     
+    def _forward_worker_signal(self, signal: Dict, strategy_name: str):
+        """Signals returned by strategy workers (already stamped by the worker's engine)."""
+        try:
+            self.signal_sink(signal)
+            record_signal(signal)
+            self.stats["signals"] += 1
+            logger.info(f"Generated signal: {signal['action']} {signal['symbol']} Quanity is {signal['quantity']} "
+                       f"at {signal['price']} (Strategy: {strategy_name}, worker)")
+        except Exception as e:
+            logger.error(f"Error processing worker signal: {e}")
+
     def add_strategy(self, strategy: BaseStrategy):
         """Add a new strategy"""
         with self._lock:
+            self._share_indicator_cache(strategy)
             self.active_strategies.append(strategy)
             logger.info(f"Added strategy: {strategy.name}")
     
@@ -0,0 +1,409 @@
+"""
+app/core/strategy_workers.py
+
+Process-sharded strategy execution for the StrategyEngine.
+The engine publishes every tick into a single-producer shared-memory ring
+(SharedTickRing, TICK_DTYPE records). Each worker process builds its strategies from
+StrategySpecs, reads the ring with its own cursor, runs the same bar/tick dispatch as
+the engine (a StrategyEngine with an explicit strategy list) and sends signals back over
+a multiprocessing queue; the pool forwards them to trade_signal_queue through the
+engine's signal path. Enable/disable is forwarded to the owning worker.
+
+Placement (STRATEGY_WORKER_PLACEMENT) maps strategy names to a worker index or "main"
+(stay in the engine thread); unlisted strategies are spread round-robin over workers.
+"""
+
+import multiprocessing as mp
+import threading
+import time
+from datetime import datetime
+from multiprocessing import shared_memory
+from queue import Empty
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.models.tick import TICK_DTYPE, Tick
+from app.strategies.base import BaseStrategy
+from app.strategies.registry import StrategySpec
+from app.services.logger import get_logger, stop_logging
+from app.config.settings import get_settings
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+MAIN = "main"
+_HEADER_BYTES = 64  # int64 write sequence, padded to a cache line
+
+
+class SharedTickRing:
+    """
+    Single-producer, multi-consumer tick ring in shared memory.
+
+    The producer writes record ``seq % capacity`` and then publishes ``seq + 1``; readers
+    keep their own cursor and copy records below the published sequence. A reader that
+    falls more than ``capacity`` behind skips ahead and reports the lost ticks.
+    """
+
+    def __init__(self, capacity: int, name: Optional[str] = None, create: bool = True):
+        self.capacity = capacity
+        size = _HEADER_BYTES + capacity * TICK_DTYPE.itemsize
+        self.shm = shared_memory.SharedMemory(name=name, create=create, size=size if create else 0)
+        self._owner = create
+        self._seq = np.ndarray((1,), dtype="<i8", buffer=self.shm.buf, offset=0)
+        self.records = np.ndarray((capacity,), dtype=TICK_DTYPE, buffer=self.shm.buf, offset=_HEADER_BYTES)
+        if create:
+            self._seq[0] = 0
+
+    @classmethod
+    def attach(cls, name: str, capacity: int) -> "SharedTickRing":
+        return cls(capacity, name=name, create=False)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @property
+    def write_seq(self) -> int:
+        return int(self._seq[0])
+
+    def publish(self, ts: int, symbol_id: int, open_: float, high: float, low: float,
+                close: float, volume: float):
+        seq = int(self._seq[0])
+        self.records[seq % self.capacity] = (ts, symbol_id, 0, open_, high, low, close, volume)
+        self._seq[0] = seq + 1
+
+    def read(self, cursor: int, max_items: int) -> Tuple[np.ndarray, int, int]:
+        """Copy up to ``max_items`` records from ``cursor``; returns (records, new cursor, lost)."""
+        seq = int(self._seq[0])
+        lost = 0
+        if seq - cursor > self.capacity:
+            lost = seq - self.capacity - cursor
+            cursor = seq - self.capacity
+        n = min(seq - cursor, max_items)
+        if n <= 0:
+            return self.records[:0].copy(), cursor, lost
+        records = self.records[(cursor + np.arange(n)) % self.capacity]
+        # Drop anything the producer overwrote while we were copying
+        overwritten = int(self._seq[0]) - self.capacity - cursor
+        if overwritten > 0:
+            records = records[overwritten:]
+            lost += overwritten
+        return records, cursor + n, lost
+
+    def close(self):
+        # Release our numpy views before closing the mapping
+        self._seq = None
+        self.records = None
+        self.shm.close()
+        if self._owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class RemoteStrategy(BaseStrategy):
+    """Engine-side stand-in for a strategy that runs in a worker process."""
+
+    def __init__(self, spec: StrategySpec, pool: "StrategyWorkerPool"):
+        super().__init__(spec.name, spec.symbols)
+        self.spec = spec
+        self.pool = pool
+
+    def generate_signals(self, market_data):
+        return []  # executed in the worker
+
+    def enable(self):
+        super().enable()
+        self.pool.set_enabled(self.name, True)
+
+    def disable(self):
+        super().disable()
+        self.pool.set_enabled(self.name, False)
+
+
+def parse_placement(placement: str) -> Dict[str, Any]:
+    """"CPR_Meta_ML=0,MA_CrossOver=main" -> {"CPR_Meta_ML": 0, "MA_CrossOver": "main"}."""
+    result: Dict[str, Any] = {}
+    for item in filter(None, (p.strip() for p in (placement or "").split(","))):
+        name, _, target = item.partition("=")
+        target = target.strip().lower()
+        result[name.strip()] = MAIN if target == MAIN else int(target)
+    return result
+
+
+def _worker_main(index: int, specs: List[StrategySpec], enabled: Dict[str, bool], ring_name: str,
+                 capacity: int, control_queue, result_queue, batch_size: int, stats_interval: float):
+    """Worker process entry point (spawned)."""
+    from app.core.strategy_engine import StrategyEngine
+
+    ring = SharedTickRing.attach(ring_name, capacity)
+    strategies = []
+    for spec in specs:
+        try:
+            strategy = spec.build()
+        except Exception as e:
+            logger.error(f"Strategy worker {index} failed to build {spec.name}: {e}")
+            continue
+        if enabled.get(spec.name):
+            strategy.enable()
+        strategies.append(strategy)
+
+    def sink(signal: Dict[str, Any]):
+        result_queue.put(("signal", index, signal))
+
+    engine = StrategyEngine(strategies=strategies, signal_sink=sink)
+    result_queue.put(("ready", index, [(s.name, list(s.symbols), s.timeframe) for s in strategies]))
+    names: Dict[int, str] = {}
+    cursor = ring.write_seq
+    lost_total = 0
+    last_stats = last_clock_close = time.monotonic()
+    running = True
+
+    def handle_control(message):
+        nonlocal running
+        kind = message[0]
+        if kind == "symbol":
+            names[message[1]] = message[2]
+        elif kind == "enable":
+            for strategy in strategies:
+                if strategy.name == message[1]:
+                    strategy.enabled = message[2]
+        elif kind == "stop":
+            running = False
+
+    def wait_for_symbol(sid: int, timeout: float = 1.0) -> Optional[str]:
+        deadline = time.monotonic() + timeout
+        while sid not in names and time.monotonic() < deadline:
+            try:
+                handle_control(control_queue.get(timeout=max(deadline - time.monotonic(), 0.001)))
+            except Empty:
+                break
+        return names.get(sid)
+
+    while running:
+        while True:
+            try:
+                handle_control(control_queue.get_nowait())
+            except Empty:
+                break
+        records, cursor, lost = ring.read(cursor, batch_size)
+        lost_total += lost
+        if len(records):
+            received_at = time.perf_counter()
+            for ts, sid, _, o, h, l, c, v in records.tolist():
+                name = names.get(sid)
+                if name is None:
+                    # Symbol announcements travel on the control queue and may trail the ring
+                    name = wait_for_symbol(sid)
+                    if name is None:
+                        logger.error(f"Strategy worker {index}: unknown symbol id {sid}, tick skipped")
+                        continue
+                engine._handle_tick(Tick(name, ts, o, h, l, c, v, received_at))
+        else:
+            time.sleep(0.001)
+        now = time.monotonic()
+        if engine.close_bars_on_clock and now - last_clock_close >= 0.1:
+            engine._close_due_bars(datetime.now())
+            last_clock_close = now
+        engine._execute_strategies()
+        if now - last_stats >= stats_interval:
+            stats = engine.get_dispatch_stats()
+            stats["lost_ticks"] = lost_total
+            result_queue.put(("stats", index, stats))
+            last_stats = time.monotonic()
+
+    stats = engine.get_dispatch_stats()
+    stats["lost_ticks"] = lost_total
+    result_queue.put(("stats", index, stats))
+    ring.close()
+    stop_logging()  # worker processes exit without running atexit handlers
+
+
+class StrategyWorkerPool:
+    """
+    Owns the tick ring, the worker processes and the signal return channel.
+
+    Usage:
+        pool = StrategyWorkerPool(specs, workers=2, placement={"CPR_Meta_ML": 0}, signal_sink=engine._process_signal)
+        local_specs, remote = pool.local_specs, pool.remote_strategies   # build local ones in-process
+        pool.start()
+        pool.publish(tick)        # from the engine thread, for every tick
+        pool.stop()
+    """
+
+    def __init__(self, specs: List[StrategySpec], workers: int, placement: Optional[Dict[str, Any]] = None,
+                 signal_sink: Optional[Callable[[Dict[str, Any], str], None]] = None,
+                 capacity: Optional[int] = None, batch_size: int = 1024, stats_interval: float = 1.0):
+        self.workers = max(int(workers), 1)
+        self.capacity = capacity or settings.STRATEGY_TICK_BUS_CAPACITY
+        self.batch_size = batch_size
+        self.stats_interval = stats_interval
+        self.signal_sink = signal_sink
+        placement = placement or {}
+
+        self.local_specs: List[StrategySpec] = []
+        self.assignments: Dict[int, List[StrategySpec]] = {}
+        next_worker = 0
+        for spec in specs:
+            target = placement.get(spec.name)
+            if target == MAIN:
+                self.local_specs.append(spec)
+                continue
+            if target is None:
+                target = next_worker % self.workers
+                next_worker += 1
+            elif not 0 <= target < self.workers:
+                raise ValueError(f"Strategy {spec.name} placed on worker {target}, but only {self.workers} configured")
+            self.assignments.setdefault(target, []).append(spec)
+
+        self.remote_strategies: Dict[str, RemoteStrategy] = {
+            spec.name: RemoteStrategy(spec, self) for specs_ in self.assignments.values() for spec in specs_
+        }
+        self._owner = {spec.name: index for index, specs_ in self.assignments.items() for spec in specs_}
+        self._ctx = mp.get_context("spawn")
+        self._ring: Optional[SharedTickRing] = None
+        self._processes: Dict[int, Any] = {}
+        self._control: Dict[int, Any] = {}
+        self._results = None
+        self._result_thread: Optional[threading.Thread] = None
+        self._symbol_ids: Dict[str, int] = {}
+        self._worker_stats: Dict[int, Dict[str, Any]] = {}
+        self._ready = set()
+        self._published = 0
+        self._ready_event = threading.Event()
+        self.running = False
+        self.signals_received = 0
+
+    # ---------- lifecycle ----------
+    def start(self, ready_timeout: float = 60.0):
+        """Spawn the workers and wait until each one is reading the ring."""
+        if self.running:
+            return
+        self._ready.clear()
+        self._ready_event.clear()
+        self._ring = SharedTickRing(self.capacity)
+        self._results = self._ctx.Queue()
+        for index, specs in self.assignments.items():
+            control = self._ctx.Queue()
+            enabled = {spec.name: self.remote_strategies[spec.name].is_enabled() for spec in specs}
+            process = self._ctx.Process(
+                target=_worker_main,
+                args=(index, specs, enabled, self._ring.name, self.capacity, control, self._results,
+                      self.batch_size, self.stats_interval),
+                name=f"StrategyWorker-{index}",
+                daemon=True,
+            )
+            process.start()
+            self._control[index] = control
+            self._processes[index] = process
+            logger.info(f"Strategy worker {index} started (pid={process.pid}) with {[s.name for s in specs]}")
+        # Announce symbols already known (e.g. after a restart)
+        for symbol, sid in self._symbol_ids.items():
+            self._broadcast(("symbol", sid, symbol))
+        self.running = True
+        self._result_thread = threading.Thread(target=self._collect_results, name="StrategyWorkerResults", daemon=True)
+        self._result_thread.start()
+        if not self.wait_ready(ready_timeout):
+            logger.warning(f"Strategy workers not ready after {ready_timeout}s: "
+                           f"{sorted(set(self._processes) - self._ready)}")
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """True once every worker has built its strategies; ticks published earlier are not seen."""
+        return self._ready_event.wait(timeout)
+
+    def stop(self, timeout: float = 5.0):
+        if not self.running:
+            return
+        self._broadcast(("stop",))
+        for index, process in self._processes.items():
+            process.join(timeout=timeout)
+            if process.is_alive():
+                logger.warning(f"Strategy worker {index} did not stop, terminating")
+                process.terminate()
+        self.running = False
+        if self._result_thread:
+            self._result_thread.join(timeout=timeout)
+        self._drain_results()
+        self._processes.clear()
+        self._control.clear()
+        self._published = self._ring.write_seq
+        self._ring.close()
+        self._ring = None
+        logger.info("Strategy workers stopped")
+
+    # ---------- engine side ----------
+    def publish(self, tick: Tick):
+        """Append a tick to the shared ring (engine thread only)."""
+        sid = self._symbol_ids.get(tick.symbol)
+        if sid is None:
+            sid = self._symbol_ids[tick.symbol] = len(self._symbol_ids)
+            self._broadcast(("symbol", sid, tick.symbol))
+        self._ring.publish(tick.ts, sid, tick.open, tick.high, tick.low, tick.close, tick.volume or 0.0)
+
+    def set_enabled(self, strategy_name: str, enabled: bool):
+        index = self._owner.get(strategy_name)
+        control = self._control.get(index)
+        if control is not None:
+            control.put(("enable", strategy_name, enabled))
+
+    def _broadcast(self, message):
+        for control in self._control.values():
+            control.put(message)
+
+    # ---------- results ----------
+    def _collect_results(self):
+        while self.running:
+            try:
+                message = self._results.get(timeout=0.2)
+            except Empty:
+                continue
+            except (EOFError, OSError):
+                break
+            self._handle_result(message)
+
+    def _drain_results(self):
+        while True:
+            try:
+                self._handle_result(self._results.get(timeout=0.05))
+            except (Empty, EOFError, OSError):
+                return
+
+    def _handle_result(self, message):
+        kind, index, payload = message
+        if kind == "signal":
+            self.signals_received += 1
+            strategy = self.remote_strategies.get(payload.get("strategy"))
+            if strategy is not None:
+                strategy.signals_generated += 1
+            if self.signal_sink is not None:
+                self.signal_sink(payload, payload.get("strategy"))
+        elif kind == "stats":
+            self._worker_stats[index] = payload
+        elif kind == "ready":
+            for name, symbols, timeframe in payload:
+                strategy = self.remote_strategies.get(name)
+                if strategy is not None:
+                    strategy.symbols = symbols
+                    strategy.timeframe = timeframe
+            logger.info(f"Strategy worker {index} ready: {[name for name, _, _ in payload]}")
+            self._ready.add(index)
+            if self._ready >= set(self.assignments):
+                self._ready_event.set()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "workers": {
+                index: {
+                    "alive": index in self._processes and self._processes[index].is_alive(),
+                    "ready": index in self._ready,
+                    "strategies": [spec.name for spec in specs],
+                    **self._worker_stats.get(index, {}),
+                }
+                for index, specs in self.assignments.items()
+            },
+            "local_strategies": [spec.name for spec in self.local_specs],
+            "ticks_published": self._ring.write_seq if self._ring is not None else self._published,
+            "signals_received": self.signals_received,
+        }
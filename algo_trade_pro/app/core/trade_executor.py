@@ -1,5 +1,6 @@
 import time
 import threading
+from itertools import count
 from typing import Dict, Any, Optional
 from datetime import datetime
 from app.queue.trade_queue import trade_signal_queue
@@ -7,6 +8,7 @@ from app.models.database import get_db_session
 from app.models.trade import Trade, TradeStatus, TradeSide
 from app.brokers.base import BrokerBase
 from app.services.logger import get_logger
+from app.services.clock import get_clock
 from app.config.settings import get_settings
 from app.strategies.registry import STRATEGY_REGISTRY
 from app.brokers.zerodha import ZerodhaBroker
@@ -24,6 +26,8 @@ class TradeExecutor:
         self.pending_orders = {}  # order_id (str) -> trade_id (str)
         self.active_sl_target_orders = {}
         self._lock = threading.Lock()
+        # Keeps trade ids unique when a symbol gets two same-side signals within a second
+        self._trade_seq = count(1)
 
     def run(self):
         """Main trade execution loop."""
@@ -66,7 +70,7 @@ class TradeExecutor:
             quantity = signal.get('quantity', 10)
             strategy = signal.get('strategy', 'Unknown')
 
-            trade_id = f"{symbol}_{action}_{int(time.time())}_{threading.get_ident()}"
+            trade_id = f"{symbol}_{action}_{int(get_clock().time())}_{next(self._trade_seq)}"
             side = TradeSide.BUY if action == "BUY" else TradeSide.SELL
             metadata = signal.get('metadata', {})
             # 1. Create Trade record (insert into DB!)
@@ -79,10 +83,12 @@ class TradeExecutor:
                     price=price,
                     status=TradeStatus.PENDING,
                     strategy=strategy,
-                    timestamp=datetime.utcnow(),
+                    timestamp=get_clock().utcnow(),
                     stop_loss=metadata.get('stoploss'),
                     target=metadata.get('target'),
                     underlying_symbol=metadata.get('underlying_symbol'),
+                    model_version=metadata.get('model_version'),
+                    signal_id=signal.get('signal_id'),
                 )
                 db.add(trade)
                 db.commit()
@@ -145,7 +151,7 @@ class TradeExecutor:
                 'action': action,
                 'stoploss': metadata.get('stoploss'),
                 'target': metadata.get('target'),
-                'timestamp': datetime.utcnow()
+                'timestamp': get_clock().utcnow()
             }
 
     def _place_sl_target_orders(self, trade_id: str, sl_target_info: dict):
@@ -264,7 +270,7 @@ class TradeExecutor:
                 db.query(Trade).filter(Trade.id == trade_id).update({
                     "status": TradeStatus.FILLED.value,
                     "filled_price": filled_price or trade.price,
-                    "filled_timestamp": datetime.utcnow(),
+                    "filled_timestamp": get_clock().utcnow(),
                     "pnl": pnl
                 })
                 db.commit()
@@ -323,7 +329,7 @@ class TradeExecutor:
                 if trade:
                     # Update trade with exit details
                     trade.exit_price = exit_price
-                    trade.exit_timestamp = datetime.utcnow()
+                    trade.exit_timestamp = get_clock().utcnow()
                     trade.status = TradeStatus.EXITED.value
                     trade.exit_reason = order_type
                     
@@ -0,0 +1,16 @@
+"""
+app/indicators
+
+Streaming technical indicators with O(1) updates (current and previous value
+exposed on each), plus ``batch`` for the vectorized equivalents.
+"""
+
+from app.indicators.base import Indicator
+from app.indicators.moving import EMA, SMA, RollingStd
+from app.indicators.momentum import RSI
+from app.indicators.bands import Bollinger
+from app.indicators.volume import VWAP
+from app.indicators.volatility import ATR
+from app.indicators import batch
+
+__all__ = ["Indicator", "SMA", "EMA", "RollingStd", "RSI", "Bollinger", "VWAP", "ATR", "batch"]
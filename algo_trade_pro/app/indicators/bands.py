@@ -0,0 +1,49 @@
+"""
+app/indicators/bands.py
+
+Bollinger bands: middle = SMA(period), upper/lower = middle +/- k * sample std,
+width = (upper - lower) / middle. ``value`` is the middle band; the other lines
+and their previous values are attributes.
+
+Usage:
+    bb = Bollinger(20, 2.0)
+    bb.update(price)
+    if prev_price <= bb.prev_upper and price > bb.upper: ...
+"""
+
+from app.indicators.base import NAN, Indicator
+from app.indicators.moving import RollingStd
+
+
+class Bollinger(Indicator):
+    """Bollinger bands over ``period`` observations, ``k`` standard deviations wide."""
+
+    def __init__(self, period: int = 20, k: float = 2.0):
+        self.period = period
+        self.k = k
+        self.warmup = period
+        super().__init__()
+
+    def reset(self):
+        super().reset()
+        self._std = RollingStd(self.period)
+        self.upper = self.lower = self.width = self.std = NAN
+        self.prev_upper = self.prev_lower = self.prev_width = NAN
+
+    def update(self, x: float) -> float:
+        std = self._std.update(x)
+        middle = self._std.window_mean
+        self.prev_upper, self.prev_lower, self.prev_width = self.upper, self.lower, self.width
+        self.std = std
+        self.upper = middle + self.k * std
+        self.lower = middle - self.k * std
+        self.width = (self.upper - self.lower) / middle if middle else NAN
+        return self._push(middle)
+
+    @property
+    def middle(self) -> float:
+        return self.value
+
+    @property
+    def prev_middle(self) -> float:
+        return self.previous
@@ -0,0 +1,58 @@
+"""
+app/indicators/base.py
+
+Common interface of the streaming indicators.
+
+Every indicator folds one observation at a time into a constant amount of state
+(``update`` is O(1) whatever the period) and keeps the last two outputs, which
+is all the crossover-style strategies look at. Until an indicator has seen
+enough observations its value is NaN, like the leading rows of the matching
+pandas ``rolling``/``ewm`` computation.
+
+Usage:
+    sma = SMA(20)
+    for price in prices:
+        sma.update(price)
+    if sma.ready:
+        crossed = sma.previous <= level < sma.value
+"""
+
+import math
+from typing import Iterable
+
+import numpy as np
+
+NAN = float("nan")
+
+
+class Indicator:
+    """Base class: subclasses implement ``reset`` and ``update``."""
+
+    # Observations needed before ``value`` is defined
+    warmup: int = 1
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Forget all observations."""
+        self.value = NAN
+        self.previous = NAN
+        self.count = 0
+
+    @property
+    def ready(self) -> bool:
+        return self.count >= self.warmup and not math.isnan(self.value)
+
+    def _push(self, value: float) -> float:
+        self.count += 1
+        self.previous = self.value
+        self.value = value
+        return value
+
+    def update_many(self, values: Iterable[float]) -> np.ndarray:
+        """Feed a sequence of observations; returns the value after each one."""
+        return np.array([self.update(v) for v in values], dtype="float64")
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(value={self.value:.6g}, previous={self.previous:.6g})"
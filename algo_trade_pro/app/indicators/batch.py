@@ -0,0 +1,106 @@
+"""
+app/indicators/batch.py
+
+Vectorized forms of the streaming indicators for backtests and warm-up: each
+function takes whole columns and returns, row for row, what the incremental
+indicator would report after that row (NaN during warm-up).
+
+Usage:
+    from app.indicators import batch
+    rsi = batch.rsi(df["close"], 14)
+    bands = batch.bollinger(df["close"], 20, 2.0)   # DataFrame middle/upper/lower/width
+"""
+
+import numpy as np
+import pandas as pd
+
+from app.indicators.momentum import RSI_METHODS
+
+
+def _values(x) -> np.ndarray:
+    return np.asarray(x, dtype="float64")
+
+
+def _series(x) -> pd.Series:
+    return pd.Series(_values(x))
+
+
+def _wilder(values: np.ndarray, period: int, first: int = 0) -> np.ndarray:
+    """Wilder average of ``values[first:]``, seeded with the mean of its first ``period`` entries."""
+    out = np.full(len(values), np.nan)
+    seed_at = first + period - 1
+    if len(values) <= seed_at:
+        return out
+    seq = values[seed_at:].copy()
+    seq[0] = values[first:seed_at + 1].mean()
+    # After the seed the recursion is exactly an adjust=False EWM with alpha = 1/period
+    out[seed_at:] = pd.Series(seq).ewm(alpha=1.0 / period, adjust=False).mean().to_numpy()
+    return out
+
+
+def previous(values) -> np.ndarray:
+    """``values`` one row back (NaN for the first row), for crossover tests."""
+    out = np.empty(len(values))
+    out[:1] = np.nan
+    out[1:] = _values(values)[:-1]
+    return out
+
+
+def sma(values, period: int) -> np.ndarray:
+    return _series(values).rolling(period).mean().to_numpy()
+
+
+def ema(values, period: int) -> np.ndarray:
+    return _series(values).ewm(span=period, adjust=False).mean().to_numpy()
+
+
+def rolling_std(values, period: int, ddof: int = 1) -> np.ndarray:
+    return _series(values).rolling(period).std(ddof=ddof).to_numpy()
+
+
+def rsi(values, period: int = 14, method: str = "wilder") -> np.ndarray:
+    if method not in RSI_METHODS:
+        raise ValueError(f"Unknown RSI method {method!r} (expected one of {RSI_METHODS})")
+    change = np.diff(_values(values), prepend=np.nan)
+    gain = np.where(change > 0, change, 0.0)
+    loss = np.where(change < 0, -change, 0.0)
+    if method == "sma":
+        gain[:1] = loss[:1] = np.nan   # the first row has no change
+        avg_gain, avg_loss = sma(gain, period), sma(loss, period)
+    else:
+        avg_gain, avg_loss = _wilder(gain, period, first=1), _wilder(loss, period, first=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+
+
+def bollinger(values, period: int = 20, k: float = 2.0) -> pd.DataFrame:
+    close = _series(values)
+    middle = close.rolling(period).mean().to_numpy()
+    std = close.rolling(period).std().to_numpy()
+    upper, lower = middle + k * std, middle - k * std
+    return pd.DataFrame({"middle": middle, "upper": upper, "lower": lower,
+                         "width": (upper - lower) / middle}, index=getattr(values, "index", None))
+
+
+def vwap(high, low, close, volume, sessions=None) -> np.ndarray:
+    pv = pd.Series((_values(high) + _values(low) + _values(close)) / 3.0 * _values(volume))
+    vol = pd.Series(_values(volume))
+    if sessions is None:
+        cum_pv, cum_vol = pv.cumsum(), vol.cumsum()
+    else:
+        keys = np.asarray(sessions)
+        cum_pv, cum_vol = pv.groupby(keys).cumsum(), vol.groupby(keys).cumsum()
+    return (cum_pv / cum_vol.where(cum_vol > 0)).to_numpy()
+
+
+def true_range(high, low, close) -> np.ndarray:
+    high, low, close = _values(high), _values(low), _values(close)
+    prev_close = np.roll(close, 1)
+    tr = np.maximum(high - low, np.maximum(np.abs(high - prev_close), np.abs(low - prev_close)))
+    if len(tr):
+        tr[0] = high[0] - low[0]
+    return tr
+
+
+def atr(high, low, close, period: int = 14) -> np.ndarray:
+    return _wilder(true_range(high, low, close), period)
@@ -0,0 +1,159 @@
+"""
+app/indicators/cache.py
+
+Shared streaming indicators, keyed by (symbol, timeframe, indicator, params).
+
+Strategies that need the same indicator on the same series (say a 20-period
+SMA of NIFTY closes for both the MA crossover and the Bollinger breakout) get
+the same instance. An entry remembers the id of the last row it was fed (index
+value plus how many rows share it), so within a cycle the first strategy
+to ask feeds the new rows (a miss) and every later one reads the values (a
+hit). Entries are evicted least recently used beyond ``maxsize``.
+
+Usage:
+    cache = IndicatorCache(maxsize=4096)
+    sma = cache.get("NIFTY 50", None, "sma", (20,), df)
+    sma.value, sma.previous
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import pandas as pd
+
+from app.indicators.base import Indicator
+from app.indicators.bands import Bollinger
+from app.indicators.momentum import RSI
+from app.indicators.moving import EMA, SMA, RollingStd
+from app.indicators.volatility import ATR
+from app.indicators.volume import VWAP
+
+
+def _feed_close(indicator: Indicator, rows: pd.DataFrame):
+    for price in rows["close"].tolist():
+        indicator.update(price)
+
+
+def _feed_hlc(indicator: Indicator, rows: pd.DataFrame):
+    for high, low, close in zip(rows["high"].tolist(), rows["low"].tolist(), rows["close"].tolist()):
+        indicator.update(high, low, close)
+
+
+def _feed_vwap(indicator: Indicator, rows: pd.DataFrame):
+    sessions = rows.index.normalize().tolist() if isinstance(rows.index, pd.DatetimeIndex) else [None] * len(rows)
+    for high, low, close, volume, session in zip(rows["high"].tolist(), rows["low"].tolist(),
+                                                 rows["close"].tolist(), rows["volume"].tolist(), sessions):
+        indicator.update(high, low, close, volume, session)
+
+
+# indicator name -> (class, how rows are fed to it)
+INDICATORS: Dict[str, Tuple[Callable[..., Indicator], Callable[[Indicator, pd.DataFrame], None]]] = {
+    "sma": (SMA, _feed_close),
+    "ema": (EMA, _feed_close),
+    "std": (RollingStd, _feed_close),
+    "rsi": (RSI, _feed_close),
+    "bollinger": (Bollinger, _feed_close),
+    "atr": (ATR, _feed_hlc),
+    "vwap": (VWAP, _feed_vwap),
+}
+
+
+def unseen_rows(df: pd.DataFrame, fed: Optional[Tuple[Any, int]]) -> Tuple[pd.DataFrame, bool]:
+    """
+    Rows of the index-sorted ``df`` after the row id ``fed``, and whether the
+    indicator has to be rebuilt from the whole window instead (never fed, or the
+    window no longer overlaps what was fed).
+    """
+    if fed is None or not len(df):
+        return df, True
+    index = df.index
+    last, seen = fed
+    left = index.searchsorted(last, side="left")
+    right = index.searchsorted(last, side="right")
+    # left > 0: every row sharing the last fed index is still in the window
+    if 0 < left and left + seen <= right:
+        return df.iloc[left + seen:], False
+    return df, True
+
+
+def last_row_id(df: pd.DataFrame) -> Optional[Tuple[Any, int]]:
+    """(index of the last row, rows with that index) - changes whenever a row is appended."""
+    if not len(df):
+        return None
+    newest = df.index[-1]
+    return newest, len(df) - df.index.searchsorted(newest, side="left")
+
+
+class _Entry:
+    __slots__ = ("indicator", "feed", "fed")
+
+    def __init__(self, indicator: Indicator, feed: Callable[[Indicator, pd.DataFrame], None]):
+        self.indicator = indicator
+        self.feed = feed
+        self.fed: Optional[Tuple[Any, int]] = None
+
+
+class IndicatorCache:
+    """LRU cache of streaming indicators shared by the strategies of one engine."""
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, symbol: str, timeframe: Optional[str], name: str, params: Tuple = (),
+            df: Optional[pd.DataFrame] = None) -> Indicator:
+        """
+        The ``name`` indicator with ``params`` on this series, brought up to the last
+        row of ``df`` (rows since its previous update are fed; none on a hit).
+        """
+        key = (symbol, timeframe, name, params)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                try:
+                    cls, feed = INDICATORS[name]
+                except KeyError:
+                    raise ValueError(f"Unknown indicator {name!r} (expected one of {sorted(INDICATORS)})")
+                entry = self._entries[key] = _Entry(cls(*params), feed)
+                if len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+            else:
+                self._entries.move_to_end(key)
+
+            if df is None:
+                return entry.indicator
+            row_id = last_row_id(df)
+            if row_id is not None and row_id == entry.fed:
+                self.hits += 1
+                return entry.indicator
+            self.misses += 1
+            rows, rebuild = unseen_rows(df, entry.fed)
+            if rebuild:
+                entry.indicator.reset()
+            entry.feed(entry.indicator, rows)
+            entry.fed = row_id
+            return entry.indicator
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,79 @@
+"""
+app/indicators/momentum.py
+
+Relative Strength Index.
+
+Two smoothings of the average gain/loss are supported:
+    "wilder"  Wilder's RSI: the first average is the mean of ``period`` changes,
+              then avg = (avg * (period - 1) + change) / period
+    "sma"     plain ``period``-change rolling means (what RSIStrategy has always used)
+
+Usage:
+    rsi = RSI(14)
+    rsi.update(price)
+    if rsi.previous <= 30 < rsi.value: ...
+"""
+
+from app.indicators.base import NAN, Indicator
+from app.indicators.moving import SMA
+
+RSI_METHODS = ("wilder", "sma")
+
+
+def rsi_from_averages(avg_gain: float, avg_loss: float) -> float:
+    """100 - 100 / (1 + gain/loss), with pandas' conventions for a zero loss."""
+    if avg_loss == 0.0:
+        return 100.0 if avg_gain > 0.0 else NAN
+    return 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+
+
+class RSI(Indicator):
+    """RSI over ``period`` price changes (defined from the ``period + 1``-th price)."""
+
+    def __init__(self, period: int = 14, method: str = "wilder"):
+        if period < 1:
+            raise ValueError(f"period must be >= 1, got {period}")
+        if method not in RSI_METHODS:
+            raise ValueError(f"Unknown RSI method {method!r} (expected one of {RSI_METHODS})")
+        self.period = period
+        self.method = method
+        self.warmup = period + 1
+        super().__init__()
+
+    def reset(self):
+        super().reset()
+        self._last = None
+        self.avg_gain = NAN
+        self.avg_loss = NAN
+        self._changes = 0
+        self._gain_sum = 0.0
+        self._loss_sum = 0.0
+        if self.method == "sma":
+            self._gains, self._losses = SMA(self.period), SMA(self.period)
+
+    def update(self, price: float) -> float:
+        last, self._last = self._last, price
+        if last is None:
+            return self._push(NAN)
+        change = price - last
+        gain = change if change > 0.0 else 0.0
+        loss = -change if change < 0.0 else 0.0
+        self._changes += 1
+
+        if self.method == "sma":
+            self.avg_gain = self._gains.update(gain)
+            self.avg_loss = self._losses.update(loss)
+            if not self._gains.ready:
+                return self._push(NAN)
+        elif self._changes <= self.period:
+            self._gain_sum += gain
+            self._loss_sum += loss
+            if self._changes < self.period:
+                return self._push(NAN)
+            self.avg_gain = self._gain_sum / self.period
+            self.avg_loss = self._loss_sum / self.period
+        else:
+            n = self.period
+            self.avg_gain = (self.avg_gain * (n - 1) + gain) / n
+            self.avg_loss = (self.avg_loss * (n - 1) + loss) / n
+        return self._push(rsi_from_averages(self.avg_gain, self.avg_loss))
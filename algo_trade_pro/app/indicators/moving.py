@@ -0,0 +1,115 @@
+"""
+app/indicators/moving.py
+
+Moving averages and the rolling standard deviation.
+
+    SMA         window mean, running sum over a fixed-size deque
+    EMA         exponential mean (pandas ``ewm(span=period, adjust=False)``)
+    RollingStd  window standard deviation, Welford's update with the oldest
+                observation removed as the new one enters
+
+Usage:
+    std = RollingStd(20)
+    std.update(price)
+    std.mean, std.value
+"""
+
+import math
+from collections import deque
+from typing import Optional
+
+from app.indicators.base import NAN, Indicator
+
+# Window sums are rebuilt from the window every this many updates so float
+# error from the add/subtract pairs cannot accumulate over a long session
+_RESUM_EVERY = 10_000
+
+
+class SMA(Indicator):
+    """Simple moving average over the last ``period`` observations."""
+
+    def __init__(self, period: int):
+        if period < 1:
+            raise ValueError(f"period must be >= 1, got {period}")
+        self.period = period
+        self.warmup = period
+        super().__init__()
+
+    def reset(self):
+        super().reset()
+        self._window = deque()
+        self._sum = 0.0
+
+    def update(self, x: float) -> float:
+        window = self._window
+        window.append(x)
+        self._sum += x
+        if len(window) > self.period:
+            self._sum -= window.popleft()
+        if self.count % _RESUM_EVERY == _RESUM_EVERY - 1:
+            self._sum = math.fsum(window)
+        return self._push(self._sum / self.period if len(window) == self.period else NAN)
+
+
+class EMA(Indicator):
+    """Exponential moving average seeded with the first observation."""
+
+    def __init__(self, period: Optional[int] = None, alpha: Optional[float] = None):
+        if alpha is None:
+            if not period or period < 1:
+                raise ValueError("EMA needs a period >= 1 or an alpha")
+            alpha = 2.0 / (period + 1)
+        self.period = period
+        self.alpha = alpha
+        super().__init__()
+
+    def update(self, x: float) -> float:
+        if self.count == 0:
+            return self._push(float(x))
+        return self._push(self.value + self.alpha * (x - self.value))
+
+
+class RollingStd(Indicator):
+    """Standard deviation (``ddof`` 1 = sample, like pandas) of the last ``period`` observations."""
+
+    def __init__(self, period: int, ddof: int = 1):
+        if period <= ddof:
+            raise ValueError(f"period must be > ddof ({ddof}), got {period}")
+        self.period = period
+        self.ddof = ddof
+        self.warmup = period
+        super().__init__()
+
+    def reset(self):
+        super().reset()
+        self._window = deque()
+        self.mean = NAN
+        self._m2 = 0.0
+
+    def update(self, x: float) -> float:
+        window = self._window
+        window.append(x)
+        n = len(window)
+        if n == 1:
+            self.mean, self._m2 = float(x), 0.0
+        elif n <= self.period:
+            delta = x - self.mean
+            self.mean += delta / n
+            self._m2 += delta * (x - self.mean)
+        else:
+            # Replace the oldest observation: add and remove in one step
+            old = window.popleft()
+            n = self.period
+            old_mean = self.mean
+            self.mean += (x - old) / n
+            self._m2 += (x - old) * (x - self.mean + old - old_mean)
+        if self._m2 < 0.0:
+            self._m2 = 0.0
+        if n < self.period:
+            return self._push(NAN)
+        return self._push(math.sqrt(self._m2 / (n - self.ddof)))
+
+    @property
+    def window_mean(self) -> float:
+        """Mean of the current window (NaN until it is full)."""
+        return self.mean if len(self._window) == self.period else NAN
@@ -0,0 +1,48 @@
+"""
+app/indicators/volatility.py
+
+Average True Range. The true range of a bar is max(high - low,
+|high - prev close|, |low - prev close|) (just high - low for the first bar);
+the ATR is its Wilder average, seeded with the mean of the first ``period``.
+
+Usage:
+    atr = ATR(14)
+    atr.update(bar.high, bar.low, bar.close)
+"""
+
+import numpy as np
+
+from app.indicators.base import NAN, Indicator
+
+
+class ATR(Indicator):
+    """Wilder's Average True Range over ``period`` bars."""
+
+    def __init__(self, period: int = 14):
+        if period < 1:
+            raise ValueError(f"period must be >= 1, got {period}")
+        self.period = period
+        self.warmup = period
+        super().__init__()
+
+    def reset(self):
+        super().reset()
+        self._prev_close = None
+        self._tr_sum = 0.0
+        self.true_range = NAN
+
+    def update(self, high: float, low: float, close: float) -> float:
+        prev_close, self._prev_close = self._prev_close, close
+        if prev_close is None:
+            tr = high - low
+        else:
+            tr = max(high - low, abs(high - prev_close), abs(low - prev_close))
+        self.true_range = tr
+        n = self.period
+        if self.count < n:
+            self._tr_sum += tr
+            return self._push(self._tr_sum / n if self.count == n - 1 else NAN)
+        return self._push((self.value * (n - 1) + tr) / n)
+
+    def update_many(self, high, low, close) -> np.ndarray:
+        return np.array([self.update(h, l, c) for h, l, c in zip(high, low, close)], dtype="float64")
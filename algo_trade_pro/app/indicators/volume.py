@@ -0,0 +1,41 @@
+"""
+app/indicators/volume.py
+
+Session VWAP: cumulative (typical price * volume) / cumulative volume, where the
+typical price is (high + low + close) / 3. Passing a ``session`` key (usually the
+trading date) to ``update`` starts a new accumulation whenever it changes.
+
+Usage:
+    vwap = VWAP()
+    vwap.update(bar.high, bar.low, bar.close, bar.volume, session=ts.date())
+"""
+
+from typing import Any, Optional
+
+import numpy as np
+
+from app.indicators.base import NAN, Indicator
+
+
+class VWAP(Indicator):
+    """Volume weighted average price, reset per session."""
+
+    def reset(self):
+        super().reset()
+        self._pv = 0.0
+        self._volume = 0.0
+        self.session: Optional[Any] = None
+
+    def update(self, high: float, low: float, close: float, volume: float,
+               session: Optional[Any] = None) -> float:
+        if session is not None and session != self.session:
+            self._pv = self._volume = 0.0
+            self.session = session
+        self._pv += (high + low + close) / 3.0 * volume
+        self._volume += volume
+        return self._push(self._pv / self._volume if self._volume > 0.0 else NAN)
+
+    def update_many(self, high, low, close, volume, sessions=None) -> np.ndarray:
+        sessions = [None] * len(close) if sessions is None else sessions
+        return np.array([self.update(h, l, c, v, s) for h, l, c, v, s in zip(high, low, close, volume, sessions)],
+                        dtype="float64")
@@ -11,7 +11,7 @@ import uvicorn
 from typing import List
 
 from app.core.controller import AlgoController
-from app.api.endpoints import strategies, trades, control, dashboard, websocket, system, reports, settings as sg, status
+from app.api.endpoints import strategies, trades, control, dashboard, websocket, system, reports, settings as sg, status, optimizer, models
 from app.websocket.connection_manager import ConnectionManager
 from app.models.database import init_database
 from app.services.logger import get_logger
@@ -91,6 +91,8 @@ app.include_router(websocket.router)
 app.include_router(reports.router, prefix="/api/v1")
 app.include_router(sg.router, prefix="/api/v1")
 app.include_router(status.router, prefix="/api/v1")
+app.include_router(optimizer.router, prefix="/api/v1")
+app.include_router(models.router, prefix="/api/v1")
 
 # @app.get("/")
 # async def root():
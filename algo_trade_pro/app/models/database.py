@@ -1,5 +1,5 @@
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.orm import scoped_session, sessionmaker, declarative_base
 from contextlib import contextmanager
 
@@ -16,12 +16,15 @@ Base = declarative_base()
 # Create SQLAlchemy engine
 DATABASE_URL = settings.DATABASE_URL or "sqlite:///./algo_trade.db"
 
+def _create_engine(url: str):
+    return create_engine(
+        url,
+        echo=settings.DEBUG,
+        connect_args={"check_same_thread": False} if "sqlite" in url else {}
+    )
+
 # Create engine & configure session
-engine = create_engine(
-    DATABASE_URL,
-    echo=settings.DEBUG,
-    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
-)
+engine = _create_engine(DATABASE_URL)
 
 # SessionFactory
 SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
@@ -44,16 +47,62 @@ def get_db_session():
     finally:
         session.close()
 
+# Columns added to existing tables after their first release: (table, column, SQL type).
+# create_all() never alters a table that already exists, so older database files get
+# them through add_missing_columns() (sql_migration.py does the same by hand).
+ADDED_COLUMNS = [
+    ("trades", "underlying_symbol", "VARCHAR(50)"),
+    ("trades", "model_version", "VARCHAR(40)"),
+    ("trades", "signal_id", "VARCHAR(100)"),
+]
+
+def add_missing_columns(bind=None):
+    """ALTER TABLE ... ADD COLUMN for every ADDED_COLUMNS entry the database lacks"""
+    bind = bind or engine
+    inspector = inspect(bind)
+    tables = set(inspector.get_table_names())
+    existing = {table: {c["name"] for c in inspector.get_columns(table)}
+                for table in {t for t, _, _ in ADDED_COLUMNS} if table in tables}
+    added = []
+    with bind.begin() as conn:
+        for table, column, sql_type in ADDED_COLUMNS:
+            if table in existing and column not in existing[table]:
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {sql_type}"))
+                existing[table].add(column)
+                added.append(f"{table}.{column}")
+    if added:
+        logger.info(f"Database migrated, added columns: {', '.join(added)}")
+    return added
+
 # Function to initialize the database
 def init_database():
     """Create all tables based on model definitions"""
     try:
         from app.models import trade, position, logs  # Import all ORM models
         Base.metadata.create_all(bind=engine)
+        add_missing_columns()
         logger.info("Database initialized with all models.")
     except Exception as e:
         logger.error(f"Failed to initialize database: {e}")
 
+def bind_database(url: str, create_tables: bool = True) -> str:
+    """
+    Point every session from get_db_session()/get_db() at ``url`` (e.g. an isolated
+    SQLite file for a replay run); returns the URL that was bound before.
+    """
+    global engine, DATABASE_URL
+    previous_url, previous_engine = DATABASE_URL, engine
+    SessionScoped.remove()
+    engine = _create_engine(url)
+    SessionLocal.configure(bind=engine)
+    DATABASE_URL = url
+    if previous_engine is not engine:
+        previous_engine.dispose()
+    if create_tables:
+        init_database()
+    logger.info(f"Database bound to {url}")
+    return previous_url
+
 def get_db():
     """Get database session for FastAPI dependency injection."""
     db = SessionLocal()
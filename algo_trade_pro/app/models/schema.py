@@ -28,6 +28,8 @@ class TradeResponse(TradeBase):
     stop_loss: Optional[float] = None
     target: Optional[float] = None
     error_message: Optional[str] = None
+    model_version: Optional[str] = None
+    signal_id: Optional[str] = None
 
     class Config:
         orm_mode = True
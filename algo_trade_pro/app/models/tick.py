@@ -0,0 +1,179 @@
+"""
+app/models/tick.py
+
+Compact in-memory market data records shared by the ingestion path.
+Tick and Bar are __slots__ classes (no per-instance __dict__) with the timestamp kept
+as an int of epoch nanoseconds (naive exchange wall clock), so the websocket callback,
+DataCollector, the queues, the tick writer and StrategyEngine pass them along without
+building dicts or parsing timestamps. Batches use the TICK_DTYPE NumPy layout.
+
+Dicts are produced only at the edges (API responses, DataFrames) via to_dict(); item
+access (tick["close"]) is kept for code written against the old dict records.
+"""
+
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+_EPOCH = datetime(1970, 1, 1)
+_ONE_MICROSECOND = timedelta(microseconds=1)
+
+# Fixed-width tick layout for batches (same records as the binary tick journal)
+TICK_DTYPE = np.dtype([
+    ("ts", "<i8"),         # epoch nanoseconds (wall clock of the feed)
+    ("symbol_id", "<i4"),
+    ("flags", "<i4"),      # reserved, keeps the float columns 8-byte aligned
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+    ("volume", "<f8"),
+])
+
+
+def to_epoch_ns(value) -> int:
+    """Epoch nanoseconds for an int, naive datetime, pd.Timestamp or timestamp string."""
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if type(value) is datetime and value.tzinfo is None:
+        # Fast path for the naive datetimes KiteTicker produces
+        return ((value - _EPOCH) // _ONE_MICROSECOND) * 1000
+    return pd.Timestamp(value).value
+
+
+def ns_to_datetime(ts_ns: int) -> datetime:
+    """Naive datetime (microsecond precision) for an epoch-ns timestamp."""
+    return _EPOCH + timedelta(microseconds=ts_ns // 1000)
+
+
+class Tick:
+    """One market data update for a symbol."""
+
+    __slots__ = ("symbol", "ts", "open", "high", "low", "close", "volume", "received_at")
+
+    def __init__(self, symbol: str, ts: int, open: float, high: float, low: float, close: float,
+                 volume: float = 0.0, received_at: Optional[float] = None):
+        self.symbol = symbol
+        self.ts = ts
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+        self.received_at = received_at  # perf_counter() at ingestion, for latency tracking
+
+    @classmethod
+    def from_kite(cls, symbol: str, tick: Dict[str, Any], received_at: Optional[float] = None) -> "Tick":
+        """
+        Build from a KiteTicker quote/full mode tick, stamped with its ingestion time
+        (``received_at``, perf_counter() now when not given) so the strategy engine's
+        latency covers the queue wait.
+        """
+        price = tick["last_price"]
+        ohlc = tick.get("ohlc")
+        stamp = tick.get("timestamp") or datetime.now()
+        if received_at is None:
+            received_at = time.perf_counter()
+        if ohlc:
+            return cls(symbol, to_epoch_ns(stamp), ohlc.get("open", price), ohlc.get("high", price),
+                       ohlc.get("low", price), price, tick.get("volume", 0) or 0.0, received_at)
+        return cls(symbol, to_epoch_ns(stamp), price, price, price, price, tick.get("volume", 0) or 0.0, received_at)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Tick":
+        close = data["close"]
+        return cls(
+            data["symbol"],
+            to_epoch_ns(data["timestamp"]),
+            data.get("open", close),
+            data.get("high", close),
+            data.get("low", close),
+            close,
+            data.get("volume", 0) or 0.0,
+            data.get("received_at"),
+        )
+
+    @property
+    def timestamp(self) -> pd.Timestamp:
+        return pd.Timestamp(self.ts)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "symbol": self.symbol,
+            "timestamp": self.timestamp,
+            "open": self.open,
+            "high": self.high,
+            "low": self.low,
+            "close": self.close,
+            "volume": self.volume,
+        }
+
+    def copy(self) -> "Tick":
+        return Tick(self.symbol, self.ts, self.open, self.high, self.low, self.close,
+                    self.volume, self.received_at)
+
+    def __getitem__(self, key: str):
+        return getattr(self, key)
+
+    def get(self, key: str, default=None):
+        return getattr(self, key, default)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Tick):
+            return NotImplemented
+        return (self.symbol, self.ts, self.open, self.high, self.low, self.close, self.volume) == \
+            (other.symbol, other.ts, other.open, other.high, other.low, other.close, other.volume)
+
+    def __repr__(self) -> str:
+        return f"<Tick[{self.symbol}] {self.timestamp} O={self.open} H={self.high} L={self.low} C={self.close} V={self.volume}>"
+
+
+def as_tick(data) -> Tick:
+    """Pass Ticks through; convert dict records (tests, legacy producers) at the boundary."""
+    return data if isinstance(data, Tick) else Tick.from_dict(data)
+
+
+class Bar:
+    """A completed (or in-progress) OHLCV bar, labelled by its right edge."""
+
+    __slots__ = ("symbol", "timeframe", "ts", "open", "high", "low", "close", "volume")
+
+    def __init__(self, symbol: str, timeframe: str, ts: int, open: float, high: float, low: float,
+                 close: float, volume: float = 0.0):
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.ts = ts
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+
+    @property
+    def timestamp(self) -> pd.Timestamp:
+        return pd.Timestamp(self.ts)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "symbol": self.symbol,
+            "timeframe": self.timeframe,
+            "timestamp": self.timestamp,
+            "open": self.open,
+            "high": self.high,
+            "low": self.low,
+            "close": self.close,
+            "volume": self.volume,
+        }
+
+    def __getitem__(self, key: str):
+        return getattr(self, key)
+
+    def get(self, key: str, default=None):
+        return getattr(self, key, default)
+
+    def __repr__(self) -> str:
+        return (f"<Bar[{self.symbol} {self.timeframe}] {self.timestamp} O={self.open} H={self.high} "
+                f"L={self.low} C={self.close} V={self.volume}>")
@@ -61,6 +61,9 @@ class Trade(Base):
     has_active_target = Column(Boolean, default=False)      # Track if target order is active
     has_active_stoploss = Column(Boolean, default=False)    # Track if SL order is active
     parent_trade_id = Column(String(50), nullable=True)     # For linking SL/Target to parent
+    underlying_symbol = Column(String(50), nullable=True)   # Index an option trade's SL/Target refer to
+    model_version = Column(String(40), nullable=True)       # ML model version that accepted the signal
+    signal_id = Column(String(100), nullable=True)          # Signal that opened the trade (feature store row id)
     
     # Execution tracking
     target_triggered = Column(Boolean, default=False)
@@ -0,0 +1,205 @@
+"""
+app/queue/market_queue.py
+
+Bounded market data queue with a selectable overflow policy and per-symbol conflation.
+Drop-in replacement for queue.Queue on the market data path (put/get/get_nowait/qsize/
+empty, raising queue.Empty and queue.Full the same way). Items are Tick records.
+
+Policies:
+    block            put() waits for space (queue.Queue semantics)
+    drop_newest      a tick arriving at a full queue is discarded
+    drop_oldest      the oldest queued tick is evicted to make room
+    conflate_latest  a symbol keeps at most one queued tick per window; newer ticks replace it
+    conflate_ohlcv   as above, but ticks are merged into a running OHLCV (open kept, high/low
+                     extended, close replaced, volume summed)
+
+Conflation only happens while the consumer is behind: a tick is merged into the queued
+tick of the same symbol, so a caught-up consumer still sees every tick. Ticks are never
+conflated across a ``conflate_window_seconds`` boundary so bars built downstream stay
+exact. Conflating queues evict the oldest entry when full.
+"""
+
+import threading
+import time
+from collections import deque
+from queue import Empty, Full
+from typing import Any, Deque, Dict, Optional
+
+from app.models.tick import Tick, as_tick
+from app.services.logger import get_logger
+
+logger = get_logger(__name__)
+
+POLICIES = ("block", "drop_newest", "drop_oldest", "conflate_latest", "conflate_ohlcv")
+
+NS_PER_SECOND = 1_000_000_000
+
+
+class MarketDataQueue:
+    """
+    Bounded FIFO of ticks with overflow and conflation counters.
+
+    Usage:
+        q = MarketDataQueue(maxsize=10000, policy="conflate_ohlcv", name="market_data")
+        q.put(tick)
+        tick = q.get(timeout=1)
+        q.get_stats()   # depth, high watermark, dropped, conflated, ...
+    """
+
+    def __init__(self, maxsize: int = 0, policy: str = "block", name: str = "market_data",
+                 conflate_window_seconds: int = 60):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown queue policy '{policy}', expected one of {POLICIES}")
+        self.maxsize = maxsize
+        self.policy = policy
+        self.name = name
+        self.conflate_window_ns = max(int(conflate_window_seconds), 1) * NS_PER_SECOND
+        self._conflate = policy.startswith("conflate")
+        self._queue: Deque[Tick] = deque()
+        # symbol -> (window, queued entry) for the newest queued tick of each symbol
+        self._pending: Dict[Any, tuple] = {}
+        self._mutex = threading.Lock()
+        self._not_empty = threading.Condition(self._mutex)
+        self._not_full = threading.Condition(self._mutex)
+        self._stats = {
+            "put": 0,
+            "get": 0,
+            "conflated": 0,
+            "dropped": 0,
+            "blocked": 0,
+            "max_depth": 0,
+        }
+
+    # ---------- queue.Queue compatible API ----------
+    def qsize(self) -> int:
+        with self._mutex:
+            return len(self._queue)
+
+    def empty(self) -> bool:
+        with self._mutex:
+            return not self._queue
+
+    def full(self) -> bool:
+        with self._mutex:
+            return 0 < self.maxsize <= len(self._queue)
+
+    def put(self, item: Tick, block: bool = True, timeout: Optional[float] = None):
+        if self._conflate:
+            item = as_tick(item)
+        with self._not_full:
+            self._stats["put"] += 1
+            if self._conflate and self._merge_pending(item):
+                return
+            if 0 < self.maxsize <= len(self._queue):
+                if self.policy == "block":
+                    self._wait_for_space(block, timeout)
+                elif self.policy == "drop_newest":
+                    self._stats["dropped"] += 1
+                    return
+                else:
+                    self._evict_oldest()
+            if self._conflate:
+                # Conflation merges in place, so queue a private copy of the producer's tick
+                entry = item.copy()
+                self._pending[item.symbol] = (item.ts // self.conflate_window_ns, entry)
+            else:
+                entry = item
+            self._queue.append(entry)
+            depth = len(self._queue)
+            if depth > self._stats["max_depth"]:
+                self._stats["max_depth"] = depth
+            self._not_empty.notify()
+
+    def put_nowait(self, item: Tick):
+        self.put(item, block=False)
+
+    def get(self, block: bool = True, timeout: Optional[float] = None) -> Tick:
+        with self._not_empty:
+            if not block:
+                if not self._queue:
+                    raise Empty
+            elif timeout is None:
+                while not self._queue:
+                    self._not_empty.wait()
+            else:
+                if timeout < 0:
+                    raise ValueError("'timeout' must be a non-negative number")
+                deadline = time.monotonic() + timeout
+                while not self._queue:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise Empty
+                    self._not_empty.wait(remaining)
+            entry = self._pop_oldest()
+            self._stats["get"] += 1
+            self._not_full.notify()
+            return entry
+
+    def get_nowait(self) -> Tick:
+        return self.get(block=False)
+
+    # ---------- internals (called with the mutex held) ----------
+    def _wait_for_space(self, block: bool, timeout: Optional[float]):
+        self._stats["blocked"] += 1
+        if not block:
+            raise Full
+        if timeout is None:
+            while 0 < self.maxsize <= len(self._queue):
+                self._not_full.wait()
+            return
+        deadline = time.monotonic() + timeout
+        while 0 < self.maxsize <= len(self._queue):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise Full
+            self._not_full.wait(remaining)
+
+    def _pop_oldest(self) -> Tick:
+        entry = self._queue.popleft()
+        if self._conflate:
+            pending = self._pending.get(entry.symbol)
+            if pending is not None and pending[1] is entry:
+                del self._pending[entry.symbol]
+        return entry
+
+    def _evict_oldest(self):
+        self._pop_oldest()
+        self._stats["dropped"] += 1
+
+    def _merge_pending(self, item: Tick) -> bool:
+        """Fold ``item`` into the queued tick of the same symbol; False if it must be queued."""
+        pending = self._pending.get(item.symbol)
+        if pending is None:
+            return False
+        window, entry = pending
+        if item.ts // self.conflate_window_ns != window:
+            return False
+        # received_at is left alone: latency is measured from the oldest tick the entry stands for
+        if self.policy == "conflate_ohlcv":
+            if item.high > entry.high:
+                entry.high = item.high
+            if item.low < entry.low:
+                entry.low = item.low
+            entry.volume = (entry.volume or 0.0) + (item.volume or 0.0)
+        else:
+            entry.open, entry.high, entry.low = item.open, item.high, item.low
+            entry.volume = item.volume
+        entry.close = item.close
+        entry.ts = item.ts
+        self._stats["conflated"] += 1
+        return True
+
+    # ---------- monitoring ----------
+    def get_stats(self) -> Dict[str, Any]:
+        """Depth, high watermark and overflow/conflation counters."""
+        with self._mutex:
+            stats = dict(self._stats)
+            stats["depth"] = len(self._queue)
+        stats["maxsize"] = self.maxsize
+        stats["policy"] = self.policy
+        return stats
+
+    def reset_stats(self):
+        with self._mutex:
+            for name in self._stats:
+                self._stats[name] = 0
@@ -9,15 +9,60 @@ For typical trading scenarios, FIFO order is sufficient; if you require prioriti
 use PriorityQueue from the 'queue' module.
 """
 
+from collections import deque
 from queue import Queue
 
-# Market data (dict or pandas-like record) posted by DataCollector, consumed by StrategyEngine
-market_data_queue = Queue(maxsize=0)  # 0 means infinite size
+from app.queue.market_queue import MarketDataQueue
+from app.config.settings import get_settings
+
+settings = get_settings()
+
+# Market data (dict or pandas-like record) posted by DataCollector, consumed by StrategyEngine.
+# Bounded; by default DataCollector waits for room, so strategies see every tick. Conflation
+# per symbol while the engine is behind is opt-in (MARKET_DATA_QUEUE_POLICY, see MarketDataQueue).
+market_data_queue = MarketDataQueue(
+    maxsize=settings.MARKET_DATA_QUEUE_MAXSIZE,
+    policy=settings.MARKET_DATA_QUEUE_POLICY,
+    name="market_data_queue",
+    conflate_window_seconds=settings.QUEUE_CONFLATE_WINDOW_SECONDS,
+)
 
 # Signals generated by strategies, fetched by the trade executor
 trade_signal_queue = Queue(maxsize=0)
 
-websocket_queue = Queue(maxsize=0)
+# Summaries of the most recent signals (newest last), served by /api/signals/live
+latest_signals = deque(maxlen=200)
+
+# Raw ticks posted by the broker websocket callback, consumed by DataCollector
+websocket_queue = MarketDataQueue(
+    maxsize=settings.WEBSOCKET_QUEUE_MAXSIZE,
+    policy=settings.WEBSOCKET_QUEUE_POLICY,
+    name="websocket_queue",
+    conflate_window_seconds=settings.QUEUE_CONFLATE_WINDOW_SECONDS,
+)
+
+# Queues reported by the /pipeline/status endpoint
+MONITORED_QUEUES = {
+    "websocket_queue": websocket_queue,
+    "market_data_queue": market_data_queue,
+}
+
+
+def record_signal(signal: dict):
+    """Keep a JSON-friendly summary of ``signal``, including the model version that scored it."""
+    metadata = signal.get("metadata") or {}
+    latest_signals.append({
+        "signal_id": signal.get("signal_id"),
+        "strategy": signal.get("strategy"),
+        "symbol": signal.get("symbol"),
+        "action": signal.get("action"),
+        "price": signal.get("price"),
+        "quantity": signal.get("quantity"),
+        "signal_type": signal.get("signal_type"),
+        "timestamp": signal.get("timestamp"),
+        "model_version": metadata.get("model_version"),
+    })
+
 
 # Example Usage in Threads:
 #   market_data_queue.put(data_dict)
@@ -0,0 +1,164 @@
+"""
+app/services/bar_builder.py
+
+Streaming multi-timeframe OHLCV bar builder.
+Ticks are folded into the open bar of every configured timeframe in O(1); when a
+bar completes it is appended to a bounded per-(symbol, timeframe) history and a
+"bar closed" event is emitted to registered listeners.
+
+Bars use the same semantics as ``df.resample(freq, label="right", closed="right")``:
+a bar covers ``(label - freq, label]`` and is labelled by its right edge. Daily bars
+follow the same rule, so the bar for trading date D is labelled D+1 00:00.
+"""
+
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.models.tick import Bar
+from app.services.ring_buffer import OHLCVRingBuffer
+from app.services.logger import get_logger
+from app.config.settings import get_settings
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+NS_PER_SECOND = 1_000_000_000
+
+# Supported timeframes -> bar length in nanoseconds
+TIMEFRAMES: Dict[str, int] = {
+    "1min": 60 * NS_PER_SECOND,
+    "5min": 5 * 60 * NS_PER_SECOND,
+    "15min": 15 * 60 * NS_PER_SECOND,
+    "1D": 24 * 60 * 60 * NS_PER_SECOND,
+}
+
+BarListener = Callable[[str, str, Bar], None]
+
+
+def bar_label(ts_ns: int, timeframe: str) -> int:
+    """Right edge of the (label - freq, label] bin that contains ``ts_ns``."""
+    freq = TIMEFRAMES[timeframe]
+    return -((-ts_ns) // freq) * freq
+
+
+class BarBuilder:
+    """
+    Incrementally builds right-labelled, right-closed OHLCV bars for several timeframes.
+
+    Usage:
+        builder = BarBuilder(["1min", "5min"])
+        builder.add_listener(lambda symbol, timeframe, bar: ...)
+        builder.update("NIFTY 50", ts, o, h, l, c, v)   # emits closed bars
+        df = builder.to_frame("NIFTY 50", "5min")       # completed bars only
+    """
+
+    def __init__(self, timeframes: Optional[Iterable[str]] = None, history_size: Optional[int] = None):
+        timeframes = list(timeframes or TIMEFRAMES.keys())
+        unknown = [tf for tf in timeframes if tf not in TIMEFRAMES]
+        if unknown:
+            raise ValueError(f"Unsupported timeframes: {unknown}")
+        self.timeframes = timeframes
+        self.history_size = history_size or settings.BAR_HISTORY_SIZE
+        # (symbol, timeframe) -> [label, open, high, low, close, volume]
+        self._open_bars: Dict[Tuple[str, str], list] = {}
+        self._history: Dict[Tuple[str, str], OHLCVRingBuffer] = {}
+        self._last_closed: Dict[Tuple[str, str], int] = {}
+        self._listeners: List[BarListener] = []
+        self._lock = threading.RLock()
+        self.late_ticks = 0
+        self.bars_closed = 0
+
+    def add_listener(self, listener: BarListener):
+        """Register ``listener(symbol, timeframe, bar)`` for bar-closed events."""
+        self._listeners.append(listener)
+
+    def update(self, symbol: str, ts, open_: float, high: float, low: float,
+               close: float, volume: float = 0.0) -> List[Tuple[str, str, Bar]]:
+        """Fold one tick into every timeframe; returns the bars this tick closed."""
+        ts_ns = int(ts) if isinstance(ts, (int, np.integer)) else pd.Timestamp(ts).value
+        closed = []
+        with self._lock:
+            for tf in self.timeframes:
+                key = (symbol, tf)
+                label = bar_label(ts_ns, tf)
+                bar = self._open_bars.get(key)
+                if bar is None or label > bar[0]:
+                    if label <= self._last_closed.get(key, -1):
+                        # Tick belongs to a bar that was already closed (out of order / clock close)
+                        self.late_ticks += 1
+                        continue
+                    if bar is not None:
+                        closed.append(self._close(key, bar))
+                    self._open_bars[key] = [label, open_, high, low, close, volume or 0.0]
+                elif label < bar[0]:
+                    # Out-of-order tick for an older bar: fold into the open bar
+                    self.late_ticks += 1
+                    bar[2] = max(bar[2], high)
+                    bar[3] = min(bar[3], low)
+                    bar[5] += volume or 0.0
+                else:
+                    bar[2] = max(bar[2], high)
+                    bar[3] = min(bar[3], low)
+                    bar[4] = close
+                    bar[5] += volume or 0.0
+        self._emit(closed)
+        return closed
+
+    def close_due(self, now, grace_seconds: float = 0.0) -> List[Tuple[str, str, Bar]]:
+        """Close every open bar whose right edge is at or before ``now - grace``."""
+        now_ns = int(now) if isinstance(now, (int, np.integer)) else pd.Timestamp(now).value
+        cutoff = now_ns - int(grace_seconds * NS_PER_SECOND)
+        closed = []
+        with self._lock:
+            for key, bar in list(self._open_bars.items()):
+                if bar[0] <= cutoff:
+                    closed.append(self._close(key, bar))
+                    del self._open_bars[key]
+        self._emit(closed)
+        return closed
+
+    def _close(self, key: Tuple[str, str], bar: list) -> Tuple[str, str, Bar]:
+        symbol, tf = key
+        history = self._history.get(key)
+        if history is None:
+            history = self._history[key] = OHLCVRingBuffer(self.history_size)
+        label, o, h, l, c, v = bar
+        history.append(label, o, h, l, c, v)
+        self._last_closed[key] = label
+        self.bars_closed += 1
+        return symbol, tf, Bar(symbol, tf, label, o, h, l, c, v)
+
+    def _emit(self, closed: List[Tuple[str, str, Bar]]):
+        for symbol, tf, bar in closed:
+            for listener in self._listeners:
+                try:
+                    listener(symbol, tf, bar)
+                except Exception as e:
+                    logger.error("Bar listener failed for %s %s: %s", symbol, tf, e, extra={"rate_limit": 5})
+
+    def history(self, symbol: str, timeframe: str) -> Optional[OHLCVRingBuffer]:
+        """Completed bars for a symbol/timeframe (None if no bar has closed yet)."""
+        return self._history.get((symbol, timeframe))
+
+    def bar_count(self, symbol: str, timeframe: str) -> int:
+        history = self._history.get((symbol, timeframe))
+        return len(history) if history is not None else 0
+
+    def open_bar(self, symbol: str, timeframe: str) -> Optional[Bar]:
+        """The in-progress bar, if any."""
+        with self._lock:
+            bar = self._open_bars.get((symbol, timeframe))
+            if bar is None:
+                return None
+            return Bar(symbol, timeframe, *bar)
+
+    def to_frame(self, symbol: str, timeframe: str, n: Optional[int] = None) -> pd.DataFrame:
+        """Completed bars as an OHLCV DataFrame indexed by the bar label."""
+        with self._lock:
+            history = self._history.get((symbol, timeframe))
+            if history is None:
+                return pd.DataFrame(columns=["open", "high", "low", "close", "volume"])
+            return history.to_frame(n)
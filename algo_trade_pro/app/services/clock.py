@@ -0,0 +1,114 @@
+"""
+app/services/clock.py
+
+Process-wide clock. The engine, trade executor and SL/target monitor read the
+time through it, so a replay can run those same components under simulated time.
+
+    SystemClock     the wall clock (default)
+    SimulatedClock  exchange time set by the replay driver; sleep() advances it
+                    instead of blocking
+
+Times follow the feed convention: naive exchange wall clock (IST) for now(),
+naive UTC for utcnow().
+
+Usage:
+    clock = get_clock()
+    clock.now(), clock.utcnow(), clock.time()
+
+    with use_clock(SimulatedClock("2025-08-20 09:15")) as clock:
+        clock.advance_to(tick.ts)
+"""
+
+import threading
+import time as _time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Iterator
+
+import pandas as pd
+
+from app.models.tick import ns_to_datetime, to_epoch_ns
+
+IST_OFFSET = timedelta(hours=5, minutes=30)
+
+
+class SystemClock:
+    """Wall clock."""
+
+    simulated = False
+
+    def now(self) -> datetime:
+        return datetime.now()
+
+    def utcnow(self) -> datetime:
+        return datetime.utcnow()
+
+    def time(self) -> float:
+        return _time.time()
+
+    def sleep(self, seconds: float):
+        _time.sleep(seconds)
+
+
+class SimulatedClock:
+    """Clock that only moves when told to (by the replay driver, or by sleep())."""
+
+    simulated = True
+
+    def __init__(self, start=None, utc_offset: timedelta = IST_OFFSET):
+        self._ns = to_epoch_ns(start) if start is not None else pd.Timestamp.now().value
+        self._offset_ns = int(utc_offset.total_seconds() * 1_000_000_000)
+        self._lock = threading.Lock()
+
+    @property
+    def ns(self) -> int:
+        """Exchange wall clock in epoch nanoseconds."""
+        return self._ns
+
+    def advance_to(self, ts) -> int:
+        """Move to ``ts`` (never backwards)."""
+        ts = to_epoch_ns(ts)
+        with self._lock:
+            if ts > self._ns:
+                self._ns = ts
+            return self._ns
+
+    def advance(self, seconds: float) -> int:
+        with self._lock:
+            self._ns += int(seconds * 1_000_000_000)
+            return self._ns
+
+    def now(self) -> datetime:
+        return ns_to_datetime(self._ns)
+
+    def utcnow(self) -> datetime:
+        return ns_to_datetime(self._ns - self._offset_ns)
+
+    def time(self) -> float:
+        return (self._ns - self._offset_ns) / 1_000_000_000
+
+    def sleep(self, seconds: float):
+        self.advance(seconds)
+
+
+_clock = SystemClock()
+
+
+def get_clock():
+    return _clock
+
+
+def set_clock(clock) -> object:
+    """Install ``clock`` process-wide; returns the previous one."""
+    global _clock
+    previous, _clock = _clock, clock
+    return previous
+
+
+@contextmanager
+def use_clock(clock) -> Iterator:
+    previous = set_clock(clock)
+    try:
+        yield clock
+    finally:
+        set_clock(previous)
@@ -1,103 +1,728 @@
-import pandas as pd
+"""
+app/services/feature_store.py
+
+Feature/label store for trading signals (e.g. the CPR meta-label training set).
+
+Each dataset is a date-partitioned Parquet dataset:
+
+    BASEDIR/<name>/_schema.json               schema version, feature width and dtype, column types
+    BASEDIR/<name>/date=2025-08-06/part-*.parquet
+    BASEDIR/<name>/_labels/labels-*.parquet   label sidecar: (signal_id, label, exit_time, exit_price, labelled_at)
+    BASEDIR/<name>/_rejects/rejects-*.jsonl   rows that could not be written (see below)
+    BASEDIR/<name>/.lock                      cross-process lock (fcntl) of the dataset
+
+- The ``features`` list of an observation is stored as typed columns f000, f001, ...
+  (FEATURE_STORE_FEATURE_DTYPE), so reading a feature matrix is a columnar read with
+  no per-row parsing.
+- append() only adds to an in-memory buffer. The buffer is written as one part file
+  per date when it holds FEATURE_STORE_FLUSH_ROWS rows, every FEATURE_STORE_FLUSH_SECONDS
+  (background flusher), at exit, and before any read of the dataset. A failed write
+  keeps the rows buffered for the next flush; after FEATURE_STORE_MAX_FLUSH_ATTEMPTS
+  failures the rows are written one by one and those that still fail are moved to
+  the _rejects directory as JSON lines. append() never raises because of a flush.
+- Every row gets a ``signal_id`` when it is appended (returned by append()). Labels
+  are written to the sidecar keyed by that id -- thousands per call with
+  bulk_update_labels() -- without touching the feature files; reads apply the latest
+  sidecar label per id over the stored one, and compact() folds the sidecar back in.
+- Strategies may append from worker processes, so the in-process lock is not enough:
+  rewriting partitions (compact, schema upgrade, CSV migration) and folding the label
+  sidecar hold an exclusive lock on ``.lock``; adding part files and reading hold a
+  shared one.
+- A legacy ``BASEDIR/<name>.csv`` (features as stringified lists) is migrated once, the
+  first time the dataset is used; the CSV is left in place.
+
+Usage:
+    signal_id = FeatureStore.append("cpr_meta_signals", feature_dict, label=None)
+    FeatureStore.bulk_update_labels("cpr_meta_signals", {signal_id: 1, ...})
+    X = FeatureStore.load_matrix("cpr_meta_signals", start="2025-08-01", end="2025-08-31")
+    df = FeatureStore.load_frame("cpr_meta_signals", columns=["dt", "label"])
+
+    python -m app.services.feature_store migrate cpr_meta_signals
+"""
+
+import argparse
+import atexit
+import json
 import os
-from threading import Lock
-from typing import Any, List, Optional, Dict
+import shutil
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from threading import Lock, RLock
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from app.config.settings import get_settings
+from app.services.logger import get_logger
+
+try:
+    import fcntl
+except ImportError:  # Windows: only the in-process lock applies
+    fcntl = None
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+SCHEMA_VERSION = 2  # 2: signal_id column + label sidecar
+FEATURE_PREFIX = "f"
+_NUMPY_SCALAR = r"np\.\w+\(([^()]*)\)"  # np.float64(1.5) -> 1.5, as written by the CSV store
+
+# Types of columns that may be all-null in the first batch written
+COLUMN_TYPES = {
+    "signal_id": "string",
+    "dt": "timestamp[ns]",
+    "exit_time": "timestamp[ns]",
+    "label": "int8",
+    "direction": "int8",
+    "entry_price": "float64",
+    "exit_price": "float64",
+    "target": "float64",
+    "stoploss": "float64",
+}
+
+
+LABEL_SCHEMA = pa.schema([("signal_id", pa.string()), ("label", pa.int8()), ("exit_time", pa.timestamp("ns")),
+                          ("exit_price", pa.float64()), ("labelled_at", pa.timestamp("ns"))])
+LABEL_FIELDS = ("label", "exit_time", "exit_price")  # sidecar values applied over the stored columns
+
+
+def new_signal_id() -> str:
+    return uuid.uuid4().hex
+
+
+def feature_columns(n_features: int) -> List[str]:
+    return [f"{FEATURE_PREFIX}{i:03d}" for i in range(n_features)]
+
+
+def parse_feature_strings(column: pd.Series) -> np.ndarray:
+    """Stringified feature lists (legacy CSV) -> float matrix, NaN-padded to the widest row."""
+    if not len(column):
+        return np.empty((0, 0))
+    text = column.astype(str).str.replace(_NUMPY_SCALAR, r"\1", regex=True).str.strip("[] ")
+    parts = text.str.split(",", expand=True)
+    return parts.apply(pd.to_numeric, errors="coerce").to_numpy("float64", copy=True)
+
+
+def _arrow_type(values: pd.Series, name: str) -> str:
+    if name in COLUMN_TYPES:
+        return COLUMN_TYPES[name]
+    if pd.api.types.is_bool_dtype(values):
+        return "bool"
+    if pd.api.types.is_integer_dtype(values):
+        return "int64"
+    if pd.api.types.is_float_dtype(values):
+        return "float64"
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return "timestamp[ns]"
+    return "string"
+
 
 class FeatureStore:
     """
     Utility for logging and loading trading signal features and labels,
     e.g. for meta-labeling CPR ML training.
-    Features and labels are stored as serialized lists and columns.
 
     Usage:
-        FeatureStore.append("cpr_meta_signals", feature_dict, label=1)
-        FeatureStore.load_all("cpr_meta_signals")
-        FeatureStore.update_label("cpr_meta_signals", features, label)
+        signal_id = FeatureStore.append("cpr_meta_signals", feature_dict)
+        FeatureStore.bulk_update_labels("cpr_meta_signals", {signal_id: 1})
+        FeatureStore.load_matrix("cpr_meta_signals")
     """
-    # You can switch to Parquet for faster, larger-scale ops
     BASEDIR = "./feature_store/"
-    SUFFIX = ".csv"
-    _lock = Lock()
+    LEGACY_SUFFIX = ".csv"
+    _lock = RLock()
+    _buffers: Dict[str, List[Dict[str, Any]]] = {}
+    _first_buffered: Dict[str, float] = {}
+    _flush_failures: Dict[str, int] = {}
+    _flusher: Optional[threading.Thread] = None
+    _flusher_lock = Lock()
+    _label_cache: Dict[str, Any] = {}
+    _held = threading.local()  # dataset -> [file, exclusive, depth] of this thread's file locks
+
+    # ---------- layout / schema ----------
+
+    @classmethod
+    def _dataset_dir(cls, name: str) -> str:
+        return os.path.join(cls.BASEDIR, name)
+
+    @classmethod
+    def _legacy_path(cls, name: str) -> str:
+        return os.path.join(cls.BASEDIR, f"{name}{cls.LEGACY_SUFFIX}")
 
     @classmethod
-    def _file_path(cls, name: str) -> str:
-        os.makedirs(cls.BASEDIR, exist_ok=True)
-        return os.path.join(cls.BASEDIR, f"{name}{cls.SUFFIX}")
+    def _labels_dir(cls, name: str) -> str:
+        return os.path.join(cls._dataset_dir(name), "_labels")
 
     @classmethod
-    def append(cls, name: str, feat: Dict[str, Any], label: Optional[int] = None):
+    def _rejects_dir(cls, name: str) -> str:
+        return os.path.join(cls._dataset_dir(name), "_rejects")
+
+    @classmethod
+    def _schema_path(cls, name: str) -> str:
+        return os.path.join(cls._dataset_dir(name), "_schema.json")
+
+    @classmethod
+    def schema(cls, name: str) -> Optional[Dict[str, Any]]:
+        """The dataset's schema (None if nothing was written yet)."""
+        cls.flush(name)
+        cls._migrate_if_needed(name)
+        return cls._read_schema(name)
+
+    @classmethod
+    def _read_schema(cls, name: str) -> Optional[Dict[str, Any]]:
+        path = cls._schema_path(name)
+        if not os.path.isfile(path):
+            return None
+        with open(path) as f:
+            schema = json.load(f)
+        if schema.get("schema_version", 0) > SCHEMA_VERSION:
+            raise ValueError(f"Feature store {name!r} has schema version {schema['schema_version']}, "
+                             f"this build reads up to {SCHEMA_VERSION}")
+        return schema
+
+    @classmethod
+    def _write_schema(cls, name: str, schema: Dict[str, Any]):
+        os.makedirs(cls._dataset_dir(name), exist_ok=True)
+        path = cls._schema_path(name)
+        with open(path + ".tmp", "w") as f:
+            json.dump(schema, f, indent=2)
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    @contextmanager
+    def _file_lock(cls, name: str, exclusive: bool = True):
+        """
+        Cross-process lock of a dataset (flock on ``<name>/.lock``), re-entrant within a
+        thread. An exclusive lock already held covers nested shared requests.
         """
-        Appends a new feature observation (with optional label) to the store.
-        Fields must all be JSON/pickle serializable.
+        if fcntl is None:
+            yield
+            return
+        held = cls._held.__dict__.setdefault("locks", {})
+        key = os.path.abspath(cls._dataset_dir(name))
+        entry = held.get(key)
+        if entry is not None:
+            if exclusive and not entry[1]:
+                fcntl.flock(entry[0], fcntl.LOCK_EX)
+                entry[1] = True
+            entry[2] += 1
+            try:
+                yield
+            finally:
+                entry[2] -= 1
+            return
+        os.makedirs(key, exist_ok=True)
+        handle = open(os.path.join(key, ".lock"), "a")
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            held[key] = [handle, exclusive, 1]
+            yield
+        finally:
+            held.pop(key, None)
+            handle.close()  # releases the flock
+
+    @staticmethod
+    def _arrow_schema(schema: Dict[str, Any]) -> pa.Schema:
+        return pa.schema([(column, pa.type_for_alias(kind)) for column, kind in schema["columns"].items()])
+
+    # ---------- writing ----------
+
+    @classmethod
+    def append(cls, name: str, feat: Dict[str, Any], label: Optional[int] = None) -> str:
+        """
+        Buffers a new feature observation (with optional label); it is written on the
+        next flush. ``feat["features"]`` is the feature vector. Returns the row's
+        signal_id (``feat["signal_id"]`` if given, else a new one).
         """
         entry = feat.copy()
+        entry["signal_id"] = entry.get("signal_id") or new_signal_id()
         if label is not None:
             entry["label"] = label
         with cls._lock:
-            file_path = cls._file_path(name)
-            df = pd.DataFrame([entry])
-            header = not os.path.isfile(file_path)
-            df.to_csv(file_path, mode="a", header=header, index=False)
+            buffer = cls._buffers.setdefault(name, [])
+            if not buffer:
+                cls._first_buffered[name] = time.monotonic()
+            buffer.append(entry)
+            full = len(buffer) >= settings.FEATURE_STORE_FLUSH_ROWS
+        if full:
+            try:
+                cls.flush(name)
+            except Exception as e:
+                # The rows stay buffered; the caller (a strategy) must not fail on the store
+                logger.error(f"FeatureStore: flush of {name} failed, {len(cls._buffers.get(name, []))} rows "
+                             f"kept for the next attempt: {e}")
+        cls._ensure_flusher()
+        return entry["signal_id"]
+
+    @classmethod
+    def _ensure_flusher(cls):
+        if cls._flusher is not None or settings.FEATURE_STORE_FLUSH_SECONDS <= 0:
+            return
+        with cls._flusher_lock:
+            if cls._flusher is None:
+                cls._flusher = threading.Thread(target=cls._flush_loop, name="FeatureStoreFlusher", daemon=True)
+                cls._flusher.start()
+
+    @classmethod
+    def _flush_loop(cls):
+        interval = settings.FEATURE_STORE_FLUSH_SECONDS
+        while True:
+            time.sleep(min(interval, 5.0))
+            now = time.monotonic()
+            for name, since in list(cls._first_buffered.items()):
+                if now - since >= interval:
+                    try:
+                        cls.flush(name)
+                    except Exception as e:
+                        logger.error(f"FeatureStore: flush of {name} failed: {e}")
+
+    @classmethod
+    def flush(cls, name: Optional[str] = None) -> int:
+        """Write buffered rows of ``name`` (default: every dataset); returns rows written."""
+        if name is None:
+            return sum(cls.flush(n) for n in list(cls._buffers))
+        with cls._lock:
+            rows = cls._buffers.pop(name, [])
+            cls._first_buffered.pop(name, None)
+            if rows:
+                try:
+                    cls._migrate_if_needed(name)
+                    cls._write_rows(name, pd.DataFrame(rows))
+                except Exception:
+                    failures = cls._flush_failures.get(name, 0) + 1
+                    if failures >= settings.FEATURE_STORE_MAX_FLUSH_ATTEMPTS:
+                        cls._flush_failures.pop(name, None)
+                        return cls._write_or_reject(name, rows)
+                    # Keep the rows for the next flush
+                    cls._flush_failures[name] = failures
+                    cls._buffers[name] = rows + cls._buffers.get(name, [])
+                    cls._first_buffered.setdefault(name, time.monotonic())
+                    raise
+                cls._flush_failures.pop(name, None)
+        return len(rows)
+
+    @classmethod
+    def _write_or_reject(cls, name: str, rows: List[Dict[str, Any]]) -> int:
+        """Last attempt: write the rows one by one and move the ones that fail to _rejects."""
+        rejected = []
+        for row in rows:
+            try:
+                cls._write_rows(name, pd.DataFrame([row]))
+            except Exception as e:
+                rejected.append({**row, "_error": repr(e)})
+        if rejected:
+            directory = cls._rejects_dir(name)
+            path = os.path.join(directory, f"rejects-{time.time_ns()}-{uuid.uuid4().hex[:8]}.jsonl")
+            try:
+                os.makedirs(directory, exist_ok=True)
+                with open(path, "w") as f:
+                    for row in rejected:
+                        f.write(json.dumps(row, default=str) + "\n")
+                logger.error(f"FeatureStore: {len(rejected)} rows of {name} could not be written after "
+                             f"{settings.FEATURE_STORE_MAX_FLUSH_ATTEMPTS} attempts, moved to {path}")
+            except OSError as e:
+                logger.error(f"FeatureStore: {len(rejected)} rows of {name} dropped, "
+                             f"the reject file could not be written either: {e}")
+        return len(rows) - len(rejected)
+
+    @classmethod
+    def _to_columns(cls, name: str, df: pd.DataFrame) -> pd.DataFrame:
+        """Expand ``features`` into typed columns and settle the dataset schema."""
+        schema = cls._read_schema(name)
+        features = df.pop("features") if "features" in df else pd.Series([[]] * len(df))
+        ids = df.pop("signal_id") if "signal_id" in df else pd.Series(None, index=df.index, dtype=object)
+        missing = ids.isna()
+        if missing.any():
+            ids = ids.copy()
+            ids[missing] = [new_signal_id() for _ in range(int(missing.sum()))]
+        df.insert(0, "signal_id", ids.astype(str))
+        matrix = pd.DataFrame(features.tolist(), index=df.index).to_numpy("float64") if len(df) else np.empty((0, 0))
+        if schema is None:
+            schema = {
+                "schema_version": SCHEMA_VERSION,
+                "n_features": int(matrix.shape[1]),
+                "feature_dtype": settings.FEATURE_STORE_FEATURE_DTYPE,
+                "columns": {},
+            }
+        n_features = schema["n_features"]
+        if matrix.shape[1] != n_features:
+            logger.warning(f"FeatureStore: {name} expects {n_features} features, got {matrix.shape[1]}; "
+                           f"padding/truncating")
+            fixed = np.full((len(df), n_features), np.nan)
+            width = min(n_features, matrix.shape[1])
+            fixed[:, :width] = matrix[:, :width]
+            matrix = fixed
+
+        if "dt" in df:
+            df["dt"] = pd.to_datetime(df["dt"])
+        if "exit_time" in df:
+            df["exit_time"] = pd.to_datetime(df["exit_time"])
+        columns = dict(schema["columns"])
+        changed = not columns
+        for column in df.columns:
+            if column not in columns:
+                columns[column] = _arrow_type(df[column], column)
+                changed = True
+        for column in feature_columns(n_features):
+            if column not in columns:
+                columns[column] = schema["feature_dtype"]
+                changed = True
+        if changed:
+            schema["columns"] = columns
+            cls._write_schema(name, schema)
+
+        features = pd.DataFrame(matrix.astype(schema["feature_dtype"]), columns=feature_columns(n_features),
+                                index=df.index)
+        out = pd.concat([df, features], axis=1)
+        return out.reindex(columns=list(columns))
+
+    @classmethod
+    def _write_rows(cls, name: str, df: pd.DataFrame):
+        df = cls._to_columns(name, df)
+        schema = cls._read_schema(name)
+        table_schema = cls._arrow_schema(schema)
+        dates = df["dt"].dt.strftime("%Y-%m-%d") if "dt" in df else pd.Series(
+            pd.Timestamp.now().strftime("%Y-%m-%d"), index=df.index)
+        with cls._file_lock(name, exclusive=False):
+            for date, part in df.groupby(dates.to_numpy(), sort=True):
+                cls._write_part(name, date, pa.Table.from_pandas(part, schema=table_schema, preserve_index=False))
+
+    @classmethod
+    def _write_part(cls, name: str, date: str, table: pa.Table) -> str:
+        directory = os.path.join(cls._dataset_dir(name), f"date={date}")
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"part-{time.time_ns()}-{uuid.uuid4().hex[:8]}.parquet")
+        pq.write_table(table, path + ".tmp", compression="zstd")
+        os.replace(path + ".tmp", path)
+        return path
+
+    # ---------- reading ----------
+
+    @classmethod
+    def _dataset(cls, name: str) -> Optional[ds.Dataset]:
+        cls.flush(name)
+        cls._migrate_if_needed(name)
+        schema = cls._read_schema(name)
+        if schema is None:
+            return None
+        return ds.dataset(
+            cls._dataset_dir(name),
+            schema=cls._arrow_schema(schema).append(pa.field("date", pa.string())),
+            format="parquet",
+            partitioning=ds.partitioning(pa.schema([("date", pa.string())]), flavor="hive"),
+            exclude_invalid_files=True,
+        )
+
+    @staticmethod
+    def _filter(start, end):
+        expression = None
+        for value, op in ((start, "ge"), (end, "le")):
+            if value is None:
+                continue
+            day = pd.Timestamp(value).strftime("%Y-%m-%d")
+            clause = ds.field("date") >= day if op == "ge" else ds.field("date") <= day
+            expression = clause if expression is None else expression & clause
+        return expression
+
+    @classmethod
+    def load_table(cls, name: str, start=None, end=None, columns: Optional[Sequence[str]] = None) -> Optional[pa.Table]:
+        """
+        Rows with dates in [start, end] (inclusive, by partition date) as an Arrow
+        table, with sidecar labels applied.
+        """
+        dataset = cls._dataset(name)
+        if dataset is None:
+            return None
+        wanted = list(columns) if columns is not None else None
+        read = wanted
+        if wanted is not None and set(LABEL_FIELDS) & set(wanted) and "signal_id" not in wanted:
+            read = [*wanted, "signal_id"]
+        with cls._file_lock(name, exclusive=False):
+            table = dataset.to_table(columns=read, filter=cls._filter(start, end))
+            index = cls.label_index(name)
+        table = cls._apply_labels(table, index)
+        return table.select(wanted) if wanted is not None else table.drop_columns(["date"])
+
+    @classmethod
+    def load_frame(cls, name: str, start=None, end=None, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        table = cls.load_table(name, start, end, columns)
+        return table.to_pandas() if table is not None else pd.DataFrame()
+
+    @classmethod
+    def load_matrix(cls, name: str, start=None, end=None, columns: Optional[Sequence[str]] = None) -> np.ndarray:
+        """
+        (rows x columns) float array of ``columns`` (default: the feature columns),
+        straight from the columnar files. Nulls (e.g. missing labels) become NaN.
+        """
+        schema = cls.schema(name)
+        if schema is None:
+            return np.empty((0, len(columns) if columns is not None else 0))
+        columns = list(columns) if columns is not None else feature_columns(schema["n_features"])
+        table = cls.load_table(name, start, end, columns)
+        dtype = np.result_type(*(np.float64 if c not in feature_columns(schema["n_features"])
+                                 else np.dtype(schema["feature_dtype"]) for c in columns))
+        matrix = np.empty((table.num_rows, len(columns)), dtype=dtype)
+        for i, column in enumerate(columns):
+            matrix[:, i] = table.column(column).to_numpy(zero_copy_only=False)
+        return matrix
 
     @classmethod
     def load_all(cls, name: str) -> List[Dict[str, Any]]:
         """
-        Loads all rows from the feature store for this dataset.
+        Loads all rows from the feature store for this dataset, with ``features`` as lists.
         """
-        file_path = cls._file_path(name)
-        if not os.path.isfile(file_path):
+        df = cls.load_frame(name)
+        if df.empty:
             return []
-        df = pd.read_csv(file_path)
-        # Convert stringified lists back to Python list objects for "features", if necessary
-        import ast
-        if "features" in df.columns:
-            df["features"] = df["features"].apply(lambda x: ast.literal_eval(x) if isinstance(x, str) else x)
+        schema = cls._read_schema(name)
+        columns = feature_columns(schema["n_features"])
+        features = df[columns].to_numpy("float64").tolist()
+        df = df.drop(columns=columns)
+        df["features"] = features
         return df.to_dict("records")
 
+    # ---------- labels ----------
+
+    @classmethod
+    def bulk_update_labels(cls, name: str, labels) -> int:
+        """
+        Set the labels of many signals in one write: ``labels`` maps signal_id -> label
+        (a dict, a Series indexed by id, or a DataFrame with signal_id/label columns and
+        optionally exit_time/exit_price). Only the label sidecar is written; returns the
+        number of labels recorded.
+        """
+        if isinstance(labels, pd.DataFrame):
+            frame = labels.set_index("signal_id") if "signal_id" in labels else labels
+        else:
+            frame = pd.DataFrame({"label": pd.Series(labels, dtype="float64")})
+        frame = frame[pd.to_numeric(frame["label"], errors="coerce").notna()]
+        if frame.empty:
+            return 0
+        n = len(frame)
+        exit_time = (pd.to_datetime(frame["exit_time"]).to_numpy("datetime64[ns]") if "exit_time" in frame
+                     else np.full(n, np.datetime64("NaT"), dtype="datetime64[ns]"))
+        exit_price = frame["exit_price"].to_numpy("float64") if "exit_price" in frame else np.full(n, np.nan)
+        table = pa.table({
+            "signal_id": pa.array(frame.index.astype(str), pa.string()),
+            "label": pa.array(frame["label"].to_numpy("float64").astype("int8"), pa.int8()),
+            "exit_time": pa.array(exit_time, pa.timestamp("ns"), from_pandas=True),
+            "exit_price": pa.array(exit_price, pa.float64(), from_pandas=True),
+            "labelled_at": pa.array(np.full(n, time.time_ns(), dtype="datetime64[ns]"), pa.timestamp("ns")),
+        }, schema=LABEL_SCHEMA)
+        with cls._lock:
+            directory = cls._labels_dir(name)
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"labels-{time.time_ns()}-{uuid.uuid4().hex[:8]}.parquet")
+            pq.write_table(table, path + ".tmp")
+            os.replace(path + ".tmp", path)
+        return n
+
+    @classmethod
+    def _label_files(cls, name: str) -> List[str]:
+        directory = cls._labels_dir(name)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(os.path.join(directory, f) for f in os.listdir(directory) if f.endswith(".parquet"))
+
+    @classmethod
+    def label_index(cls, name: str) -> pd.DataFrame:
+        """
+        Latest sidecar label, exit_time and exit_price per signal_id (cached until a
+        label file is added or folded).
+        """
+        files = cls._label_files(name)
+        cached = cls._label_cache.get(name)
+        if cached is not None and cached[0] == files:
+            return cached[1]
+        if files:
+            table = ds.dataset(files, schema=LABEL_SCHEMA, format="parquet").to_table()
+            frame = table.select(["signal_id", *LABEL_FIELDS]).to_pandas()
+            # Files sort by write time, so the last entry per id is the latest label
+            index = frame.drop_duplicates("signal_id", keep="last").set_index("signal_id")
+            index["label"] = index["label"].astype("float64")
+        else:
+            index = pd.DataFrame(columns=list(LABEL_FIELDS))
+        cls._label_cache[name] = (files, index)
+        return index
+
+    @classmethod
+    def _apply_labels(cls, table: pa.Table, index: pd.DataFrame) -> pa.Table:
+        if not len(index) or "signal_id" not in table.column_names:
+            return table
+        ids = table.column("signal_id").to_pandas()
+        for field in LABEL_FIELDS:
+            if field not in table.column_names:
+                continue
+            position = table.schema.get_field_index(field)
+            kind = table.schema.field(field).type
+            stored = table.column(field).to_pandas()
+            if field == "label":
+                stored = stored.astype("float64")
+            values = ids.map(index[field])
+            merged = values.where(values.notna(), stored)
+            table = table.set_column(position, field, pa.array(merged.to_numpy(), type=kind, from_pandas=True))
+        return table
+
     @classmethod
     def update_label(cls, name: str, features: List[float], new_label: int, tol: float = 1e-8):
         """
-        Finds the row (by features -- exact or nearly-equal match) and sets its label.
+        Finds the row (by features -- exact or nearly-equal match) and labels its
+        signal_id. Prefer bulk_update_labels() with the id returned by append().
         """
-        file_path = cls._file_path(name)
-        if not os.path.isfile(file_path):
+        schema = cls.schema(name)
+        if schema is None:
             return
-        # Use ast.literal_eval to parse feature lists from str
-        df = pd.read_csv(file_path)
-        import ast
-        if "features" in df.columns:
-            df["features"] = df["features"].apply(lambda x: ast.literal_eval(x) if isinstance(x, str) else x)
-            # Find the first row with features nearly equal
-            idx = -1
-            for i, row in enumerate(df["features"]):
-                # Compare feature lists elementwise with tolerance
-                try:
-                    if len(row) == len(features) and all(abs(a - b) < tol for a, b in zip(row, features)):
-                        idx = i
-                        break
-                except Exception:
-                    continue
-            if idx >= 0:
-                df.at[idx, "label"] = new_label
-                with cls._lock:
-                    df.to_csv(file_path, index=False)
+        columns = feature_columns(schema["n_features"])
+        target = np.asarray(features, dtype="float64")
+        if target.shape != (len(columns),):
+            return
+        tol = max(tol, 1e-6) if schema["feature_dtype"] == "float32" else tol
+        table = cls.load_table(name, columns=["signal_id", *columns])
+        matrix = np.column_stack([table.column(c).to_numpy(zero_copy_only=False) for c in columns])
+        hits = np.flatnonzero((np.abs(matrix - target) < tol).all(axis=1))
+        if len(hits):
+            cls.bulk_update_labels(name, {table.column("signal_id")[int(hits[0])].as_py(): new_label})
+
+    @classmethod
+    def _partitions(cls, name: str) -> List[str]:
+        root = cls._dataset_dir(name)
+        if not os.path.isdir(root):
+            return []
+        return [d for d in os.listdir(root) if d.startswith("date=") and os.path.isdir(os.path.join(root, d))]
+
+    @classmethod
+    def _read_partition(cls, name: str, directory: str) -> pa.Table:
+        schema = cls._arrow_schema(cls._read_schema(name))
+        return ds.dataset(os.path.join(cls._dataset_dir(name), directory), schema=schema, format="parquet",
+                          exclude_invalid_files=True).to_table()
+
+    @classmethod
+    def _replace_partition(cls, name: str, directory: str, table: pa.Table):
+        """
+        Write the partition as one new part file, then drop the files it replaces (the
+        caller holds the dataset's exclusive file lock).
+        """
+        path = os.path.join(cls._dataset_dir(name), directory)
+        old = [f for f in os.listdir(path) if f.endswith(".parquet")]
+        cls._write_part(name, directory[len("date="):], table)
+        for f in old:
+            os.remove(os.path.join(path, f))
 
     @classmethod
-    def sync_to_parquet(cls, name: str):
+    def compact(cls, name: str) -> int:
         """
-        (Optional) Sync CSV to Parquet for faster loading if needed.
+        Merge each partition's part files into one and fold the label sidecar into the
+        stored labels (then drop it); returns partitions rewritten.
         """
-        file_path = cls._file_path(name)
-        pq_path = file_path.replace(".csv", ".parquet")
-        if os.path.exists(file_path):
-            df = pd.read_csv(file_path)
-            df.to_parquet(pq_path, index=False)
+        rewritten = 0
+        with cls._lock, cls._file_lock(name):
+            cls.flush(name)
+            files = cls._label_files(name)
+            index = cls.label_index(name)
+            for directory in cls._partitions(name):
+                path = os.path.join(cls._dataset_dir(name), directory)
+                table = cls._read_partition(name, directory)
+                labelled = cls._apply_labels(table, index)
+                if len([f for f in os.listdir(path) if f.endswith(".parquet")]) > 1 or not labelled.equals(table):
+                    cls._replace_partition(name, directory, labelled)
+                    rewritten += 1
+            for f in files:
+                os.remove(f)
+        return rewritten
+
+    # ---------- migration / maintenance ----------
+
+    @classmethod
+    def _migrate_if_needed(cls, name: str):
+        schema = cls._read_schema(name)
+        if schema is not None:
+            if schema.get("schema_version", 1) < 2:
+                cls._upgrade_v1(name)
+            return
+        if not os.path.isfile(cls._legacy_path(name)):
+            return
+        with cls._lock, cls._file_lock(name):
+            if not os.path.isfile(cls._schema_path(name)):
+                cls.migrate_csv(name)
+
+    @classmethod
+    def _upgrade_v1(cls, name: str):
+        """Schema 1 -> 2: give every stored row a signal_id (rewrites each partition once)."""
+        with cls._lock, cls._file_lock(name):
+            schema = cls._read_schema(name)
+            if schema.get("schema_version", 1) >= 2:
+                return
+            old_schema = cls._arrow_schema(schema)
+            schema["columns"] = {"signal_id": "string", **schema["columns"]}
+            schema["schema_version"] = 2
+            for directory in cls._partitions(name):
+                table = ds.dataset(os.path.join(cls._dataset_dir(name), directory), schema=old_schema,
+                                   format="parquet", exclude_invalid_files=True).to_table()
+                ids = pa.array([new_signal_id() for _ in range(table.num_rows)], pa.string())
+                cls._replace_partition(name, directory, table.add_column(0, "signal_id", ids))
+            cls._write_schema(name, schema)
+        logger.info(f"FeatureStore: {name} upgraded to schema version 2 (signal ids)")
+
+    @classmethod
+    def migrate_csv(cls, name: str, csv_path: Optional[str] = None) -> int:
+        """One-time conversion of a legacy CSV dataset (stringified feature lists) to Parquet."""
+        csv_path = csv_path or cls._legacy_path(name)
+        existing = cls._read_schema(name)
+        if existing is not None and existing.get("migrated_from"):
+            logger.info(f"FeatureStore: {name} already migrated from {existing['migrated_from']}")
+            return 0
+        started = time.perf_counter()
+        df = pd.read_csv(csv_path)
+        if "features" in df:
+            matrix = parse_feature_strings(df["features"])
+            df["features"] = list(matrix)
+        with cls._lock, cls._file_lock(name):
+            if len(df):
+                cls._write_rows(name, df)
+            schema = cls._read_schema(name) or {"schema_version": SCHEMA_VERSION, "n_features": 0,
+                                                 "feature_dtype": settings.FEATURE_STORE_FEATURE_DTYPE,
+                                                 "columns": {}}
+            schema["migrated_from"] = os.path.basename(csv_path)
+            cls._write_schema(name, schema)
+        logger.info(f"FeatureStore: migrated {len(df)} rows of {csv_path} to Parquet "
+                    f"in {time.perf_counter() - started:.2f}s")
+        return len(df)
 
     @classmethod
     def clear_store(cls, name: str):
         """
         Utility: Wipe a feature store (for dev/backtest reset).
         """
-        file_path = cls._file_path(name)
-        if os.path.exists(file_path):
-            os.remove(file_path)
+        with cls._lock:
+            cls._buffers.pop(name, None)
+            cls._first_buffered.pop(name, None)
+            cls._flush_failures.pop(name, None)
+            cls._label_cache.pop(name, None)
+            shutil.rmtree(cls._dataset_dir(name), ignore_errors=True)
+            if os.path.exists(cls._legacy_path(name)):
+                os.remove(cls._legacy_path(name))
+
+
+atexit.register(FeatureStore.flush)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Feature store maintenance")
+    parser.add_argument("command", choices=["migrate", "compact", "info"])
+    parser.add_argument("name")
+    args = parser.parse_args(argv)
+    if args.command == "migrate":
+        print(f"{FeatureStore.migrate_csv(args.name)} rows migrated")
+    elif args.command == "compact":
+        print(f"{FeatureStore.compact(args.name)} partitions compacted")
+    else:
+        print(json.dumps(FeatureStore.schema(args.name), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,425 @@
+"""
+app/services/inference.py
+
+Batched inference for the calibrated meta-label ensemble (base classifiers whose
+probabilities feed a meta model), as used by CPRMetaMLStrategy.
+
+- Models are loaded once, up front, with joblib ``mmap_mode="r"`` so the numpy
+  arrays inside uncompressed dumps are mapped from disk rather than copied (compressed
+  dumps are loaded normally).
+- All candidate signals of a bar are scored together: one predict_proba call per
+  base model on the (candidates x features) matrix, then one on the meta model.
+- Scoring runs on the service's own thread. decide() waits at most the latency
+  budget and then returns the fallback decision for the whole batch; the late
+  result is still timed and counted. While a late batch is still running, new
+  batches are not queued behind it: they get the fallback decision at once, so one
+  stall cannot snowball into a backlog of stale work. Timeouts, busy skips and
+  scoring errors are counted as errors (``errors``, ``unscored``) and logged at
+  error level; they are never reported as a model version's rejections.
+- With ``n_features`` (the width the caller's features have), a model set trained
+  on another width is refused when it is loaded, with an error, instead of failing
+  every batch later.
+- With a ModelRegistry, the service scores with the registry's active version. New
+  versions are deserialized and dry-run on a loader thread (the watcher polls the
+  registry every ML_MODEL_POLL_SECONDS), then installed with a single reference swap;
+  a batch in flight finishes on the set it started with. rollback() re-activates the
+  previous version, from memory when it is still loaded.
+- get_stats() reports the active version, calls, rows and timings per model plus
+  timeouts, errors and swaps.
+
+Usage:
+    service = get_inference_service("CPR_Meta_ML", model_paths, registry=get_model_registry("CPR_Meta_ML"))
+    accepted, version = service.decide_versioned([features_a, features_b], threshold=0.6)
+    service.rollback()
+    service.get_stats()
+"""
+
+import threading
+import time
+import warnings
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import joblib
+import numpy as np
+
+from app.config.settings import get_settings
+from app.services.logger import get_logger
+from app.services.model_registry import ModelRegistry
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+BASE_MODELS = ("rf", "xgb", "svm", "lr")
+
+
+def load_model(path: Path, mmap: bool = True) -> Any:
+    """joblib.load, memory-mapping the model's arrays where the dump allows it."""
+    if mmap:
+        with warnings.catch_warnings():
+            # Compressed dumps cannot be mapped; joblib warns and loads them normally
+            warnings.simplefilter("ignore", UserWarning)
+            return joblib.load(path, mmap_mode="r")
+    return joblib.load(path)
+
+
+class _ModelTimer:
+    __slots__ = ("calls", "rows", "total_ms", "max_ms", "last_ms")
+
+    def __init__(self):
+        self.calls = 0
+        self.rows = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.last_ms = 0.0
+
+    def record(self, rows: int, ms: float):
+        self.calls += 1
+        self.rows += rows
+        self.total_ms += ms
+        self.last_ms = ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "rows": self.rows,
+            "total_ms": round(self.total_ms, 3),
+            "mean_ms": round(self.total_ms / self.calls, 3) if self.calls else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "last_ms": round(self.last_ms, 3),
+        }
+
+
+class ModelSet:
+    """One fully loaded ensemble version; never mutated, replaced as a whole."""
+
+    __slots__ = ("version", "calibrators", "meta_model", "feature_schema", "loaded_at")
+
+    def __init__(self, version: Optional[str], calibrators: Dict[str, Any], meta_model: Any,
+                 feature_schema: Optional[Dict[str, Any]] = None):
+        self.version = version
+        self.calibrators = dict(calibrators)
+        self.meta_model = meta_model
+        self.feature_schema = feature_schema or {}
+        self.loaded_at = time.time()
+
+
+class EnsembleInference:
+    """Preloaded base models + meta model, scored in batches on a dedicated thread."""
+
+    def __init__(self, model_paths: Dict[str, Path], base_models: Sequence[str] = BASE_MODELS,
+                 budget_ms: Optional[float] = None, fallback_accept: Optional[bool] = None,
+                 mmap: Optional[bool] = None, name: str = "ensemble", registry: Optional[ModelRegistry] = None,
+                 poll_seconds: Optional[float] = None, n_features: Optional[int] = None):
+        self.name = name
+        self.model_paths = dict(model_paths)
+        self.base_names = list(base_models)
+        self.budget_ms = settings.ML_INFERENCE_BUDGET_MS if budget_ms is None else budget_ms
+        self.fallback_accept = settings.ML_INFERENCE_FALLBACK_ACCEPT if fallback_accept is None else fallback_accept
+        self.mmap = settings.ML_MODEL_MMAP if mmap is None else mmap
+        self.registry = registry
+        self.poll_seconds = settings.ML_MODEL_POLL_SECONDS if poll_seconds is None else poll_seconds
+        self.n_features = n_features
+        # Readers take one reference to the current set; a swap replaces the reference
+        self._models = ModelSet(None, {}, None)
+        self._previous: Optional[ModelSet] = None
+        self._swap_lock = threading.Lock()
+        self._pending: Optional[str] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"inference-{name}")
+        self._inflight: Optional[Future] = None
+        self._submit_lock = threading.Lock()
+        self._loader = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"model-loader-{name}")
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        self._timers = {key: _ModelTimer() for key in [*self.base_names, "meta"]}
+        self._counts = {"batches": 0, "candidates": 0, "errors": 0, "timeouts": 0, "busy": 0, "unscored": 0,
+                        "unfiltered": 0, "swaps": 0, "load_errors": 0}
+
+    # ---------- models ----------
+
+    @property
+    def calibrators(self) -> Dict[str, Any]:
+        return self._models.calibrators
+
+    @property
+    def meta_model(self) -> Any:
+        return self._models.meta_model
+
+    @property
+    def version(self) -> Optional[str]:
+        return self._models.version
+
+    def load(self) -> bool:
+        """
+        Load the registry's active version (or, without one, the files in model_paths)
+        on the calling thread; returns whether the ensemble is complete.
+        """
+        version = self.registry.current() if self.registry is not None else None
+        try:
+            if version is not None:
+                self._install(self._read_version(version))
+            else:
+                models = self._read_files(None, self.model_paths)
+                self._check_width(models)
+                self._install(models, validate=False)
+        except Exception as e:
+            self._counts["load_errors"] += 1
+            logger.error(f"{self.name}: failed to load models {version or ''}: {e}")
+        if self.ready:
+            logger.info(f"{self.name}: ensemble models loaded (version={self.version}, mmap={self.mmap})")
+        else:
+            missing = [key for key in [*self.base_names, "meta"]
+                       if (self.meta_model is None if key == "meta" else key not in self.calibrators)]
+            logger.warning(f"{self.name}: ML models missing or not fit (yet): {missing}")
+        return self.ready
+
+    def _read_files(self, version: Optional[str], paths: Dict[str, Path],
+                    feature_schema: Optional[Dict[str, Any]] = None) -> ModelSet:
+        calibrators, meta_model = {}, None
+        for key in self.base_names:
+            path = paths.get(key)
+            if path is not None and Path(path).exists():
+                calibrators[key] = load_model(path, self.mmap)
+        meta_path = paths.get("meta")
+        if meta_path is not None and Path(meta_path).exists():
+            meta_model = load_model(meta_path, self.mmap)
+        return ModelSet(version, calibrators, meta_model, feature_schema)
+
+    def _read_version(self, version: str) -> ModelSet:
+        manifest = self.registry.manifest(version)
+        return self._read_files(version, self.registry.paths(version), manifest.get("feature_schema"))
+
+    def _check_width(self, models: ModelSet):
+        """Refuse models trained on another feature width than the caller builds."""
+        if self.n_features is None:
+            return
+        widths = {key: getattr(model, "n_features_in_", None) for key, model in models.calibrators.items()}
+        widths["schema"] = models.feature_schema.get("n_features")
+        wrong = {key: width for key, width in widths.items() if width is not None and width != self.n_features}
+        if wrong:
+            raise ValueError(f"model set {models.version or '(files)'} expects {wrong} features but "
+                             f"{self.n_features} are built; retrain it before it can filter")
+
+    def _validate(self, models: ModelSet):
+        """Refuse a set that cannot score: missing models or mismatched feature widths."""
+        missing = [key for key in self.base_names if key not in models.calibrators]
+        if missing or models.meta_model is None:
+            raise ValueError(f"incomplete model set {models.version}: missing {missing or ['meta']}")
+        self._check_width(models)
+        width = models.feature_schema.get("n_features")
+        widths = {getattr(models.calibrators[key], "n_features_in_", width) for key in self.base_names}
+        if width is not None:
+            widths.add(width)
+        if len(widths) != 1 or None in widths:
+            raise ValueError(f"model set {models.version} has inconsistent feature widths {sorted(map(str, widths))}")
+        # One dry run off the hot path, so the first live batch does not pay for lazy initialisation
+        probe = np.zeros((1, widths.pop()))
+        base = np.column_stack([models.calibrators[key].predict_proba(probe)[:, 1] for key in self.base_names])
+        models.meta_model.predict_proba(base)
+
+    def _install(self, models: ModelSet, validate: bool = True):
+        if validate:
+            self._validate(models)
+        with self._swap_lock:
+            if models.version is not None and models.version == self._models.version:
+                return
+            self._previous, self._models = self._models, models
+            self._counts["swaps"] += 1
+        logger.info(f"{self.name}: now scoring with model version {models.version}")
+
+    def set_models(self, calibrators: Dict[str, Any], meta_model: Any, version: Optional[str] = None):
+        """Swap in freshly trained models (one reference swap; batches in flight keep the old set)."""
+        self._install(ModelSet(version, calibrators, meta_model), validate=False)
+
+    def load_version(self, version: Optional[str] = None) -> Future:
+        """
+        Deserialize and validate ``version`` (default: the registry's active one) on
+        the loader thread, then swap it in. Scoring continues on the current set
+        meanwhile; a version that fails to load is never installed.
+        """
+        version = version or self.registry.current()
+        self._pending = version
+
+        def _load():
+            try:
+                self._install(self._read_version(version))
+            except Exception as e:
+                self._counts["load_errors"] += 1
+                logger.error(f"{self.name}: model version {version} not installed: {e}")
+                raise
+            finally:
+                self._pending = None
+            return version
+
+        return self._loader.submit(_load)
+
+    def rollback(self, version: Optional[str] = None) -> str:
+        """Re-activate the previous version (instantly if it is still in memory)."""
+        if self.registry is None:
+            if self._previous is None or self._previous.meta_model is None:
+                raise ValueError(f"{self.name}: no previous model set to roll back to")
+            with self._swap_lock:
+                self._previous, self._models = self._models, self._previous
+                self._counts["swaps"] += 1
+            return self.version
+        version = self.registry.rollback(version)
+        previous = self._previous
+        if previous is not None and previous.version == version:
+            self._install(previous, validate=False)
+        else:
+            self.load_version(version)
+        return version
+
+    def start_watching(self):
+        """Poll the registry and load a newly activated version in the background."""
+        if self.registry is None or self.poll_seconds <= 0 or self._watcher is not None:
+            return
+        self._watcher = threading.Thread(target=self._watch, name=f"ModelWatcher-{self.name}", daemon=True)
+        self._watcher.start()
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_seconds):
+            try:
+                current = self.registry.current()
+                if current is not None and current not in (self.version, self._pending):
+                    self.load_version(current)
+            except Exception as e:
+                logger.error(f"{self.name}: model registry poll failed: {e}")
+
+    @property
+    def ready(self) -> bool:
+        models = self._models
+        return models.meta_model is not None and all(key in models.calibrators for key in self.base_names)
+
+    # ---------- scoring ----------
+
+    def _score(self, features: np.ndarray):
+        features = np.asarray(features, dtype="float64")
+        if features.ndim == 1:
+            features = features[None, :]
+        models = self._models
+        rows = len(features)
+        base_probs = np.empty((rows, len(self.base_names)))
+        for column, key in enumerate(self.base_names):
+            started = time.perf_counter()
+            base_probs[:, column] = models.calibrators[key].predict_proba(features)[:, 1]
+            self._timers[key].record(rows, (time.perf_counter() - started) * 1000)
+        started = time.perf_counter()
+        final = models.meta_model.predict_proba(base_probs)[:, 1]
+        self._timers["meta"].record(rows, (time.perf_counter() - started) * 1000)
+        logger.debug("%s: base probabilities %s, final %s", self.name, base_probs.tolist(), final.tolist())
+        return final, models.version
+
+    def predict_proba(self, features: np.ndarray) -> np.ndarray:
+        """Meta-model probability of class 1 for every row of ``features`` (on the calling thread)."""
+        return self._score(features)[0]
+
+    def decide(self, features: Sequence[Sequence[float]], threshold: float = 0.6,
+               budget_ms: Optional[float] = None) -> List[bool]:
+        """
+        Accept/reject every candidate in one batch. Without a complete ensemble every
+        candidate is accepted (no filter); on a timeout or scoring error the whole
+        batch gets the fallback decision.
+        """
+        return self.decide_versioned(features, threshold, budget_ms)[0]
+
+    def decide_versioned(self, features: Sequence[Sequence[float]], threshold: float = 0.6,
+                         budget_ms: Optional[float] = None) -> Tuple[List[bool], Optional[str]]:
+        """
+        decide(), plus the model version that scored the batch (None if it was not
+        scored: no complete ensemble, or the fallback after an error).
+        """
+        n = len(features)
+        if not n:
+            return [], None
+        self._counts["batches"] += 1
+        self._counts["candidates"] += n
+        if not self.ready:
+            self._counts["unfiltered"] += n
+            return [True] * n, None
+        budget_ms = self.budget_ms if budget_ms is None else budget_ms
+        with self._submit_lock:
+            inflight = self._inflight
+            if inflight is not None and not inflight.done():
+                # Still scoring a late batch: do not queue stale work behind it
+                return self._unscored(n, "busy", "the previous batch is still being scored")
+            future = self._inflight = self._executor.submit(self._score, np.asarray(features, dtype="float64"))
+        try:
+            probs, version = future.result(timeout=budget_ms / 1000 if budget_ms > 0 else None)
+        except FutureTimeout:
+            return self._unscored(n, "timeouts", f"not scored within {budget_ms:.0f} ms")
+        except Exception as e:
+            return self._unscored(n, None, f"inference failed: {e}")
+        return [bool(p >= threshold) for p in probs], version
+
+    def _unscored(self, n: int, reason: Optional[str], detail: str) -> Tuple[List[bool], None]:
+        """Fallback decision for a batch the ensemble did not score, counted as an error."""
+        self._counts["errors"] += 1
+        if reason is not None:
+            self._counts[reason] += 1
+        self._counts["unscored"] += n
+        logger.error("%s: %d candidate(s) %s, fallback %s (%d unscored so far)", self.name, n, detail,
+                     "accept" if self.fallback_accept else "reject", self._counts["unscored"],
+                     extra={"rate_limit": 60})
+        return [self.fallback_accept] * n, None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "version": self.version,
+            "previous_version": self._previous.version if self._previous is not None else None,
+            "pending_version": self._pending,
+            "budget_ms": self.budget_ms,
+            "fallback": "accept" if self.fallback_accept else "reject",
+            **self._counts,
+            "models": {key: timer.as_dict() for key, timer in self._timers.items()},
+        }
+
+    def close(self):
+        self._stop.set()
+        self._executor.shutdown(wait=False)
+        self._loader.shutdown(wait=False)
+
+
+_services: Dict[str, EnsembleInference] = {}
+_services_lock = threading.Lock()
+
+
+def get_inference_service(name: str, model_paths: Optional[Dict[str, Path]] = None, **kwargs) -> EnsembleInference:
+    """Process-wide service per model set, loaded on first use."""
+    with _services_lock:
+        service = _services.get(name)
+        if service is None:
+            if model_paths is None:
+                raise ValueError(f"Inference service {name!r} is not loaded and no model paths were given")
+            service = _services[name] = EnsembleInference(model_paths, name=name, **kwargs)
+            service.load()
+            service.start_watching()
+        return service
+
+
+def find_inference_service(name: str) -> Optional[EnsembleInference]:
+    """The service ``name`` if it is loaded in this process."""
+    with _services_lock:
+        return _services.get(name)
+
+
+def reload_inference_service(name: str) -> Optional[Future]:
+    """
+    Load the registry's active version into a loaded service in the background
+    (after training); None if the service is not loaded in this process.
+    """
+    service = find_inference_service(name)
+    if service is None:
+        return None
+    if service.registry is None:
+        return service._loader.submit(service.load)
+    return service.load_version()
+
+
+def get_inference_stats() -> Dict[str, Dict[str, Any]]:
+    """Stats of every loaded inference service, for the status endpoint."""
+    with _services_lock:
+        return {name: service.get_stats() for name, service in _services.items()}
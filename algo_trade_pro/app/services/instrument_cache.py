@@ -0,0 +1,275 @@
+"""
+app/services/instrument_cache.py
+
+On-disk Kite instrument master (NSE + NFO) with in-memory indexes.
+
+The dump is downloaded at most once per day and stored as a columnar .npz file
+(INSTRUMENT_CACHE_PATH); later starts load the arrays from disk. Nothing is read
+until the first lookup. When the first download fails and there is no dump, lookups
+find nothing and the download is retried on a later lookup, after
+INSTRUMENT_RETRY_SECONDS (doubling up to INSTRUMENT_RETRY_MAX_SECONDS). Indexes:
+    tradingsymbol -> row, instrument_token -> row,
+    (underlying, expiry, strike, "CE"/"PE") -> row,
+    underlying -> sorted expiries, (underlying, expiry) -> sorted listed strikes,
+so the option a signal needs is resolved with dict lookups and a binary search
+instead of building its tradingsymbol by hand.
+
+Usage:
+    cache = get_instrument_cache()
+    cache.token("RELIANCE")
+    expiry = cache.next_expiry("NIFTY 50", date.today())
+    strike = cache.nearest_strike("NIFTY 50", expiry, 24712.0)
+    cache.option("NIFTY 50", expiry, strike, "CE")["tradingsymbol"]
+"""
+
+import os
+import threading
+import time
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.services.logger import get_logger
+from app.config.settings import get_settings
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+# Index symbols (NSE tradingsymbol) -> name of their derivatives in NFO
+UNDERLYING_NAMES = {
+    "NIFTY 50": "NIFTY",
+    "NIFTY BANK": "BANKNIFTY",
+    "BANK NIFTY": "BANKNIFTY",
+    "NIFTY FIN SERVICE": "FINNIFTY",
+    "NIFTY MID SELECT": "MIDCPNIFTY",
+}
+
+_STRING_COLUMNS = ("tradingsymbol", "name", "exchange", "segment", "instrument_type")
+
+
+def underlying_name(symbol: str) -> str:
+    """NFO underlying name for a spot symbol ("NIFTY 50" -> "NIFTY")."""
+    symbol = symbol.upper()
+    return UNDERLYING_NAMES.get(symbol, symbol)
+
+
+def _to_date64(value) -> np.datetime64:
+    return np.datetime64(pd.Timestamp(value).date(), "D")
+
+
+class InstrumentCache:
+    """
+    Instrument master for a set of exchanges, persisted to ``path`` (None = memory only).
+    """
+
+    def __init__(self, kite_client=None, path: Optional[str] = None,
+                 exchanges: Iterable[str] = ("NSE", "NFO")):
+        self._kite = kite_client
+        self.path = path
+        self.exchanges = tuple(exchanges)
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._retry_at = 0.0  # monotonic time of the next load attempt after a failed one
+        self._retry_delay = settings.INSTRUMENT_RETRY_SECONDS
+        self.fetched_on: Optional[date] = None
+        self.columns: Dict[str, np.ndarray] = {}
+        self._by_symbol: Dict[str, int] = {}
+        self._by_token: Dict[int, int] = {}
+        self._options: Dict[tuple, int] = {}
+        self._expiries: Dict[str, np.ndarray] = {}
+        self._strikes: Dict[tuple, np.ndarray] = {}
+
+    # ---------- loading ----------
+    def ensure_loaded(self):
+        if not self._loaded and time.monotonic() >= self._retry_at:
+            self.load()
+
+    def load(self, today: Optional[date] = None):
+        """Load today's file if there is one, otherwise download (falling back to a stale file)."""
+        today = today or date.today()
+        with self._lock:
+            columns, fetched_on = self._read_file()
+            if columns is None or fetched_on != today:
+                try:
+                    columns, fetched_on = self._download(), today
+                    self._write_file(columns, fetched_on)
+                except Exception as e:
+                    if columns is None:
+                        # Nothing to serve: stay unloaded and try again after a back-off
+                        logger.error(f"Failed loading instruments, retrying in {self._retry_delay:.0f}s: {e}")
+                        self._index(self._from_records([]))
+                        self._retry_at = time.monotonic() + self._retry_delay
+                        self._retry_delay = min(self._retry_delay * 2, settings.INSTRUMENT_RETRY_MAX_SECONDS)
+                        return
+                    logger.warning(f"Instrument refresh failed, using dump from {fetched_on}: {e}")
+            self._index(columns)
+            self.fetched_on = fetched_on
+            self._loaded = True
+            self._retry_delay = settings.INSTRUMENT_RETRY_SECONDS
+        logger.info(f"Instruments loaded: {len(self)} ({', '.join(self.exchanges)}, fetched {fetched_on})")
+
+    def refresh(self):
+        """Force a new download (e.g. from a daily scheduled job)."""
+        with self._lock:
+            columns = self._download()
+            self._write_file(columns, date.today())
+            self._index(columns)
+            self.fetched_on = date.today()
+            self._loaded = True
+
+    def _client(self):
+        if self._kite is None:
+            from app.services.kite import get_kite_client
+            self._kite = get_kite_client()
+        return self._kite
+
+    def _download(self) -> Dict[str, np.ndarray]:
+        client = self._client()
+        records: List[Dict[str, Any]] = []
+        for exchange in self.exchanges:
+            records.extend(client.instruments(exchange))
+        return self._from_records(records)
+
+    @staticmethod
+    def _from_records(records: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+        df = pd.DataFrame(records, columns=["instrument_token", "tradingsymbol", "name", "exchange", "segment",
+                                            "instrument_type", "expiry", "strike", "lot_size", "tick_size"])
+        expiry = pd.to_datetime(df["expiry"].replace("", None), errors="coerce")
+        columns = {
+            "instrument_token": df["instrument_token"].fillna(0).to_numpy("int64"),
+            "expiry": expiry.to_numpy("datetime64[D]"),
+            "strike": df["strike"].fillna(0).to_numpy("float64"),
+            "lot_size": df["lot_size"].fillna(0).to_numpy("int32"),
+            "tick_size": df["tick_size"].fillna(0).to_numpy("float64"),
+        }
+        for name in _STRING_COLUMNS:
+            values = df[name].fillna("").astype(str)
+            if name == "tradingsymbol":
+                values = values.str.upper()
+            columns[name] = values.to_numpy("U")
+        return columns
+
+    def _read_file(self):
+        if not self.path or not os.path.exists(self.path):
+            return None, None
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                columns = {name: data[name] for name in data.files if name != "fetched_on"}
+                fetched_on = date.fromisoformat(str(data["fetched_on"]))
+            return columns, fetched_on
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable instrument cache {self.path}: {e}")
+            return None, None
+
+    def _write_file(self, columns: Dict[str, np.ndarray], fetched_on: date):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp.npz"
+        np.savez(tmp_path, fetched_on=np.array(fetched_on.isoformat()), **columns)
+        os.replace(tmp_path, self.path)
+
+    def _index(self, columns: Dict[str, np.ndarray]):
+        self.columns = columns
+        symbols = columns["tradingsymbol"].tolist()
+        tokens = columns["instrument_token"].tolist()
+        # First occurrence wins, so NSE (loaded first) keeps its symbols
+        self._by_symbol = {}
+        for row, symbol in enumerate(symbols):
+            self._by_symbol.setdefault(symbol, row)
+        self._by_token = dict(zip(tokens, range(len(tokens))))
+
+        types = columns["instrument_type"]
+        rows = np.flatnonzero((types == "CE") | (types == "PE"))
+        names, expiries, strikes = columns["name"][rows], columns["expiry"][rows], columns["strike"][rows]
+        self._options = dict(zip(zip(names.tolist(), expiries.tolist(), strikes.tolist(), types[rows].tolist()),
+                                 rows.tolist()))
+        self._expiries, self._strikes = {}, {}
+        if len(rows):
+            chains = pd.DataFrame({"name": names, "expiry": expiries, "strike": strikes}).drop_duplicates()
+            for name, group in chains.groupby("name"):
+                self._expiries[name] = np.unique(group["expiry"].to_numpy("datetime64[D]"))
+            for (name, expiry), group in chains.groupby(["name", "expiry"]):
+                self._strikes[(name, expiry.date())] = np.unique(group["strike"].to_numpy("float64"))
+
+    # ---------- lookups ----------
+    def __len__(self) -> int:
+        return len(self.columns.get("instrument_token", ()))
+
+    def _row(self, row: int) -> Dict[str, Any]:
+        record = {name: values[row].item() for name, values in self.columns.items()}
+        expiry = self.columns["expiry"][row]
+        record["expiry"] = None if np.isnat(expiry) else expiry.astype(object)
+        return record
+
+    def instrument(self, symbol: str) -> Optional[Dict[str, Any]]:
+        self.ensure_loaded()
+        row = self._by_symbol.get(symbol.upper())
+        return None if row is None else self._row(row)
+
+    def token(self, symbol: str) -> Optional[int]:
+        self.ensure_loaded()
+        row = self._by_symbol.get(symbol.upper())
+        return None if row is None else int(self.columns["instrument_token"][row])
+
+    def symbol(self, token: int) -> Optional[str]:
+        self.ensure_loaded()
+        row = self._by_token.get(token)
+        return None if row is None else str(self.columns["tradingsymbol"][row])
+
+    def token_map(self) -> Dict[str, int]:
+        self.ensure_loaded()
+        tokens = self.columns["instrument_token"]
+        return {symbol: int(tokens[row]) for symbol, row in self._by_symbol.items()}
+
+    def expiries(self, underlying: str) -> List[date]:
+        self.ensure_loaded()
+        return self._expiries.get(underlying_name(underlying), np.array([], "datetime64[D]")).astype(object).tolist()
+
+    def next_expiry(self, underlying: str, on: Optional[date] = None) -> Optional[date]:
+        """First listed expiry on or after ``on`` (today by default)."""
+        self.ensure_loaded()
+        expiries = self._expiries.get(underlying_name(underlying))
+        if expiries is None or not len(expiries):
+            return None
+        pos = np.searchsorted(expiries, _to_date64(on or date.today()))
+        return None if pos >= len(expiries) else expiries[pos].astype(object)
+
+    def strikes(self, underlying: str, expiry: date) -> np.ndarray:
+        self.ensure_loaded()
+        return self._strikes.get((underlying_name(underlying), expiry), np.array([], "float64"))
+
+    def nearest_strike(self, underlying: str, expiry: date, price: float) -> Optional[float]:
+        """Listed strike closest to ``price`` (the lower one on a tie)."""
+        strikes = self.strikes(underlying, expiry)
+        if not len(strikes):
+            return None
+        pos = int(np.searchsorted(strikes, price))
+        if pos == 0:
+            return float(strikes[0])
+        if pos == len(strikes):
+            return float(strikes[-1])
+        below, above = strikes[pos - 1], strikes[pos]
+        return float(below if price - below <= above - price else above)
+
+    def option(self, underlying: str, expiry: date, strike: float, option_type: str) -> Optional[Dict[str, Any]]:
+        """The listed CE/PE contract, or None."""
+        self.ensure_loaded()
+        row = self._options.get((underlying_name(underlying), expiry, float(strike), option_type.upper()))
+        return None if row is None else self._row(row)
+
+
+_instrument_cache: Optional[InstrumentCache] = None
+_instrument_cache_lock = threading.Lock()
+
+
+def get_instrument_cache() -> InstrumentCache:
+    """Process-wide cache backed by INSTRUMENT_CACHE_PATH (loaded on first lookup)."""
+    global _instrument_cache
+    with _instrument_cache_lock:
+        if _instrument_cache is None:
+            _instrument_cache = InstrumentCache(path=settings.INSTRUMENT_CACHE_PATH,
+                                                exchanges=settings.INSTRUMENT_EXCHANGES.split(","))
+    return _instrument_cache
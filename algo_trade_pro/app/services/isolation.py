@@ -0,0 +1,68 @@
+"""
+app/services/isolation.py
+
+Process-wide state redirected to a scratch directory for offline runs (replay
+backtests, tick replay load tests). Strategies write FeatureStore rows such as
+cpr_meta_signals, feed the session index and use the instrument cache; inside
+isolated_state() all three point at the run directory, so a replay never reaches
+the production training set or the live caches.
+
+Usage:
+    with isolated_state(run_dir):
+        engine.run()
+"""
+
+import os
+import shutil
+from contextlib import contextmanager
+
+from app.config.settings import get_settings
+from app.services.logger import get_logger
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+
+@contextmanager
+def isolated_state(run_dir: str):
+    """
+    Point the process-wide FeatureStore, session index and instrument cache at
+    ``run_dir`` for the duration of a replay. The session index starts as a copy of
+    the live one (or loads its own on first use); the instrument cache reads a copy
+    of the live dump.
+    """
+    from app.services import instrument_cache, session_index
+    from app.services.feature_store import FeatureStore
+
+    os.makedirs(run_dir, exist_ok=True)
+    live_index = session_index._session_index
+    index = None
+    if live_index is not None:
+        index = session_index.SessionIndex()
+        for symbol in live_index.symbols():
+            index.add_sessions(symbol, live_index.sessions(symbol))
+    cache_path = os.path.join(run_dir, os.path.basename(settings.INSTRUMENT_CACHE_PATH))
+    if os.path.isfile(settings.INSTRUMENT_CACHE_PATH):
+        shutil.copyfile(settings.INSTRUMENT_CACHE_PATH, cache_path)
+    cache = instrument_cache.InstrumentCache(path=cache_path, exchanges=settings.INSTRUMENT_EXCHANGES.split(","))
+
+    with FeatureStore._lock:
+        # Live rows still buffered belong to the live store
+        FeatureStore.flush()
+        live_basedir = FeatureStore.BASEDIR
+        FeatureStore.BASEDIR = os.path.join(run_dir, "feature_store")
+    live_cache, instrument_cache._instrument_cache = instrument_cache._instrument_cache, cache
+    session_index._session_index = index
+    try:
+        yield
+    finally:
+        with FeatureStore._lock:
+            try:
+                FeatureStore.flush()
+            except Exception as e:
+                logger.error(f"Replay: could not write the run's feature rows: {e}")
+                FeatureStore._buffers.clear()
+                FeatureStore._first_buffered.clear()
+            FeatureStore.BASEDIR = live_basedir
+        instrument_cache._instrument_cache = live_cache
+        session_index._session_index = live_index
@@ -1,5 +1,7 @@
 # app/services/kite.py
 
+import threading
+
 from kiteconnect import KiteConnect, KiteTicker
 from app.config.settings import get_settings
 from app.services.logger import get_logger
@@ -29,3 +31,238 @@ def get_ws_client(on_ticks=None, on_connect=None, on_close=None) -> KiteTicker:
     if on_close:
         kws.on_close = on_close
     return kws
+
+
+def get_ws_pool(on_ticks=None, on_connect=None, on_close=None) -> "KiteTickerPool":
+    """Sharded ticker used by ZerodhaBroker.create_ws_client (one KiteTicker per instrument shard)."""
+    from twisted.internet import reactor
+    return KiteTickerPool(on_ticks=on_ticks, on_connect=on_connect, on_close=on_close, reactor=reactor)
+
+
+_reactor_lock = threading.Lock()
+_reactor_thread = None
+
+
+def _run_reactor_once(reactor):
+    """Start the (process-wide) Twisted reactor on a daemon thread unless it was started already."""
+    global _reactor_thread
+    with _reactor_lock:
+        if reactor.running or _reactor_thread is not None:
+            return
+        # Signals are not allowed outside the main thread, as in KiteTicker.connect(threaded=True)
+        _reactor_thread = threading.Thread(target=reactor.run, kwargs={"installSignalHandlers": False},
+                                           name="KiteReactor", daemon=True)
+        _reactor_thread.start()
+
+
+class _TickerShard:
+    __slots__ = ("index", "client", "tokens", "connected")
+
+    def __init__(self, index, client):
+        self.index = index
+        self.client = client
+        self.tokens = set()
+        self.connected = False
+
+
+class KiteTickerPool:
+    """
+    KiteTicker-compatible facade over several websocket connections.
+
+    A connection carries at most KITE_MAX_INSTRUMENTS_PER_CONNECTION tokens; once every
+    open shard is full, subscribe() opens another connection (up to KITE_MAX_CONNECTIONS).
+    Tokens can be subscribed/unsubscribed at any time, before or after connect().
+    Ticks from every shard are delivered to the single on_ticks callback, and on_connect
+    is called with the pool itself so callers can subscribe through it.
+
+    With a Twisted ``reactor`` (real KiteTicker shards), the pool runs the reactor
+    once and every shard connection, subscription and mode change is made on the
+    reactor thread through reactor.callFromThread: KiteTicker.connect() would
+    otherwise race to start the reactor per shard, and Twisted is not thread-safe.
+    Without one (stand-in tickers), clients are called directly.
+    """
+
+    MODE_LTP = KiteTicker.MODE_LTP
+    MODE_QUOTE = KiteTicker.MODE_QUOTE
+    MODE_FULL = KiteTicker.MODE_FULL
+
+    def __init__(self, client_factory=None, max_per_connection=None, max_connections=None,
+                 on_ticks=None, on_connect=None, on_close=None, reactor=None):
+        settings = get_settings()
+        self.client_factory = client_factory or get_ws_client
+        self.max_per_connection = max_per_connection or settings.KITE_MAX_INSTRUMENTS_PER_CONNECTION
+        self.max_connections = max_connections or settings.KITE_MAX_CONNECTIONS
+        self.on_ticks = on_ticks
+        self.on_connect = on_connect
+        self.on_close = on_close
+        self.reactor = reactor
+        self.shards = []
+        self.token_shard = {}   # instrument_token -> shard
+        self.modes = {}         # instrument_token -> mode
+        self.rejected_tokens = 0
+        self._started = False
+        self._lock = threading.RLock()
+
+    # ---------- shards ----------
+    def _new_shard(self):
+        shard = _TickerShard(len(self.shards), None)
+        shard.client = self.client_factory(
+            on_ticks=self._on_shard_ticks,
+            on_connect=lambda ws, resp: self._on_shard_connect(shard, ws, resp),
+            on_close=lambda ws, code, reason: self._on_shard_close(shard, ws, code, reason),
+        )
+        self.shards.append(shard)
+        logger.info(f"KiteTickerPool opened shard {shard.index}")
+        return shard
+
+    def _shard_with_room(self):
+        for shard in self.shards:
+            if len(shard.tokens) < self.max_per_connection:
+                return shard
+        if len(self.shards) < self.max_connections:
+            shard = self._new_shard()
+            if self._started:
+                self._connect_shard(shard)
+            return shard
+        return None
+
+    def _call(self, fn, *args, **kwargs):
+        """Run a client call on the reactor thread (directly without a reactor)."""
+        if self.reactor is None:
+            fn(*args, **kwargs)
+        else:
+            self.reactor.callFromThread(fn, *args, **kwargs)
+
+    def _connect_shard(self, shard, **kwargs):
+        # On the reactor thread the reactor is running, so KiteTicker.connect only calls connectWS
+        self._call(shard.client.connect, threaded=True, **kwargs)
+
+    def _on_shard_ticks(self, ws, ticks):
+        if self.on_ticks:
+            self.on_ticks(self, ticks)
+
+    def _on_shard_connect(self, shard, ws, resp):
+        with self._lock:
+            shard.connected = True
+            tokens = list(shard.tokens)
+        if tokens:
+            ws.subscribe(tokens)
+            self._send_modes(ws, tokens)
+        logger.info(f"KiteTickerPool shard {shard.index} connected with {len(tokens)} instruments")
+        if self.on_connect:
+            self.on_connect(self, resp)
+
+    def _on_shard_close(self, shard, ws, code, reason):
+        shard.connected = False
+        if self.on_close:
+            self.on_close(self, code, reason)
+
+    def _send_modes(self, client, tokens):
+        by_mode = {}
+        for token in tokens:
+            by_mode.setdefault(self.modes.get(token, self.MODE_QUOTE), []).append(token)
+        for mode, mode_tokens in by_mode.items():
+            client.set_mode(mode, mode_tokens)
+
+    # ---------- KiteTicker interface ----------
+    def subscribe(self, instrument_tokens):
+        """Assign new tokens to shards (opening connections as needed) and subscribe them."""
+        sends = {}
+        rejected = 0
+        with self._lock:
+            for token in instrument_tokens:
+                if token is None or token in self.token_shard:
+                    continue
+                shard = self._shard_with_room()
+                if shard is None:
+                    rejected += 1
+                    continue
+                shard.tokens.add(token)
+                self.token_shard[token] = shard
+                if shard.connected:
+                    sends.setdefault(shard.index, []).append(token)
+            self.rejected_tokens += rejected
+        for index, tokens in sends.items():
+            self._call(self.shards[index].client.subscribe, tokens)
+            self._call(self._send_modes, self.shards[index].client, tokens)
+        if rejected:
+            logger.error(
+                f"KiteTickerPool is full ({self.max_connections} x {self.max_per_connection}); "
+                f"{rejected} instruments not subscribed ({self.rejected_tokens} in total)"
+            )
+        return True
+
+    def unsubscribe(self, instrument_tokens):
+        sends = {}
+        with self._lock:
+            for token in instrument_tokens:
+                shard = self.token_shard.pop(token, None)
+                self.modes.pop(token, None)
+                if shard is None:
+                    continue
+                shard.tokens.discard(token)
+                if shard.connected:
+                    sends.setdefault(shard.index, []).append(token)
+        for index, tokens in sends.items():
+            self._call(self.shards[index].client.unsubscribe, tokens)
+        return True
+
+    def set_mode(self, mode, instrument_tokens):
+        sends = {}
+        with self._lock:
+            for token in instrument_tokens:
+                self.modes[token] = mode
+                shard = self.token_shard.get(token)
+                if shard is not None and shard.connected:
+                    sends.setdefault(shard.index, []).append(token)
+        for index, tokens in sends.items():
+            self._call(self.shards[index].client.set_mode, mode, tokens)
+        return True
+
+    def connect(self, threaded=False, **kwargs):
+        """
+        Connect every shard (an empty pool opens one connection so on_connect fires).
+        Like KiteTicker.connect, blocks in the reactor unless ``threaded``.
+        """
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+            if not self.shards:
+                self._new_shard()
+            shards = list(self.shards)
+        if self.reactor is None:
+            for i, shard in enumerate(shards):
+                last = i == len(shards) - 1
+                shard.client.connect(threaded=threaded or not last, **kwargs)
+            return
+        # Queued connections run on the reactor thread once it is running
+        for shard in shards:
+            self._connect_shard(shard, **kwargs)
+        if threaded:
+            _run_reactor_once(self.reactor)
+        elif not self.reactor.running:
+            self.reactor.run()
+
+    def is_connected(self):
+        return any(shard.connected for shard in self.shards)
+
+    def close(self, code=None, reason=None):
+        self._started = False
+        for shard in self.shards:
+            try:
+                self._call(shard.client.close, code, reason)
+            except Exception as e:
+                logger.error(f"KiteTickerPool failed to close shard {shard.index}: {e}")
+
+    def stop(self):
+        self.close()
+
+    def get_stats(self):
+        return {
+            "connections": len(self.shards),
+            "connected": sum(1 for shard in self.shards if shard.connected),
+            "instruments": len(self.token_shard),
+            "per_connection": [len(shard.tokens) for shard in self.shards],
+            "rejected": self.rejected_tokens,
+        }
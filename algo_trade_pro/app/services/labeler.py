@@ -0,0 +1,253 @@
+"""
+app/services/labeler.py
+
+Triple-barrier labels for stored signals (cpr_meta_signals): for each unlabelled
+signal, which of its barriers the underlying touched first after entry.
+
+    upper/lower  the signal's target and stoploss (target above entry for bull
+                 signals, below for bear signals)
+    vertical     entry + ML_LABEL_MAX_HOLDING_MINUTES, capped at that day's
+                 MARKET_CLOSE_TIME
+
+label 1 = target first, 0 = stop first; a signal that reaches the vertical barrier
+is labelled by the sign of its return there. When one tick/bar reaches both barriers
+the stop is assumed first. Signals whose vertical barrier lies beyond the available
+prices stay unlabelled until a later run.
+
+All signals of a symbol are resolved in one pass: each signal's price window
+(np.searchsorted on the timestamps) is laid out in one flat array, running highs and
+lows are taken per window with a single cumulative max/min (windows are offset so
+they never mix), and the first touch of every barrier is again one searchsorted.
+Prices come from the tick journal (ticks or 1-minute bars) or any OHLC DataFrame;
+results are written with FeatureStore.bulk_update_labels.
+
+Usage:
+    report = TripleBarrierLabeler().run()                 # journal prices, unlabelled rows
+    labels = triple_barrier(entry_ns, direction, target, stop, vertical_ns, ts, high, low, close)
+"""
+
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.config.settings import get_settings
+from app.services.feature_store import FeatureStore
+from app.services.logger import get_logger
+from app.services.tick_journal import TickJournal
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+DATASET = "cpr_meta_signals"
+NS_PER_MINUTE = 60 * 1_000_000_000
+
+# Outcome codes in the result of triple_barrier()
+TARGET, STOP, VERTICAL, UNRESOLVED = 1, -1, 0, 2
+
+
+def triple_barrier(entry_ns: np.ndarray, direction: np.ndarray, target: np.ndarray, stop: np.ndarray,
+                   vertical_ns: np.ndarray, ts: np.ndarray, high: np.ndarray, low: np.ndarray,
+                   close: np.ndarray, entry_price: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+    """
+    Resolve n signals against one price series (``ts`` sorted, epoch ns).
+
+    ``direction`` is 1 for long (target above) and 0/-1 for short. Prices strictly
+    after ``entry_ns`` and up to ``vertical_ns`` are considered; ``entry_price``
+    (default: the last close at or before entry) only sets the return at the
+    vertical barrier. Returns arrays of
+    length n: outcome (TARGET / STOP / VERTICAL / UNRESOLVED), label (1/0, -1 when
+    unresolved), exit_ns, exit_price and ret (directional return at the exit).
+    """
+    n = len(entry_ns)
+    entry_ns = np.asarray(entry_ns, dtype="int64")
+    vertical_ns = np.asarray(vertical_ns, dtype="int64")
+    long = np.asarray(direction) > 0
+    target = np.asarray(target, dtype="float64")
+    stop = np.asarray(stop, dtype="float64")
+    outcome = np.full(n, UNRESOLVED, dtype="int8")
+    exit_ns = np.full(n, np.iinfo("int64").min, dtype="int64")
+    exit_price = np.full(n, np.nan)
+    if not n or not len(ts):
+        return {"outcome": outcome, "label": np.full(n, -1, dtype="int8"), "exit_ns": exit_ns,
+                "exit_price": exit_price, "ret": np.full(n, np.nan)}
+
+    lo = np.searchsorted(ts, entry_ns, side="right")
+    hi = np.searchsorted(ts, vertical_ns, side="right")
+    lengths = np.maximum(hi - lo, 0)
+    complete = vertical_ns <= ts[-1]
+
+    # Flat layout: window k occupies [starts[k], starts[k] + lengths[k])
+    starts = np.zeros(n, dtype="int64")
+    np.cumsum(lengths[:-1], out=starts[1:])
+    total = int(lengths.sum())
+    segment = np.repeat(np.arange(n), lengths)
+    flat = np.arange(total) - np.repeat(starts, lengths) + np.repeat(lo, lengths)
+
+    # "Favourable" and "adverse" excursions as prices that rise towards the barrier
+    fav = np.where(long[segment], high[flat], -low[flat])
+    adv = np.where(long[segment], -low[flat], high[flat])
+    fav_level = np.where(long, target, -target)
+    adv_level = np.where(long, -stop, stop)
+
+    def first_touch(values: np.ndarray, levels: np.ndarray) -> np.ndarray:
+        """Flat index of the first value >= level in every window (-1 if none)."""
+        if not total:
+            return np.full(n, -1, dtype="int64")
+        # Offset each window above the previous one so a single running max never carries over
+        span = float(np.nanmax(np.abs(values))) * 2 + float(np.nanmax(np.abs(levels))) * 2 + 1.0
+        running = np.maximum.accumulate(values + segment * span)
+        hit = np.searchsorted(running, levels + np.arange(n) * span, side="left")
+        return np.where(hit < starts + lengths, hit, -1)
+
+    fav_hit = first_touch(fav, fav_level)
+    adv_hit = first_touch(adv, adv_level)
+
+    stop_first = (adv_hit >= 0) & ((fav_hit < 0) | (adv_hit <= fav_hit))
+    target_first = (fav_hit >= 0) & ~stop_first
+    outcome[target_first] = TARGET
+    outcome[stop_first] = STOP
+    exit_ns[target_first] = ts[flat[fav_hit[target_first]]]
+    exit_ns[stop_first] = ts[flat[adv_hit[stop_first]]]
+    exit_price[target_first] = target[target_first]
+    exit_price[stop_first] = stop[stop_first]
+
+    timed_out = (outcome == UNRESOLVED) & complete & (lengths > 0)
+    last = hi[timed_out] - 1
+    outcome[timed_out] = VERTICAL
+    exit_ns[timed_out] = ts[last]
+    exit_price[timed_out] = close[last]
+
+    # Default entry: last print at or before entry (the first one after it if there is none)
+    entry_fill = close[np.clip(lo - 1, 0, len(ts) - 1)]
+    entry_price = entry_fill if entry_price is None else np.asarray(entry_price, dtype="float64")
+    entry_price = np.where(np.isnan(entry_price), entry_fill, entry_price)
+    sign = np.where(long, 1.0, -1.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ret = sign * (exit_price - entry_price) / entry_price
+    label = np.where(outcome == TARGET, 1, np.where(outcome == STOP, 0,
+                     np.where(outcome == VERTICAL, (ret > 0).astype(int), -1))).astype("int8")
+    return {"outcome": outcome, "label": label, "exit_ns": exit_ns, "exit_price": exit_price, "ret": ret}
+
+
+class TripleBarrierLabeler:
+    """Batch labeller for the unlabelled rows of a FeatureStore dataset."""
+
+    def __init__(self, dataset: str = DATASET, journal: Optional[TickJournal] = None,
+                 max_holding_minutes: Optional[int] = None, entry_lag_minutes: Optional[int] = None,
+                 close_time: Optional[str] = None):
+        self.dataset = dataset
+        self.journal = journal
+        self.max_holding_ns = (settings.ML_LABEL_MAX_HOLDING_MINUTES if max_holding_minutes is None
+                               else max_holding_minutes) * NS_PER_MINUTE
+        # Bars are labelled by their right edge, so a signal's dt is already the close it entered at
+        self.entry_lag_ns = (settings.ML_LABEL_ENTRY_LAG_MINUTES if entry_lag_minutes is None
+                             else entry_lag_minutes) * NS_PER_MINUTE
+        hours, minutes = map(int, (close_time or settings.MARKET_CLOSE_TIME).split(":"))
+        self.close_offset_ns = (hours * 60 + minutes) * NS_PER_MINUTE
+
+    def pending(self, start=None, end=None) -> pd.DataFrame:
+        """Unlabelled signals with what the barriers need."""
+        columns = ["signal_id", "dt", "base_symbol", "direction", "entry_price", "target", "stoploss", "label"]
+        frame = FeatureStore.load_frame(self.dataset, start, end, columns=columns)
+        if frame.empty:
+            return frame
+        frame = frame[frame["label"].isna()].dropna(subset=["dt", "target", "stoploss"])
+        return frame.drop(columns="label")
+
+    def journal_prices(self, symbol: str, start_ns: int, end_ns: int) -> Optional[Dict[str, np.ndarray]]:
+        """ts/high/low/close of ``symbol`` from the tick journal between two times."""
+        journal = self.journal or TickJournal()
+        days = pd.date_range(pd.Timestamp(start_ns).normalize(), pd.Timestamp(end_ns).normalize(), freq="D")
+        chunks = [journal.load(day.strftime("%Y-%m-%d"), symbol) for day in days]
+        chunks = [chunk for chunk in chunks if len(chunk)]
+        if not chunks:
+            return None
+        records = np.concatenate(chunks)
+        return {"ts": np.asarray(records["ts"]), "high": np.asarray(records["high"]),
+                "low": np.asarray(records["low"]), "close": np.asarray(records["close"])}
+
+    @staticmethod
+    def frame_prices(bars: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """ts/high/low/close from an OHLC DataFrame indexed by time (e.g. 1-minute bars)."""
+        bars = bars.sort_index()
+        return {"ts": bars.index.as_unit("ns").asi8, "high": bars["high"].to_numpy("float64"),
+                "low": bars["low"].to_numpy("float64"), "close": bars["close"].to_numpy("float64")}
+
+    def label(self, signals: pd.DataFrame, prices: Dict[str, Dict[str, np.ndarray]]) -> pd.DataFrame:
+        """Resolve ``signals`` against ``prices`` (symbol -> arrays); resolved rows only."""
+        results = []
+        for symbol, group in signals.groupby("base_symbol", sort=False):
+            series = prices.get(symbol)
+            if series is None:
+                continue
+            dt = pd.DatetimeIndex(group["dt"]).as_unit("ns").asi8
+            entry_ns = dt + self.entry_lag_ns
+            day_close = pd.DatetimeIndex(group["dt"]).normalize().as_unit("ns").asi8 + self.close_offset_ns
+            vertical_ns = np.minimum(entry_ns + self.max_holding_ns, day_close)
+            out = triple_barrier(entry_ns, group["direction"].to_numpy(), group["target"].to_numpy(),
+                                 group["stoploss"].to_numpy(), vertical_ns, series["ts"], series["high"],
+                                 series["low"], series["close"], group["entry_price"].to_numpy("float64"))
+            resolved = out["outcome"] != UNRESOLVED
+            results.append(pd.DataFrame({
+                "signal_id": group["signal_id"].to_numpy()[resolved],
+                "label": out["label"][resolved],
+                "outcome": out["outcome"][resolved],
+                "exit_time": pd.to_datetime(out["exit_ns"][resolved]),
+                "exit_price": out["exit_price"][resolved],
+            }))
+        if not results:
+            return pd.DataFrame(columns=["signal_id", "label", "outcome", "exit_time", "exit_price"])
+        return pd.concat(results, ignore_index=True)
+
+    def run(self, start=None, end=None, prices: Optional[Dict[str, Dict[str, np.ndarray]]] = None) -> Dict[str, Any]:
+        """Label every pending signal in [start, end] (journal prices unless ``prices`` is given)."""
+        started = time.perf_counter()
+        signals = self.pending(start, end)
+        report: Dict[str, Any] = {"pending": len(signals), "labelled": 0, "no_prices": []}
+        if signals.empty:
+            return report
+        if prices is None:
+            prices = {}
+            for symbol, group in signals.groupby("base_symbol", sort=False):
+                span = pd.DatetimeIndex(group["dt"]).as_unit("ns").asi8
+                series = self.journal_prices(symbol, int(span.min()),
+                                             int(span.max()) + self.entry_lag_ns + self.max_holding_ns)
+                if series is None:
+                    report["no_prices"].append(symbol)
+                else:
+                    prices[symbol] = series
+        labels = self.label(signals, prices)
+        if len(labels):
+            FeatureStore.bulk_update_labels(self.dataset, labels[["signal_id", "label", "exit_time", "exit_price"]])
+        counts = labels["outcome"].value_counts()
+        report.update(
+            labelled=len(labels),
+            target=int(counts.get(TARGET, 0)),
+            stop=int(counts.get(STOP, 0)),
+            vertical=int(counts.get(VERTICAL, 0)),
+            positives=int(labels["label"].sum()) if len(labels) else 0,
+            seconds=round(time.perf_counter() - started, 3),
+        )
+        logger.info(f"Triple-barrier labelling of {self.dataset}: {report['labelled']}/{report['pending']} "
+                    f"signals resolved in {report['seconds']}s (target {report['target']}, stop {report['stop']}, "
+                    f"vertical {report['vertical']})")
+        if report["no_prices"]:
+            logger.warning(f"No stored prices for {report['no_prices']}; their signals stay unlabelled")
+        return report
+
+
+_labeling_lock = threading.Lock()
+
+
+def run_nightly_labeling(**kwargs) -> Optional[Dict[str, Any]]:
+    """Entry point for the scheduler; skips if a run is already in progress."""
+    if not _labeling_lock.acquire(blocking=False):
+        logger.warning("Signal labelling already running, skipping this trigger")
+        return None
+    try:
+        return TripleBarrierLabeler(**kwargs).run()
+    finally:
+        _labeling_lock.release()
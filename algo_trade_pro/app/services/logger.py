@@ -1,8 +1,32 @@
+"""
+app/services/logger.py
+
+Centralized, asynchronous logging.
+Every logger returned by get_logger() shares one QueueHandler; a single QueueListener
+thread formats the records and writes them to the console (text) and to LOG_FILE
+(JSON lines, one object per record, when LOG_FILE_FORMAT is "json"). Trading threads
+only build the LogRecord and enqueue it: %-style arguments are formatted by the
+listener, and a full queue drops the record (counted) instead of blocking.
+Spawned worker processes run their own listener on the same LOG_FILE, so the file
+handler is ConcurrentRotatingFileHandler (rotation is locked across processes).
+
+Hot-path call sites opt into throttling through ``extra``:
+    logger.debug("pushed tick for %s", symbol, extra={"sample": 1000})   # 1 in 1000
+    logger.warning("queue full for %s", name, extra={"rate_limit": 5})   # at most every 5s
+The next record let through from that call site carries the number suppressed.
+Pass immutable values (or snapshots) as arguments, since formatting happens later.
+"""
+
+import atexit
+import json
 import logging
 import os
-from logging.handlers import RotatingFileHandler
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from queue import Full, Queue
 from threading import current_thread
 from datetime import datetime
+from typing import Any, Dict, Optional
 
 from app.models.logs import SystemLog, LogLevel
 #from app.models.database import get_db_session
@@ -18,37 +42,177 @@ _logger_cache = {}
 LOG_DIR = os.path.dirname(settings.LOG_FILE)
 os.makedirs(LOG_DIR, exist_ok=True)
 
+TEXT_FORMAT = '[%(asctime)s] [%(levelname)s] [%(threadName)s] - %(message)s'
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+class TextFormatter(logging.Formatter):
+    """The classic one-line console format, noting records suppressed by rate limiting."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            line += f" (+{suppressed} suppressed)"
+        return line
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record. ``extra={"fields": {...}}`` adds structured fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "msg": record.getMessage(),
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry.update(fields)
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            entry["suppressed"] = suppressed
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Per call-site throttling for records carrying ``rate_limit`` (seconds) or
+    ``sample`` (keep one in N) in their extra dict. Other records pass untouched.
+    """
+
+    def __init__(self):
+        super().__init__()
+        # (pathname, lineno) -> [last emitted at, records seen, suppressed since last emit]
+        self._sites: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+        self.suppressed = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        interval = getattr(record, "rate_limit", None)
+        every = getattr(record, "sample", None)
+        if interval is None and every is None:
+            return True
+        key = (record.pathname, record.lineno)
+        with self._lock:
+            site = self._sites.get(key)
+            if site is None:
+                site = self._sites[key] = [None, 0, 0]
+            site[1] += 1
+            if interval is not None:
+                allow = site[0] is None or record.created - site[0] >= interval
+            else:
+                allow = (site[1] - 1) % max(int(every), 1) == 0
+            if not allow:
+                site[2] += 1
+                self.suppressed += 1
+                return False
+            site[0] = record.created
+            record.suppressed, site[2] = site[2], 0
+        return True
+
+
+class LogQueueHandler(QueueHandler):
+    """Enqueue records without formatting them; never blocks the caller."""
+
+    def __init__(self, queue: Queue):
+        super().__init__(queue)
+        self.queued = 0
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # msg/args stay unformatted for the listener; tracebacks must be rendered now
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+            self.queued += 1
+        except Full:
+            self.dropped += 1
+
+
+_log_queue: Queue = Queue(maxsize=settings.LOG_QUEUE_MAXSIZE)
+_queue_handler = LogQueueHandler(_log_queue)
+_rate_limit_filter = RateLimitFilter()
+_queue_handler.addFilter(_rate_limit_filter)
+_listener: Optional[QueueListener] = None
+_listener_lock = threading.Lock()
+
+
+def _build_output_handlers():
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(TextFormatter(TEXT_FORMAT, datefmt=DATE_FORMAT))
+
+    file_handler = ConcurrentRotatingFileHandler(
+        settings.LOG_FILE, maxBytes=500 * 1024 * 1024, backupCount=5
+    )
+    if settings.LOG_FILE_FORMAT.lower() == "json":
+        file_handler.setFormatter(JsonFormatter())
+    else:
+        file_handler.setFormatter(TextFormatter(TEXT_FORMAT, datefmt=DATE_FORMAT))
+    return console_handler, file_handler
+
+
+def start_logging():
+    """Start the writer thread (idempotent; get_logger calls it)."""
+    global _listener
+    with _listener_lock:
+        if _listener is None:
+            _listener = QueueListener(_log_queue, *_build_output_handlers(), respect_handler_level=True)
+            _listener.start()
+
+
+def stop_logging():
+    """Flush queued records and stop the writer thread."""
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            _listener.stop()
+            for handler in _listener.handlers:
+                handler.close()
+            _listener = None
+
+
+atexit.register(stop_logging)
+
+
+def get_log_stats() -> Dict[str, int]:
+    """Counters for the logging pipeline (records queued, dropped on a full queue, rate limited)."""
+    return {
+        "queued": _queue_handler.queued,
+        "dropped": _queue_handler.dropped,
+        "suppressed": _rate_limit_filter.suppressed,
+        "depth": _log_queue.qsize(),
+        "maxsize": _log_queue.maxsize,
+    }
+
 
 def get_logger(name: str = "algo_trade_pro") -> logging.Logger:
     """
-    Initializes or returns a configured logger with console + rotating file handler.
+    Initializes or returns a logger that writes through the shared queue handler.
     """
     global _logger_cache
 
     if name in _logger_cache:
         return _logger_cache[name]
 
+    start_logging()
+
     # Create logger
     logger = logging.getLogger(name)
     logger.setLevel(getattr(logging, settings.LOG_LEVEL.upper(), logging.INFO))
     logger.propagate = False  # Avoid duplicate logs if using FastAPI's app.logger
-
-    log_formatter = logging.Formatter(
-        '[%(asctime)s] [%(levelname)s] [%(threadName)s] - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-
-    # Console Handler
-    console_handler = logging.StreamHandler()
-    console_handler.setFormatter(log_formatter)
-    logger.addHandler(console_handler)
-
-
-    file_handler = RotatingFileHandler(
-        settings.LOG_FILE, maxBytes=500 * 1024 * 1024, backupCount=5
-    )
-    file_handler.setFormatter(log_formatter)
-    logger.addHandler(file_handler)
+    logger.addHandler(_queue_handler)
 
     _logger_cache[name] = logger
-    return logger
\ No newline at end of file
+    return logger
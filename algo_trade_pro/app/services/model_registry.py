@@ -0,0 +1,183 @@
+"""
+app/services/model_registry.py
+
+Versioned on-disk store of trained model sets (the CPR meta-label ensemble: base
+models + meta model), with the active version and its activation history.
+
+Layout under ML_MODEL_REGISTRY_DIR/<name>/:
+    v0001/            one directory per version, never modified once published
+        rf.pkl ...    one joblib file per model
+        manifest.json version, created_at, parent, feature schema, training metadata
+    state.json        {"current": "v0003", "history": ["v0001", "v0002", "v0003"]}
+
+A version is written to a temporary directory and renamed into place, and
+state.json is replaced atomically, so a reader (the inference service's loader
+thread, possibly in another process) sees either the old version or the new one.
+Rollback re-activates the previously active version.
+
+Usage:
+    registry = get_model_registry("CPR_Meta_ML")
+    version = registry.publish({"rf": rf, ..., "meta": meta}, metadata=report,
+                               feature_schema={"n_features": 27})
+    registry.current(), registry.versions(), registry.paths(version)
+    registry.rollback()
+"""
+
+import json
+import os
+import re
+import shutil
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import joblib
+
+from app.config.settings import get_settings
+from app.services.logger import get_logger
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+_VERSION = re.compile(r"^v(\d{4,})$")
+
+
+def _write_json(path: Path, payload: Dict[str, Any]):
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(payload, f, indent=2, default=str)
+    os.replace(tmp, path)
+
+
+class ModelRegistry:
+    """Versions of one model set, stored under ``root/name``."""
+
+    def __init__(self, name: str, root: Optional[str] = None, keep: Optional[int] = None):
+        self.name = name
+        self.root = Path(root or settings.ML_MODEL_REGISTRY_DIR) / name
+        self.keep = settings.ML_MODEL_REGISTRY_KEEP if keep is None else keep
+        self._lock = threading.Lock()
+
+    # ---------- versions ----------
+
+    def _version_numbers(self) -> List[int]:
+        if not self.root.is_dir():
+            return []
+        return sorted(int(m.group(1)) for m in map(_VERSION.match, os.listdir(self.root)) if m)
+
+    def version_names(self) -> List[str]:
+        """Published versions, oldest first."""
+        return [f"v{n:04d}" for n in self._version_numbers()]
+
+    def manifest(self, version: str) -> Dict[str, Any]:
+        path = self.root / version / "manifest.json"
+        if not path.is_file():
+            raise KeyError(f"{self.name}: no model version {version!r}")
+        with open(path) as f:
+            return json.load(f)
+
+    def versions(self) -> List[Dict[str, Any]]:
+        """Manifests of every version, newest first, with the active one flagged."""
+        current = self.current()
+        manifests = []
+        for version in reversed(self.version_names()):
+            try:
+                manifest = self.manifest(version)
+            except (KeyError, ValueError):
+                continue
+            manifests.append({**manifest, "active": version == current})
+        return manifests
+
+    def paths(self, version: str) -> Dict[str, Path]:
+        """Model file per key of ``version``."""
+        return {key: self.root / version / f"{key}.pkl" for key in self.manifest(version)["models"]}
+
+    def publish(self, models: Dict[str, Any], metadata: Optional[Dict[str, Any]] = None,
+                feature_schema: Optional[Dict[str, Any]] = None, activate: bool = True) -> str:
+        """Store ``models`` (key -> fitted model) as a new version; returns its name."""
+        with self._lock:
+            self.root.mkdir(parents=True, exist_ok=True)
+            numbers = self._version_numbers()
+            version = f"v{(numbers[-1] + 1 if numbers else 1):04d}"
+            tmp = self.root / f".{version}.tmp"
+            shutil.rmtree(tmp, ignore_errors=True)
+            tmp.mkdir()
+            for key, model in models.items():
+                joblib.dump(model, tmp / f"{key}.pkl")
+            _write_json(tmp / "manifest.json", {
+                "name": self.name,
+                "version": version,
+                "created_at": datetime.utcnow().isoformat(timespec="seconds"),
+                "parent": self._state().get("current"),
+                "models": list(models),
+                "feature_schema": feature_schema or {},
+                "metadata": metadata or {},
+            })
+            os.rename(tmp, self.root / version)
+        logger.info(f"{self.name}: published model version {version}")
+        if activate:
+            self.activate(version)
+        self.prune()
+        return version
+
+    # ---------- active version ----------
+
+    def _state(self) -> Dict[str, Any]:
+        path = self.root / "state.json"
+        if not path.is_file():
+            return {"current": None, "history": []}
+        with open(path) as f:
+            return json.load(f)
+
+    def current(self) -> Optional[str]:
+        """The active version (None until one is published)."""
+        return self._state().get("current")
+
+    def activate(self, version: str) -> str:
+        self.manifest(version)  # must exist
+        with self._lock:
+            state = self._state()
+            if state.get("current") != version:
+                state["current"] = version
+                state["history"] = [*state.get("history", []), version][-100:]
+                _write_json(self.root / "state.json", state)
+        logger.info(f"{self.name}: model version {version} is active")
+        return version
+
+    def rollback(self, version: Optional[str] = None) -> str:
+        """Activate ``version``, or the version that was active before the current one."""
+        if version is None:
+            state = self._state()
+            current = state.get("current")
+            earlier = [v for v in reversed(state.get("history", [])) if v != current
+                       and (self.root / v / "manifest.json").is_file()]
+            if not earlier:
+                raise ValueError(f"{self.name}: no earlier model version to roll back to")
+            version = earlier[0]
+        logger.warning(f"{self.name}: rolling back to model version {version}")
+        return self.activate(version)
+
+    def prune(self):
+        """Delete the oldest versions beyond ``keep``, except the active and previous ones."""
+        if self.keep <= 0:
+            return
+        state = self._state()
+        protected = {state.get("current"), *state.get("history", [])[-2:]}
+        names = self.version_names()
+        for version in names[:max(len(names) - self.keep, 0)]:
+            if version not in protected:
+                shutil.rmtree(self.root / version, ignore_errors=True)
+
+
+_registries: Dict[str, ModelRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def get_model_registry(name: str) -> ModelRegistry:
+    """Process-wide registry per model set name."""
+    with _registries_lock:
+        registry = _registries.get(name)
+        if registry is None:
+            registry = _registries[name] = ModelRegistry(name)
+        return registry
@@ -0,0 +1,109 @@
+"""
+app/services/ring_buffer.py
+
+Preallocated, NumPy-backed OHLCV ring buffer used to keep per-symbol market data.
+Appends are O(1) regardless of session length and the most recent window of
+every column is always available as a contiguous, zero-copy NumPy view.
+"""
+
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+OHLCV_COLUMNS = ("open", "high", "low", "close", "volume")
+
+
+class OHLCVRingBuffer:
+    """
+    Fixed-capacity columnar buffer of timestamp/open/high/low/close/volume rows.
+
+    Every value is written twice (at ``i`` and ``i + capacity``) so that the last
+    ``n`` rows are always a contiguous slice of the backing array. This doubles the
+    memory per column but lets ``window()`` return views instead of copies.
+
+    Usage:
+        buf = OHLCVRingBuffer(capacity=5000)
+        buf.append(ts, o, h, l, c, v)
+        closes = buf.window(20)["close"]     # zero-copy view
+        df = buf.to_frame()                  # pandas, for strategies that need it
+    """
+
+    def __init__(self, capacity: int = 5000):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self._ts = np.zeros(2 * capacity, dtype="int64")  # epoch nanoseconds
+        self._cols: Dict[str, np.ndarray] = {
+            name: np.zeros(2 * capacity, dtype="float64") for name in OHLCV_COLUMNS
+        }
+        self._head = 0    # next write position in [0, capacity)
+        self._size = 0
+        self.version = 0  # total rows ever appended; doubles as a monotonic bar id
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, timestamp, open_: float, high: float, low: float, close: float, volume: float = 0.0):
+        """Append one row. ``timestamp`` may be epoch-ns int, datetime or anything pd.Timestamp accepts."""
+        ts = timestamp if isinstance(timestamp, (int, np.integer)) else pd.Timestamp(timestamp).value
+        i, j = self._head, self._head + self.capacity
+        self._ts[i] = self._ts[j] = ts
+        cols = self._cols
+        cols["open"][i] = cols["open"][j] = open_
+        cols["high"][i] = cols["high"][j] = high
+        cols["low"][i] = cols["low"][j] = low
+        cols["close"][i] = cols["close"][j] = close
+        cols["volume"][i] = cols["volume"][j] = volume or 0.0
+        self._head = (self._head + 1) % self.capacity
+        if self._size < self.capacity:
+            self._size += 1
+        self.version += 1
+
+    def update_last(self, high: float, low: float, close: float, volume: float = 0.0):
+        """Merge a value into the most recent row (used for in-progress bars)."""
+        if not self._size:
+            raise IndexError("update_last on empty buffer")
+        i = (self._head - 1) % self.capacity
+        j = i + self.capacity
+        cols = self._cols
+        cols["high"][i] = cols["high"][j] = max(cols["high"][i], high)
+        cols["low"][i] = cols["low"][j] = min(cols["low"][i], low)
+        cols["close"][i] = cols["close"][j] = close
+        cols["volume"][i] = cols["volume"][j] = cols["volume"][i] + (volume or 0.0)
+
+    def _slice(self, n: Optional[int]) -> slice:
+        n = self._size if n is None else max(0, min(n, self._size))
+        end = self._head + self.capacity
+        return slice(end - n, end)
+
+    def window(self, n: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Zero-copy views of the last ``n`` rows (all rows if ``n`` is None), oldest first."""
+        s = self._slice(n)
+        views = {name: col[s] for name, col in self._cols.items()}
+        views["timestamp"] = self._ts[s]
+        return views
+
+    def column(self, name: str, n: Optional[int] = None) -> np.ndarray:
+        """Zero-copy view of a single column ("timestamp", "open", ... "volume")."""
+        s = self._slice(n)
+        return self._ts[s] if name == "timestamp" else self._cols[name][s]
+
+    def last(self) -> Optional[Dict[str, float]]:
+        """Most recent row as a plain dict, or None if empty."""
+        if not self._size:
+            return None
+        i = (self._head - 1) % self.capacity
+        row = {name: float(col[i]) for name, col in self._cols.items()}
+        row["timestamp"] = pd.Timestamp(int(self._ts[i]))
+        return row
+
+    def to_frame(self, n: Optional[int] = None) -> pd.DataFrame:
+        """Materialize the last ``n`` rows as an OHLCV DataFrame indexed by timestamp."""
+        s = self._slice(n)
+        index = pd.DatetimeIndex(self._ts[s].astype("datetime64[ns]"), name="timestamp")
+        return pd.DataFrame({name: col[s] for name, col in self._cols.items()}, index=index, copy=True)
+
+    def clear(self):
+        self._head = 0
+        self._size = 0
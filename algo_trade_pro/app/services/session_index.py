@@ -0,0 +1,275 @@
+"""
+app/services/session_index.py
+
+Daily session OHLC per symbol, with the CPR / floor pivot levels each trading day
+trades against (levels for day D come from the session before D).
+
+History is loaded once from the daily OHLC csv (SESSION_OHLC_CSV) and from the
+sessions recorded in ticks.db; levels for every day are computed in one vectorized
+pass and kept in a per-symbol dict keyed by date, so a lookup is a dict access.
+When a 1D bar closes (BarBuilder listener) the session is appended and the next
+day's levels are available immediately. Levels are not served from a session that
+lies more than SESSION_MAX_MISSING_DAYS trading days before the day asked for (the
+history stopped being updated): the lookup returns None and logs a warning.
+
+Usage:
+    index = get_session_index()
+    index.cpr_levels("NIFTY 50", date(2025, 8, 20))   # {"pivot": ..., "tc": ..., ..., "width": ...}
+    index.previous_session("NIFTY 50", date(2025, 8, 20))
+    index.levels_frame("NIFTY 50")                    # every historical day at once
+"""
+
+import os
+import sqlite3
+import threading
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.models.tick import Bar
+from app.services.logger import get_logger
+from app.services.trading_calendar import get_trading_calendar
+from app.config.settings import get_settings
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+OHLCV_COLUMNS = ["open", "high", "low", "close", "volume"]
+LEVEL_NAMES = ("pivot", "tc", "bc", "r1", "r2", "r3", "r4", "s1", "s2", "s3", "s4", "width")
+
+
+def compute_cpr_levels(high, low, close) -> Dict[str, np.ndarray]:
+    """Frank Ochoa CPR (level 4) and floor pivots; scalars or arrays (one row per session)."""
+    h = np.asarray(high, dtype="float64")
+    l = np.asarray(low, dtype="float64")
+    c = np.asarray(close, dtype="float64")
+    pivot = (h + l + c) / 3
+    bc = (h + l) / 2
+    tc = pivot * 2 - bc
+    r1, s1 = 2 * pivot - l, 2 * pivot - h
+    r2, s2 = pivot + (h - l), pivot - (h - l)
+    r3, s3 = h + 2 * (pivot - l), l - 2 * (h - pivot)
+    r4, s4 = r3 + (r2 - r1), s3 - (s1 - s2)
+    width = np.abs(tc - bc)
+    return dict(pivot=pivot, tc=tc, bc=bc, r1=r1, r2=r2, r3=r3, r4=r4, s1=s1, s2=s2, s3=s3, s4=s4, width=width)
+
+
+class SessionIndex:
+    """Per-symbol daily sessions and the levels derived from them."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        # symbol -> daily OHLCV indexed by session date (ascending)
+        self._sessions: Dict[str, pd.DataFrame] = {}
+        # symbol -> {trading date: (previous session row, levels tuple)}
+        self._by_date: Dict[str, Dict[date, tuple]] = {}
+        # symbol -> (last session row, levels tuple): applies to any date after the last session
+        self._latest: Dict[str, tuple] = {}
+        self._holidays: Optional[np.ndarray] = None  # for counting missed sessions
+
+    # ---------- loading ----------
+    def load_csv(self, path: str, symbol: str) -> int:
+        """Daily bars from a csv with date, open, high, low, close[, volume] columns."""
+        df = pd.read_csv(path)
+        stamps = pd.to_datetime(df["date"], errors="coerce", format="mixed")
+        df = df.assign(date=stamps.dt.date)[stamps.notna()]
+        if "volume" not in df:
+            df["volume"] = 0.0
+        self.add_sessions(symbol, df.set_index("date")[OHLCV_COLUMNS])
+        return len(df)
+
+    def load_ticks_db(self, db_path: Optional[str] = None, symbols: Optional[Iterable[str]] = None) -> int:
+        """Aggregate ticks.db into daily sessions (open = first tick, close = last tick of the day)."""
+        db_path = db_path or settings.TICK_DB_PATH
+        if not os.path.isfile(db_path):
+            # sqlite3.connect would create an empty database here
+            logger.info(f"SessionIndex: no tick database at {db_path}, skipping recorded sessions")
+            return 0
+        conn = sqlite3.connect(db_path)
+        try:
+            rows = conn.execute("""
+                SELECT d.symbol, d.day, o.open, d.high, d.low, c.close, d.volume
+                FROM (
+                    -- Kite volume is cumulative for the day, so the session volume is its maximum
+                    SELECT symbol, substr(timestamp, 1, 10) AS day, MAX(high) AS high, MIN(low) AS low,
+                           MAX(volume) AS volume, MIN(rowid) AS first_row, MAX(rowid) AS last_row
+                    FROM ticks GROUP BY symbol, day
+                ) d
+                JOIN ticks o ON o.rowid = d.first_row
+                JOIN ticks c ON c.rowid = d.last_row
+            """).fetchall()
+        except sqlite3.OperationalError as e:
+            logger.warning(f"SessionIndex could not read ticks from {db_path}: {e}")
+            return 0
+        finally:
+            conn.close()
+
+        df = pd.DataFrame(rows, columns=["symbol", "day"] + OHLCV_COLUMNS)
+        if symbols is not None:
+            df = df[df["symbol"].isin(set(symbols))]
+        df["day"] = pd.to_datetime(df["day"], errors="coerce").dt.date
+        df = df.dropna(subset=["day"])
+        for symbol, group in df.groupby("symbol"):
+            self.add_sessions(symbol, group.set_index("day")[OHLCV_COLUMNS])
+        return len(df)
+
+    # ---------- updates ----------
+    def add_sessions(self, symbol: str, sessions: pd.DataFrame):
+        """Merge daily OHLCV rows (indexed by date); rows given here replace existing ones."""
+        sessions = sessions[OHLCV_COLUMNS].astype("float64")
+        with self._lock:
+            current = self._sessions.get(symbol)
+            if current is not None:
+                sessions = pd.concat([current[~current.index.isin(sessions.index)], sessions])
+            sessions = sessions[~sessions.index.duplicated(keep="last")].sort_index()
+            self._sessions[symbol] = sessions
+            self._reindex(symbol)
+
+    def add_session(self, symbol: str, day: date, open_: float, high: float, low: float, close: float,
+                    volume: float = 0.0):
+        """Record one completed session (session rollover)."""
+        with self._lock:
+            current = self._sessions.get(symbol)
+            if current is None or not len(current) or day <= current.index[-1]:
+                self.add_sessions(symbol, pd.DataFrame([[open_, high, low, close, volume]],
+                                                       index=[day], columns=OHLCV_COLUMNS))
+                return
+            # Common case: a new latest session, extend the lookup without recomputing history
+            row = (day, float(open_), float(high), float(low), float(close), float(volume))
+            self._sessions[symbol] = pd.concat([
+                current, pd.DataFrame([row[1:]], index=[day], columns=OHLCV_COLUMNS),
+            ])
+            self._by_date[symbol][day] = self._latest[symbol]
+            self._latest[symbol] = (row, self._levels_tuple(high, low, close))
+        logger.info(f"SessionIndex rolled over {symbol} to session {day}")
+
+    def on_bar(self, symbol: str, timeframe: str, bar: Bar):
+        """BarBuilder listener: a closed 1D bar (labelled D+1 00:00) is session D."""
+        if timeframe != "1D":
+            return
+        day = (bar.timestamp - pd.Timedelta(days=1)).date()
+        self.add_session(symbol, day, bar.open, bar.high, bar.low, bar.close, bar.volume)
+
+    def _reindex(self, symbol: str):
+        sessions = self._sessions[symbol]
+        if sessions.empty:
+            self._by_date[symbol] = {}
+            self._latest.pop(symbol, None)
+            return
+        levels = compute_cpr_levels(sessions["high"].to_numpy(), sessions["low"].to_numpy(),
+                                    sessions["close"].to_numpy())
+        level_rows = list(zip(*(levels[name].tolist() for name in LEVEL_NAMES)))
+        session_rows = list(zip(sessions.index, *(sessions[c].tolist() for c in OHLCV_COLUMNS)))
+        days = list(sessions.index)
+        # Day i trades against the levels of session i - 1
+        self._by_date[symbol] = {
+            days[i]: (session_rows[i - 1], level_rows[i - 1]) for i in range(1, len(days))
+        }
+        self._latest[symbol] = (session_rows[-1], level_rows[-1])
+
+    @staticmethod
+    def _levels_tuple(high: float, low: float, close: float) -> tuple:
+        levels = compute_cpr_levels(high, low, close)
+        return tuple(float(levels[name]) for name in LEVEL_NAMES)
+
+    # ---------- lookups ----------
+    def _lookup(self, symbol: str, day: date) -> Optional[tuple]:
+        if isinstance(day, pd.Timestamp):
+            day = day.date()
+        entry = self._by_date.get(symbol, {}).get(day)
+        if entry is not None:
+            return entry
+        latest = self._latest.get(symbol)
+        if latest is None:
+            return None
+        if day > latest[0][0]:
+            entry = latest
+        else:
+            # A date that is not a session (weekend, holiday): last session before it
+            with self._lock:
+                sessions = self._sessions[symbol]
+                pos = sessions.index.searchsorted(day) - 1
+                if pos < 0:
+                    return None
+                next_day = sessions.index[pos + 1] if pos + 1 < len(sessions) else None
+            entry = self._by_date[symbol].get(next_day) if next_day is not None else self._latest[symbol]
+        if entry is not None and not self._is_recent(symbol, entry[0][0], day):
+            return None
+        return entry
+
+    def _is_recent(self, symbol: str, session_day: date, day: date) -> bool:
+        """Whether at most SESSION_MAX_MISSING_DAYS trading days lie between a session and ``day``."""
+        if self._holidays is None:
+            self._holidays = np.array(sorted(get_trading_calendar().holidays), dtype="datetime64[D]")
+        missing = int(np.busday_count(session_day + timedelta(days=1), day, holidays=self._holidays))
+        if missing <= settings.SESSION_MAX_MISSING_DAYS:
+            return True
+        logger.warning("SessionIndex: last session of %s is %s, %d trading days before %s; not using its levels",
+                       symbol, session_day, missing, day, extra={"rate_limit": 300})
+        return False
+
+    def previous_session(self, symbol: str, day: date) -> Optional[Dict[str, float]]:
+        """OHLCV of the last session before ``day`` (with its date), or None."""
+        entry = self._lookup(symbol, day)
+        if entry is None:
+            return None
+        row = entry[0]
+        return {"date": row[0], **dict(zip(OHLCV_COLUMNS, row[1:]))}
+
+    def cpr_levels(self, symbol: str, day: date) -> Optional[Dict[str, float]]:
+        """CPR and pivot levels in force on ``day``, or None without a previous session."""
+        entry = self._lookup(symbol, day)
+        if entry is None:
+            return None
+        return dict(zip(LEVEL_NAMES, entry[1]))
+
+    def levels_frame(self, symbol: str) -> pd.DataFrame:
+        """Bulk mode: levels for every recorded session date, from the session before it."""
+        with self._lock:
+            sessions = self._sessions.get(symbol)
+            if sessions is None:
+                return pd.DataFrame(columns=["prev_date", *LEVEL_NAMES])
+            prev = sessions.shift(1)
+        levels = compute_cpr_levels(prev["high"].to_numpy(), prev["low"].to_numpy(), prev["close"].to_numpy())
+        frame = pd.DataFrame(levels, index=sessions.index)
+        frame.insert(0, "prev_date", [None] + list(sessions.index[:-1]))
+        frame.index.name = "date"
+        return frame.iloc[1:]
+
+    def sessions(self, symbol: str) -> pd.DataFrame:
+        with self._lock:
+            sessions = self._sessions.get(symbol)
+            return sessions.copy() if sessions is not None else pd.DataFrame(columns=OHLCV_COLUMNS)
+
+    def symbols(self) -> List[str]:
+        return list(self._sessions)
+
+
+_session_index: Optional[SessionIndex] = None
+_session_index_lock = threading.Lock()
+
+
+def get_session_index() -> SessionIndex:
+    """Process-wide index, loaded from the daily csv and ticks.db on first use."""
+    global _session_index
+    with _session_index_lock:
+        if _session_index is None:
+            index = SessionIndex()
+            try:
+                index.load_csv(settings.SESSION_OHLC_CSV, settings.SESSION_OHLC_CSV_SYMBOL)
+            except FileNotFoundError:
+                logger.warning(f"Daily OHLC file not found: {settings.SESSION_OHLC_CSV}")
+            except Exception as e:
+                logger.error(f"Failed to load daily OHLC from {settings.SESSION_OHLC_CSV}: {e}")
+            index.load_ticks_db(settings.TICK_DB_PATH)
+            logger.info(f"SessionIndex loaded sessions for {index.symbols()}")
+            _session_index = index
+    return _session_index
+
+
+def on_daily_bar(symbol: str, timeframe: str, bar: Bar):
+    """BarBuilder listener for the process-wide index (loads it only when a 1D bar closes)."""
+    if timeframe == "1D":
+        get_session_index().on_bar(symbol, timeframe, bar)
@@ -0,0 +1,277 @@
+"""
+app/services/tick_journal.py
+
+Append-only, fixed-width binary tick journal (one file per trading day).
+Records are int64 epoch-ns timestamps, an int32 symbol id and float64 prices, so a
+whole session can be opened with numpy.memmap and sliced without parsing.
+A small JSON index per day keeps per-symbol record offsets and time ranges. It is
+kept in memory while appending and written on flush()/close(), when the day rolls
+over and at most every TICK_JOURNAL_INDEX_SECONDS; an index that lags its data file
+is rebuilt from the records when read.
+
+Layout:
+    <TICK_JOURNAL_DIR>/symbols.json          symbol name -> id (stable across days)
+    <TICK_JOURNAL_DIR>/YYYY-MM-DD.ticks      TICK_RECORD_DTYPE records, append order
+    <TICK_JOURNAL_DIR>/YYYY-MM-DD.idx.json   per-day index
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from app.models.tick import TICK_DTYPE, Tick
+from app.services.logger import get_logger
+from app.config.settings import get_settings
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+NS_PER_DAY = 24 * 60 * 60 * 1_000_000_000
+ITER_CHUNK_RECORDS = 65536  # records converted to Python values at a time by iter_ticks()
+
+TICK_RECORD_DTYPE = TICK_DTYPE
+
+
+def _write_json_atomic(path: str, payload: Dict[str, Any]):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(payload, f)
+    os.replace(tmp_path, path)
+
+
+class TickJournal:
+    """
+    Binary per-day tick journal with memory-mapped reads.
+
+    Usage:
+        journal = TickJournal()
+        journal.append(symbols, timestamps_ns, opens, highs, lows, closes, volumes)
+        journal.flush()                                            # write the day indexes
+        records = journal.load("2025-08-20", symbol="NIFTY 50")   # structured ndarray
+        df = journal.to_frame("2025-08-20", symbol="NIFTY 50")
+    """
+
+    def __init__(self, directory: Optional[str] = None, index_interval: Optional[float] = None):
+        self.directory = directory or settings.TICK_JOURNAL_DIR
+        self.index_interval = settings.TICK_JOURNAL_INDEX_SECONDS if index_interval is None else index_interval
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._symbols_path = os.path.join(self.directory, "symbols.json")
+        self.symbol_ids: Dict[str, int] = {}
+        if os.path.isfile(self._symbols_path):
+            with open(self._symbols_path) as f:
+                self.symbol_ids = json.load(f)
+        self.symbol_names: Dict[int, str] = {v: k for k, v in self.symbol_ids.items()}
+        self._indexes: Dict[str, Dict[str, Any]] = {}
+        self._dirty: set = set()  # days whose in-memory index is ahead of idx.json
+        self._index_written = 0.0
+
+    # ---------- paths ----------
+    def data_path(self, day) -> str:
+        return os.path.join(self.directory, f"{self._day_key(day)}.ticks")
+
+    def index_path(self, day) -> str:
+        return os.path.join(self.directory, f"{self._day_key(day)}.idx.json")
+
+    @staticmethod
+    def _day_key(day) -> str:
+        if isinstance(day, str):
+            return day
+        return pd.Timestamp(day).strftime("%Y-%m-%d")
+
+    def days(self) -> List[str]:
+        """Trading days present in the journal, oldest first."""
+        return sorted(f[:-len(".ticks")] for f in os.listdir(self.directory) if f.endswith(".ticks"))
+
+    # ---------- writing ----------
+    def symbol_id(self, symbol: str) -> int:
+        """Stable integer id for a symbol (allocated on first use)."""
+        sid = self.symbol_ids.get(symbol)
+        if sid is None:
+            sid = len(self.symbol_ids)
+            self.symbol_ids[symbol] = sid
+            self.symbol_names[sid] = symbol
+            _write_json_atomic(self._symbols_path, self.symbol_ids)
+        return sid
+
+    def append(self, symbols: Sequence[str], timestamps_ns: Sequence[int], opens: Sequence[float],
+               highs: Sequence[float], lows: Sequence[float], closes: Sequence[float],
+               volumes: Sequence[float]) -> int:
+        """Append a batch of ticks; rows are routed to their trading-day file. Returns rows written."""
+        n = len(symbols)
+        if not n:
+            return 0
+        with self._lock:
+            records = np.empty(n, dtype=TICK_RECORD_DTYPE)
+            records["ts"] = np.asarray(timestamps_ns, dtype="int64")
+            records["symbol_id"] = [self.symbol_id(s) for s in symbols]
+            records["flags"] = 0
+            records["open"] = opens
+            records["high"] = highs
+            records["low"] = lows
+            records["close"] = closes
+            records["volume"] = volumes
+
+            day_numbers = records["ts"] // NS_PER_DAY
+            days = []
+            for day_number in np.unique(day_numbers):
+                day_records = records[day_numbers == day_number]
+                day = pd.Timestamp(int(day_number) * NS_PER_DAY).strftime("%Y-%m-%d")
+                self._append_day(day, day_records)
+                days.append(day)
+            # Days no longer appended to (rollover) are written now, the current one periodically
+            if self._dirty - set(days) or time.monotonic() - self._index_written >= self.index_interval:
+                self._write_indexes()
+        return n
+
+    def _append_day(self, day: str, records: np.ndarray):
+        path = self.data_path(day)
+        index = self.index(day)
+        offset = index["records"]
+        with open(path, "ab") as f:
+            f.write(records.tobytes())
+        self._merge_index(index, records, offset)
+        self._dirty.add(day)
+
+    def flush(self):
+        """Write the indexes of days appended to since the last write."""
+        with self._lock:
+            self._write_indexes()
+
+    def close(self):
+        """Write pending indexes (the journal keeps no open files)."""
+        self.flush()
+
+    def _write_indexes(self):
+        for day in sorted(self._dirty):
+            _write_json_atomic(self.index_path(day), self._indexes[day])
+        self._dirty.clear()
+        self._index_written = time.monotonic()
+
+    # ---------- index ----------
+    def _empty_index(self) -> Dict[str, Any]:
+        return {"records": 0, "start_ns": None, "end_ns": None, "symbols": {}}
+
+    def _merge_index(self, index: Dict[str, Any], records: np.ndarray, offset: int):
+        """Fold a block of records (starting at record ``offset``) into a day index."""
+        if not len(records):
+            return
+        ts = records["ts"]
+        ids = records["symbol_id"]
+        order = np.argsort(ids, kind="stable")
+        uniq, starts, counts = np.unique(ids[order], return_index=True, return_counts=True)
+        for sid, start, count in zip(uniq, starts, counts):
+            rows = order[start:start + count]
+            name = self.symbol_names.get(int(sid), str(int(sid)))
+            entry = index["symbols"].get(name)
+            first, last = offset + int(rows[0]), offset + int(rows[-1])
+            t_min, t_max = int(ts[rows].min()), int(ts[rows].max())
+            if entry is None:
+                index["symbols"][name] = {
+                    "id": int(sid), "first": first, "last": last, "count": int(count),
+                    "start_ns": t_min, "end_ns": t_max,
+                }
+            else:
+                entry["last"] = last
+                entry["count"] += int(count)
+                entry["start_ns"] = min(entry["start_ns"], t_min)
+                entry["end_ns"] = max(entry["end_ns"], t_max)
+        index["records"] = offset + len(records)
+        start_ns, end_ns = int(ts.min()), int(ts.max())
+        index["start_ns"] = start_ns if index["start_ns"] is None else min(index["start_ns"], start_ns)
+        index["end_ns"] = end_ns if index["end_ns"] is None else max(index["end_ns"], end_ns)
+
+    def index(self, day) -> Dict[str, Any]:
+        """Per-day index; rebuilt from the data file if missing or stale."""
+        key = self._day_key(day)
+        index = self._indexes.get(key)
+        if index is None:
+            path = self.index_path(key)
+            if os.path.isfile(path):
+                with open(path) as f:
+                    index = json.load(f)
+            else:
+                index = self._empty_index()
+            self._indexes[key] = index
+        on_disk = self._record_count(key)
+        if index["records"] != on_disk:
+            index = self._indexes[key] = self._rebuild_index(key)
+        return index
+
+    def _record_count(self, day: str) -> int:
+        path = self.data_path(day)
+        return os.path.getsize(path) // TICK_RECORD_DTYPE.itemsize if os.path.isfile(path) else 0
+
+    def _rebuild_index(self, day: str) -> Dict[str, Any]:
+        logger.info(f"Rebuilding tick journal index for {day}")
+        index = self._empty_index()
+        records = self.memmap(day)
+        if records is not None:
+            self._merge_index(index, records, 0)
+        _write_json_atomic(self.index_path(day), index)
+        return index
+
+    # ---------- reading ----------
+    def memmap(self, day) -> Optional[np.ndarray]:
+        """Whole trading day as a read-only structured memmap (None if there is no data)."""
+        n = self._record_count(self._day_key(day))
+        if not n:
+            return None
+        return np.memmap(self.data_path(day), dtype=TICK_RECORD_DTYPE, mode="r", shape=(n,))
+
+    def load(self, day, symbol: Optional[str] = None, start=None, end=None) -> np.ndarray:
+        """
+        Records for a day, optionally filtered by symbol and [start, end] time range.
+        Without a symbol filter the result is a zero-copy slice of the memmap.
+        Time filtering uses binary search and assumes ticks were appended in time order.
+        """
+        records = self.memmap(day)
+        if records is None:
+            return np.empty(0, dtype=TICK_RECORD_DTYPE)
+        if symbol is not None:
+            entry = self.index(day)["symbols"].get(symbol)
+            if entry is None:
+                return np.empty(0, dtype=TICK_RECORD_DTYPE)
+            block = records[entry["first"]:entry["last"] + 1]
+            if entry["count"] != len(block):
+                block = block[block["symbol_id"] == entry["id"]]
+            records = block
+        if start is not None or end is not None:
+            ts = records["ts"]
+            lo = 0 if start is None else np.searchsorted(ts, pd.Timestamp(start).value, side="left")
+            hi = len(ts) if end is None else np.searchsorted(ts, pd.Timestamp(end).value, side="right")
+            records = records[lo:hi]
+        return records
+
+    def to_frame(self, day, symbol: Optional[str] = None, start=None, end=None) -> pd.DataFrame:
+        """Records as an OHLCV DataFrame indexed by timestamp (with a symbol column)."""
+        records = self.load(day, symbol, start, end)
+        index = pd.DatetimeIndex(records["ts"].astype("datetime64[ns]"), name="timestamp")
+        df = pd.DataFrame({
+            "open": records["open"], "high": records["high"], "low": records["low"],
+            "close": records["close"], "volume": records["volume"],
+        }, index=index)
+        names = np.array([self.symbol_names.get(i, str(i)) for i in range(len(self.symbol_ids))], dtype=object)
+        df.insert(0, "symbol", names[records["symbol_id"]] if len(records) else [])
+        return df
+
+    def iter_ticks(self, days: Iterable, symbols: Optional[Iterable[str]] = None):
+        """
+        Yield one Tick per record, in journal order (used for warmup). Every record
+        becomes Python objects; records are converted ITER_CHUNK_RECORDS at a time so
+        a whole day is never held as Python values. Use load()/memmap() for arrays.
+        """
+        wanted = None if symbols is None else {self.symbol_ids[s] for s in symbols if s in self.symbol_ids}
+        for day in days:
+            records = self.load(day)
+            if wanted is not None:
+                records = records[np.isin(records["symbol_id"], list(wanted))]
+            names = self.symbol_names
+            for start in range(0, len(records), ITER_CHUNK_RECORDS):
+                for ts, sid, _, o, h, l, c, v in records[start:start + ITER_CHUNK_RECORDS].tolist():
+                    yield Tick(names[sid], ts, o, h, l, c, v)
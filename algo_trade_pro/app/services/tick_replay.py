@@ -0,0 +1,544 @@
+"""
+app/services/tick_replay.py
+
+Offline KiteTicker stand-in and replay driver for load testing the live pipeline.
+ReplayTicker emulates the KiteTicker callback interface (on_connect/on_ticks/on_close,
+subscribe/set_mode/connect/close) and plays back tick frames recorded in ticks.db, in
+the binary tick journal, or generated synthetically for N symbols at a given rate.
+Playback runs at 1x, Nx or as fast as possible (speed=0).
+
+ReplayDriver wires the real ZerodhaBroker.create_ws_client -> websocket_queue ->
+DataCollector -> market_data_queue -> StrategyEngine chain around a ReplayTicker and
+reports end-to-end throughput and the queue depth of every stage.
+
+Usage:
+    python -m app.services.tick_replay --source synthetic --symbols 50 --rate 5000 --duration 10 --speed 0
+    python -m app.services.tick_replay --source db --db ticks.db --speed 10
+"""
+
+import argparse
+import json
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.services.isolation import isolated_state
+from app.services.tick_journal import TickJournal
+from app.services.logger import get_logger
+from app.config.settings import get_settings
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+NS_PER_SECOND = 1_000_000_000
+NIFTY_50_TOKEN = 256265
+DEFAULT_SYMBOLS = ["NIFTY 50", "RELIANCE", "TCS", "HDFCBANK", "INFY", "ICICIBANK"]
+
+_EPOCH = datetime(1970, 1, 1)
+
+# (symbol, ts_ns, open, high, low, close, volume)
+TickRow = Tuple[str, int, float, float, float, float, float]
+# (frame start ts_ns, rows); one frame is delivered as one on_ticks call
+TickFrame = Tuple[int, List[TickRow]]
+
+
+# ---------- tick sources ----------
+
+def _split_frames(symbols: np.ndarray, ts: np.ndarray, opens: np.ndarray, highs: np.ndarray,
+                  lows: np.ndarray, closes: np.ndarray, volumes: np.ndarray,
+                  frame_ns: int) -> Iterator[TickFrame]:
+    """Cut columnar ticks (in feed order) into frames of consecutive rows sharing a frame bucket."""
+    if not len(ts):
+        return
+    keys = ts // frame_ns
+    bounds = np.concatenate(([0], np.flatnonzero(np.diff(keys)) + 1, [len(ts)]))
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        rows = list(zip(
+            symbols[start:end].tolist(), ts[start:end].tolist(), opens[start:end].tolist(),
+            highs[start:end].tolist(), lows[start:end].tolist(), closes[start:end].tolist(),
+            volumes[start:end].tolist(),
+        ))
+        yield int(ts[start]), rows
+
+
+def synthetic_frames(symbols: Sequence[str], rate: float, duration: float, start=None,
+                     frame_ms: int = 100, seed: int = 0) -> Iterator[TickFrame]:
+    """
+    Random-walk ticks for ``symbols`` at ``rate`` ticks/second (all symbols combined)
+    for ``duration`` seconds of feed time, starting at ``start`` (default: today 09:15).
+    """
+    if rate <= 0 or duration <= 0:
+        return
+    rng = np.random.default_rng(seed)
+    symbols = np.asarray(list(symbols), dtype=object)
+    start_ns = pd.Timestamp(start if start is not None else pd.Timestamp.now().normalize() + pd.Timedelta("9h15min")).value
+    frame_ns = frame_ms * 1_000_000
+    n_frames = int(np.ceil(duration * 1000 / frame_ms))
+    prices = rng.uniform(100.0, 5000.0, size=len(symbols))
+    carry = 0.0
+    cursor = 0
+    for i in range(n_frames):
+        carry += rate * frame_ms / 1000
+        n = int(carry)
+        carry -= n
+        if not n:
+            continue
+        idx = (cursor + np.arange(n)) % len(symbols)
+        cursor = (cursor + n) % len(symbols)
+        # One random-walk step per tick, applied in order so repeated symbols keep walking
+        steps = rng.normal(0.0, 0.0005, size=n)
+        closes = np.empty(n)
+        for j, (sym_idx, step) in enumerate(zip(idx.tolist(), steps.tolist())):
+            prices[sym_idx] *= 1.0 + step
+            closes[j] = prices[sym_idx]
+        spread = np.abs(rng.normal(0.0, 0.0002, size=n)) * closes
+        frame_start = start_ns + i * frame_ns
+        ts = frame_start + (np.arange(n, dtype="int64") * frame_ns) // n
+        volumes = rng.integers(1, 500, size=n).astype("float64")
+        yield from _split_frames(symbols[idx], ts, closes, closes + spread, closes - spread,
+                                 closes, volumes, frame_ns)
+
+
+def db_frames(db_path: Optional[str] = None, symbols: Optional[Iterable[str]] = None, start=None,
+              end=None, frame_ms: int = 100, chunk_size: int = 50_000) -> Iterator[TickFrame]:
+    """Ticks recorded in ticks.db, in insertion order, optionally filtered by symbol and time range."""
+    wanted = None if symbols is None else {s.upper() for s in symbols}
+    start_ns = None if start is None else pd.Timestamp(start).value
+    end_ns = None if end is None else pd.Timestamp(end).value
+    frame_ns = frame_ms * 1_000_000
+    conn = sqlite3.connect(db_path or settings.TICK_DB_PATH)
+    try:
+        cursor = conn.execute(
+            "SELECT symbol, timestamp, open, high, low, close, volume FROM ticks ORDER BY rowid"
+        )
+        while True:
+            chunk = cursor.fetchmany(chunk_size)
+            if not chunk:
+                break
+            df = pd.DataFrame(chunk, columns=["symbol", "timestamp", "open", "high", "low", "close", "volume"])
+            if wanted is not None:
+                df = df[df["symbol"].str.upper().isin(wanted)]
+            stamps = pd.to_datetime(df["timestamp"], format="mixed", errors="coerce")
+            if stamps.dt.tz is not None:
+                stamps = stamps.dt.tz_localize(None)
+            valid = stamps.notna()
+            df = df[valid].assign(ts=stamps[valid].dt.as_unit("ns").astype("int64"))
+            if start_ns is not None:
+                df = df[df["ts"] >= start_ns]
+            if end_ns is not None:
+                df = df[df["ts"] <= end_ns]
+            close = df["close"].to_numpy("float64")
+            yield from _split_frames(
+                df["symbol"].to_numpy(object), df["ts"].to_numpy("int64"),
+                df["open"].fillna(df["close"]).to_numpy("float64"),
+                df["high"].fillna(df["close"]).to_numpy("float64"),
+                df["low"].fillna(df["close"]).to_numpy("float64"),
+                close, df["volume"].fillna(0.0).to_numpy("float64"), frame_ns,
+            )
+    finally:
+        conn.close()
+
+
+def journal_frames(journal: Optional[TickJournal] = None, days: Optional[Iterable] = None,
+                   symbols: Optional[Iterable[str]] = None, frame_ms: int = 100) -> Iterator[TickFrame]:
+    """Ticks from the binary journal for ``days`` (default: every day in the journal)."""
+    journal = journal or TickJournal()
+    frame_ns = frame_ms * 1_000_000
+    names = np.array([journal.symbol_names.get(i, str(i)) for i in range(len(journal.symbol_ids))], dtype=object)
+    wanted = None if symbols is None else [journal.symbol_ids[s] for s in symbols if s in journal.symbol_ids]
+    for day in (journal.days() if days is None else days):
+        records = journal.load(day)
+        if wanted is not None:
+            records = records[np.isin(records["symbol_id"], wanted)]
+        yield from _split_frames(
+            names[records["symbol_id"]], np.asarray(records["ts"]), np.asarray(records["open"]),
+            np.asarray(records["high"]), np.asarray(records["low"]), np.asarray(records["close"]),
+            np.asarray(records["volume"]), frame_ns,
+        )
+
+
+# ---------- Kite stand-ins ----------
+
+class ReplayKite:
+    """Offline stand-in for the KiteConnect calls ZerodhaBroker makes at startup (instrument dump)."""
+
+    def __init__(self, symbols: Iterable[str]):
+        self.token_map: Dict[str, int] = {}
+        for symbol in symbols:
+            symbol = symbol.upper()
+            if symbol not in self.token_map:
+                self.token_map[symbol] = NIFTY_50_TOKEN if symbol == "NIFTY 50" else 1_000_001 + len(self.token_map)
+        self.token_map.setdefault("NIFTY 50", NIFTY_50_TOKEN)
+
+    def instruments(self, exchange: Optional[str] = None) -> List[Dict[str, Any]]:
+        if exchange not in (None, "NSE"):
+            return []
+        return [{
+            "instrument_token": token,
+            "exchange_token": token >> 8,
+            "tradingsymbol": symbol,
+            "name": symbol,
+            "last_price": 0.0,
+            "expiry": "",
+            "strike": 0.0,
+            "tick_size": 0.05,
+            "lot_size": 1,
+            "instrument_type": "EQ",
+            "segment": "INDICES" if symbol == "NIFTY 50" else "NSE",
+            "exchange": exchange or "NSE",
+        } for symbol, token in self.token_map.items()]
+
+
+class ReplayTicker:
+    """
+    KiteTicker-compatible replay client.
+
+    Each frame is delivered as one ``on_ticks(ws, ticks)`` call with Kite full-mode
+    style tick dicts; only subscribed tokens are delivered. With ``speed > 0`` frames
+    are paced so that feed time advances ``speed`` times faster than the wall clock;
+    ``speed=0`` plays back as fast as the callbacks allow. ``rebase=True`` shifts the
+    feed timestamps so the first frame is stamped with the connect time.
+    """
+
+    MODE_LTP = "ltp"
+    MODE_QUOTE = "quote"
+    MODE_FULL = "full"
+
+    def __init__(self, frames: Iterable[TickFrame], token_map: Dict[str, int], speed: float = 1.0,
+                 rebase: bool = False, on_ticks: Callable = None, on_connect: Callable = None,
+                 on_close: Callable = None):
+        self.frames = frames
+        self.token_map = {symbol.upper(): token for symbol, token in token_map.items()}
+        self.speed = speed
+        self.rebase = rebase
+        self.on_ticks = on_ticks
+        self.on_connect = on_connect
+        self.on_close = on_close
+        self.subscribed: set = set()
+        self.modes: Dict[int, str] = {}
+        self.finished = threading.Event()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {
+            "frames": 0,
+            "ticks_sent": 0,
+            "ticks_unsubscribed": 0,
+            "max_lag_ms": 0.0,
+            "started_at": None,
+            "finished_at": None,
+        }
+
+    # ---------- KiteTicker interface ----------
+    def subscribe(self, instrument_tokens: Iterable[int]):
+        self.subscribed.update(t for t in instrument_tokens if t is not None)
+        return True
+
+    def unsubscribe(self, instrument_tokens: Iterable[int]):
+        for token in instrument_tokens:
+            self.subscribed.discard(token)
+            self.modes.pop(token, None)
+        return True
+
+    def set_mode(self, mode: str, instrument_tokens: Iterable[int]):
+        for token in instrument_tokens:
+            self.modes[token] = mode
+        return True
+
+    def is_connected(self) -> bool:
+        return self._running
+
+    def connect(self, threaded: bool = False, **kwargs):
+        if threaded:
+            self._thread = threading.Thread(target=self._run, name="ReplayTicker", daemon=True)
+            self._thread.start()
+        else:
+            self._run()
+
+    def close(self, code: Optional[int] = None, reason: Optional[str] = None):
+        self._running = False
+
+    def stop(self):
+        self.close()
+
+    # ---------- playback ----------
+    def _run(self):
+        self._running = True
+        self.stats["started_at"] = time.time()
+        if self.on_connect:
+            self.on_connect(self, {"replay": True})
+        wall_start = time.perf_counter()
+        feed_start = None
+        offset_ns = 0
+        try:
+            for frame_ts, rows in self.frames:
+                if not self._running:
+                    break
+                if feed_start is None:
+                    feed_start = frame_ts
+                    if self.rebase:
+                        offset_ns = pd.Timestamp.now().value - frame_ts
+                if self.speed > 0:
+                    due = wall_start + (frame_ts - feed_start) / NS_PER_SECOND / self.speed
+                    delay = due - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                    else:
+                        self.stats["max_lag_ms"] = max(self.stats["max_lag_ms"], -delay * 1000)
+                ticks = self._to_kite_ticks(rows, offset_ns)
+                self.stats["frames"] += 1
+                if ticks and self.on_ticks:
+                    self.on_ticks(self, ticks)
+        except Exception as e:
+            logger.error(f"ReplayTicker stopped on error: {e}")
+        finally:
+            self._running = False
+            self.stats["finished_at"] = time.time()
+            if self.on_close:
+                self.on_close(self, 1000, "replay finished")
+            self.finished.set()
+
+    def _to_kite_ticks(self, rows: List[TickRow], offset_ns: int) -> List[Dict[str, Any]]:
+        ticks = []
+        for symbol, ts_ns, o, h, l, c, v in rows:
+            token = self.token_map.get(symbol.upper())
+            if token is None or token not in self.subscribed:
+                self.stats["ticks_unsubscribed"] += 1
+                continue
+            stamp = _EPOCH + timedelta(microseconds=(ts_ns + offset_ns) // 1000)
+            ticks.append({
+                "tradable": True,
+                "mode": self.modes.get(token, self.MODE_QUOTE),
+                "instrument_token": token,
+                "last_price": c,
+                "ohlc": {"open": o, "high": h, "low": l, "close": c},
+                "volume_traded": v,
+                "volume": v,  # per-tick volume as persisted by ZerodhaBroker, so ticks.db round-trips
+                "timestamp": stamp,
+                "exchange_timestamp": stamp,
+            })
+        self.stats["ticks_sent"] += len(ticks)
+        return ticks
+
+
+# ---------- driver ----------
+
+class ReplayDriver:
+    """
+    Runs the live data path against a ReplayTicker and measures it.
+
+    The pipeline uses the process-wide queues from app.queue, so nothing else should be
+    consuming them while a replay is running. Ticks are persisted to a temporary ticks
+    database and journal unless ``tick_db_path`` / ``journal_dir`` are given; the
+    strategies run inside isolated_state(), so their feature store rows, session index
+    and instrument cache live in the same temporary directory.
+    """
+
+    def __init__(self, frames: Iterable[TickFrame], symbols: Iterable[str], speed: float = 0.0,
+                 rebase: bool = False, run_strategies: bool = True, sample_interval: float = 0.25,
+                 drain_timeout: float = 30.0, tick_db_path: Optional[str] = None,
+                 journal_dir: Optional[str] = None):
+        self.frames = frames
+        self.symbols = [s.upper() for s in symbols]
+        self.speed = speed
+        self.rebase = rebase
+        self.run_strategies = run_strategies
+        self.sample_interval = sample_interval
+        self.drain_timeout = drain_timeout
+        self.tick_db_path = tick_db_path
+        self.journal_dir = journal_dir
+        self.ticker: Optional[ReplayTicker] = None
+
+    def _make_ticker(self, token_map: Dict[str, int], on_ticks=None, on_connect=None, on_close=None) -> ReplayTicker:
+        self.ticker = ReplayTicker(self.frames, token_map, speed=self.speed, rebase=self.rebase,
+                                   on_ticks=on_ticks, on_connect=on_connect, on_close=on_close)
+        return self.ticker
+
+    def run(self) -> Dict[str, Any]:
+        """Replay every frame through the pipeline and return the throughput/queue-depth report."""
+        workdir = tempfile.mkdtemp(prefix="tick_replay_")
+        try:
+            # Strategy state (feature store rows, session index, instrument cache) stays in the workdir
+            with isolated_state(f"{workdir}/state"):
+                return self._run(workdir)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    def _run(self, workdir: str) -> Dict[str, Any]:
+        from app.brokers.zerodha import ZerodhaBroker
+        from app.core.data_collector import DataCollector
+        from app.core.strategy_engine import StrategyEngine
+        from app.queue.signal_queue import market_data_queue, websocket_queue
+        from app.queue.trade_queue import trade_signal_queue
+        from app.services.tick_writer import TickWriter
+
+        tick_db_path = self.tick_db_path or f"{workdir}/ticks.db"
+        journal_dir = self.journal_dir or f"{workdir}/tick_journal"
+
+        kite = ReplayKite(self.symbols)
+        broker = ZerodhaBroker(kite_client=kite, ws_client_factory=partial(self._make_ticker, kite.token_map))
+        writer = TickWriter(db_path=tick_db_path, journal=TickJournal(journal_dir))
+        collector = DataCollector(broker, tick_writer=writer)
+        collector.add_symbols(self.symbols)
+        engine = StrategyEngine()
+        engine.close_bars_on_clock = self.rebase and self.speed == 1
+        if self.run_strategies:
+            for strategy in engine.active_strategies:
+                strategy.enable()
+        else:
+            engine.active_strategies = []
+
+        stages = {
+            "websocket_queue": websocket_queue.qsize,
+            "market_data_queue": market_data_queue.qsize,
+            "tick_writer_backlog": collector.tick_writer.backlog,
+            "trade_signal_queue": trade_signal_queue.qsize,
+        }
+        samples: Dict[str, List[int]] = {name: [] for name in stages}
+        websocket_queue.reset_stats()
+        market_data_queue.reset_stats()
+
+        def sample():
+            for name, depth in stages.items():
+                samples[name].append(depth())
+
+        engine_thread = threading.Thread(target=engine.run, name="ReplayStrategyEngine", daemon=True)
+        collector_thread = threading.Thread(target=collector.run, name="ReplayDataCollector", daemon=True)
+        started = time.perf_counter()
+        engine_thread.start()
+        collector_thread.start()
+
+        # Wait for the feed to finish, sampling queue depths as it runs
+        while self.ticker is None or not self.ticker.finished.wait(self.sample_interval):
+            sample()
+            if not collector_thread.is_alive():
+                logger.error("DataCollector exited before the replay finished")
+                break
+        feed_done = time.perf_counter()
+        sent = self.ticker.stats["ticks_sent"] if self.ticker else 0
+
+        def accounted() -> int:
+            # Every sent tick is either processed, or folded/dropped by a bounded queue
+            absorbed = sum(q.get_stats()["conflated"] + q.get_stats()["dropped"]
+                           for q in (websocket_queue, market_data_queue))
+            return engine.stats["ticks_processed"] + absorbed
+
+        # Let the pipeline drain
+        deadline = feed_done + self.drain_timeout
+        while accounted() < sent and time.perf_counter() < deadline:
+            sample()
+            time.sleep(min(self.sample_interval, 0.05))
+        drained = time.perf_counter()
+        sample()
+
+        collector.stop()
+        engine.stop()
+        collector_thread.join(timeout=5)
+        engine_thread.join(timeout=5)
+        # Nothing executes the replayed signals; drop them so they never reach a real executor
+        while not trade_signal_queue.empty():
+            trade_signal_queue.get_nowait()
+
+        feed_seconds = max(feed_done - started, 1e-9)
+        total_seconds = max(drained - started, 1e-9)
+        writer_stats = collector.tick_writer.get_stats()
+        engine_stats = engine.get_dispatch_stats()
+        processed = engine_stats["ticks_processed"]
+        queue_stats = {"websocket_queue": websocket_queue.get_stats(),
+                       "market_data_queue": market_data_queue.get_stats()}
+        report = {
+            "speed": self.speed,
+            "symbols": len(self.symbols),
+            "ticks_sent": sent,
+            "ticks_collected": writer_stats["submitted"],
+            "ticks_processed": processed,
+            "ticks_persisted": writer_stats["written"],
+            "ticks_conflated": sum(q["conflated"] for q in queue_stats.values()),
+            "ticks_dropped": sum(q["dropped"] for q in queue_stats.values()),
+            "drained": accounted() >= sent,
+            "feed_seconds": round(feed_seconds, 3),
+            "end_to_end_seconds": round(total_seconds, 3),
+            "throughput_tps": {
+                "feed": round(sent / feed_seconds, 1),
+                "strategy_engine": round(processed / total_seconds, 1),
+                "tick_writer": round(writer_stats["written"] / total_seconds, 1),
+            },
+            "feed_max_lag_ms": round(self.ticker.stats["max_lag_ms"], 3) if self.ticker else 0.0,
+            "queue_depth": {
+                name: {
+                    "max": int(max(values)) if values else 0,
+                    "mean": round(float(np.mean(values)), 1) if values else 0.0,
+                    "last": int(values[-1]) if values else 0,
+                }
+                for name, values in samples.items()
+            },
+            "queues": queue_stats,
+            "tick_writer": writer_stats,
+            "strategy_engine": engine_stats,
+        }
+        logger.info(
+            f"Replay finished: {sent} ticks in {report['end_to_end_seconds']}s "
+            f"({report['throughput_tps']['strategy_engine']} ticks/s end to end)"
+        )
+        return report
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Replay ticks through the live data pipeline")
+    parser.add_argument("--source", choices=["synthetic", "db", "journal"], default="synthetic")
+    parser.add_argument("--symbols", default="50",
+                        help="number of synthetic symbols, or a comma separated symbol list")
+    parser.add_argument("--rate", type=float, default=1000.0, help="synthetic ticks per second (all symbols)")
+    parser.add_argument("--duration", type=float, default=10.0, help="synthetic feed seconds")
+    parser.add_argument("--speed", type=float, default=0.0, help="1 = real time, N = N x, 0 = as fast as possible")
+    parser.add_argument("--rebase", action="store_true", help="stamp ticks relative to the replay start")
+    parser.add_argument("--db", default=None, help="ticks.db to replay (source=db)")
+    parser.add_argument("--journal-dir", default=None, help="tick journal directory (source=journal)")
+    parser.add_argument("--days", default=None, help="comma separated journal days (source=journal)")
+    parser.add_argument("--start", default=None)
+    parser.add_argument("--end", default=None)
+    parser.add_argument("--no-strategies", action="store_true", help="measure the data path only")
+    parser.add_argument("--output", default=None, help="write the JSON report here")
+    args = parser.parse_args(argv)
+
+    if args.symbols.isdigit():
+        count = int(args.symbols)
+        symbols = (DEFAULT_SYMBOLS + [f"SYM{i:04d}" for i in range(count)])[:count]
+    else:
+        symbols = [s.strip().upper() for s in args.symbols.split(",") if s.strip()]
+
+    if args.source == "synthetic":
+        frames = synthetic_frames(symbols, args.rate, args.duration, start=args.start)
+    elif args.source == "db":
+        frames = db_frames(args.db, symbols=None if args.symbols.isdigit() else symbols,
+                           start=args.start, end=args.end)
+    else:
+        journal = TickJournal(args.journal_dir)
+        frames = journal_frames(journal, args.days.split(",") if args.days else None,
+                                symbols=None if args.symbols.isdigit() else symbols)
+        if args.symbols.isdigit():
+            symbols = list(journal.symbol_ids)
+
+    if args.source == "db" and args.symbols.isdigit():
+        conn = sqlite3.connect(args.db or settings.TICK_DB_PATH)
+        symbols = [row[0] for row in conn.execute("SELECT DISTINCT symbol FROM ticks")]
+        conn.close()
+
+    report = ReplayDriver(frames, symbols, speed=args.speed, rebase=args.rebase,
+                          run_strategies=not args.no_strategies).run()
+    text = json.dumps(report, indent=2, default=str)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
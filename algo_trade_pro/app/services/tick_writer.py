@@ -0,0 +1,190 @@
+"""
+app/services/tick_writer.py
+
+Background tick persistence stage for AlgoTrade Pro.
+Ticks are handed over with a non-blocking submit() and written to SQLite by a
+dedicated writer thread in group commits (one executemany per batch, one
+transaction per flush). Batches are bounded by size and by time. The same batch
+is also appended to the binary TickJournal for fast replay.
+"""
+
+import sqlite3
+import threading
+import time
+from queue import SimpleQueue, Empty
+from typing import Any, Dict, List, Optional
+
+from app.models.tick import Tick, as_tick, ns_to_datetime
+from app.services.tick_journal import TickJournal
+from app.services.logger import get_logger
+from app.config.settings import get_settings
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+INSERT_TICK_SQL = (
+    "INSERT INTO ticks (symbol, timestamp, open, high, low, close, volume) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+
+
+class TickWriter:
+    """Buffers ticks and group-commits them to the ticks database off the hot path."""
+
+    def __init__(self, db_path: Optional[str] = None, batch_size: Optional[int] = None,
+                 flush_interval: Optional[float] = None, journal: Optional[TickJournal] = None):
+        self.db_path = db_path or settings.TICK_DB_PATH
+        if journal is None and settings.TICK_JOURNAL_ENABLED:
+            journal = TickJournal()
+        self.journal = journal
+        self.batch_size = batch_size or settings.TICK_FLUSH_BATCH_SIZE
+        self.flush_interval = flush_interval or settings.TICK_FLUSH_INTERVAL
+        self.running = False
+        self._buffer: SimpleQueue = SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "submitted": 0,
+            "written": 0,
+            "flushes": 0,
+            "failed_flushes": 0,
+            "last_flush_ms": 0.0,
+            "max_flush_ms": 0.0,
+            "total_flush_ms": 0.0,
+            "last_batch_size": 0,
+            "journal_errors": 0,
+        }
+        self.conn = self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS ticks (
+                symbol TEXT,
+                timestamp TEXT,
+                open REAL,
+                high REAL,
+                low REAL,
+                close REAL,
+                volume REAL
+            )
+        """)
+        conn.commit()
+        return conn
+
+    def submit(self, tick: Tick):
+        """Hand a tick to the writer thread. Never blocks on disk."""
+        self._buffer.put(as_tick(tick))
+        self._stats["submitted"] += 1
+
+    def start(self):
+        """Start the writer thread."""
+        if self.running:
+            return
+        self.running = True
+        self._thread = threading.Thread(target=self.run, name="TickWriter", daemon=True)
+        self._thread.start()
+        logger.info(f"TickWriter started (batch={self.batch_size}, interval={self.flush_interval}s, db={self.db_path})")
+
+    def run(self):
+        """Writer loop: collect a batch until it is full or the interval elapses, then flush."""
+        while self.running:
+            batch = self._collect_batch()
+            if batch:
+                self._flush(batch)
+        # Drain anything submitted before stop()
+        self._flush(self._drain())
+        if self.journal is not None:
+            self.journal.close()
+        logger.info("TickWriter stopped")
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the writer thread after a final flush."""
+        self.running = False
+        if self._thread:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    def _collect_batch(self) -> List[Tick]:
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._buffer.get(timeout=remaining))
+            except Empty:
+                break
+        return batch
+
+    def _drain(self) -> List[Tick]:
+        batch = []
+        while True:
+            try:
+                batch.append(self._buffer.get_nowait())
+            except Empty:
+                return batch
+
+    def _flush(self, batch: List[Tick]):
+        """Write one batch inside a single transaction."""
+        if not batch:
+            return
+        started = time.perf_counter()
+        try:
+            with self.conn:
+                self.conn.executemany(INSERT_TICK_SQL, [
+                    (t.symbol, str(ns_to_datetime(t.ts)), t.open, t.high, t.low, t.close, t.volume)
+                    for t in batch
+                ])
+        except Exception as e:
+            with self._stats_lock:
+                self._stats["failed_flushes"] += 1
+            logger.error(f"TickWriter failed to flush {len(batch)} ticks: {e}")
+            return
+        if self.journal is not None:
+            self._append_journal(batch)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._stats_lock:
+            self._stats["written"] += len(batch)
+            self._stats["flushes"] += 1
+            self._stats["last_flush_ms"] = elapsed_ms
+            self._stats["max_flush_ms"] = max(self._stats["max_flush_ms"], elapsed_ms)
+            self._stats["total_flush_ms"] += elapsed_ms
+            self._stats["last_batch_size"] = len(batch)
+
+    def _append_journal(self, batch: List[Tick]):
+        try:
+            self.journal.append(
+                [t.symbol for t in batch], [t.ts for t in batch],
+                [t.open for t in batch], [t.high for t in batch], [t.low for t in batch],
+                [t.close for t in batch], [t.volume or 0.0 for t in batch],
+            )
+        except Exception as e:
+            with self._stats_lock:
+                self._stats["journal_errors"] += 1
+            logger.error(f"TickWriter failed to journal {len(batch)} ticks: {e}")
+
+    def flush(self):
+        """Synchronously flush everything currently buffered (used on shutdown and in tests)."""
+        self._flush(self._drain())
+        if self.journal is not None:
+            self.journal.flush()
+
+    def backlog(self) -> int:
+        """Number of ticks submitted but not yet handed to SQLite."""
+        return self._buffer.qsize()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Flush latency, throughput and backlog counters."""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        flushes = stats.pop("total_flush_ms")
+        stats["avg_flush_ms"] = round(flushes / stats["flushes"], 3) if stats["flushes"] else 0.0
+        stats["last_flush_ms"] = round(stats["last_flush_ms"], 3)
+        stats["max_flush_ms"] = round(stats["max_flush_ms"], 3)
+        stats["backlog"] = self.backlog()
+        stats["running"] = self.running
+        return stats
@@ -0,0 +1,276 @@
+"""
+app/services/trading_calendar.py
+
+NSE trading calendar: holidays, session hours, index derivative expiries and the
+bar boundaries of every session.
+
+Everything is precomputed once for the calendar range (the years in the holiday
+table plus WEEKDAY_YEARS after it): trading days and expiries are sorted
+datetime64[D] arrays, bar boundaries are sorted int64 epoch-ns arrays per timeframe.
+Lookups are a set membership test or a binary search, never a scan.
+
+Past the end of the holiday table every weekday is taken as a trading day, so
+expiries and session bars keep working (off by the unknown holidays);
+get_trading_calendar() logs an error from HOLIDAY_TABLE_WARN_DAYS before the table
+runs out until the next year's holidays are added.
+
+Bar boundaries follow BarBuilder's convention: a bar is labelled by its right edge,
+so the first 5min bar of a session is 09:20 and the last one 15:30.
+
+Expiry rules (last trading day on or before the scheduled weekday when it is a holiday):
+    NIFTY       weekly + monthly, Thursday; Tuesday from 2025-09-01
+    BANKNIFTY   weekly Wednesday until 2024-11-13; monthly last Thursday, last Wednesday
+                Mar-Dec 2024, last Tuesday from 2025-09-01
+    FINNIFTY    weekly Tuesday until 2024-11-19; monthly last Tuesday, last Thursday
+                Jan-Aug 2025, last Tuesday from 2025-09-01
+"""
+
+import threading
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.services.instrument_cache import underlying_name
+from app.services.logger import get_logger
+from app.config.settings import get_settings
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+NS_PER_MINUTE = 60 * 1_000_000_000
+
+# Intraday bar lengths in minutes (same names as BarBuilder.TIMEFRAMES)
+INTRADAY_TIMEFRAMES: Dict[str, int] = {"1min": 1, "5min": 5, "15min": 15}
+
+# NSE equity / F&O trading holidays (weekday closures only)
+NSE_HOLIDAYS: Tuple[str, ...] = (
+    # 2024
+    "2024-01-22", "2024-01-26", "2024-03-08", "2024-03-25", "2024-03-29", "2024-04-11", "2024-04-17",
+    "2024-05-01", "2024-05-20", "2024-06-17", "2024-07-17", "2024-08-15", "2024-10-02", "2024-11-01",
+    "2024-11-15", "2024-11-20", "2024-12-25",
+    # 2025
+    "2025-02-26", "2025-03-14", "2025-03-31", "2025-04-10", "2025-04-14", "2025-04-18", "2025-05-01",
+    "2025-08-15", "2025-08-27", "2025-10-02", "2025-10-21", "2025-10-22", "2025-11-05", "2025-12-25",
+    # 2026
+    "2026-01-15", "2026-01-26", "2026-03-03", "2026-03-26", "2026-03-31", "2026-04-03", "2026-04-14",
+    "2026-05-01", "2026-05-28", "2026-06-26", "2026-09-14", "2026-10-02", "2026-10-20", "2026-11-10",
+    "2026-11-24", "2026-12-25",
+)
+
+# Years after the holiday table that are still precomputed (weekdays as trading days)
+WEEKDAY_YEARS = 2
+# Days before the end of the holiday table from which get_trading_calendar() logs an error
+HOLIDAY_TABLE_WARN_DAYS = 90
+
+MON, TUE, WED, THU, FRI = range(5)
+
+# underlying -> kind -> [(effective from, weekday or None when not listed)]
+EXPIRY_RULES: Dict[str, Dict[str, List[Tuple[date, Optional[int]]]]] = {
+    "NIFTY": {
+        "weekly": [(date(2000, 1, 1), THU), (date(2025, 9, 1), TUE)],
+        "monthly": [(date(2000, 1, 1), THU), (date(2025, 9, 1), TUE)],
+    },
+    "BANKNIFTY": {
+        "weekly": [(date(2000, 1, 1), WED), (date(2024, 11, 14), None)],
+        "monthly": [(date(2000, 1, 1), THU), (date(2024, 3, 1), WED), (date(2025, 1, 1), THU),
+                    (date(2025, 9, 1), TUE)],
+    },
+    "FINNIFTY": {
+        "weekly": [(date(2000, 1, 1), TUE), (date(2024, 11, 20), None)],
+        "monthly": [(date(2000, 1, 1), TUE), (date(2025, 1, 1), THU), (date(2025, 9, 1), TUE)],
+    },
+}
+
+
+def _parse_time(value: str) -> time:
+    return datetime.strptime(value, "%H:%M").time()
+
+
+def _rule_weekday(rules: List[Tuple[date, Optional[int]]], day: date) -> Optional[int]:
+    weekday = None
+    for start, rule_weekday in rules:
+        if day >= start:
+            weekday = rule_weekday
+    return weekday
+
+
+class TradingCalendar:
+    """
+    Precomputed NSE calendar for ``start``..``end``. ``holidays_until`` is the last
+    day covered by the holiday table; after it (up to ``end``) weekdays are sessions.
+
+    Usage:
+        cal = get_trading_calendar()
+        cal.is_trading_day(date(2025, 8, 27))              # False (Ganesh Chaturthi)
+        cal.next_expiry("NIFTY 50", date(2025, 9, 3))      # 2025-09-09 (Tuesday)
+        cal.session_bounds(date(2025, 8, 20))              # (09:15, 15:30) as pd.Timestamps
+        cal.bars_between(prev_label_ns, label_ns, "5min")  # session bars strictly between two labels
+    """
+
+    def __init__(self, holidays: Iterable = NSE_HOLIDAYS, start: Optional[date] = None, end: Optional[date] = None,
+                 open_time: str = "09:15", close_time: str = "15:30"):
+        self.holidays = {pd.Timestamp(day).date() for day in holidays}
+        years = sorted({day.year for day in self.holidays}) or [date.today().year]
+        self.start = start or date(years[0], 1, 1)
+        self.holidays_until = date(years[-1], 12, 31)
+        self.end = end or date(years[-1] + WEEKDAY_YEARS, 12, 31)
+        self.open_time = _parse_time(open_time)
+        self.close_time = _parse_time(close_time)
+        self._open_offset_ns = (self.open_time.hour * 60 + self.open_time.minute) * NS_PER_MINUTE
+        self._close_offset_ns = (self.close_time.hour * 60 + self.close_time.minute) * NS_PER_MINUTE
+
+        days = pd.bdate_range(self.start, self.end).date
+        self.trading_days = np.array([d for d in days if d not in self.holidays], dtype="datetime64[D]")
+        self._trading_day_set = set(self.trading_days.astype(object).tolist())
+        self._lock = threading.Lock()
+        self._boundaries: Dict[str, np.ndarray] = {}
+        self._expiries: Dict[Tuple[str, str], np.ndarray] = {}
+
+    # ---------- trading days ----------
+    def in_range(self, day: date) -> bool:
+        return self.start <= day <= self.end
+
+    def check_holiday_table(self, today: Optional[date] = None) -> int:
+        """Days the holiday table still covers after ``today``; logs an error when it runs out soon."""
+        today = today or date.today()
+        remaining = (self.holidays_until - today).days
+        if remaining <= HOLIDAY_TABLE_WARN_DAYS:
+            logger.error(f"NSE holiday table ends {self.holidays_until} ({remaining} days left): later weekdays "
+                         f"are treated as trading days. Add the next year's holidays to NSE_HOLIDAYS "
+                         f"(or TRADING_HOLIDAYS_EXTRA)")
+        return remaining
+
+    def is_trading_day(self, day: date) -> bool:
+        if not self.in_range(day):
+            return day.weekday() < 5 and day not in self.holidays
+        return day in self._trading_day_set
+
+    def next_trading_day(self, day: date, include: bool = False) -> Optional[date]:
+        """First trading day after ``day`` (or on it when ``include``)."""
+        pos = np.searchsorted(self.trading_days, np.datetime64(day, "D"), side="left" if include else "right")
+        return self.trading_days[pos].astype(object) if pos < len(self.trading_days) else None
+
+    def previous_trading_day(self, day: date, include: bool = False) -> Optional[date]:
+        """Last trading day before ``day`` (or on it when ``include``)."""
+        pos = np.searchsorted(self.trading_days, np.datetime64(day, "D"), side="right" if include else "left") - 1
+        return self.trading_days[pos].astype(object) if pos >= 0 else None
+
+    def trading_days_between(self, start: date, end: date) -> List[date]:
+        lo = np.searchsorted(self.trading_days, np.datetime64(start, "D"), side="left")
+        hi = np.searchsorted(self.trading_days, np.datetime64(end, "D"), side="right")
+        return self.trading_days[lo:hi].astype(object).tolist()
+
+    # ---------- sessions ----------
+    def session_bounds(self, day: date) -> Optional[Tuple[pd.Timestamp, pd.Timestamp]]:
+        """(open, close) of the session on ``day``, or None on holidays and weekends."""
+        if not self.is_trading_day(day):
+            return None
+        return pd.Timestamp(datetime.combine(day, self.open_time)), pd.Timestamp(datetime.combine(day, self.close_time))
+
+    def is_market_open(self, ts) -> bool:
+        ts = pd.Timestamp(ts)
+        bounds = self.session_bounds(ts.date())
+        return bounds is not None and bounds[0] <= ts <= bounds[1]
+
+    # ---------- bar boundaries ----------
+    def bar_boundaries(self, timeframe: str) -> np.ndarray:
+        """Right-edge labels (epoch ns) of every session bar in the calendar range."""
+        boundaries = self._boundaries.get(timeframe)
+        if boundaries is None:
+            with self._lock:
+                boundaries = self._boundaries.get(timeframe)
+                if boundaries is None:
+                    step = INTRADAY_TIMEFRAMES[timeframe] * NS_PER_MINUTE
+                    offsets = np.arange(self._open_offset_ns + step, self._close_offset_ns + 1, step, dtype="int64")
+                    day_ns = self.trading_days.astype("datetime64[ns]").astype("int64")
+                    boundaries = (day_ns[:, None] + offsets[None, :]).ravel()
+                    self._boundaries[timeframe] = boundaries
+        return boundaries
+
+    def session_bars(self, day: date, timeframe: str) -> np.ndarray:
+        """Bar labels of one session."""
+        boundaries = self.bar_boundaries(timeframe)
+        start = np.datetime64(day, "D").astype("datetime64[ns]").astype("int64")
+        lo, hi = np.searchsorted(boundaries, [start, start + 24 * 60 * NS_PER_MINUTE])
+        return boundaries[lo:hi]
+
+    def next_boundary(self, ts_ns: int, timeframe: str) -> Optional[int]:
+        """Label of the session bar containing ``ts_ns`` (first boundary >= ts), or None past the range."""
+        boundaries = self.bar_boundaries(timeframe)
+        pos = np.searchsorted(boundaries, ts_ns, side="left")
+        return int(boundaries[pos]) if pos < len(boundaries) else None
+
+    def bars_between(self, start_ns: int, end_ns: int, timeframe: str) -> int:
+        """Number of session bar labels strictly between two labels."""
+        boundaries = self.bar_boundaries(timeframe)
+        lo = np.searchsorted(boundaries, start_ns, side="right")
+        hi = np.searchsorted(boundaries, end_ns, side="left")
+        return max(int(hi - lo), 0)
+
+    # ---------- expiries ----------
+    def expiries(self, underlying: str, kind: str = "all") -> np.ndarray:
+        """Scheduled expiry dates (datetime64[D], sorted) of ``underlying``: weekly, monthly or all."""
+        name = underlying_name(underlying)
+        key = (name, kind)
+        expiries = self._expiries.get(key)
+        if expiries is None:
+            with self._lock:
+                if kind == "all":
+                    expiries = np.union1d(self._build_expiries(name, "weekly"), self._build_expiries(name, "monthly"))
+                else:
+                    expiries = self._build_expiries(name, kind)
+                self._expiries[key] = expiries
+        return expiries
+
+    def _build_expiries(self, name: str, kind: str) -> np.ndarray:
+        rules = EXPIRY_RULES.get(name, {}).get(kind)
+        if not rules:
+            return np.array([], dtype="datetime64[D]")
+        result = []
+        if kind == "weekly":
+            day = self.start
+            while day <= self.end:
+                weekday = _rule_weekday(rules, day)
+                if weekday is not None and day.weekday() == weekday:
+                    result.append(day)
+                day += timedelta(days=1)
+        else:
+            for month_start in pd.date_range(self.start, self.end, freq="MS").date:
+                month_end = (pd.Timestamp(month_start) + pd.offsets.MonthEnd(0)).date()
+                weekday = _rule_weekday(rules, month_end)
+                if weekday is None:
+                    continue
+                result.append(month_end - timedelta(days=(month_end.weekday() - weekday) % 7))
+        # A holiday moves the expiry to the previous trading day
+        shifted = [day if self.is_trading_day(day) else self.previous_trading_day(day) for day in result]
+        return np.unique(np.array([d for d in shifted if d is not None], dtype="datetime64[D]"))
+
+    def next_expiry(self, underlying: str, on: date, kind: str = "all") -> Optional[date]:
+        """First scheduled expiry on or after ``on``."""
+        expiries = self.expiries(underlying, kind)
+        pos = np.searchsorted(expiries, np.datetime64(on, "D"))
+        return expiries[pos].astype(object) if pos < len(expiries) else None
+
+    def is_monthly_expiry(self, underlying: str, day: date) -> bool:
+        monthly = self.expiries(underlying, "monthly")
+        pos = np.searchsorted(monthly, np.datetime64(day, "D"))
+        return bool(pos < len(monthly) and monthly[pos] == np.datetime64(day, "D"))
+
+
+_trading_calendar: Optional[TradingCalendar] = None
+_trading_calendar_lock = threading.Lock()
+
+
+def get_trading_calendar() -> TradingCalendar:
+    """Process-wide calendar (NSE holidays plus TRADING_HOLIDAYS_EXTRA, configured session hours)."""
+    global _trading_calendar
+    with _trading_calendar_lock:
+        if _trading_calendar is None:
+            extra = [d.strip() for d in settings.TRADING_HOLIDAYS_EXTRA.split(",") if d.strip()]
+            _trading_calendar = TradingCalendar(holidays=list(NSE_HOLIDAYS) + extra,
+                                                open_time=settings.MARKET_OPEN_TIME,
+                                                close_time=settings.MARKET_CLOSE_TIME)
+            _trading_calendar.check_holiday_table()
+    return _trading_calendar
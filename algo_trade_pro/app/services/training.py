@@ -0,0 +1,362 @@
+"""
+app/services/training.py
+
+Nightly training of the CPR meta-label ensemble (four calibrated base models whose
+probabilities feed a logistic meta model), run by TaskScheduler.
+
+Stages (each timed in the report):
+    load      labelled rows of the feature store, read as a typed matrix
+    balance   downsample the majority class when the label mix is outside 40-60%
+    folds     stratified fold assignment, cached while the labels are unchanged
+    base      rf / xgb / svm / lr fitted in parallel worker processes: out-of-fold
+              probabilities (each fold from models that never saw it), then the
+              production fit on every row, isotonic-calibrated on 3-fold
+              cross-validated predictions
+    meta      logistic regression on the out-of-fold base probabilities
+    save      models published as a new ModelRegistry version and activated; live
+              inference services load it in the background and swap it in
+
+The production fits warm-start from the active registry version (or, before the
+first publish, the seed models in ``model_paths``) where the estimator allows it:
+XGB adds ``warm_rounds`` boosting rounds to the previous booster, and the SGD
+logistic regression starts from the previous coefficients. Only the production
+estimator is warm-started, on every row outside the last fold, and is then
+isotonic-calibrated on its own scores for that fold; the out-of-fold fits always
+start cold, since the previous model has seen the rows they hold out. A model is refitted from
+scratch instead once its booster would exceed ML_TRAINING_MAX_BOOST_ROUNDS, after
+ML_TRAINING_MAX_WARM_REFITS warm refits in a row, or when the sample count moved by
+more than ML_TRAINING_FULL_REFIT_CHANGE since the previous version. Training runs in
+its own thread and processes; the trading threads only see the final model swap.
+
+Usage:
+    report = TrainingPipeline(model_paths).run()
+    report["version"], report["timings"], report["models"]["xgb"]["mode"], report["oof_auc"]
+"""
+
+import hashlib
+import json
+import multiprocessing as mp
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from app.config.settings import get_settings
+from app.services.feature_store import FeatureStore, feature_columns
+from app.services.inference import BASE_MODELS, reload_inference_service
+from app.services.model_registry import ModelRegistry, get_model_registry
+from app.services.logger import get_logger
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+DATASET = "cpr_meta_signals"
+MODEL_SET = "CPR_Meta_ML"  # registry (and inference service) name of the CPR meta-label ensemble
+
+
+# ---------- estimators (built inside the workers) ----------
+
+def make_estimator(name: str, seed: int = 42):
+    """Uncalibrated base estimator ``name``."""
+    if name == "rf":
+        from sklearn.ensemble import RandomForestClassifier
+        return RandomForestClassifier(n_estimators=100, max_depth=7, random_state=seed, n_jobs=1)
+    if name == "xgb":
+        from xgboost import XGBClassifier
+        return XGBClassifier(n_estimators=150, max_depth=4, learning_rate=0.07, random_state=seed, n_jobs=1)
+    if name == "svm":
+        from sklearn.svm import SVC
+        # Calibrated on its decision function, so no Platt-scaled probability=True fit
+        return SVC(C=2.0, kernel="rbf", gamma="scale", random_state=seed)
+    if name == "lr":
+        # Logistic regression fitted by SGD, so a refit can start from yesterday's weights
+        from sklearn.linear_model import SGDClassifier
+        from sklearn.pipeline import make_pipeline
+        from sklearn.preprocessing import StandardScaler
+        return make_pipeline(StandardScaler(), SGDClassifier(loss="log_loss", alpha=1e-4, max_iter=1000,
+                                                             tol=1e-3, random_state=seed))
+    raise ValueError(f"Unknown base model {name!r}")
+
+
+def _calibrated(name: str, seed: int, ensemble: bool = True):
+    from sklearn.calibration import CalibratedClassifierCV
+    return CalibratedClassifierCV(make_estimator(name, seed), method="isotonic", cv=3, ensemble=ensemble)
+
+
+def warm_start_params(name: str, previous: Any, n_features: int, warm_rounds: int,
+                      max_rounds: Optional[int] = None) -> Optional[Tuple[Dict, Dict]]:
+    """
+    (set_params overrides, fit params) continuing ``previous`` (a calibrated model from
+    the last run), or None when the estimator has no incremental update, the previous
+    model does not fit the current feature width or (XGB) continuing it would grow the
+    booster beyond ``max_rounds``.
+    """
+    if previous is None or getattr(previous, "n_features_in_", None) != n_features:
+        return None
+    try:
+        fitted = previous.calibrated_classifiers_[0].estimator
+    except (AttributeError, IndexError):
+        return None
+    if name == "xgb" and hasattr(fitted, "get_booster"):
+        booster = fitted.get_booster()
+        max_rounds = settings.ML_TRAINING_MAX_BOOST_ROUNDS if max_rounds is None else max_rounds
+        if booster.num_boosted_rounds() + warm_rounds > max_rounds:
+            return None
+        return {"n_estimators": warm_rounds}, {"xgb_model": booster}
+    if name == "lr" and hasattr(fitted, "named_steps") and "sgdclassifier" in fitted.named_steps:
+        sgd = fitted.named_steps["sgdclassifier"]
+        return {}, {"sgdclassifier__coef_init": sgd.coef_, "sgdclassifier__intercept_init": sgd.intercept_}
+    return None
+
+
+def _warm_calibrated(name: str, seed: int, X: np.ndarray, y: np.ndarray, holdout: np.ndarray,
+                     overrides: Dict, fit_params: Dict):
+    """
+    Continue the previous model on the rows outside ``holdout``, then calibrate that
+    estimator (isotonic) on its own scores for the held-out rows.
+    """
+    from sklearn.calibration import CalibratedClassifierCV
+    from sklearn.frozen import FrozenEstimator
+
+    estimator = make_estimator(name, seed).set_params(**overrides).fit(X[~holdout], y[~holdout], **fit_params)
+    model = CalibratedClassifierCV(FrozenEstimator(estimator), method="isotonic").fit(X[holdout], y[holdout])
+    # Unwrapped so the next run can continue it (the calibrator is unaffected)
+    model.calibrated_classifiers_[0].estimator = estimator
+    return model
+
+
+def _fit_base_model(name: str, data_dir: str, previous_path: Optional[str], seed: int,
+                    warm_rounds: int, max_rounds: Optional[int] = None) -> Dict[str, Any]:
+    """Worker: out-of-fold probabilities plus the production fit for one base model."""
+    started = time.perf_counter()
+    X = np.load(os.path.join(data_dir, "X.npy"), mmap_mode="r")
+    y = np.load(os.path.join(data_dir, "y.npy"))
+    folds = np.load(os.path.join(data_dir, "folds.npy"))
+
+    oof = np.empty(len(y))
+    for fold in np.unique(folds):
+        test = folds == fold
+        model = _calibrated(name, seed).fit(X[~test], y[~test])
+        oof[test] = model.predict_proba(X[test])[:, 1]
+    oof_seconds = time.perf_counter() - started
+
+    previous = None
+    if previous_path and os.path.exists(previous_path):
+        try:
+            previous = joblib.load(previous_path)
+        except Exception:
+            previous = None
+    warm = warm_start_params(name, previous, X.shape[1], warm_rounds, max_rounds)
+    fit_started = time.perf_counter()
+    if warm is None:
+        # One estimator on every row, calibrated on cold cross-validated predictions
+        model = _calibrated(name, seed, ensemble=False).fit(X, y)
+    else:
+        model = _warm_calibrated(name, seed, X, y, folds == folds.max(), *warm)
+    final = model.calibrated_classifiers_[0].estimator
+    final = model.calibrated_classifiers_[0].estimator
+    return {
+        "name": name,
+        "model": model,
+        "oof": oof,
+        "mode": "warm" if warm is not None else "full",
+        "rounds": int(final.get_booster().num_boosted_rounds()) if hasattr(final, "get_booster") else None,
+        "oof_seconds": round(oof_seconds, 3),
+        "fit_seconds": round(time.perf_counter() - fit_started, 3),
+    }
+
+
+# ---------- training data ----------
+
+def load_training_matrix(dataset: str = DATASET, start=None, end=None) -> Tuple[np.ndarray, np.ndarray, Dict[str, Any]]:
+    """(X, y, info) for the labelled rows of ``dataset`` with a complete feature vector."""
+    schema = FeatureStore.schema(dataset)
+    if schema is None:
+        return np.empty((0, 0)), np.empty(0, dtype=int), {"rows": 0, "labelled": 0, "usable": 0, "features": 0}
+    n_features = schema["n_features"]
+    matrix = FeatureStore.load_matrix(dataset, start, end, columns=[*feature_columns(n_features), "label"])
+    features, labels = matrix[:, :n_features], matrix[:, n_features]
+    usable = ~np.isnan(labels) & ~np.isnan(features).any(axis=1)
+    info = {"rows": len(matrix), "labelled": int((~np.isnan(labels)).sum()), "usable": int(usable.sum()),
+            "features": n_features}
+    return features[usable].astype("float64"), labels[usable].astype(int), info
+
+
+def balance_classes(X: np.ndarray, y: np.ndarray, seed: int = 42) -> Tuple[np.ndarray, np.ndarray]:
+    """Downsample the majority class when the positive rate is outside (0.4, 0.6)."""
+    if not len(y) or 0.4 < y.mean() < 0.6:
+        return X, y
+    rng = np.random.default_rng(seed)
+    ix0, ix1 = np.flatnonzero(y == 0), np.flatnonzero(y == 1)
+    n = min(len(ix0), len(ix1))
+    ix = np.sort(np.r_[rng.choice(ix0, n, replace=False), rng.choice(ix1, n, replace=False)])
+    return X[ix], y[ix]
+
+
+def fold_assignment(y: np.ndarray, n_splits: int, seed: int, cache_dir: str) -> Tuple[np.ndarray, bool]:
+    """Stratified fold id per row; reused from the cache while the labels are unchanged."""
+    from sklearn.model_selection import StratifiedKFold
+
+    key = hashlib.blake2b(y.astype("int8").tobytes() + f"{n_splits}:{seed}".encode(), digest_size=16).hexdigest()
+    path = os.path.join(cache_dir, f"folds_{key}.npy")
+    if os.path.exists(path):
+        return np.load(path), True
+    folds = np.empty(len(y), dtype=np.int8)
+    splitter = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=seed)
+    for fold, (_, test) in enumerate(splitter.split(np.zeros(len(y)), y)):
+        folds[test] = fold
+    for stale in Path(cache_dir).glob("folds_*.npy"):
+        stale.unlink()
+    np.save(path, folds)
+    return folds, False
+
+
+def _auc(y: np.ndarray, scores: np.ndarray) -> Optional[float]:
+    from sklearn.metrics import roc_auc_score
+    return round(float(roc_auc_score(y, scores)), 4) if len(np.unique(y)) == 2 else None
+
+
+# ---------- pipeline ----------
+
+class TrainingPipeline:
+    """One nightly training run of the meta-label ensemble."""
+
+    def __init__(self, model_paths: Optional[Dict[str, Path]] = None, dataset: str = DATASET,
+                 cache_dir: Optional[str] = None, workers: Optional[int] = None, n_splits: int = 5,
+                 min_samples: Optional[int] = None, warm_rounds: int = 30, seed: int = 42,
+                 registry: Optional[ModelRegistry] = None, reload_service: bool = True):
+        self.model_paths = {key: Path(path) for key, path in (model_paths or {}).items()}
+        self.dataset = dataset
+        self.cache_dir = cache_dir or settings.ML_TRAINING_CACHE_DIR
+        self.workers = workers if workers is not None else settings.ML_TRAINING_WORKERS
+        self.n_splits = n_splits
+        self.min_samples = settings.ML_TRAINING_MIN_SAMPLES if min_samples is None else min_samples
+        self.warm_rounds = warm_rounds
+        self.seed = seed
+        self.registry = registry or get_model_registry(MODEL_SET)
+        self.reload_service = reload_service
+        self.timings: Dict[str, float] = {}
+
+    @contextmanager
+    def _stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = round(time.perf_counter() - started, 3)
+
+    def _previous_paths(self, samples: int) -> Tuple[Dict[str, Path], Dict[str, int], Optional[str]]:
+        """
+        Models the production fits warm-start from, the warm refits in a row behind each
+        of them, and why the run starts from scratch (None when warm starts are allowed).
+        """
+        current = self.registry.current()
+        if current is None:
+            return self.model_paths, {}, None
+        metadata = self.registry.manifest(current).get("metadata", {})
+        previous_samples = metadata.get("samples") or 0
+        if previous_samples and abs(samples - previous_samples) > settings.ML_TRAINING_FULL_REFIT_CHANGE * previous_samples:
+            return {}, {}, f"samples changed from {previous_samples} to {samples}"
+        chains = {name: int(model.get("warm_chain", 0)) for name, model in metadata.get("models", {}).items()}
+        paths = {name: path for name, path in self.registry.paths(current).items()
+                 if chains.get(name, 0) < settings.ML_TRAINING_MAX_WARM_REFITS}
+        return paths, chains, None
+
+    def run(self) -> Dict[str, Any]:
+        """Train, save and return the report (``trained`` False when there are too few labels)."""
+        from sklearn.linear_model import LogisticRegression
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        started = time.perf_counter()
+        report: Dict[str, Any] = {"dataset": self.dataset, "trained": False, "timings": self.timings}
+
+        with self._stage("load"):
+            X, y, info = load_training_matrix(self.dataset)
+        report["data"] = info
+        if len(y) < self.min_samples:
+            logger.info(f"Insufficient samples to (re)train meta classifier: {len(y)} labelled, "
+                        f"need {self.min_samples}+.")
+            return report
+
+        with self._stage("balance"):
+            X, y = balance_classes(X, y, self.seed)
+        with self._stage("folds"):
+            folds, reused = fold_assignment(y, self.n_splits, self.seed, self.cache_dir)
+        report.update(samples=len(y), positive_rate=round(float(y.mean()), 4), folds_cached=reused)
+
+        data_dir = os.path.join(self.cache_dir, "train")
+        os.makedirs(data_dir, exist_ok=True)
+        np.save(os.path.join(data_dir, "X.npy"), np.ascontiguousarray(X, dtype="float64"))
+        np.save(os.path.join(data_dir, "y.npy"), y)
+        np.save(os.path.join(data_dir, "folds.npy"), folds)
+
+        with self._stage("base"):
+            previous, chains, cold_reason = self._previous_paths(len(y))
+            if cold_reason:
+                logger.info(f"Meta-label models refitted from scratch: {cold_reason}")
+            jobs = [(name, data_dir, str(previous[name]) if name in previous else None, self.seed, self.warm_rounds,
+                     settings.ML_TRAINING_MAX_BOOST_ROUNDS)
+                    for name in BASE_MODELS]
+            workers = min(self.workers, len(jobs), os.cpu_count() or 1)
+            if workers > 1:
+                with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn")) as pool:
+                    results = list(pool.map(_fit_base_model, *zip(*jobs)))
+            else:
+                results = [_fit_base_model(*job) for job in jobs]
+        fitted = {result["name"]: result for result in results}
+        for name, result in fitted.items():
+            result["warm_chain"] = chains.get(name, 0) + 1 if result["mode"] == "warm" else 0
+
+        with self._stage("meta"):
+            oof = np.column_stack([fitted[name]["oof"] for name in BASE_MODELS])
+            meta_model = LogisticRegression(max_iter=1000).fit(oof, y)
+
+        report.update(
+            models={name: {key: fitted[name][key]
+                           for key in ("mode", "warm_chain", "rounds", "oof_seconds", "fit_seconds")}
+                    for name in BASE_MODELS},
+            oof_auc={**{name: _auc(y, fitted[name]["oof"]) for name in BASE_MODELS},
+                     "meta": _auc(y, meta_model.predict_proba(oof)[:, 1])},
+        )
+
+        with self._stage("save"):
+            metadata = {key: report[key] for key in ("dataset", "data", "samples", "positive_rate", "models", "oof_auc")}
+            version = self.registry.publish(
+                {**{name: fitted[name]["model"] for name in BASE_MODELS}, "meta": meta_model},
+                metadata=metadata,
+                feature_schema={"n_features": int(X.shape[1]), "dataset": self.dataset},
+            )
+            if self.reload_service:
+                reload_inference_service(self.registry.name)
+
+        self.timings["total"] = round(time.perf_counter() - started, 3)
+        report.update(trained=True, version=version)
+        with open(os.path.join(self.cache_dir, "last_report.json"), "w") as f:
+            json.dump(report, f, indent=2, default=str)
+        logger.info(f"Meta-label model {version} trained in {self.timings['total']}s on {len(y)} samples: "
+                    f"stages {self.timings}, OOF AUC {report['oof_auc']}")
+        return report
+
+
+_training_lock = threading.Lock()
+
+
+def run_nightly_training(model_paths: Optional[Dict[str, Path]] = None, **kwargs) -> Optional[Dict[str, Any]]:
+    """Entry point for the scheduler; skips if a run is already in progress."""
+    if not _training_lock.acquire(blocking=False):
+        logger.warning("Meta-label training already running, skipping this trigger")
+        return None
+    try:
+        if model_paths is None:
+            from app.strategies.cpr_startegy import MODEL_DIR
+            model_paths = {name: MODEL_DIR / f"{name}.pkl" for name in [*BASE_MODELS, "meta"]}
+        return TrainingPipeline(model_paths, **kwargs).run()
+    finally:
+        _training_lock.release()
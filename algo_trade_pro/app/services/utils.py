@@ -14,7 +14,10 @@ def nearest_strike(price: float, step: int = 100) -> int:
 
 def weekly_option_symbol(symbol: str, strike: int, option_type: str, expiry_date: dt.date) -> str:
     """
-    Constructs NSE weekly option symbol name like 'BANKNIFTY24JUL41000CE'.
+    NFO tradingsymbol of an option, looked up in the instrument master.
+    When the contract is not listed there the name is built from the expiry
+    schedule: 'NIFTY25AUG24700CE' for a monthly expiry, 'NIFTY2590224700CE'
+    (YY, month code 1-9/O/N/D, DD) for a weekly one.
 
     Args:
         symbol (str): Base symbol like 'BANKNIFTY'
@@ -26,6 +29,14 @@ def weekly_option_symbol(symbol: str, strike: int, option_type: str, expiry_date
         str: Formatted weekly option symbol
     """
 
+    from app.services.instrument_cache import get_instrument_cache, underlying_name
+    from app.services.trading_calendar import get_trading_calendar
+
+    option = get_instrument_cache().option(symbol, expiry_date, strike, option_type)
+    if option is not None:
+        return option["tradingsymbol"]
+    monthly = get_trading_calendar().is_monthly_expiry(symbol, expiry_date)
+
     symbol = symbol.upper()
     option_type = option_type.upper()
     month_map = {
@@ -40,16 +51,16 @@ def weekly_option_symbol(symbol: str, strike: int, option_type: str, expiry_date
     # Format day with two digits if needed
     day_str = f"{day:02d}"
 
-    if symbol == 'NIFTY 50':
-         symbol = 'NIFTY'
-    elif symbol == 'BANK NIFTY':
-         symbol = 'BANKNIFTY'
-    else:
-         symbol = symbol 
+    symbol = underlying_name(symbol)
+    year = str(expiry_date.year)[2:]
+    strike = int(strike) if float(strike).is_integer() else strike
 
-    # Compose symbol in NSE weekly options format:
-    # SYMBOL + YY + MON + DD + STRIKE + CE/PE
-    return f"{symbol}{str(expiry_date.year)[2:]}{month_abbr}{strike}{option_type.upper()}"
+    if monthly:
+        # SYMBOL + YY + MON + STRIKE + CE/PE
+        return f"{symbol}{year}{month_abbr}{strike}{option_type}"
+    # SYMBOL + YY + M + DD + STRIKE + CE/PE
+    month_code = str(expiry_date.month) if expiry_date.month < 10 else "OND"[expiry_date.month - 10]
+    return f"{symbol}{year}{month_code}{day_str}{strike}{option_type}"
 
 def getTimeOfDay(hours, minutes, seconds, dateTimeObj = None):
     if dateTimeObj == None:
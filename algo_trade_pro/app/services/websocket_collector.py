@@ -3,6 +3,7 @@
 import threading
 from kiteconnect import KiteTicker
 
+from app.models.tick import Tick
 from app.services.logger import get_logger
 from app.config.settings import get_settings
 
@@ -35,17 +36,7 @@ class WebsocketCollector:
     def on_ticks(self, ws, ticks):
         for tick in ticks:
             symbol = self.resolve_symbol(tick["instrument_token"])
-            market_data = {
-                'symbol': symbol,
-                'timestamp': tick.get("timestamp"),
-                'open': tick.get("ohlc", {}).get("open", tick["last_price"]),
-                'high': tick.get("ohlc", {}).get("high", tick["last_price"]),
-                'low': tick.get("ohlc", {}).get("low", tick["last_price"]),
-                'close': tick["last_price"],
-                'volume': tick.get("volume", 0),
-                'ltp': tick["last_price"]
-            }
-            self.out_queue.put(market_data)
+            self.out_queue.put(Tick.from_kite(symbol, tick))
 
     def resolve_symbol(self, instrument_token):
         # You need a mapping from token <-> symbol
@@ -8,17 +8,32 @@ from typing import List, Dict, Any, Optional
 from abc import ABC, abstractmethod
 from datetime import datetime
 from app.services.logger import get_logger
+from app.services.clock import get_clock
+from app.indicators import Indicator
+from app.indicators.cache import IndicatorCache
 
 logger = get_logger(__name__)
 
+# Signal metadata handed on to the engine and executor: bookkeeping only. Keys that
+# change execution (stoploss/target -> SL/target order placement) are not passed on.
+TRACKING_METADATA = ("signal_id", "model_version")
+
 
 class BaseStrategy(ABC):
     """Abstract base class for all trading strategies."""
 
-    def __init__(self, name: str, symbols: List[str], min_data_points: int = 20):
+    # True when the subclass implements vectorized_signals() (vectorized backtests)
+    supports_vectorized = False
+
+    def __init__(self, name: str, symbols: List[str], min_data_points: int = 20,
+                 timeframe: Optional[str] = None):
         self.name = name
         self.symbols = symbols
         self.min_data_points = min_data_points
+        # Bar timeframe the strategy consumes ("1min", "5min", "15min", "1D"); None = raw ticks
+        self.timeframe = timeframe
+        # Rows of tick history handed to generate_signals (None = everything buffered)
+        self.lookback: Optional[int] = None
         self.enabled = False
         self.signals_generated = 0
         self.trades_executed = 0
@@ -28,6 +43,8 @@ class BaseStrategy(ABC):
         self.trade_pnls = []  # Track individual trade P&Ls
         self.max_drawdown = 0.0
         self.peak_pnl = 0.0
+        # Private until the engine hands over its shared cache
+        self.indicator_cache = IndicatorCache(maxsize=256)
 
     @abstractmethod
     def generate_signals(self, market_data: Dict[str, pd.DataFrame]) -> List[Dict[str, Any]]:
@@ -36,6 +53,7 @@ class BaseStrategy(ABC):
         
         Args:
             market_data: Dictionary mapping symbols to their OHLCV DataFrames
+                (completed bars of ``self.timeframe``, or raw ticks if it is None)
             
         Returns:
             List of signal dictionaries with keys: symbol, action, price, quantity
@@ -103,6 +121,22 @@ class BaseStrategy(ABC):
             "avg_trade_pnl": round(self.total_pnl / total_trades, 2) if total_trades > 0 else 0.0
         }
 
+    def vectorized_signals(self, bars: pd.DataFrame):
+        """
+        Signals over a whole OHLCV history at once (used by the vectorized backtester):
+        an array with +1 (BUY), -1 (SELL) or 0 per bar, or a DataFrame with ``signal``,
+        ``target`` and ``stop`` columns when positions exit on price levels. None when
+        the strategy has no vectorized rules (``supports_vectorized`` is False).
+        """
+        return None
+
+    def _indicator(self, symbol: str, df: pd.DataFrame, name: str, *params) -> Indicator:
+        """
+        Streaming indicator ``name``(*params) for ``symbol``, updated to the last row
+        of ``df``; shared with every strategy using the same indicator cache.
+        """
+        return self.indicator_cache.get(symbol, self.timeframe, name, params, df)
+
     def _create_signal(self, symbol: str, action: str, price: float, quantity: int = 10, 
                       signal_type: str = "ENTRY", confidence: float = 1.0, metadata = None) -> Dict[str, Any]:
         """Create a standardized signal dictionary."""
@@ -115,5 +149,6 @@ class BaseStrategy(ABC):
             "signal_type": signal_type,
             "confidence": confidence,
             "strategy": self.name,
-            "timestamp": datetime.utcnow()
+            "timestamp": get_clock().utcnow(),
+            "metadata": {key: value for key, value in (metadata or {}).items() if key in TRACKING_METADATA},
         }
\ No newline at end of file
@@ -6,6 +6,7 @@ Generates signals based on price breakouts and mean reversion around Bollinger B
 import pandas as pd
 import numpy as np
 from typing import List, Dict, Any
+from app.indicators import batch
 from app.strategies.base import BaseStrategy
 from app.services.logger import get_logger
 
@@ -15,6 +16,8 @@ logger = get_logger(__name__)
 class BollingerBandsStrategy(BaseStrategy):
     """Bollinger Bands trading strategy for breakouts and mean reversion."""
 
+    supports_vectorized = True
+
     def __init__(self, name: str, period: int = 20, std_dev: float = 2.0,
                  symbols: List[str] = None, quantity: int = 10, strategy_type: str = "BREAKOUT"):
         symbols = symbols or ["ICICIBANK"]
@@ -25,6 +28,7 @@ class BollingerBandsStrategy(BaseStrategy):
         self.quantity = quantity
         self.strategy_type = strategy_type.upper()  # BREAKOUT or REVERSION
         self.last_signals = {}
+        self.lookback = self.min_data_points
 
     def generate_signals(self, market_data: Dict[str, pd.DataFrame]) -> List[Dict[str, Any]]:
         """Generate Bollinger Bands-based signals."""
@@ -39,29 +43,21 @@ class BollingerBandsStrategy(BaseStrategy):
                 continue
 
             try:
-                # Calculate Bollinger Bands
-                df = df.copy()
-                df['bb_middle'] = df['close'].rolling(window=self.period).mean()
-                df['bb_std'] = df['close'].rolling(window=self.period).std()
-                df['bb_upper'] = df['bb_middle'] + (df['bb_std'] * self.std_dev)
-                df['bb_lower'] = df['bb_middle'] - (df['bb_std'] * self.std_dev)
-                
-                # Calculate Bollinger Band width for volatility assessment
-                df['bb_width'] = (df['bb_upper'] - df['bb_lower']) / df['bb_middle']
-                
-                # Get latest values
-                current = df.iloc[-1]
-                previous = df.iloc[-2] if len(df) > 1 else current
-                
-                current_price = current['close']
-                bb_upper = current['bb_upper']
-                bb_lower = current['bb_lower']
-                bb_middle = current['bb_middle']
-                bb_width = current['bb_width']
-                
-                prev_price = previous['close']
-                prev_bb_upper = previous['bb_upper']
-                prev_bb_lower = previous['bb_lower']
+                # Bollinger Bands from the cached SMA (shared with MA strategies) and rolling std
+                sma = self._indicator(symbol, df, "sma", self.period)
+                std = self._indicator(symbol, df, "std", self.period)
+
+                close = df['close']
+                current_price = close.iloc[-1]
+                bb_middle = sma.value
+                bb_upper = bb_middle + std.value * self.std_dev
+                bb_lower = bb_middle - std.value * self.std_dev
+                # Bollinger Band width for volatility assessment
+                bb_width = (bb_upper - bb_lower) / bb_middle
+
+                prev_price = close.iloc[-2] if len(close) > 1 else current_price
+                prev_bb_upper = sma.previous + std.previous * self.std_dev
+                prev_bb_lower = sma.previous - std.previous * self.std_dev
                 
                 # Skip if Bollinger Bands are not available
                 if pd.isna(bb_upper) or pd.isna(bb_lower):
@@ -88,6 +84,23 @@ class BollingerBandsStrategy(BaseStrategy):
 
         return signals
 
+    def vectorized_signals(self, bars: pd.DataFrame) -> np.ndarray:
+        """Breakout or reversion signals over the whole history (+1 BUY, -1 SELL)."""
+        close = bars['close'].to_numpy('float64')
+        bands = batch.bollinger(close, self.period, self.std_dev)
+        upper, lower, width = (bands[col].to_numpy() for col in ("upper", "lower", "width"))
+        with np.errstate(invalid="ignore"):
+            if self.strategy_type == "BREAKOUT":
+                prev_price = batch.previous(close)
+                upper_break = (prev_price <= batch.previous(upper)) & (close > upper)
+                buy = upper_break & (width > 0.02)
+                sell = ~upper_break & (prev_price >= batch.previous(lower)) & (close < lower) & (width > 0.02)
+            else:  # REVERSION
+                bb_position = (close - lower) / (upper - lower)
+                buy = (bb_position <= 0.1) & (width < 0.05)
+                sell = (bb_position >= 0.9) & (width < 0.05)
+        return np.where(buy, 1, np.where(sell, -1, 0)).astype(np.int8)
+
     def _generate_breakout_signal(self, symbol: str, current_price: float, prev_price: float,
                                 bb_upper: float, bb_lower: float, prev_bb_upper: float,
                                 prev_bb_lower: float, bb_width: float) -> Dict[str, Any]:
@@ -188,20 +201,15 @@ class BollingerBandsStrategy(BaseStrategy):
         if len(df) < self.min_data_points:
             return {}
             
-        df = df.copy()
-        df['bb_middle'] = df['close'].rolling(window=self.period).mean()
-        df['bb_std'] = df['close'].rolling(window=self.period).std()
-        df['bb_upper'] = df['bb_middle'] + (df['bb_std'] * self.std_dev)
-        df['bb_lower'] = df['bb_middle'] - (df['bb_std'] * self.std_dev)
-        
-        latest = df.iloc[-1]
-        bb_position = (latest['close'] - latest['bb_lower']) / (latest['bb_upper'] - latest['bb_lower'])
-        
+        latest = batch.bollinger(df['close'], self.period, self.std_dev).iloc[-1]
+        price = df['close'].iloc[-1]
+        bb_position = (price - latest['lower']) / (latest['upper'] - latest['lower'])
+
         return {
-            "bb_upper": latest['bb_upper'],
-            "bb_middle": latest['bb_middle'],
-            "bb_lower": latest['bb_lower'],
-            "price": latest['close'],
+            "bb_upper": latest['upper'],
+            "bb_middle": latest['middle'],
+            "bb_lower": latest['lower'],
+            "price": price,
             "bb_position": bb_position,
             "near_upper": bb_position > 0.8,
             "near_lower": bb_position < 0.2
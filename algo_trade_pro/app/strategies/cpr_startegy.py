@@ -4,37 +4,29 @@ from pathlib import Path
 
 from app.strategies.base import BaseStrategy
 from app.services.logger import get_logger
-from app.services.utils import (
-    nearest_strike,
-    weekly_option_symbol,
-    get_previous_session_ohlc,
-)
+from app.services.instrument_cache import get_instrument_cache
+from app.services.session_index import LEVEL_NAMES, SessionIndex, compute_cpr_levels, get_session_index
 from app.services.feature_store import FeatureStore  # implements append/sync/load methods
-
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.linear_model import LogisticRegression
-from sklearn.svm import SVC
-from xgboost import XGBClassifier
-from sklearn.calibration import CalibratedClassifierCV
-from sklearn.model_selection import StratifiedKFold
-from sklearn.utils import resample
+from app.services.inference import BASE_MODELS, get_inference_service
+from app.services.model_registry import get_model_registry
+from app.services.training import run_nightly_training
 
 logger = get_logger(__name__)
 MODEL_DIR = Path("app/models/cpr_meta")
+N_FEATURES = 27  # length of CPRMetaMLStrategy._build_features(); models of another width are refused
 MODEL_DIR.mkdir(parents=True, exist_ok=True)
 
 class CPRMetaMLStrategy(BaseStrategy):
     """Production CPR Meta-Label Strategy with Probability-Calibrated Ensemble."""
 
+    supports_vectorized = True
+
     def __init__(self, name="CPR_Meta_ML", symbols=None, quantity=75, atm_offset=0):
         symbols = symbols or ["NIFTY 50"]
-        super().__init__(name, symbols,min_data_points= 3)
+        super().__init__(name, symbols, min_data_points=3, timeframe="5min")
         self.qty = quantity
         self.atm_offset = atm_offset
-
-        self.models: Dict[str, Any] = {}
-        self.calibrators: Dict[str, Any] = {}
-        self.meta_model = None
+        self.ml_threshold = 0.6  # meta-model probability needed to take a signal
 
         self._tick_buffer = []
         self._bar_buffer = pd.DataFrame()  # finished 5-min bars as a DataFrame
@@ -49,6 +41,8 @@ class CPRMetaMLStrategy(BaseStrategy):
         }
         logger.info("CPR Meta ML Strategy Initiated")
         self._load_or_warm_models()
+        # Daily history (csv + ticks.db) is loaded here at startup, not on the first bar
+        get_session_index()
 
     # PRIMARY SIGNAL + FEATURE LOGGING
     def generate_signals(self, market_data: Dict[str, pd.DataFrame]) -> List[Dict[str, Any]]:
@@ -57,11 +51,11 @@ class CPRMetaMLStrategy(BaseStrategy):
         df = market_data.get(sym)
         if df is None or len(df) < 3:
             return signals
-        #logger.info("Calling previous session ohlc")
-        prev_ohlc = get_previous_session_ohlc(df)
-        #logger.info("Calling cpr levels")
-        cpr_levels = self._compute_cpr(prev_ohlc)
-        #logger.info("Done with CPR Levels")
+        # Levels in force today, precomputed from the previous session
+        cpr_levels = get_session_index().cpr_levels(sym, df.index[-1].date())
+        if cpr_levels is None:
+            logger.warning("[%s] No previous session for %s, skipping", self.name, sym, extra={"rate_limit": 300})
+            return signals
         # Level lists in order from lowest to highest
         levels = ["s4", "s3", "s2", "s1", "bc", "tc", "r1", "r2", "r3", "r4"]
         level_values = [cpr_levels[lvl] for lvl in levels]
@@ -69,7 +63,8 @@ class CPRMetaMLStrategy(BaseStrategy):
         # Map each level to its neighbors (for targets)
         level_index_map = {lvl: i for i, lvl in enumerate(levels)}
 
-        bars = df.tail(3)
+        # df holds completed 5-min bars only: the last row is the bar that just closed
+        bars = df.tail(2)
         prev_bar = bars.iloc[0]
         curr_bar = bars.iloc[1]
         prev_close = prev_bar["close"]
@@ -127,8 +122,13 @@ class CPRMetaMLStrategy(BaseStrategy):
 
         # ...rest of your feature/ML/signal assembly logic here (just use new target/stoploss/level values)...
 
+        if not signals_found:
+            return signals
+
+        # Features for every candidate first, so the ensemble scores the bar in one batch
+        entry_idx = df.index.get_loc(bar_time)
+        candidate_features, signal_ids = [], []
         for sig in signals_found:
-            entry_idx = df.index.get_loc(bar_time)
             #features = self._build_features(curr_bar.to_frame().T, cpr_levels, 0, df, timestamp=bar_time)
             features = self._build_features(
                 row=curr_bar,
@@ -156,16 +156,29 @@ class CPRMetaMLStrategy(BaseStrategy):
                 "target": sig["target"],
                 "stoploss": sig["stoploss_price"],
             }
-            FeatureStore.append("cpr_meta_signals", meta_feat, label=None)
-
-            if not self._ml_ensemble_filter(features):
-                logger.info("[%s] ML filter: REJECT (%s cross)", self.name, sig["level_crossed"])
-                return
-
-            strike = nearest_strike(curr_close + self.atm_offset, 50)
-            ##expiry = self.broker.get_next_expiry(sym)
-            expiry = dt.date(2025,8,28)
-            opt_symbol = weekly_option_symbol(sym, strike, sig["opt_type"], expiry)
+            signal_ids.append(FeatureStore.append("cpr_meta_signals", meta_feat, label=None))
+            candidate_features.append(features)
+
+        accepted, model_version = self.inference.decide_versioned(candidate_features, threshold=self.ml_threshold)
+        for sig, features, signal_id, accept in zip(signals_found, candidate_features, signal_ids, accepted):
+            if not accept:
+                if model_version is None:
+                    # Not scored (timeout/error, logged by the service): the fallback, not a model decision
+                    logger.info("[%s] ML filter: not scored, skipping (%s cross)", self.name, sig["level_crossed"])
+                else:
+                    logger.info("[%s] ML filter: REJECT (%s cross)", self.name, sig["level_crossed"])
+                continue
+
+            # Nearest listed strike of the next expiry, straight from the instrument master
+            instruments = get_instrument_cache()
+            expiry = instruments.next_expiry(sym, bar_time.date())
+            strike = instruments.nearest_strike(sym, expiry, curr_close + self.atm_offset) if expiry else None
+            option = instruments.option(sym, expiry, strike, sig["opt_type"]) if strike is not None else None
+            if option is None:
+                logger.warning("[%s] No listed %s option for %s near %.2f, skipping", self.name,
+                               sig["opt_type"], sym, curr_close, extra={"rate_limit": 60})
+                continue
+            opt_symbol = option["tradingsymbol"]
             if sym == 'NIFTY':
                 self.qty = 75
             elif sym == 'BANKNIFTY':
@@ -178,6 +191,7 @@ class CPRMetaMLStrategy(BaseStrategy):
                 price=0,
                 signal_type=f"CPR_{('bull' if sig['opt_type'] == 'CE' else 'bear').upper()}_{sig['level_crossed'].upper()}",
                 metadata={
+                    "signal_id": signal_id,  # feature store row, labelled by id
                     "ml_feat": features,
                     "bias": sig["signal"],
                     "cpr_levels": cpr_levels,
@@ -186,6 +200,7 @@ class CPRMetaMLStrategy(BaseStrategy):
                     "stoploss": sig["stoploss_price"],
                     "level_crossed": sig["level_crossed"],
                     "underlying_symbol": sym,  # Add this
+                    "model_version": model_version,  # ensemble version that scored it (None: unfiltered)
                 },
             )
             logger.info("[%s] Signal %s %s generated at %.2f (target %.2f, stop %.2f)", 
@@ -195,21 +210,50 @@ class CPRMetaMLStrategy(BaseStrategy):
         return signals
 
 
+    def vectorized_signals(self, bars: pd.DataFrame) -> pd.DataFrame:
+        """
+        CPR crossings over a whole history of underlying bars: +1 for a bull (CE) cross,
+        -1 for a bear (PE) cross, with the next level as target and the crossed level
+        as stop. Levels for each day come from the previous session in ``bars``; when
+        several levels are crossed in one bar the one nearest the close is used.
+        The ML filter is not applied.
+        """
+        sym = self.symbols[0]
+        days = bars.index.normalize()
+        sessions = bars.groupby(days).agg({"open": "first", "high": "max", "low": "min",
+                                           "close": "last", "volume": "sum"})
+        index = SessionIndex()
+        index.add_sessions(sym, sessions.set_axis(sessions.index.date))
+        levels = ["s4", "s3", "s2", "s1", "bc", "tc", "r1", "r2", "r3", "r4"]
+        level_values = index.levels_frame(sym).reindex(days.date)[levels].to_numpy("float64")  # (bars, levels)
+
+        close = bars["close"].to_numpy("float64")
+        prev_close = np.empty_like(close)
+        prev_close[:1], prev_close[1:] = np.nan, close[:-1]
+        with np.errstate(invalid="ignore"):
+            up = (prev_close[:, None] < level_values) & (level_values <= close[:, None])
+            down = (prev_close[:, None] > level_values) & (level_values >= close[:, None])
+        up[:, -1] = False    # no target above r4
+        down[:, 0] = False   # no target below s4
+
+        n, width = level_values.shape
+        rows = np.arange(n)
+        # Highest level crossed up / lowest level crossed down (the ones nearest the close)
+        up_ix = width - 1 - np.argmax(up[:, ::-1], axis=1)
+        down_ix = np.argmax(down, axis=1)
+        bull, bear = up.any(axis=1), down.any(axis=1)
+
+        signal = np.where(bull, 1, np.where(bear, -1, 0)).astype(np.int8)
+        crossed = np.where(bull, up_ix, down_ix)
+        target_ix = np.clip(np.where(bull, crossed + 1, crossed - 1), 0, width - 1)
+        target = np.where(signal != 0, level_values[rows, target_ix], np.nan)
+        stop = np.where(signal != 0, level_values[rows, crossed], np.nan)
+        return pd.DataFrame({"signal": signal, "target": target, "stop": stop}, index=bars.index)
+
     def _compute_cpr(self, ohlc) -> Dict[str, float]:
-        """Frank Ochoa CPR (level 4) computation."""
-        h, l, c = ohlc["high"], ohlc["low"], ohlc["close"]
-        pivot = (h + l + c) / 3
-        bc = (h + l) / 2
-        tc = pivot * 2 - bc
-        r1, s1 = 2 * pivot - l, 2 * pivot - h
-        r2, s2 = pivot + (h - l), pivot - (h - l)
-        r3, s3 = h + 2 * (pivot - l), l - 2 * (h - pivot)
-        r4, s4 = r3 + (r2 - r1), s3 - (s1 - s2)
-        width = abs(tc - bc)
-        logger.info(f"pivot: {pivot} /n bc: {bc} /n tc: {tc}")
-        logger.info(f"r1: {r1} /n r2: {r2} /n r3: {r3} /n r4: {r4}")
-        logger.info(f"s1: {s1} /n s2: {s2} /n s3: {s3} /n s4: {s4}")
-        return dict(pivot=pivot, tc=tc, bc=bc, r1=r1, r2=r2, r3=r3, r4=r4, s1=s1, s2=s2, s3=s3, s4=s4, width=width)
+        """Frank Ochoa CPR (level 4) computation for one session's OHLC."""
+        levels = compute_cpr_levels(ohlc["high"], ohlc["low"], ohlc["close"])
+        return {name: float(levels[name]) for name in LEVEL_NAMES}
 
     # def _build_features(self, df: pd.DataFrame, lv: Dict[str, float]) -> List[float]:
     #     """Feature vector at entry time: price/vol/vola/timestamps/CPR stats."""
@@ -304,81 +348,31 @@ class CPRMetaMLStrategy(BaseStrategy):
 
 
     # ──────────────── ML/ENSEMBLE/PROBABILITY FILTER ────────────────
-    def _ml_ensemble_filter(self, features: List[float], threshold=0.6) -> bool:
+    def _ml_ensemble_filter(self, features: List[float], threshold=None) -> bool:
         """Pass features through each base model and then meta-model; accept if high-conf."""
-        if not (self.models and self.meta_model):
-            return True  # No filter, default accept
-        base_probs = np.array([
-            self.calibrators["rf"].predict_proba([features])[0][1],
-            self.calibrators["xgb"].predict_proba([features])[0][1],
-            self.calibrators["svm"].predict_proba([features])[0][1],
-            self.calibrators["lr"].predict_proba([features])[0][1],
-        ])
-        # Meta ensemble model gets base model probs as features
-        final_prob = self.meta_model.predict_proba([base_probs])[0][1]
-        logger.info(f"ML ensemble probabilities: {base_probs}, final: {final_prob:.2f}")
-        return final_prob >= threshold
+        threshold = self.ml_threshold if threshold is None else threshold
+        return self.inference.decide([features], threshold=threshold)[0]
+
+    def get_inference_stats(self) -> Dict[str, Any]:
+        """Per-model inference timings, timeouts and fallbacks of the ensemble filter."""
+        return self.inference.get_stats()
 
     # ──────────────── TRAINING AND CALIBRATION (Nightly) ────────────────
     def nightly_train(self):
-        """Retrain all meta-label models and final ensemble."""
-        records = FeatureStore.load_all("cpr_meta_signals")
-        df = pd.DataFrame(records)
-        df = df.dropna(subset=["label"])
-        if len(df) < 300:
-            logger.info("Insufficient samples to (re)train meta classifier. Need 300+ labelled.")
-            return
-
-        feats = np.stack(df["features"].to_list())
-        y = np.array(df["label"].values, dtype=int)
-
-        # Class balancing (bootstrap if needed)
-        if not 0.4 < y.mean() < 0.6:
-            n = min(np.sum(y == 0), np.sum(y == 1))
-            ix0 = np.where(y == 0)[0]
-            ix1 = np.where(y == 1)[0]
-            ix0, ix1 = resample(ix0, n_samples=n, replace=False), resample(ix1, n_samples=n, replace=False)
-            ix = np.r_[ix0, ix1]
-            feats, y = feats[ix], y[ix]
-
-        # Split train/test and fit base models with calibration
-        skf = StratifiedKFold(n_splits=5, shuffle=True, random_state=42)
-        base_models, calibrators = {}, {}
-        for name, model in [
-            ("rf", RandomForestClassifier(n_estimators=100, max_depth=7)),
-            ("xgb", XGBClassifier(n_estimators=150, max_depth=4, learning_rate=0.07)),
-            ("svm", SVC(probability=True, C=2.0, kernel="rbf", gamma="scale")),
-            ("lr", LogisticRegression(max_iter=1000)),
-        ]:
-            # Calibrate on OOF
-            calibrator = CalibratedClassifierCV(model, method="isotonic", cv=3)
-            calibrator.fit(feats, y)
-            base_models[name] = model
-            calibrators[name] = calibrator
-            joblib.dump(calibrator, self.model_paths[name])
-            logger.info(f"{self.name}: Model and calibration for {name} saved.")
-
-        # Ensemble meta-model (inputs = four base calibrated probs)
-        base_probs = np.column_stack([
-            calibrators[n].predict_proba(feats)[:,1] for n in ["rf", "xgb", "svm", "lr"]
-        ])
-        meta_model = LogisticRegression(max_iter=1000)
-        meta_model.fit(base_probs, y)
-        joblib.dump(meta_model, self.model_paths["meta"])
-        logger.info(f"{self.name}: Meta ensemble model saved.")
-
-        self.models, self.calibrators, self.meta_model = base_models, calibrators, meta_model
+        """Retrain all meta-label models and publish them as a new registry version (see app/services/training.py)."""
+        report = run_nightly_training(self.model_paths)
+        if report and report.get("trained"):
+            logger.info(f"{self.name}: Meta ensemble {report['version']} published ({report['samples']} samples, "
+                        f"OOF AUC {report['oof_auc']['meta']}); loading in the background")
+        return report
 
     def _load_or_warm_models(self):
-        self.models, self.calibrators, self.meta_model = {}, {}, None
-        for name in ["rf", "xgb", "svm", "lr"]:
-            p = self.model_paths[name]
-            if p.exists():
-                self.calibrators[name] = joblib.load(p)
-        if self.model_paths["meta"].exists():
-            self.meta_model = joblib.load(self.model_paths["meta"])
-        if self.meta_model:
-            logger.info(f"{self.name}: All ML models loaded and ready")
+        # Preloaded once per process and shared by every instance using this model set; the
+        # registry's active version is loaded at startup and later versions are swapped in
+        self.inference = get_inference_service(self.name, self.model_paths, base_models=BASE_MODELS,
+                                               registry=get_model_registry(self.name), n_features=N_FEATURES)
+        if self.inference.ready:
+            logger.info(f"{self.name}: All ML models loaded and ready (version {self.inference.version})")
         else:
             logger.warning(f"{self.name}: ML models missing or not fit (yet)!")
 
@@ -6,6 +6,7 @@ Generates signals when short-term MA crosses above/below long-term MA.
 import pandas as pd
 import numpy as np
 from typing import List, Dict, Any
+from app.indicators import batch
 from app.strategies.base import BaseStrategy
 from app.services.logger import get_logger
 
@@ -15,6 +16,8 @@ logger = get_logger(__name__)
 class MovingAverageStrategy(BaseStrategy):
     """Moving Average Crossover trading strategy."""
 
+    supports_vectorized = True
+
     def __init__(self, name: str, short_window: int = 5, long_window: int = 20, 
                  symbols: List[str] = None, quantity: int = 10):
         symbols = symbols or ["RELIANCE", "TCS"]
@@ -24,6 +27,7 @@ class MovingAverageStrategy(BaseStrategy):
         self.long_window = long_window
         self.quantity = quantity
         self.last_signals = {}  # Track last signal per symbol to avoid duplicates
+        self.lookback = self.min_data_points
 
     def generate_signals(self, market_data: Dict[str, pd.DataFrame]) -> List[Dict[str, Any]]:
         """Generate moving average crossover signals."""
@@ -38,20 +42,15 @@ class MovingAverageStrategy(BaseStrategy):
                 continue
 
             try:
-                # Calculate moving averages
-                df = df.copy()
-                df['short_ma'] = df['close'].rolling(window=self.short_window).mean()
-                df['long_ma'] = df['close'].rolling(window=self.long_window).mean()
-                
-                # Get latest values
-                current = df.iloc[-1]
-                previous = df.iloc[-2] if len(df) > 1 else current
-                
-                current_price = current['close']
-                short_ma_current = current['short_ma']
-                long_ma_current = current['long_ma']
-                short_ma_prev = previous['short_ma']
-                long_ma_prev = previous['long_ma']
+                # Moving averages (shared through the indicator cache)
+                short_ma = self._indicator(symbol, df, "sma", self.short_window)
+                long_ma = self._indicator(symbol, df, "sma", self.long_window)
+
+                current_price = df['close'].iloc[-1]
+                short_ma_current = short_ma.value
+                long_ma_current = long_ma.value
+                short_ma_prev = short_ma.previous
+                long_ma_prev = long_ma.previous
                 
                 # Skip if MAs are not available
                 if pd.isna(short_ma_current) or pd.isna(long_ma_current):
@@ -94,6 +93,16 @@ class MovingAverageStrategy(BaseStrategy):
 
         return signals
 
+    def vectorized_signals(self, bars: pd.DataFrame) -> np.ndarray:
+        """Golden/death crosses over the whole history (+1 BUY, -1 SELL)."""
+        close = bars['close'].to_numpy('float64')
+        short_ma, long_ma = batch.sma(close, self.short_window), batch.sma(close, self.long_window)
+        short_prev, long_prev = batch.previous(short_ma), batch.previous(long_ma)
+        with np.errstate(invalid="ignore"):
+            buy = (short_prev <= long_prev) & (short_ma > long_ma)
+            sell = (short_prev >= long_prev) & (short_ma < long_ma)
+        return np.where(buy, 1, np.where(sell, -1, 0)).astype(np.int8)
+
     def get_ma_values(self, symbol: str, market_data: Dict[str, pd.DataFrame]) -> Dict[str, float]:
         """Get current moving average values for a symbol."""
         if symbol not in market_data:
@@ -103,13 +112,9 @@ class MovingAverageStrategy(BaseStrategy):
         if len(df) < self.min_data_points:
             return {}
             
-        df = df.copy()
-        df['short_ma'] = df['close'].rolling(window=self.short_window).mean()
-        df['long_ma'] = df['close'].rolling(window=self.long_window).mean()
-        
-        latest = df.iloc[-1]
+        close = df['close']
         return {
-            "short_ma": latest['short_ma'],
-            "long_ma": latest['long_ma'],
-            "price": latest['close']
+            "short_ma": batch.sma(close, self.short_window)[-1],
+            "long_ma": batch.sma(close, self.long_window)[-1],
+            "price": close.iloc[-1]
         }
\ No newline at end of file
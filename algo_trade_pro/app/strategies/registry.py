@@ -1,4 +1,5 @@
-from typing import Dict
+import importlib
+from typing import Any, Dict, List, Optional
 from app.strategies.base import BaseStrategy
 
 # Global strategy registry
@@ -14,4 +15,43 @@ def get_strategy(name: str) -> BaseStrategy:
 
 def get_all_strategies() -> Dict[str, BaseStrategy]:
     """Get all registered strategies."""
-    return STRATEGY_REGISTRY.copy()
\ No newline at end of file
+    return STRATEGY_REGISTRY.copy()
+
+
+class StrategySpec:
+    """
+    Picklable recipe for a strategy: import path of the class plus constructor kwargs.
+    Lets a strategy be built in another process (strategy workers) instead of being
+    pickled together with its loaded models.
+    """
+
+    def __init__(self, name: str, class_path: str, kwargs: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.class_path = class_path
+        self.kwargs = dict(kwargs or {})
+        self.kwargs.setdefault("name", name)
+
+    @property
+    def symbols(self) -> List[str]:
+        return list(self.kwargs.get("symbols") or [])
+
+    def build(self) -> BaseStrategy:
+        module_name, class_name = self.class_path.rsplit(".", 1)
+        strategy_class = getattr(importlib.import_module(module_name), class_name)
+        return strategy_class(**self.kwargs)
+
+    def __repr__(self):
+        return f"<StrategySpec {self.name} ({self.class_path})>"
+
+
+# Strategies the StrategyEngine starts with
+DEFAULT_STRATEGY_SPECS: List[StrategySpec] = [
+    StrategySpec("MA_CrossOver", "app.strategies.moving_average.MovingAverageStrategy",
+                 {"short_window": 5, "long_window": 20, "symbols": ['RELIANCE', 'TCS']}),
+    StrategySpec("RSI_MeanReversion", "app.strategies.rsi_strategy.RSIStrategy",
+                 {"rsi_period": 14, "oversold_threshold": 30, "overbought_threshold": 70,
+                  "symbols": ['HDFCBANK', 'INFY']}),
+    StrategySpec("BB_Breakout", "app.strategies.bollinger_bands.BollingerBandsStrategy",
+                 {"period": 20, "std_dev": 2, "symbols": ['ICICIBANK']}),
+    StrategySpec("CPR_Meta_ML", "app.strategies.cpr_startegy.CPRMetaMLStrategy"),
+]
@@ -6,6 +6,7 @@ Generates buy signals when RSI is oversold and sell signals when overbought.
 import pandas as pd
 import numpy as np
 from typing import List, Dict, Any
+from app.indicators import batch
 from app.strategies.base import BaseStrategy
 from app.services.logger import get_logger
 
@@ -15,16 +16,22 @@ logger = get_logger(__name__)
 class RSIStrategy(BaseStrategy):
     """RSI Mean Reversion trading strategy."""
 
+    supports_vectorized = True
+
     def __init__(self, name: str, rsi_period: int = 14, oversold_threshold: int = 30,
-                 overbought_threshold: int = 70, symbols: List[str] = None, quantity: int = 10):
+                 overbought_threshold: int = 70, symbols: List[str] = None, quantity: int = 10,
+                 rsi_method: str = "sma"):
         symbols = symbols or ["HDFC", "INFY"]
         super().__init__(name, symbols, min_data_points=rsi_period + 5)
         
         self.rsi_period = rsi_period
+        # "sma" (rolling-mean averages, the original behaviour) or "wilder"
+        self.rsi_method = rsi_method
         self.oversold_threshold = oversold_threshold
         self.overbought_threshold = overbought_threshold
         self.quantity = quantity
         self.last_signals = {}
+        self.lookback = self.min_data_points
 
     def generate_signals(self, market_data: Dict[str, pd.DataFrame]) -> List[Dict[str, Any]]:
         """Generate RSI-based mean reversion signals."""
@@ -39,18 +46,12 @@ class RSIStrategy(BaseStrategy):
                 continue
 
             try:
-                # Calculate RSI
-                df = df.copy()
-                rsi_values = self._calculate_rsi(df['close'], self.rsi_period)
-                df['rsi'] = rsi_values
-                
-                # Get latest values
-                current = df.iloc[-1]
-                previous = df.iloc[-2] if len(df) > 1 else current
-                
-                current_price = current['close']
-                current_rsi = current['rsi']
-                prev_rsi = previous['rsi']
+                # RSI (shared through the indicator cache)
+                rsi = self._indicator(symbol, df, "rsi", self.rsi_period, self.rsi_method)
+
+                current_price = df['close'].iloc[-1]
+                current_rsi = rsi.value
+                prev_rsi = rsi.previous
                 
                 # Skip if RSI is not available
                 if pd.isna(current_rsi) or pd.isna(prev_rsi):
@@ -97,15 +98,18 @@ class RSIStrategy(BaseStrategy):
 
         return signals
 
+    def vectorized_signals(self, bars: pd.DataFrame) -> np.ndarray:
+        """Oversold bounces (+1 BUY) and overbought reversals (-1 SELL) over the whole history."""
+        rsi = batch.rsi(bars['close'].to_numpy('float64'), self.rsi_period, self.rsi_method)
+        prev_rsi = batch.previous(rsi)
+        with np.errstate(invalid="ignore"):
+            buy = (prev_rsi <= self.oversold_threshold) & (rsi > self.oversold_threshold)
+            sell = (prev_rsi >= self.overbought_threshold) & (rsi < self.overbought_threshold)
+        return np.where(buy, 1, np.where(sell, -1, 0)).astype(np.int8)
+
     def _calculate_rsi(self, prices: pd.Series, period: int) -> pd.Series:
         """Calculate RSI (Relative Strength Index)."""
-        delta = prices.diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-        
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
-        return rsi
+        return pd.Series(batch.rsi(prices, period, self.rsi_method), index=prices.index)
 
     def _calculate_confidence(self, rsi_value: float, signal_type: str) -> float:
         """Calculate signal confidence based on RSI extremity."""
@@ -127,13 +131,10 @@ class RSIStrategy(BaseStrategy):
         if len(df) < self.min_data_points:
             return {}
             
-        df = df.copy()
-        df['rsi'] = self._calculate_rsi(df['close'], self.rsi_period)
-        
-        latest = df.iloc[-1]
+        rsi = self._calculate_rsi(df['close'], self.rsi_period).iloc[-1]
         return {
-            "rsi": latest['rsi'],
-            "price": latest['close'],
-            "is_oversold": latest['rsi'] < self.oversold_threshold,
-            "is_overbought": latest['rsi'] > self.overbought_threshold
+            "rsi": rsi,
+            "price": df['close'].iloc[-1],
+            "is_oversold": rsi < self.oversold_threshold,
+            "is_overbought": rsi > self.overbought_threshold
         }
\ No newline at end of file
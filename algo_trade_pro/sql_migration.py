@@ -1,17 +1,29 @@
 # Create and run: add_columns_migration.py
 import sqlite3
 
+# Columns added to the trades table after its first release (init_database() adds
+# them automatically too; see ADDED_COLUMNS in app/models/database.py)
+NEW_COLUMNS = [
+    #'ALTER TABLE trades ADD COLUMN pending_sl_target FLOAT DEFAULT NULL',
+    'ALTER TABLE trades ADD COLUMN stoploss_order_id VARCHAR(20) DEFAULT NULL',
+    'ALTER TABLE trades ADD COLUMN underlying_symbol VARCHAR(50)',
+    'ALTER TABLE trades ADD COLUMN model_version VARCHAR(40)',
+    'ALTER TABLE trades ADD COLUMN signal_id VARCHAR(100)',
+]
+
 def add_new_columns():
     conn = sqlite3.connect('algo_trade.db')
     cursor = conn.cursor()
     
     try:
-        #cursor.execute('ALTER TABLE trades ADD COLUMN pending_sl_target FLOAT DEFAULT NULL')
-        cursor.execute('ALTER TABLE trades ADD COLUMN stoploss_order_id VARCHAR(20) DEFAULT NULL')
+        for statement in NEW_COLUMNS:
+            try:
+                cursor.execute(statement)
+                print(f"Added: {statement}")
+            except sqlite3.OperationalError as e:
+                print(f"Column may already exist: {e}")
         conn.commit()
         print("Columns added successfully!")
-    except sqlite3.OperationalError as e:
-        print(f"Column may already exist: {e}")
     finally:
         conn.close()
 
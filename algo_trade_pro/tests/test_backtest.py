@@ -0,0 +1,110 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.backtest import load_bars, run_backtest
+from app.backtest.vectorized import bracket_positions, simulate
+from app.services.pnl_calculator import PnLCalculator
+from app.strategies.bollinger_bands import BollingerBandsStrategy
+from app.strategies.moving_average import MovingAverageStrategy
+from app.strategies.rsi_strategy import RSIStrategy
+
+
+def _bars(n=400, seed=3):
+    rng = np.random.default_rng(seed)
+    close = 1000 + np.cumsum(rng.normal(0, 8, n))
+    index = pd.date_range("2024-01-01", periods=n, freq="B")
+    return pd.DataFrame({"open": close, "high": close + 5, "low": close - 5, "close": close,
+                         "volume": 0.0}, index=index)
+
+
+def _dedupe(signals):
+    """Drop repeats of the last side, as generate_signals does through last_signals."""
+    out, last = np.zeros_like(signals), 0
+    for i, s in enumerate(signals):
+        if s and s != last:
+            out[i], last = s, s
+    return out
+
+
+@pytest.mark.parametrize("make", [
+    lambda: MovingAverageStrategy("MA", short_window=5, long_window=20, symbols=["X"]),
+    lambda: RSIStrategy("RSI", rsi_period=14, symbols=["X"]),
+    lambda: BollingerBandsStrategy("BB", period=20, symbols=["X"]),
+    lambda: BollingerBandsStrategy("BBR", period=20, symbols=["X"], strategy_type="REVERSION"),
+])
+def test_vectorized_signals_match_generate_signals(make):
+    bars = _bars()
+    live = make()
+    expected = np.zeros(len(bars), dtype=np.int8)
+    for end in range(live.min_data_points, len(bars) + 1):
+        for signal in live.generate_signals({"X": bars.iloc[max(0, end - live.lookback):end]}):
+            expected[end - 1] = 1 if signal["action"] == "BUY" else -1
+    vectorized = make().vectorized_signals(bars)
+    vectorized[:live.min_data_points - 1] = 0
+    assert expected.any()
+    np.testing.assert_array_equal(_dedupe(vectorized), expected)
+
+
+def test_fills_and_costs_follow_pnl_calculator():
+    bars = _bars(6)
+    position = np.array([0, 1, 1, 1, 0, 0], dtype=float)
+    result = simulate(bars, position, quantity=10, slippage_bps=5, initial_capital=100_000)
+    trade = result.trades.iloc[0]
+    close = bars["close"].to_numpy()
+    assert trade["entry_price"] == pytest.approx(close[1] * 1.0005)
+    assert trade["exit_price"] == pytest.approx(close[4] * 0.9995)
+    expected = PnLCalculator().calculate_trade_pnl(
+        SimpleNamespace(quantity=10, filled_price=trade["entry_price"], price=0, side="BUY"), trade["exit_price"])
+    assert trade["pnl"] == pytest.approx(expected)
+    assert result.stats["total_pnl"] == pytest.approx(expected, abs=0.01)
+    assert result.equity.iloc[-1] == pytest.approx(100_000 + expected, abs=0.01)
+    assert (result.drawdown <= 0).all()
+
+
+def test_next_open_fills_and_long_only():
+    bars = _bars()
+    ma = MovingAverageStrategy("MA", short_window=5, long_window=20, symbols=["X"])
+    both = run_backtest(ma, bars, slippage_bps=0)
+    long_only = run_backtest(ma, bars, slippage_bps=0, mode="long_only", fill_on="next_open")
+    assert (both.trades["side"] == "SELL").any()
+    assert set(long_only.trades["side"]) == {"BUY"}
+    entry = long_only.trades.iloc[0]
+    assert entry["entry_price"] == bars.loc[entry["entry_time"], "open"]
+
+
+def test_bracket_exits_on_target_or_stop():
+    close = np.array([100, 101, 103, 106, 104, 99, 98, 97])
+    signal = np.array([0, 1, 0, 0, -1, 0, 0, 0])
+    target = np.array([np.nan, 105, np.nan, np.nan, 98, np.nan, np.nan, np.nan])
+    stop = np.array([np.nan, 100, np.nan, np.nan, 105, np.nan, np.nan, np.nan])
+    held = bracket_positions(close.astype(float), signal, target, stop)
+    # Long from bar 1 until the target closes at bar 3; short from bar 4 until 98 at bar 6
+    np.testing.assert_array_equal(held, [0, 1, 1, 0, -1, -1, 0, 0])
+
+
+def test_bundled_csv_runs():
+    bars = load_bars()
+    assert bars.index.is_monotonic_increasing and bars.index.tz is None
+    assert len(bars) > 2500
+    result = run_backtest(MovingAverageStrategy("MA", short_window=10, long_window=50, symbols=["NIFTY 50"]), bars)
+    assert result.stats["trades"] > 10
+    assert len(result.equity) == len(bars)
+    assert result.stats["max_drawdown"] >= 0
+
+
+def test_strategies_without_vectorized_rules_are_refused():
+    from app.backtest.vectorized import VectorizedBacktester
+    from app.strategies.base import BaseStrategy
+
+    class TickOnly(BaseStrategy):
+        def generate_signals(self, market_data):
+            return []
+
+    strategy = TickOnly("T", ["X"])
+    assert not strategy.supports_vectorized and strategy.vectorized_signals(_bars()) is None
+    assert MovingAverageStrategy("MA", symbols=["X"]).supports_vectorized
+    with pytest.raises(ValueError, match="no vectorized signal rules"):
+        VectorizedBacktester(strategy)
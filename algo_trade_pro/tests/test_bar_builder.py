@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+
+from app.services.bar_builder import BarBuilder
+
+
+def make_ticks(n=2000, seed=7):
+    rng = np.random.default_rng(seed)
+    ts = pd.Timestamp("2025-08-20 09:15:00") + pd.to_timedelta(np.cumsum(rng.integers(1, 5, n)), unit="s")
+    close = 24700 + np.cumsum(rng.normal(0, 2, n))
+    return pd.DataFrame({
+        "open": close + rng.normal(0, 1, n),
+        "high": close + 2,
+        "low": close - 2,
+        "close": close,
+        "volume": rng.integers(1, 100, n).astype(float),
+    }, index=pd.DatetimeIndex(ts, name="timestamp"))
+
+
+def test_bar_builder_matches_right_closed_resample():
+    ticks = make_ticks()
+    builder = BarBuilder(["1min", "5min"], history_size=500)
+    events = []
+    builder.add_listener(lambda symbol, tf, bar: events.append((symbol, tf, bar["timestamp"])))
+    for ts, row in ticks.iterrows():
+        builder.update("NIFTY 50", ts, row["open"], row["high"], row["low"], row["close"], row["volume"])
+
+    for tf in ("1min", "5min"):
+        expected = ticks.resample(tf, label="right", closed="right").agg({
+            "open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum",
+        }).dropna()
+        # The last bar is still open in the builder
+        got = builder.to_frame("NIFTY 50", tf)
+        pd.testing.assert_frame_equal(got, expected.iloc[:-1], check_freq=False, check_index_type=False)
+        assert builder.open_bar("NIFTY 50", tf)["timestamp"] == expected.index[-1]
+
+    assert len(events) == builder.bars_closed
+
+
+def test_bar_builder_closes_bars_on_clock():
+    builder = BarBuilder(["5min"])
+    builder.update("X", pd.Timestamp("2025-08-20 09:16:00"), 1, 2, 0.5, 1.5, 10)
+    assert builder.close_due(pd.Timestamp("2025-08-20 09:19:59")) == []
+    closed = builder.close_due(pd.Timestamp("2025-08-20 09:20:00"))
+    assert closed[0][2]["timestamp"] == pd.Timestamp("2025-08-20 09:20:00")
+    # A straggler for the closed bar is counted, not re-opened
+    builder.update("X", pd.Timestamp("2025-08-20 09:19:59"), 1, 2, 0.5, 1.5, 10)
+    assert builder.late_ticks == 1
+    assert builder.bar_count("X", "5min") == 1
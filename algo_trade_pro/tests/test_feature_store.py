@@ -0,0 +1,142 @@
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.feature_store import FeatureStore, parse_feature_strings
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(FeatureStore, "BASEDIR", str(tmp_path))
+    return tmp_path
+
+
+def signal(i, day="2025-08-06", label=None):
+    return {"dt": pd.Timestamp(f"{day} 09:30") + pd.Timedelta(minutes=5 * i), "direction": i % 2,
+            "entry_price": 24700.0 + i, "base_symbol": "NIFTY", "features": [float(i), i * 0.5, -i],
+            "label": label, "level_crossed": "r1"}
+
+
+def test_buffered_appends_are_partitioned_by_date(store):
+    for i in range(4):
+        FeatureStore.append("sigs", signal(i))
+    FeatureStore.append("sigs", signal(9, day="2025-08-07"), label=1)
+    # Nothing written until a flush (or a read)
+    assert not (store / "sigs").exists()
+
+    X = FeatureStore.load_matrix("sigs")
+    assert X.shape == (5, 3) and X.dtype == np.float64
+    np.testing.assert_array_equal(X[:, 0], [0, 1, 2, 3, 9])
+    assert sorted(p.name for p in (store / "sigs").glob("date=*")) == ["date=2025-08-06", "date=2025-08-07"]
+
+    day = FeatureStore.load_matrix("sigs", start="2025-08-07", end="2025-08-07", columns=["f000", "label"])
+    np.testing.assert_array_equal(day, [[9.0, 1.0]])
+    schema = FeatureStore.schema("sigs")
+    assert schema["schema_version"] == 2 and schema["n_features"] == 3 and schema["columns"]["label"] == "int8"
+
+    records = FeatureStore.load_all("sigs")
+    assert records[1]["features"] == [1.0, 0.5, -1.0] and np.isnan(records[1]["label"])
+
+
+def test_bulk_labels_go_to_the_sidecar(store):
+    ids = [FeatureStore.append("sigs", signal(i)) for i in range(1000)]
+    assert len(set(ids)) == 1000
+    FeatureStore.flush("sigs")
+    parts = sorted((store / "sigs").rglob("part-*.parquet"))
+
+    assert FeatureStore.bulk_update_labels("sigs", {sid: i % 2 for i, sid in enumerate(ids)}) == 1000
+    FeatureStore.bulk_update_labels("sigs", pd.DataFrame({"signal_id": ids[:2], "label": [1, 1]}))
+    # Feature files untouched; the latest label per id wins
+    assert sorted((store / "sigs").rglob("part-*.parquet")) == parts
+    labels = FeatureStore.load_matrix("sigs", columns=["label"]).ravel()
+    np.testing.assert_array_equal(labels[:4], [1, 1, 0, 1])
+    assert labels.sum() == 501
+
+    # Legacy lookup by features labels the same row through its id
+    FeatureStore.update_label("sigs", [3.0, 1.5, -3.0], 0)
+    assert FeatureStore.load_matrix("sigs", columns=["label"])[3, 0] == 0
+
+    assert FeatureStore.compact("sigs") == 4  # 1000 five-minute signals span four days
+    assert not list((store / "sigs" / "_labels").glob("*.parquet"))
+    np.testing.assert_array_equal(FeatureStore.load_matrix("sigs", columns=["label"]).ravel()[:4], [1, 1, 0, 0])
+
+
+def test_schema_1_datasets_get_signal_ids(store):
+    FeatureStore.append("sigs", signal(0))
+    FeatureStore.flush("sigs")
+    # Rewrite as a schema 1 dataset (no signal_id column)
+    import json
+    import pyarrow.parquet as pq
+    schema_path = store / "sigs" / "_schema.json"
+    schema = json.loads(schema_path.read_text())
+    del schema["columns"]["signal_id"]
+    schema["schema_version"] = 1
+    schema_path.write_text(json.dumps(schema))
+    for part in (store / "sigs").rglob("part-*.parquet"):
+        pq.write_table(pq.read_table(part).drop_columns(["signal_id"]), part)
+
+    frame = FeatureStore.load_frame("sigs")
+    assert FeatureStore.schema("sigs")["schema_version"] == 2
+    assert len(frame) == 1 and len(frame["signal_id"][0]) == 32
+
+
+def test_legacy_csv_is_migrated_once(store):
+    pd.DataFrame({
+        "dt": ["2025-08-06 09:30:00", "2025-08-06 09:35:00"],
+        "direction": [0, 1],
+        "entry_price": [24715.0, 24716.0],
+        "features": ["[np.float64(1.5), np.float64(-2.0)]", "[3, 4.25]"],
+        "label": [np.nan, 1.0],
+    }).to_csv(store / "sigs.csv", index=False)
+
+    np.testing.assert_array_equal(FeatureStore.load_matrix("sigs"), [[1.5, -2.0], [3.0, 4.25]])
+    assert FeatureStore.schema("sigs")["migrated_from"] == "sigs.csv"
+    assert FeatureStore.migrate_csv("sigs") == 0
+    assert len(FeatureStore.load_matrix("sigs")) == 2
+
+
+def test_parse_feature_strings_pads_short_rows():
+    matrix = parse_feature_strings(pd.Series(["[1.0]", "[np.float64(1.5), np.float64(-2.0)]"]))
+    assert matrix[0, 0] == 1.0 and np.isnan(matrix[0, 1])
+
+
+def test_rows_that_cannot_be_written_are_rejected_after_retries(store, monkeypatch):
+    from app.services import feature_store
+
+    monkeypatch.setattr(feature_store.settings, "FEATURE_STORE_FLUSH_ROWS", 2)
+    monkeypatch.setattr(feature_store.settings, "FEATURE_STORE_MAX_FLUSH_ATTEMPTS", 3)
+    FeatureStore.append("sigs", signal(0))
+    FeatureStore.flush("sigs")
+    bad = FeatureStore.append("sigs", {**signal(1), "entry_price": "n/a"})
+    good = FeatureStore.append("sigs", signal(2))  # fills the buffer: the failed flush must not raise here
+
+    with pytest.raises(Exception):
+        FeatureStore.flush("sigs")
+    assert FeatureStore.flush("sigs") == 1  # third failure: the good row is written on its own
+
+    ids = FeatureStore.load_frame("sigs", columns=["signal_id"])["signal_id"].tolist()
+    assert good in ids and bad not in ids
+    rejects = list((store / "sigs" / "_rejects").glob("rejects-*.jsonl"))
+    assert len(rejects) == 1 and bad in rejects[0].read_text()
+
+
+def test_partition_rewrites_exclude_other_readers_and_writers(store):
+    FeatureStore.append("sigs", signal(0))
+    FeatureStore.flush("sigs")
+    loaded = threading.Event()
+
+    def read():
+        FeatureStore.load_frame("sigs")
+        loaded.set()
+
+    # flock is held per open file, so another thread waits exactly like another process would
+    with FeatureStore._file_lock("sigs"):
+        FeatureStore.compact("sigs")  # re-entrant within the holding thread
+        reader = threading.Thread(target=read)
+        reader.start()
+        assert not loaded.wait(0.3)
+    assert loaded.wait(5)
+    reader.join()
+    assert (store / "sigs" / ".lock").exists()
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.indicators.cache import IndicatorCache
+from app.strategies.bollinger_bands import BollingerBandsStrategy
+from app.strategies.moving_average import MovingAverageStrategy
+
+
+def _ticks(n, start=0):
+    index = pd.date_range("2025-08-20 09:15", periods=n, freq="s")[start:]
+    close = 100 + np.sin(np.arange(start, n) / 3.0)
+    return pd.DataFrame({"open": close, "high": close + 1, "low": close - 1, "close": close,
+                         "volume": 10.0}, index=index)
+
+
+def test_second_lookup_on_the_same_row_is_a_hit():
+    cache = IndicatorCache()
+    df = _ticks(30)
+    first = cache.get("X", None, "sma", (20,), df)
+    assert cache.get("X", None, "sma", (20,), df) is first
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # One new row: one update, not a recomputation
+    cache.get("X", None, "sma", (20,), _ticks(31, start=1))
+    assert first.count == 31
+    assert first.value == pytest.approx(_ticks(31)["close"].iloc[-20:].mean())
+    # Different timeframe or params are separate entries
+    assert cache.get("X", "5min", "sma", (20,), df) is not first
+    assert cache.get("X", None, "sma", (10,), df) is not first
+    with pytest.raises(ValueError):
+        cache.get("X", None, "macd", (), df)
+
+
+def test_ties_on_the_index_are_not_skipped():
+    cache = IndicatorCache()
+    df = _ticks(5)
+    index = df.index.tolist()
+    index[-1] = index[-2]
+    df.index = pd.DatetimeIndex(index)
+    sma = cache.get("X", None, "sma", (2,), df.iloc[:-1])
+    sma = cache.get("X", None, "sma", (2,), df)
+    assert sma.count == 5
+    assert sma.value == pytest.approx(df["close"].iloc[-2:].mean())
+
+
+def test_lru_eviction():
+    cache = IndicatorCache(maxsize=2)
+    df = _ticks(5)
+    cache.get("A", None, "sma", (2,), df)
+    cache.get("B", None, "sma", (2,), df)
+    cache.get("A", None, "sma", (2,), df)
+    cache.get("C", None, "sma", (2,), df)
+    stats = cache.get_stats()
+    assert (stats["size"], stats["evictions"]) == (2, 1)
+    cache.get("A", None, "sma", (2,), df)
+    assert cache.get_stats()["hits"] == 2   # A survived, B was evicted
+
+
+def test_strategies_share_the_engine_cache():
+    cache = IndicatorCache()
+    ma = MovingAverageStrategy("MA", short_window=5, long_window=20, symbols=["X"])
+    bb = BollingerBandsStrategy("BB", period=20, symbols=["X"])
+    ma.indicator_cache = bb.indicator_cache = cache
+    df = _ticks(ma.lookback)
+    ma.generate_signals({"X": df})
+    bb.generate_signals({"X": df})
+    # BB reuses MA's 20-period SMA and only computes its std
+    assert (cache.hits, cache.misses, len(cache)) == (1, 3, 3)
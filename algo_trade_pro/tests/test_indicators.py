@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+
+from app.indicators import ATR, EMA, RSI, SMA, VWAP, Bollinger, RollingStd, batch
+from app.strategies.bollinger_bands import BollingerBandsStrategy
+from app.strategies.moving_average import MovingAverageStrategy
+from app.strategies.rsi_strategy import RSIStrategy
+
+rng = np.random.default_rng(7)
+PRICES = 1000 + np.cumsum(rng.normal(0, 2, 500))
+CLOSE = pd.Series(PRICES)
+
+
+def _stream(indicator, values):
+    return indicator.update_many(values)
+
+
+def _wilder_reference(values: pd.Series, period: int, first: int) -> np.ndarray:
+    out = np.full(len(values), np.nan)
+    avg = values.iloc[first:first + period].mean()
+    out[first + period - 1] = avg
+    for i in range(first + period, len(values)):
+        avg = (avg * (period - 1) + values.iloc[i]) / period
+        out[i] = avg
+    return out
+
+
+def test_moving_averages_and_std_match_pandas():
+    np.testing.assert_allclose(_stream(SMA(20), PRICES), CLOSE.rolling(20).mean(), rtol=1e-10)
+    np.testing.assert_allclose(_stream(EMA(12), PRICES), CLOSE.ewm(span=12, adjust=False).mean(), rtol=1e-10)
+    np.testing.assert_allclose(_stream(RollingStd(20), PRICES), CLOSE.rolling(20).std(), rtol=1e-7)
+    np.testing.assert_allclose(batch.rolling_std(PRICES, 20), CLOSE.rolling(20).std(), rtol=1e-10)
+
+    sma = SMA(3)
+    for price in (1.0, 2.0, 3.0, 4.0):
+        sma.update(price)
+    assert (sma.previous, sma.value, sma.ready) == (2.0, 3.0, True)
+
+
+def test_rsi_matches_pandas():
+    delta = CLOSE.diff()
+    gain, loss = delta.clip(lower=0), (-delta).clip(lower=0)
+    # "sma": the rolling-mean RSI RSIStrategy used before the port
+    expected = 100 - 100 / (1 + gain.rolling(14).mean() / loss.rolling(14).mean())
+    np.testing.assert_allclose(_stream(RSI(14, "sma"), PRICES), expected, rtol=1e-8)
+    np.testing.assert_allclose(batch.rsi(PRICES, 14, "sma"), expected, rtol=1e-8)
+
+    wilder = 100 - 100 / (1 + _wilder_reference(gain, 14, 1) / _wilder_reference(loss, 14, 1))
+    np.testing.assert_allclose(_stream(RSI(14), PRICES), wilder, rtol=1e-8)
+    np.testing.assert_allclose(batch.rsi(PRICES, 14), wilder, rtol=1e-8)
+
+    rising = RSI(3)
+    rising.update_many([1.0, 2.0, 3.0, 4.0])
+    assert rising.value == 100.0
+
+
+def test_bollinger_matches_pandas():
+    middle = CLOSE.rolling(20).mean()
+    std = CLOSE.rolling(20).std()
+    bb = Bollinger(20, 2.0)
+    rows = [(bb.update(p), bb.upper, bb.lower, bb.width) for p in PRICES]
+    streamed = pd.DataFrame(rows, columns=["middle", "upper", "lower", "width"])
+    expected = pd.DataFrame({"middle": middle, "upper": middle + 2 * std, "lower": middle - 2 * std})
+    expected["width"] = (expected["upper"] - expected["lower"]) / expected["middle"]
+    pd.testing.assert_frame_equal(streamed, expected, rtol=1e-7)
+    pd.testing.assert_frame_equal(batch.bollinger(CLOSE, 20, 2.0), expected, rtol=1e-10)
+    assert bb.prev_upper == streamed["upper"].iloc[-2]
+
+
+def test_vwap_and_atr_match_pandas():
+    n = len(PRICES)
+    high, low = PRICES + rng.uniform(0, 3, n), PRICES - rng.uniform(0, 3, n)
+    volume = rng.integers(1, 1000, n).astype(float)
+    sessions = np.repeat(np.arange(5), n // 5)
+
+    frame = pd.DataFrame({"pv": (high + low + PRICES) / 3 * volume, "v": volume, "s": sessions})
+    expected = frame.groupby("s")["pv"].cumsum() / frame.groupby("s")["v"].cumsum()
+    np.testing.assert_allclose(VWAP().update_many(high, low, PRICES, volume, sessions), expected, rtol=1e-10)
+    np.testing.assert_allclose(batch.vwap(high, low, PRICES, volume, sessions), expected, rtol=1e-10)
+
+    prev_close = CLOSE.shift()
+    tr = pd.concat([pd.Series(high - low), (pd.Series(high) - prev_close).abs(),
+                    (pd.Series(low) - prev_close).abs()], axis=1).max(axis=1)
+    expected_atr = _wilder_reference(tr, 14, 0)
+    np.testing.assert_allclose(ATR(14).update_many(high, low, PRICES), expected_atr, rtol=1e-10)
+    np.testing.assert_allclose(batch.atr(high, low, PRICES, 14), expected_atr, rtol=1e-10)
+
+
+def _windows(length):
+    """What the engine hands a tick strategy: the last ``length`` rows, one more row per cycle."""
+    index = pd.date_range("2025-08-20 09:15", periods=len(PRICES), freq="s")
+    frame = pd.DataFrame({"close": PRICES}, index=index)
+    for end in range(length, len(frame) + 1):
+        yield frame.iloc[end - length:end]
+
+
+def test_ported_strategies_match_the_pandas_computation():
+    ma = MovingAverageStrategy("MA", short_window=5, long_window=20, symbols=["X"])
+    rsi = RSIStrategy("RSI", rsi_period=14, symbols=["X"])
+    bb = BollingerBandsStrategy("BB", period=20, symbols=["X"])
+    for window in _windows(ma.lookback):
+        ma.generate_signals({"X": window})
+        rsi.generate_signals({"X": window.iloc[-rsi.lookback:]})
+        bb.generate_signals({"X": window.iloc[-bb.lookback:]})
+        short = ma.indicator_cache.get("X", None, "sma", (5,))
+        long = ma.indicator_cache.get("X", None, "sma", (20,))
+        assert np.isclose(short.value, window["close"].rolling(5).mean().iloc[-1])
+        assert np.isclose(long.previous, window["close"].rolling(20).mean().iloc[-2])
+        delta = window["close"].iloc[-rsi.lookback:].diff()
+        expected_rsi = 100 - 100 / (1 + delta.where(delta > 0, 0).rolling(14).mean()
+                                    / (-delta.where(delta < 0, 0)).rolling(14).mean())
+        assert np.isclose(rsi.indicator_cache.get("X", None, "rsi", (14, "sma")).value, expected_rsi.iloc[-1])
+        assert np.isclose(bb.indicator_cache.get("X", None, "std", (20,)).previous,
+                          window["close"].rolling(20).std().iloc[-2])
+
+
+def test_indicators_are_rebuilt_after_a_gap():
+    ma = MovingAverageStrategy("MA", short_window=2, long_window=3, symbols=["X"])
+    windows = list(_windows(ma.lookback))
+    ma.generate_signals({"X": windows[0]})
+    first = ma.indicator_cache.get("X", None, "sma", (3,))
+    ma.generate_signals({"X": windows[1]})
+    assert first.count == len(windows[0]) + 1
+    ma.generate_signals({"X": windows[50]})
+    assert first.count == len(windows[50])
+    assert np.isclose(first.value, windows[50]["close"].iloc[-3:].mean())
@@ -0,0 +1,78 @@
+import time
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.linear_model import LogisticRegression
+
+from app.services.inference import EnsembleInference
+
+
+class SlowModel:
+    def predict_proba(self, x):
+        time.sleep(0.2)
+        return np.tile([0.0, 1.0], (len(x), 1))
+
+
+@pytest.fixture
+def model_paths(tmp_path):
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=(200, 6))
+    y = (x[:, 0] + 0.3 * rng.normal(size=200) > 0).astype(int)
+    paths = {}
+    for name in ("rf", "xgb", "svm", "lr"):
+        paths[name] = tmp_path / f"{name}.pkl"
+        joblib.dump(LogisticRegression().fit(x, y), paths[name])
+    base = np.column_stack([joblib.load(paths[n]).predict_proba(x)[:, 1] for n in ("rf", "xgb", "svm", "lr")])
+    paths["meta"] = tmp_path / "meta.pkl"
+    joblib.dump(LogisticRegression().fit(base, y), paths["meta"])
+    return paths
+
+
+def test_batch_matches_row_by_row(model_paths):
+    service = EnsembleInference(model_paths, budget_ms=0)
+    assert service.load()
+    features = np.random.default_rng(1).normal(size=(7, 6))
+
+    batched = service.decide(features.tolist(), threshold=0.5)
+    single = [service.decide([row], threshold=0.5)[0] for row in features.tolist()]
+    assert batched == single
+    stats = service.get_stats()
+    # One call per model for the batch of 7, then one per single row
+    assert stats["models"]["rf"]["calls"] == 8 and stats["models"]["meta"]["rows"] == 14
+    service.close()
+
+
+def test_missing_models_accept_and_slow_models_fall_back(model_paths):
+    service = EnsembleInference({"meta": model_paths["meta"]})
+    service.load()
+    assert not service.ready and service.decide([[0.0] * 6]) == [True]
+
+    slow = EnsembleInference(model_paths, budget_ms=20, fallback_accept=False)
+    slow.set_models({name: SlowModel() for name in ("rf", "xgb", "svm", "lr")}, SlowModel())
+    assert slow.decide([[0.0] * 6, [1.0] * 6]) == [False, False]
+    # The late batch is still running: the next one is not queued behind it
+    assert slow.decide_versioned([[0.0] * 6]) == ([False], None)
+    stats = slow.get_stats()
+    assert stats["timeouts"] == 1 and stats["busy"] == 1
+    assert stats["errors"] == 2 and stats["unscored"] == 3
+    assert stats["models"]["rf"]["calls"] <= 1
+
+    # Wrong feature count: counted as an error, fallback decision
+    fallback = EnsembleInference(model_paths, fallback_accept=True)
+    fallback.load()
+    assert fallback.decide([[0.0] * 3]) == [True]
+    assert fallback.get_stats()["errors"] == 1
+    slow.close()
+    fallback.close()
+
+
+def test_feature_width_mismatch_is_refused_at_load(model_paths):
+    service = EnsembleInference(model_paths, n_features=27)
+    assert not service.load()
+    stats = service.get_stats()
+    assert stats["load_errors"] == 1 and stats["swaps"] == 0
+    # Not installed, so candidates pass unfiltered instead of failing every batch
+    assert service.decide_versioned([[0.0] * 27]) == ([True], None)
+    assert service.get_stats()["errors"] == 0
+    service.close()
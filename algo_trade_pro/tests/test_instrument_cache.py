@@ -0,0 +1,93 @@
+from datetime import date
+
+from app.services.instrument_cache import InstrumentCache
+
+
+def _instrument(token, symbol, exchange="NSE", name="", instrument_type="EQ", expiry="", strike=0.0, lot_size=1):
+    return {"instrument_token": token, "exchange_token": token >> 8, "tradingsymbol": symbol, "name": name,
+            "last_price": 0.0, "expiry": expiry, "strike": strike, "tick_size": 0.05, "lot_size": lot_size,
+            "instrument_type": instrument_type, "segment": exchange, "exchange": exchange}
+
+
+class FakeKite:
+    def __init__(self):
+        self.calls = []
+        self.fail = False
+
+    def instruments(self, exchange=None):
+        self.calls.append(exchange)
+        if self.fail:
+            raise ConnectionError("offline")
+        if exchange == "NSE":
+            return [_instrument(256265, "NIFTY 50", name="NIFTY 50"), _instrument(738561, "RELIANCE")]
+        options = []
+        token = 10_000
+        for expiry, tag in ((date(2025, 8, 28), "25828"), (date(2025, 9, 2), "25902")):
+            for strike in (24600.0, 24650.0, 24700.0, 24750.0, 24800.0):
+                for opt_type in ("CE", "PE"):
+                    token += 1
+                    options.append(_instrument(token, f"NIFTY{tag}{int(strike)}{opt_type}", "NFO", "NIFTY",
+                                               opt_type, expiry, strike, 75))
+        return options
+
+
+def test_indexes_and_option_chain_lookups():
+    cache = InstrumentCache(kite_client=FakeKite())
+    assert cache.token("reliance") == 738561
+    assert cache.symbol(256265) == "NIFTY 50"
+    assert cache.expiries("NIFTY 50") == [date(2025, 8, 28), date(2025, 9, 2)]
+    assert cache.next_expiry("NIFTY 50", date(2025, 8, 20)) == date(2025, 8, 28)
+    assert cache.next_expiry("NIFTY 50", date(2025, 8, 28)) == date(2025, 8, 28)
+    assert cache.next_expiry("NIFTY 50", date(2025, 8, 29)) == date(2025, 9, 2)
+    assert cache.next_expiry("NIFTY 50", date(2025, 9, 3)) is None
+
+    expiry = date(2025, 8, 28)
+    assert cache.nearest_strike("NIFTY 50", expiry, 24712.05) == 24700.0
+    assert cache.nearest_strike("NIFTY 50", expiry, 24730.0) == 24750.0
+    assert cache.nearest_strike("NIFTY 50", expiry, 30000.0) == 24800.0
+    option = cache.option("NIFTY 50", expiry, 24700.0, "pe")
+    assert option["tradingsymbol"] == "NIFTY2582824700PE"
+    assert (option["lot_size"], option["expiry"]) == (75, expiry)
+    assert cache.option("NIFTY 50", expiry, 24725.0, "CE") is None
+
+
+def test_dump_is_downloaded_once_per_day(tmp_path):
+    path = str(tmp_path / "instruments.npz")
+    kite = FakeKite()
+    InstrumentCache(kite_client=kite, path=path).load(today=date(2025, 8, 20))
+    assert kite.calls == ["NSE", "NFO"]
+
+    # Same day: served from the file
+    cache = InstrumentCache(kite_client=kite, path=path)
+    cache.load(today=date(2025, 8, 20))
+    assert kite.calls == ["NSE", "NFO"]
+    assert cache.option("NIFTY", date(2025, 9, 2), 24650.0, "CE")["tradingsymbol"] == "NIFTY2590224650CE"
+
+    # Next day the download fails: the stale dump is kept
+    kite.fail = True
+    cache = InstrumentCache(kite_client=kite, path=path)
+    cache.load(today=date(2025, 8, 21))
+    assert cache.fetched_on == date(2025, 8, 20)
+    assert cache.token("RELIANCE") == 738561
+
+
+def test_nothing_is_loaded_before_the_first_lookup():
+    kite = FakeKite()
+    cache = InstrumentCache(kite_client=kite)
+    assert kite.calls == []
+    cache.token("RELIANCE")
+    assert kite.calls == ["NSE", "NFO"]
+
+
+def test_failed_first_download_is_retried_after_a_back_off():
+    kite = FakeKite()
+    kite.fail = True
+    cache = InstrumentCache(kite_client=kite)
+    assert cache.token("RELIANCE") is None
+    assert cache.token("RELIANCE") is None  # within the back-off: no new download
+    assert kite.calls == ["NSE"]
+
+    kite.fail = False
+    cache._retry_at = 0.0
+    assert cache.token("RELIANCE") == 738561
+    assert kite.calls == ["NSE", "NSE", "NFO"]
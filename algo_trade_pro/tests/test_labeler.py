@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.feature_store import FeatureStore
+from app.services.labeler import STOP, TARGET, UNRESOLVED, VERTICAL, TripleBarrierLabeler, triple_barrier
+from app.services.tick_journal import TickJournal
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(FeatureStore, "BASEDIR", str(tmp_path / "fs"))
+    return tmp_path
+
+
+def ns(t):
+    return pd.Timestamp(f"2025-08-06 {t}").value
+
+
+def bars(closes, start="09:15", high_pad=1.0, low_pad=1.0):
+    index = pd.date_range(f"2025-08-06 {start}", periods=len(closes), freq="1min")
+    closes = np.asarray(closes, dtype="float64")
+    return pd.DataFrame({"high": closes + high_pad, "low": closes - low_pad, "close": closes}, index=index)
+
+
+def test_first_touch_resolves_each_barrier():
+    prices = TripleBarrierLabeler.frame_prices(bars([100, 101, 103, 106, 110, 104, 99, 95, 100, 100]))
+    entry = np.full(6, ns("09:15"))
+    vertical = np.array([ns("09:24")] * 5 + [ns("09:40")])
+    out = triple_barrier(
+        entry,
+        direction=np.array([1, 1, 0, 0, 1, 1]),
+        target=np.array([105, 120, 96, 90, 109, 130], dtype=float),
+        stop=np.array([95, 101.5, 104, 112, 97, 80], dtype=float),
+        vertical_ns=vertical, **prices)
+
+    # bull: high 107 at 09:18 reaches 105 first
+    assert out["outcome"][0] == TARGET and out["label"][0] == 1 and out["exit_price"][0] == 105
+    assert out["exit_ns"][0] == ns("09:18")
+    # bull: low 100 at 09:16 breaks 101.5 before any target
+    assert out["outcome"][1] == STOP and out["label"][1] == 0 and out["exit_ns"][1] == ns("09:16")
+    # bear: high 104 at 09:17 stops out before the low of 94 at 09:22
+    assert out["outcome"][2] == STOP and out["exit_price"][2] == 104
+    # bear: neither barrier -> label by the return at the vertical barrier (100 vs entry 100)
+    assert out["outcome"][3] == VERTICAL and out["label"][3] == 0 and out["exit_price"][3] == 100
+    # bull: 09:19 bar (109..111) reaches the target, but 09:22 (94..96) only later: target first
+    assert out["outcome"][4] == TARGET and out["exit_ns"][4] == ns("09:19")
+    # vertical barrier past the data: left for a later run
+    assert out["outcome"][5] == UNRESOLVED and out["label"][5] == -1
+
+
+def test_same_bar_touch_counts_as_stop():
+    prices = TripleBarrierLabeler.frame_prices(bars([100, 100, 100], high_pad=6, low_pad=6))
+    out = triple_barrier(np.array([ns("09:15")]), np.array([1]), np.array([105.0]), np.array([95.0]),
+                         np.array([ns("09:17")]), **prices)
+    assert out["outcome"][0] == STOP and out["exit_ns"][0] == ns("09:16")
+
+
+def test_vectorized_pass_matches_a_loop():
+    rng = np.random.default_rng(7)
+    closes = 24700 + np.cumsum(rng.normal(0, 3, 375))
+    prices = TripleBarrierLabeler.frame_prices(bars(closes, high_pad=2, low_pad=2))
+    n = 2000
+    entry = ns("09:15") + rng.integers(0, 300, n) * 60_000_000_000
+    vertical = entry + 60 * 60_000_000_000
+    direction = rng.integers(0, 2, n)
+    ref = closes[(entry - ns("09:15")) // 60_000_000_000]
+    width = rng.uniform(5, 40, n)
+    target = np.where(direction == 1, ref + width, ref - width)
+    stop = np.where(direction == 1, ref - width / 2, ref + width / 2)
+    out = triple_barrier(entry, direction, target, stop, vertical, **prices)
+
+    ts, high, low = prices["ts"], prices["high"], prices["low"]
+    for k in range(0, n, 37):
+        window = (ts > entry[k]) & (ts <= vertical[k])
+        if direction[k] == 1:
+            hit_t, hit_s = high[window] >= target[k], low[window] <= stop[k]
+        else:
+            hit_t, hit_s = low[window] <= target[k], high[window] >= stop[k]
+        first_t = np.argmax(hit_t) if hit_t.any() else np.inf
+        first_s = np.argmax(hit_s) if hit_s.any() else np.inf
+        expected = STOP if first_s <= first_t and first_s < np.inf else TARGET if first_t < np.inf else VERTICAL
+        assert out["outcome"][k] == expected
+
+
+def test_run_labels_pending_signals_from_the_journal(store):
+    journal = TickJournal(str(store / "ticks"))
+    frame = bars([100, 101, 103, 106, 110, 104, 99, 95, 100, 100])
+    n = len(frame)
+    journal.append(["NIFTY"] * n, frame.index.as_unit("ns").asi8, frame["close"], frame["high"],
+                   frame["low"], frame["close"], np.zeros(n))
+
+    def signal(minute, direction, target, stoploss):
+        return {"dt": pd.Timestamp("2025-08-06 09:15") + pd.Timedelta(minutes=minute), "direction": direction,
+                "entry_price": 100.0, "base_symbol": "NIFTY", "features": [1.0, 2.0], "label": None,
+                "exit_time": None, "exit_price": None, "level_crossed": "r1",
+                "target": target, "stoploss": stoploss}
+
+    hit = FeatureStore.append("sigs", signal(0, 1, 105.0, 95.0))
+    stopped = FeatureStore.append("sigs", signal(0, 0, 90.0, 104.0))
+    later = FeatureStore.append("sigs", signal(0, 1, 200.0, 10.0))   # barrier beyond the stored day
+    done = FeatureStore.append("sigs", signal(0, 1, 105.0, 95.0), label=0)
+    other = FeatureStore.append("sigs", {**signal(0, 1, 105.0, 95.0), "base_symbol": "BANKNIFTY"})
+
+    labeler = TripleBarrierLabeler("sigs", journal=journal, max_holding_minutes=60)
+    report = labeler.run()
+    assert report["pending"] == 4 and report["labelled"] == 2
+    assert report["target"] == 1 and report["stop"] == 1 and report["no_prices"] == ["BANKNIFTY"]
+
+    rows = FeatureStore.load_frame("sigs", columns=["signal_id", "label", "exit_time", "exit_price"])
+    rows = rows.set_index("signal_id")
+    assert rows.loc[hit, "label"] == 1 and rows.loc[hit, "exit_price"] == 105.0
+    assert rows.loc[hit, "exit_time"] == pd.Timestamp("2025-08-06 09:18")
+    assert rows.loc[stopped, "label"] == 0 and rows.loc[stopped, "exit_price"] == 104.0
+    assert pd.isna(rows.loc[later, "label"]) and pd.isna(rows.loc[other, "label"])
+    assert rows.loc[done, "label"] == 0
+
+    # Already-labelled rows are not pending any more
+    assert labeler.run()["pending"] == 2
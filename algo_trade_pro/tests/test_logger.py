@@ -0,0 +1,68 @@
+import json
+import logging
+from queue import Queue
+
+from app.services.logger import JsonFormatter, LogQueueHandler, RateLimitFilter, get_log_stats, get_logger
+
+
+def _record(msg="tick %s", args=("A",), lineno=10, created=0.0, **extra):
+    record = logging.LogRecord("test", logging.INFO, "/app/x.py", lineno, msg, args, None)
+    record.created = created
+    record.__dict__.update(extra)
+    return record
+
+
+def test_sampling_keeps_one_in_n_per_call_site():
+    f = RateLimitFilter()
+    kept = [f.filter(_record(sample=3)) for _ in range(7)]
+    assert kept == [True, False, False, True, False, False, True]
+    assert f.suppressed == 4
+    # Another call site has its own counter, unthrottled records pass
+    assert f.filter(_record(lineno=11, sample=3))
+    assert f.filter(_record(lineno=12))
+
+
+def test_rate_limit_reports_suppressed_count():
+    f = RateLimitFilter()
+    assert f.filter(_record(created=0.0, rate_limit=5))
+    assert not f.filter(_record(created=1.0, rate_limit=5))
+    assert not f.filter(_record(created=4.9, rate_limit=5))
+    record = _record(created=5.0, rate_limit=5)
+    assert f.filter(record)
+    assert record.suppressed == 2
+
+
+def test_queue_handler_defers_formatting_and_counts_drops():
+    handler = LogQueueHandler(Queue(maxsize=1))
+    handler.handle(_record())
+    handler.handle(_record())
+    assert (handler.queued, handler.dropped) == (1, 1)
+    record = handler.queue.get_nowait()
+    assert (record.msg, record.args) == ("tick %s", ("A",))
+
+
+def test_json_formatter_writes_one_object_per_record():
+    record = _record(fields={"symbol": "A", "depth": 3}, suppressed=2)
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["msg"] == "tick A"
+    assert entry["level"] == "INFO"
+    assert (entry["symbol"], entry["depth"], entry["suppressed"]) == ("A", 3, 2)
+
+
+def test_loggers_share_one_queue_handler():
+    a, b = get_logger("test_logger.a"), get_logger("test_logger.b")
+    assert a.handlers == b.handlers and len(a.handlers) == 1
+    assert isinstance(a.handlers[0], LogQueueHandler)
+    assert set(get_log_stats()) == {"queued", "dropped", "suppressed", "depth", "maxsize"}
+
+
+def test_log_file_handler_is_safe_across_processes():
+    from concurrent_log_handler import ConcurrentRotatingFileHandler
+    from app.services.logger import _build_output_handlers
+
+    handlers = _build_output_handlers()
+    try:
+        assert isinstance(handlers[1], ConcurrentRotatingFileHandler)
+    finally:
+        for handler in handlers:
+            handler.close()
@@ -0,0 +1,92 @@
+import threading
+from queue import Empty, Full
+
+import pandas as pd
+import pytest
+
+from app.queue.market_queue import MarketDataQueue
+
+
+def tick(symbol, ts, price, volume=1):
+    return {"symbol": symbol, "timestamp": pd.Timestamp(f"2025-08-20 {ts}"), "open": price,
+            "high": price, "low": price, "close": price, "volume": volume}
+
+
+def drain(q):
+    items = []
+    while True:
+        try:
+            items.append(q.get_nowait())
+        except Empty:
+            return items
+
+
+def test_block_policy_raises_full_without_blocking():
+    q = MarketDataQueue(maxsize=2, policy="block")
+    q.put(tick("A", "09:15:00", 1))
+    q.put(tick("A", "09:15:01", 2))
+    with pytest.raises(Full):
+        q.put(tick("A", "09:15:02", 3), block=False)
+    with pytest.raises(Full):
+        q.put(tick("A", "09:15:02", 3), timeout=0.01)
+    assert q.get_stats()["blocked"] == 2
+
+
+def test_block_policy_waits_for_consumer():
+    q = MarketDataQueue(maxsize=1, policy="block")
+    q.put(tick("A", "09:15:00", 1))
+    threading.Timer(0.05, q.get).start()
+    q.put(tick("A", "09:15:01", 2), timeout=2)
+    assert [t["close"] for t in drain(q)] == [2]
+
+
+def test_drop_policies():
+    newest = MarketDataQueue(maxsize=2, policy="drop_newest")
+    oldest = MarketDataQueue(maxsize=2, policy="drop_oldest")
+    for i in range(4):
+        newest.put(tick("A", f"09:15:0{i}", i))
+        oldest.put(tick("A", f"09:15:0{i}", i))
+    assert [t["close"] for t in drain(newest)] == [0, 1]
+    assert [t["close"] for t in drain(oldest)] == [2, 3]
+    assert newest.get_stats()["dropped"] == 2
+    assert oldest.get_stats()["dropped"] == 2
+
+
+def test_conflate_latest_keeps_one_tick_per_symbol():
+    q = MarketDataQueue(policy="conflate_latest")
+    q.put(tick("A", "09:15:00", 1))
+    q.put(tick("B", "09:15:00", 10))
+    q.put(tick("A", "09:15:01", 2))
+    q.put(tick("A", "09:15:02", 3))
+    assert [(t["symbol"], t["close"]) for t in drain(q)] == [("A", 3), ("B", 10)]
+    assert q.get_stats()["conflated"] == 2
+    # Once consumed, the next tick is queued again rather than merged
+    q.put(tick("A", "09:15:03", 4))
+    assert q.qsize() == 1
+
+
+def test_conflate_ohlcv_merges_running_bar_within_window():
+    q = MarketDataQueue(policy="conflate_ohlcv", conflate_window_seconds=60)
+    for ts, price in [("09:15:00", 100), ("09:15:10", 105), ("09:15:20", 98), ("09:15:30", 101)]:
+        q.put(tick("A", ts, price, volume=2))
+    q.put(tick("A", "09:16:05", 110))  # next minute: not merged into the previous window
+
+    merged, nxt = drain(q)
+    assert (merged["open"], merged["high"], merged["low"], merged["close"]) == (100, 105, 98, 101)
+    assert merged["volume"] == 8
+    assert merged["timestamp"] == pd.Timestamp("2025-08-20 09:15:30")
+    assert nxt["close"] == 110
+
+
+def test_conflation_does_not_mutate_producer_dicts():
+    q = MarketDataQueue(policy="conflate_ohlcv")
+    first = tick("A", "09:15:00", 100)
+    q.put(first)
+    q.put(tick("A", "09:15:01", 120))
+    assert first["close"] == 100
+    assert q.get()["close"] == 120
+
+
+def test_unknown_policy_rejected():
+    with pytest.raises(ValueError):
+        MarketDataQueue(policy="lossy")
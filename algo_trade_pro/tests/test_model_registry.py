@@ -0,0 +1,85 @@
+import threading
+
+import numpy as np
+import pytest
+from sklearn.linear_model import LogisticRegression
+
+from app.services.inference import EnsembleInference
+from app.services.model_registry import ModelRegistry
+
+BASE = ("rf", "xgb", "svm", "lr")
+
+
+def model_set(seed, width=4):
+    rng = np.random.default_rng(seed)
+    x = rng.normal(size=(200, width))
+    y = (x[:, 0] > 0).astype(int)
+    base = {name: LogisticRegression().fit(x, y) for name in BASE}
+    probs = np.column_stack([base[name].predict_proba(x)[:, 1] for name in BASE])
+    return {**base, "meta": LogisticRegression().fit(probs, y)}
+
+
+@pytest.fixture
+def registry(tmp_path):
+    return ModelRegistry("cpr", root=str(tmp_path), keep=3)
+
+
+def test_publish_activate_rollback_and_prune(registry):
+    assert registry.current() is None
+    v1 = registry.publish(model_set(0), metadata={"samples": 200}, feature_schema={"n_features": 4})
+    v2 = registry.publish(model_set(1), activate=False)
+    assert (v1, v2, registry.current()) == ("v0001", "v0002", "v0001")
+
+    registry.activate(v2)
+    assert registry.rollback() == v1 and registry.current() == v1
+    assert registry.manifest(v2)["parent"] == v1
+    assert [m["version"] for m in registry.versions()] == ["v0002", "v0001"]
+
+    for seed in range(2, 6):
+        registry.publish(model_set(seed))
+    # Oldest versions pruned, the active one and its predecessor kept
+    assert registry.version_names() == ["v0004", "v0005", "v0006"]
+    with pytest.raises(KeyError):
+        registry.activate("v0001")
+
+
+def test_background_load_swaps_atomically(registry):
+    registry.publish(model_set(0), feature_schema={"n_features": 4})
+    service = EnsembleInference({}, budget_ms=0, registry=registry, poll_seconds=0)
+    assert service.load() and service.version == "v0001"
+    features = np.zeros((5, 4)).tolist()
+
+    # Score continuously while a new version is loaded and swapped in
+    seen, stop = set(), threading.Event()
+
+    def score():
+        while not stop.is_set():
+            decisions, version = service.decide_versioned(features, threshold=0.5)
+            assert len(decisions) == 5
+            seen.add(version)
+
+    scorer = threading.Thread(target=score)
+    scorer.start()
+    registry.publish(model_set(1), feature_schema={"n_features": 4})
+    assert service.load_version().result(timeout=10) == "v0002"
+    stop.set()
+    scorer.join()
+    assert service.version == "v0002" and seen <= {"v0001", "v0002"}
+    assert service.get_stats()["errors"] == 0
+
+    # Rollback returns to v0001 from memory; the registry agrees
+    assert service.rollback() == "v0001"
+    assert service.version == "v0001" and registry.current() == "v0001"
+    service.close()
+
+
+def test_invalid_version_is_not_installed(registry):
+    registry.publish(model_set(0), feature_schema={"n_features": 4})
+    service = EnsembleInference({}, budget_ms=0, registry=registry, poll_seconds=0)
+    service.load()
+    broken = model_set(1, width=6)
+    registry.publish(broken, feature_schema={"n_features": 4})
+    with pytest.raises(ValueError):
+        service.load_version().result(timeout=10)
+    assert service.version == "v0001" and service.get_stats()["load_errors"] == 1
+    service.close()
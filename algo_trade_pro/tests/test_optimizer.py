@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.backtest import run_backtest
+from app.backtest.optimizer import (ParameterOptimizer, ResultCache, SharedBars, grid_search_space,
+                                    random_search_space, walk_forward_windows)
+from app.strategies.moving_average import MovingAverageStrategy
+
+
+def _bars(n=800, seed=5):
+    rng = np.random.default_rng(seed)
+    close = 1000 + np.cumsum(rng.normal(0, 8, n))
+    index = pd.date_range("2020-01-01", periods=n, freq="B")
+    return pd.DataFrame({"open": close, "high": close + 5, "low": close - 5, "close": close,
+                         "volume": 0.0}, index=index)
+
+
+SPACE = {"short_window": [5, 10, 30], "long_window": [20, 50]}
+
+
+def test_search_spaces():
+    assert len(grid_search_space(SPACE)) == 6
+    draws = random_search_space({"rsi_period": (5, 30), "oversold_threshold": [20, 30]}, samples=10, seed=1)
+    assert len(draws) == 10 and len({tuple(d.items()) for d in draws}) == 10
+    assert all(5 <= d["rsi_period"] <= 30 and isinstance(d["rsi_period"], int) for d in draws)
+
+
+def test_walk_forward_windows_roll_without_overlap():
+    index = _bars().index
+    windows = walk_forward_windows(index, train="365D", test="90D")
+    assert len(windows) > 5
+    for (_, train_end, test_start, test_end), following in zip(windows, windows[1:]):
+        assert train_end == test_start < test_end <= following[3]
+        assert following[2] == test_end
+
+
+def test_sweep_runs_in_workers_and_is_cached(tmp_path):
+    bars = _bars()
+    cache = ResultCache(str(tmp_path / "results.db"))
+    with ParameterOptimizer(bars, workers=2, cache=cache, slippage_bps=0) as optimizer:
+        table = optimizer.sweep("MA_CrossOver", SPACE)
+        # short_window >= long_window is filtered out
+        assert len(table) == 5 and table["error"].isna().all()
+        assert table["sharpe"].is_monotonic_decreasing
+
+        best = table.iloc[0]
+        direct = run_backtest(MovingAverageStrategy("MA", int(best["short_window"]), int(best["long_window"]),
+                                                    symbols=["RELIANCE", "TCS"]), bars, slippage_bps=0)
+        assert best["total_pnl"] == pytest.approx(direct.stats["total_pnl"])
+
+        # Served from the cache the second time (no pool needed)
+        optimizer.close()
+        again = ParameterOptimizer(bars, workers=2, cache=cache, slippage_bps=0)
+        assert again.sweep("MA_CrossOver", SPACE).equals(table)
+        assert again._pool is None
+
+    rows = cache.table("MA_CrossOver", limit=None)
+    assert len(rows) == 5 and rows[0]["sharpe"] == table["sharpe"].iloc[0]
+
+
+def test_walk_forward_picks_on_train_and_scores_on_test(tmp_path):
+    bars = _bars()
+    with ParameterOptimizer(bars, workers=1, cache=ResultCache(str(tmp_path / "r.db"))) as optimizer:
+        result = optimizer.walk_forward("MA_CrossOver", SPACE, train="365D", test="180D")
+    assert len(result) >= 3
+    assert result["test_sharpe"].notna().all()
+    assert all(p["short_window"] < p["long_window"] for p in result["params"])
+
+
+def test_shared_bars_round_trip():
+    bars = _bars(50)
+    shared = SharedBars(bars)
+    try:
+        loaded = SharedBars.load(shared.path)
+        pd.testing.assert_frame_equal(loaded, bars, check_freq=False, check_index_type=False)
+    finally:
+        shared.close()
+
+
+def test_failed_backtests_are_not_cached(tmp_path, monkeypatch):
+    from app.backtest import optimizer as module
+
+    bars = _bars()
+    cache = ResultCache(str(tmp_path / "results.db"))
+    space = {"short_window": [5], "long_window": [20]}
+    real = module.evaluate_params
+
+    def failing(*args, **kwargs):
+        raise RuntimeError("data feed hiccup")
+
+    monkeypatch.setattr(module, "evaluate_params", failing)
+    with ParameterOptimizer(bars, workers=1, cache=cache) as optimizer:
+        assert optimizer.sweep("MA_CrossOver", space)["error"].iloc[0] == "RuntimeError: data feed hiccup"
+        assert cache.table("MA_CrossOver", limit=None) == []
+
+        # The next sweep backtests the parameter set again
+        monkeypatch.setattr(module, "evaluate_params", real)
+        table = optimizer.sweep("MA_CrossOver", space)
+        assert table["error"].isna().all() and len(cache.table("MA_CrossOver", limit=None)) == 1
@@ -0,0 +1,72 @@
+import pandas as pd
+import pytest
+
+from app.backtest.replay import ReplayBacktest, diff_reports, isolated_state
+from app.models import database
+from app.services.feature_store import FeatureStore
+from app.services.clock import SimulatedClock, SystemClock, get_clock, use_clock
+from app.services.tick_replay import synthetic_frames
+from app.strategies.registry import StrategySpec
+
+MA_SPEC = StrategySpec("MA_Replay", "app.strategies.moving_average.MovingAverageStrategy",
+                       {"short_window": 5, "long_window": 20, "symbols": ["RELIANCE", "TCS"]})
+
+
+def _run(tmp_path, name, seed=0):
+    frames = synthetic_frames(["RELIANCE", "TCS"], rate=20, duration=60, start="2025-08-20 09:15", seed=seed)
+    return ReplayBacktest(frames, specs=[MA_SPEC], trade_db=str(tmp_path / name)).run()
+
+
+def test_simulated_clock_only_moves_forward():
+    clock = SimulatedClock("2025-08-20 09:15")
+    clock.advance_to(pd.Timestamp("2025-08-20 09:14").value)
+    assert clock.now() == pd.Timestamp("2025-08-20 09:15").to_pydatetime()
+    clock.sleep(30)
+    assert clock.now() == pd.Timestamp("2025-08-20 09:15:30").to_pydatetime()
+    assert clock.utcnow() == pd.Timestamp("2025-08-20 03:45:30").to_pydatetime()
+    with use_clock(clock):
+        assert get_clock() is clock
+    assert isinstance(get_clock(), SystemClock)
+
+
+def test_replay_is_deterministic_and_isolated(tmp_path):
+    live_url = database.DATABASE_URL
+    report = _run(tmp_path, "run.db")
+    baseline = _run(tmp_path, "baseline.db")
+
+    assert database.DATABASE_URL == live_url
+    assert report["ticks"] == 1200 and report["ticks_per_second"] > 0
+    assert report["signals"] and len(report["trades"]) == len(report["signals"])
+    assert {t["status"] for t in report["trades"]} == {"FILLED"}
+    # Signals are stamped with exchange (simulated) time, not the wall clock
+    assert all(s["time"].startswith("2025-08-20T09:") for s in report["signals"])
+    assert report["latency"]["ticks"]["calls"] == 1200
+    assert report["latency"]["executor"]["calls"] >= 60
+    assert diff_reports(report, baseline)["identical"]
+
+    other = _run(tmp_path, "other.db", seed=1)
+    diff = diff_reports(other, baseline)
+    assert not diff["identical"] and diff["signals"]["added"] and diff["signals"]["removed"]
+
+
+def test_existing_trade_db_is_only_emptied_with_overwrite(tmp_path):
+    path = tmp_path / "copy_of_live.db"
+    path.write_bytes(b"")
+    frames = synthetic_frames(["RELIANCE"], rate=5, duration=5, start="2025-08-20 09:15")
+    with pytest.raises(FileExistsError):
+        ReplayBacktest(frames, specs=[MA_SPEC], trade_db=str(path)).run()
+    assert path.exists()
+
+    report = ReplayBacktest(frames, specs=[MA_SPEC], trade_db=str(path), overwrite=True).run()
+    assert report["ticks"] == 25
+
+
+def test_replay_state_is_written_to_the_run_directory(tmp_path, monkeypatch):
+    live = tmp_path / "live_store"
+    monkeypatch.setattr(FeatureStore, "BASEDIR", str(live))
+    run_dir = tmp_path / "run"
+    with isolated_state(str(run_dir)):
+        FeatureStore.append("cpr_meta_signals", {"dt": pd.Timestamp("2025-08-20 09:20"), "features": [1.0]})
+    assert FeatureStore.BASEDIR == str(live)
+    assert list((run_dir / "feature_store" / "cpr_meta_signals").rglob("part-*.parquet"))
+    assert not live.exists()
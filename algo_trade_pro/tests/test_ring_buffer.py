@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+
+from app.services.ring_buffer import OHLCVRingBuffer
+
+
+def fill(buf, n, start="2025-08-20 09:15:00"):
+    ts = pd.date_range(start, periods=n, freq="s")
+    for i, t in enumerate(ts):
+        buf.append(t, i, i + 1, i - 1, i + 0.5, 10)
+    return ts
+
+
+def test_ring_buffer_wraps_and_keeps_latest_rows():
+    buf = OHLCVRingBuffer(capacity=5)
+    ts = fill(buf, 12)
+    assert len(buf) == 5
+    assert buf.version == 12
+    np.testing.assert_array_equal(buf.column("close"), [7.5, 8.5, 9.5, 10.5, 11.5])
+    df = buf.to_frame()
+    assert list(df.columns) == ["open", "high", "low", "close", "volume"]
+    assert df.index[-1] == ts[-1]
+    assert df.index.name == "timestamp"
+
+
+def test_ring_buffer_window_is_a_view():
+    buf = OHLCVRingBuffer(capacity=8)
+    fill(buf, 11)
+    window = buf.window(3)
+    assert window["close"].base is not None  # view on the backing array
+    np.testing.assert_array_equal(window["close"], [8.5, 9.5, 10.5])
+    assert len(buf.to_frame(100)) == 8
@@ -0,0 +1,91 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.models.tick import Bar
+from app.services.session_index import LEVEL_NAMES, SessionIndex, compute_cpr_levels
+from app.services.tick_journal import TickJournal
+from app.services.tick_writer import TickWriter
+
+
+def _index():
+    index = SessionIndex()
+    sessions = pd.DataFrame(
+        [[100.0, 110.0, 95.0, 105.0, 0.0], [105.0, 112.0, 101.0, 111.0, 0.0], [111.0, 115.0, 108.0, 109.0, 0.0]],
+        index=[date(2025, 8, 14), date(2025, 8, 18), date(2025, 8, 19)],
+        columns=["open", "high", "low", "close", "volume"],
+    )
+    index.add_sessions("NIFTY 50", sessions)
+    return index
+
+
+def test_levels_match_the_cpr_formula():
+    levels = _index().cpr_levels("NIFTY 50", date(2025, 8, 18))
+    h, l, c = 110.0, 95.0, 105.0
+    pivot = (h + l + c) / 3
+    assert levels["pivot"] == pytest.approx(pivot)
+    assert levels["bc"] == pytest.approx((h + l) / 2)
+    assert levels["tc"] == pytest.approx(2 * pivot - (h + l) / 2)
+    assert levels["r2"] == pytest.approx(pivot + (h - l))
+    assert levels["s1"] == pytest.approx(2 * pivot - h)
+    assert set(levels) == set(LEVEL_NAMES)
+
+
+def test_previous_session_skips_non_trading_days():
+    index = _index()
+    assert index.previous_session("NIFTY 50", date(2025, 8, 18))["date"] == date(2025, 8, 14)
+    # Weekend between sessions and a day after the last session
+    assert index.previous_session("NIFTY 50", date(2025, 8, 16))["date"] == date(2025, 8, 14)
+    assert index.previous_session("NIFTY 50", date(2025, 8, 20))["close"] == 109.0
+    assert index.previous_session("NIFTY 50", date(2025, 8, 14)) is None
+    assert index.cpr_levels("BANKNIFTY", date(2025, 8, 20)) is None
+
+
+def test_daily_bar_close_rolls_the_index_over():
+    index = _index()
+    before = index.cpr_levels("NIFTY 50", date(2025, 8, 21))
+    # The 1D bar for Aug 20 is labelled Aug 21 00:00
+    index.on_bar("NIFTY 50", "1D", Bar("NIFTY 50", "1D", pd.Timestamp("2025-08-21").value,
+                                       109.0, 120.0, 100.0, 118.0, 0.0))
+    assert index.previous_session("NIFTY 50", date(2025, 8, 21))["date"] == date(2025, 8, 20)
+    assert index.cpr_levels("NIFTY 50", date(2025, 8, 21))["pivot"] == pytest.approx((120 + 100 + 118) / 3)
+    # The day that just closed keeps the levels it traded against
+    assert index.cpr_levels("NIFTY 50", date(2025, 8, 20)) == before
+
+
+def test_levels_frame_is_the_bulk_form_of_the_lookup():
+    index = _index()
+    frame = index.levels_frame("NIFTY 50")
+    assert list(frame.index) == [date(2025, 8, 18), date(2025, 8, 19)]
+    for day, row in frame.iterrows():
+        expected = index.cpr_levels("NIFTY 50", day)
+        assert np.allclose([row[name] for name in LEVEL_NAMES], [expected[name] for name in LEVEL_NAMES])
+    bulk = compute_cpr_levels([110.0, 112.0], [95.0, 101.0], [105.0, 111.0])
+    assert np.allclose(bulk["width"], frame["width"].to_numpy())
+
+
+def test_sessions_from_ticks_db(tmp_path):
+    writer = TickWriter(db_path=str(tmp_path / "ticks.db"), journal=TickJournal(str(tmp_path / "journal")))
+    prices = [(100.0, "2025-08-19 09:15"), (104.0, "2025-08-19 11:00"), (98.0, "2025-08-19 13:00"),
+              (101.0, "2025-08-19 15:29"), (102.0, "2025-08-20 09:15")]
+    for price, stamp in prices:
+        writer.submit({"symbol": "TCS", "timestamp": pd.Timestamp(stamp), "open": price, "high": price,
+                       "low": price, "close": price, "volume": 10})
+    writer.flush()
+
+    index = SessionIndex()
+    assert index.load_ticks_db(str(tmp_path / "missing.db")) == 0
+    assert not (tmp_path / "missing.db").exists()
+    assert index.load_ticks_db(str(tmp_path / "ticks.db")) == 2
+    prev = index.previous_session("TCS", date(2025, 8, 20))
+    assert (prev["open"], prev["high"], prev["low"], prev["close"]) == (100.0, 104.0, 98.0, 101.0)
+
+
+def test_stale_history_gives_no_levels():
+    index = _index()
+    # 2025-08-19 is the last session: Aug 20-22 missing is tolerated, a fourth missing day is not
+    assert index.cpr_levels("NIFTY 50", date(2025, 8, 25))["pivot"] == pytest.approx((115 + 108 + 109) / 3)
+    assert index.cpr_levels("NIFTY 50", date(2025, 8, 26)) is None
+    assert index.previous_session("NIFTY 50", date(2026, 10, 16)) is None
@@ -56,3 +56,12 @@ def test_bollinger_band_signal():
         assert signal["symbol"] == "TEST"
         assert signal["action"] in ["BUY", "SELL"]
         assert "signal_type" in signal
+
+
+def test_signal_metadata_only_carries_tracking_keys():
+    strategy = MovingAverageStrategy(name="MA_Meta", short_window=3, long_window=5, symbols=["TEST"])
+    signal = strategy._create_signal("TEST", "buy", 100.0, metadata={
+        "signal_id": "abc", "model_version": "v0002", "stoploss": 95.0, "target": 110.0})
+    # stoploss/target would make the executor place live SL/target orders
+    assert signal["metadata"] == {"signal_id": "abc", "model_version": "v0002"}
+    assert strategy._create_signal("TEST", "sell", 100.0)["metadata"] == {}
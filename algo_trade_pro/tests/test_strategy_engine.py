@@ -0,0 +1,130 @@
+import pandas as pd
+
+from app.core.strategy_engine import StrategyEngine
+from app.strategies.base import BaseStrategy
+
+
+class RecordingStrategy(BaseStrategy):
+    def __init__(self, name, timeframe=None):
+        super().__init__(name, ["TEST"], min_data_points=1, timeframe=timeframe)
+        self.calls = []
+
+    def generate_signals(self, market_data):
+        df = market_data["TEST"]
+        self.calls.append(df.index[-1])
+        return []
+
+
+def tick(ts, price):
+    return {"symbol": "TEST", "timestamp": pd.Timestamp(ts), "open": price, "high": price,
+            "low": price, "close": price, "volume": 1}
+
+
+def make_engine(*strategies):
+    engine = StrategyEngine()
+    engine.active_strategies = list(strategies)
+    for strategy in strategies:
+        strategy.enable()
+    return engine
+
+
+def test_bar_strategy_runs_once_per_completed_bar():
+    bar_strategy = RecordingStrategy("bars", timeframe="5min")
+    engine = make_engine(bar_strategy)
+    for ts in ["09:16", "09:18", "09:20", "09:21", "09:24", "09:26", "09:41"]:
+        engine._handle_tick(tick(f"2025-08-20 {ts}:00", 100.0))
+
+    assert bar_strategy.calls == [
+        pd.Timestamp("2025-08-20 09:20"),
+        pd.Timestamp("2025-08-20 09:25"),
+        pd.Timestamp("2025-08-20 09:30"),
+    ]
+    # 09:35 and 09:40 never closed because no ticks arrived in them
+    engine._close_due_bars(pd.Timestamp("2025-08-20 09:46"))
+    stats = engine.get_dispatch_stats()
+    assert stats["bar_dispatches"] == 4
+    assert stats["missed_bars"] == 2
+
+
+def test_tick_strategy_runs_only_for_changed_symbols():
+    tick_strategy = RecordingStrategy("ticks")
+    engine = make_engine(tick_strategy)
+    engine._execute_strategies()
+    assert tick_strategy.calls == []
+
+    engine._handle_tick(tick("2025-08-20 09:16:00", 100.0))
+    engine._handle_tick(tick("2025-08-20 09:16:01", 101.0))
+    engine._execute_strategies()
+    engine._execute_strategies()
+    assert tick_strategy.calls == [pd.Timestamp("2025-08-20 09:16:01")]
+
+
+class PairStrategy(BaseStrategy):
+    def __init__(self):
+        super().__init__("pair", ["TEST", "OTHER"], min_data_points=1)
+        self.calls = []
+
+    def generate_signals(self, market_data):
+        self.calls.append({symbol: len(df) for symbol, df in market_data.items()})
+        return []
+
+
+def test_tick_strategy_gets_one_batch_of_the_symbols_that_ticked():
+    strategy = PairStrategy()
+    engine = make_engine(strategy)
+    engine._handle_tick(tick("2025-08-20 09:16:00", 100.0))
+    engine._handle_tick({**tick("2025-08-20 09:16:00", 50.0), "symbol": "OTHER"})
+    engine._handle_tick(tick("2025-08-20 09:16:01", 101.0))
+    engine._execute_strategies()
+    # One run for the batch, with every tick received so far
+    assert strategy.calls == [{"TEST": 2, "OTHER": 1}]
+
+    engine._handle_tick(tick("2025-08-20 09:16:02", 102.0))
+    engine._execute_strategies()
+    assert strategy.calls[-1] == {"TEST": 3}
+
+
+def test_loop_errors_back_off_up_to_the_limit(monkeypatch):
+    from app.core import strategy_engine
+
+    engine = make_engine()
+    delays = []
+
+    def failing(*args, **kwargs):
+        raise RuntimeError("boom")
+
+    def sleep(seconds):
+        delays.append(seconds)
+        if len(delays) == 12:
+            engine.running = False
+
+    monkeypatch.setattr(engine, "_process_market_data", failing)
+    monkeypatch.setattr(strategy_engine.time, "sleep", sleep)
+    engine.run()
+    assert delays[:4] == [1.0, 2.0, 4.0, 8.0]
+    assert delays[-1] == strategy_engine.settings.STRATEGY_ERROR_BACKOFF_MAX_SECONDS
+
+
+class SignalStrategy(BaseStrategy):
+    def __init__(self):
+        super().__init__("signal", ["TEST"], min_data_points=1)
+
+    def generate_signals(self, market_data):
+        return [{"symbol": "TEST", "action": "BUY", "quantity": 1, "price": 100.0}]
+
+
+def test_latency_includes_the_queue_wait():
+    import queue
+    import time
+
+    from app.models.tick import Tick
+
+    engine = make_engine(SignalStrategy())
+    sent = []
+    engine.signal_sink = sent.append
+    ingest = queue.Queue()
+    ingest.put(Tick.from_kite("TEST", {"last_price": 100.0, "timestamp": pd.Timestamp("2025-08-20 09:16")}))
+    time.sleep(0.05)  # the tick waits in the ingestion queue
+    engine._handle_tick(ingest.get_nowait())
+    engine._execute_strategies()
+    assert len(sent) == 1 and engine.get_dispatch_stats()["latency_max_ms"] >= 50
@@ -0,0 +1,84 @@
+import time
+
+import pandas as pd
+import pytest
+
+from app.core.strategy_workers import MAIN, RemoteStrategy, SharedTickRing, StrategyWorkerPool, parse_placement
+from app.models.tick import Tick
+from app.strategies.registry import StrategySpec
+
+MA_PATH = "app.strategies.moving_average.MovingAverageStrategy"
+
+
+def _spec(name, symbols=("RELIANCE",)):
+    return StrategySpec(name, MA_PATH, {"short_window": 2, "long_window": 3, "symbols": list(symbols)})
+
+
+def test_ring_reads_in_order_and_reports_overrun():
+    ring = SharedTickRing(8)
+    try:
+        for i in range(5):
+            ring.publish(i, 0, 1.0, 1.0, 1.0, 100.0 + i, 1.0)
+        records, cursor, lost = ring.read(0, 3)
+        assert records["ts"].tolist() == [0, 1, 2]
+        assert (cursor, lost) == (3, 0)
+
+        reader = SharedTickRing.attach(ring.name, 8)
+        for i in range(5, 15):
+            ring.publish(i, 0, 1.0, 1.0, 1.0, 100.0 + i, 1.0)
+        records, cursor, lost = reader.read(cursor, 100)
+        # 15 published, ring holds the last 8: ticks 3..6 were overwritten before this read
+        assert lost == 4
+        assert records["ts"].tolist() == list(range(7, 15))
+        assert cursor == 15
+        reader.close()
+    finally:
+        ring.close()
+
+
+def test_parse_placement():
+    assert parse_placement("") == {}
+    assert parse_placement("CPR_Meta_ML=0, MA_CrossOver=main,BB=1") == {
+        "CPR_Meta_ML": 0, "MA_CrossOver": MAIN, "BB": 1,
+    }
+
+
+def test_pool_places_strategies():
+    specs = [_spec("A"), _spec("B"), _spec("C"), _spec("D")]
+    pool = StrategyWorkerPool(specs, workers=2, placement={"A": MAIN, "D": 1})
+    assert [s.name for s in pool.local_specs] == ["A"]
+    assert {i: [s.name for s in v] for i, v in pool.assignments.items()} == {0: ["B"], 1: ["C", "D"]}
+    assert set(pool.remote_strategies) == {"B", "C", "D"}
+    assert isinstance(pool.remote_strategies["B"], RemoteStrategy)
+
+    with pytest.raises(ValueError):
+        StrategyWorkerPool(specs, workers=2, placement={"A": 5})
+
+
+def test_worker_returns_signals_for_published_ticks():
+    received = []
+    pool = StrategyWorkerPool([_spec("MA_Worker")], workers=1, capacity=1024, stats_interval=0.1,
+                              signal_sink=lambda signal, name: received.append((name, signal)))
+    pool.remote_strategies["MA_Worker"].enable()
+    pool.start()
+    try:
+        assert pool.wait_ready(0)
+        start = pd.Timestamp("2025-08-20 09:15").value
+        # Falling prices, then a jump: the 2/3 tick moving averages cross on the last tick
+        prices = [110.0 - i for i in range(10)] + [150.0]
+        for i, price in enumerate(prices):
+            pool.publish(Tick("RELIANCE", start + i * 1_000_000_000, price, price, price, price, 1.0))
+
+        deadline = time.monotonic() + 30
+        while not received and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        pool.stop()
+
+    assert [(name, signal["action"]) for name, signal in received] == [("MA_Worker", "BUY")]
+    assert received[0][1]["price"] == 150.0
+    stats = pool.get_stats()
+    assert stats["ticks_published"] == 11
+    assert stats["signals_received"] == 1
+    assert stats["workers"][0]["alive"] is False
+    assert stats["workers"][0]["ticks_processed"] == 11
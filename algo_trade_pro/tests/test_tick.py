@@ -0,0 +1,43 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from app.models.tick import Bar, Tick, as_tick, ns_to_datetime, to_epoch_ns
+
+
+def test_tick_is_slotted():
+    tick = Tick("NIFTY 50", 0, 1.0, 1.0, 1.0, 1.0)
+    assert not hasattr(tick, "__dict__")
+    with pytest.raises(AttributeError):
+        tick.ltp = 1.0
+    assert not hasattr(Bar("NIFTY 50", "5min", 0, 1, 1, 1, 1), "__dict__")
+
+
+def test_epoch_ns_conversions_agree_with_pandas():
+    stamp = datetime(2025, 8, 20, 9, 15, 1, 250000)
+    assert to_epoch_ns(stamp) == pd.Timestamp(stamp).value
+    assert to_epoch_ns("2025-08-20 09:15:01.25") == pd.Timestamp(stamp).value
+    assert to_epoch_ns(pd.Timestamp(stamp).value) == pd.Timestamp(stamp).value
+    assert ns_to_datetime(to_epoch_ns(stamp)) == stamp
+
+
+def test_tick_from_kite_uses_ohlc_and_last_price():
+    kite_tick = {"instrument_token": 256265, "last_price": 24510.5, "volume": 7,
+                 "timestamp": datetime(2025, 8, 20, 9, 15),
+                 "ohlc": {"open": 24400.0, "high": 24550.0, "low": 24390.0, "close": 24380.0}}
+    tick = Tick.from_kite("NIFTY 50", kite_tick)
+    assert (tick.open, tick.high, tick.low, tick.close, tick.volume) == (24400.0, 24550.0, 24390.0, 24510.5, 7)
+    assert tick.timestamp == pd.Timestamp("2025-08-20 09:15")
+
+    ltp_only = Tick.from_kite("NIFTY 50", {"instrument_token": 256265, "last_price": 10.0})
+    assert (ltp_only.open, ltp_only.high, ltp_only.low, ltp_only.close) == (10.0, 10.0, 10.0, 10.0)
+
+
+def test_dict_round_trip_at_the_edge():
+    data = {"symbol": "TCS", "timestamp": pd.Timestamp("2025-08-20 09:15"), "open": 1.0,
+            "high": 2.0, "low": 0.5, "close": 1.5, "volume": 3.0}
+    tick = as_tick(data)
+    assert tick.to_dict() == data
+    assert as_tick(tick) is tick
+    assert tick["close"] == tick.get("close") == 1.5
@@ -0,0 +1,60 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from app.services.tick_journal import TickJournal, TICK_RECORD_DTYPE
+
+
+def append_session(journal, day="2025-08-20", n=1000):
+    ts = pd.date_range(f"{day} 09:15", periods=n, freq="s")
+    symbols = ["NIFTY 50" if i % 3 else "RELIANCE" for i in range(n)]
+    close = np.arange(n, dtype=float)
+    journal.append(symbols, ts.as_unit("ns").asi8, close, close + 1, close - 1, close, np.ones(n))
+    return ts, symbols
+
+
+def test_journal_roundtrip_and_index(tmp_path):
+    journal = TickJournal(str(tmp_path))
+    ts, symbols = append_session(journal)
+
+    records = journal.load("2025-08-20")
+    assert isinstance(records, np.memmap)
+    assert records.dtype == TICK_RECORD_DTYPE
+    assert len(records) == 1000
+
+    index = journal.index("2025-08-20")
+    assert index["symbols"]["RELIANCE"]["count"] == symbols.count("RELIANCE")
+    assert index["symbols"]["NIFTY 50"]["start_ns"] == ts[1].value
+
+    df = journal.to_frame("2025-08-20", symbol="RELIANCE", start=ts[300], end=ts[600])
+    assert set(df["symbol"]) == {"RELIANCE"}
+    assert df.index.min() >= ts[300] and df.index.max() <= ts[600]
+
+
+def test_journal_rebuilds_missing_index_and_reopens(tmp_path):
+    journal = TickJournal(str(tmp_path))
+    append_session(journal, n=50)
+    (tmp_path / "2025-08-20.idx.json").unlink()
+
+    reopened = TickJournal(str(tmp_path))
+    assert reopened.days() == ["2025-08-20"]
+    assert reopened.index("2025-08-20")["records"] == 50
+    ticks = list(reopened.iter_ticks(["2025-08-20"], symbols=["NIFTY 50"]))
+    assert len(ticks) == 33 and ticks[0]["symbol"] == "NIFTY 50"
+
+
+def test_index_is_written_on_flush_and_rollover(tmp_path):
+    journal = TickJournal(str(tmp_path), index_interval=3600)
+    append_session(journal, n=30)
+    idx = tmp_path / "2025-08-20.idx.json"
+    assert json.loads(idx.read_text())["records"] == 30  # first write is immediate
+
+    append_session(journal, n=30)
+    assert json.loads(idx.read_text())["records"] == 30  # not rewritten per append
+    assert journal.index("2025-08-20")["records"] == 60
+    # A new day writes the previous day's index
+    append_session(journal, day="2025-08-21", n=5)
+    assert json.loads(idx.read_text())["records"] == 60
+    journal.flush()
+    assert json.loads((tmp_path / "2025-08-21.idx.json").read_text())["records"] == 5
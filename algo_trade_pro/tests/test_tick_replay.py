@@ -0,0 +1,85 @@
+import pandas as pd
+
+from app.services.tick_journal import TickJournal
+from app.services.tick_replay import ReplayDriver, ReplayKite, ReplayTicker, db_frames, synthetic_frames
+from app.services.tick_writer import TickWriter
+
+
+def test_synthetic_frames_hit_requested_rate():
+    frames = list(synthetic_frames(["A", "B", "C"], rate=1000, duration=2, start="2025-08-20 09:15"))
+    rows = [row for _, row_list in frames for row in row_list]
+    assert len(rows) == 2000
+    assert {row[0] for row in rows} == {"A", "B", "C"}
+    timestamps = [row[1] for row in rows]
+    assert timestamps == sorted(timestamps)
+    assert timestamps[0] == pd.Timestamp("2025-08-20 09:15").value
+
+
+def test_replay_ticker_delivers_only_subscribed_tokens():
+    kite = ReplayKite(["A", "B"])
+    received = []
+
+    def on_connect(ws, response):
+        ws.subscribe([kite.token_map["A"]])
+        ws.set_mode(ws.MODE_FULL, [kite.token_map["A"]])
+
+    ticker = ReplayTicker(synthetic_frames(["A", "B"], rate=100, duration=1), kite.token_map, speed=0,
+                          on_ticks=lambda ws, ticks: received.extend(ticks), on_connect=on_connect)
+    ticker.connect()
+
+    assert ticker.finished.is_set()
+    assert len(received) == 50
+    assert {t["instrument_token"] for t in received} == {kite.token_map["A"]}
+    assert received[0]["mode"] == "full"
+    assert ticker.stats["ticks_unsubscribed"] == 50
+
+
+def test_db_frames_replays_persisted_ticks(tmp_path):
+    writer = TickWriter(db_path=str(tmp_path / "ticks.db"), journal=TickJournal(str(tmp_path / "journal")))
+    for i in range(5):
+        writer.submit({"symbol": "NIFTY 50", "timestamp": pd.Timestamp("2025-08-20 09:15") + pd.Timedelta(seconds=i),
+                       "open": 100.0 + i, "high": 101.0 + i, "low": 99.0 + i, "close": 100.5 + i, "volume": 10})
+    writer.flush()
+
+    rows = [row for _, row_list in db_frames(str(tmp_path / "ticks.db")) for row in row_list]
+    assert [row[5] for row in rows] == [100.5, 101.5, 102.5, 103.5, 104.5]
+    assert rows[1][1] == pd.Timestamp("2025-08-20 09:15:01").value
+
+
+def test_replay_driver_pushes_every_tick_through_the_pipeline(tmp_path):
+    symbols = ["NIFTY 50", "RELIANCE", "TCS"]
+    driver = ReplayDriver(synthetic_frames(symbols, rate=3000, duration=1, start="2025-08-20 09:15"),
+                          symbols, speed=0, run_strategies=False, sample_interval=0.05,
+                          tick_db_path=str(tmp_path / "ticks.db"), journal_dir=str(tmp_path / "journal"))
+    report = driver.run()
+
+    assert report["ticks_sent"] == 3000
+    # Every tick is processed, or absorbed by a queue's overflow/conflation policy
+    assert report["ticks_processed"] + report["ticks_conflated"] + report["ticks_dropped"] == 3000
+    assert report["ticks_persisted"] == 3000
+    assert report["drained"]
+    assert set(report["queue_depth"]) == {
+        "websocket_queue", "market_data_queue", "tick_writer_backlog", "trade_signal_queue",
+    }
+
+
+def test_replay_driver_leaves_the_live_feature_store_untouched(tmp_path, monkeypatch):
+    from app.services.feature_store import FeatureStore
+
+    live = tmp_path / "live_store"
+    monkeypatch.setattr(FeatureStore, "BASEDIR", str(live))
+    during = []
+
+    class Driver(ReplayDriver):
+        def _make_ticker(self, *args, **kwargs):
+            # What a strategy such as CPR_Meta_ML does while the replay runs
+            during.append(FeatureStore.BASEDIR)
+            FeatureStore.append("cpr_meta_signals", {"dt": pd.Timestamp("2025-08-20 09:20"), "features": [1.0]})
+            return super()._make_ticker(*args, **kwargs)
+
+    symbols = ["NIFTY 50", "RELIANCE"]
+    report = Driver(synthetic_frames(symbols, rate=100, duration=1, start="2025-08-20 09:15"), symbols,
+                    speed=0, sample_interval=0.05).run()
+    assert report["ticks_sent"] == 100
+    assert during and during[0] != str(live)
+    assert FeatureStore.BASEDIR == str(live) and not live.exists()
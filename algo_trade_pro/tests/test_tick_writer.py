@@ -0,0 +1,48 @@
+import sqlite3
+
+from app.services.tick_writer import TickWriter
+from app.services.tick_journal import TickJournal
+
+
+def make_tick(i):
+    return {
+        "symbol": "NIFTY 50",
+        "timestamp": f"2025-08-20 09:15:{i % 60:02d}",
+        "open": 100.0 + i,
+        "high": 101.0 + i,
+        "low": 99.0 + i,
+        "close": 100.5 + i,
+        "volume": 10,
+    }
+
+
+def test_tick_writer_group_commits(tmp_path):
+    db_path = str(tmp_path / "ticks.db")
+    journal = TickJournal(str(tmp_path / "journal"))
+    writer = TickWriter(db_path=db_path, batch_size=50, flush_interval=0.05, journal=journal)
+    writer.start()
+    for i in range(120):
+        writer.submit(make_tick(i))
+    writer.stop()
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM ticks").fetchone()[0] == 120
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    conn.close()
+
+    stats = writer.get_stats()
+    assert stats["written"] == 120
+    assert stats["backlog"] == 0
+    assert stats["flushes"] >= 2  # bounded by batch size
+    assert stats["max_flush_ms"] >= stats["last_flush_ms"]
+    assert journal.index("2025-08-20")["symbols"]["NIFTY 50"]["count"] == 120
+
+
+def test_tick_writer_submit_does_not_touch_disk(tmp_path):
+    db_path = str(tmp_path / "ticks.db")
+    writer = TickWriter(db_path=db_path, journal=TickJournal(str(tmp_path / "journal")))
+    writer.submit(make_tick(1))
+    assert writer.backlog() == 1
+    assert writer.get_stats()["written"] == 0
+    writer.flush()
+    assert writer.get_stats()["written"] == 1
@@ -52,3 +52,37 @@ def test_trade_update_status():
         updated = db.query(Trade).filter_by(id="UPD-001").first()
         assert updated.status == TradeStatus.FILLED
         assert updated.pnl == 100
+
+def test_added_columns_are_migrated_on_an_existing_database(tmp_path):
+    from sqlalchemy import create_engine, inspect, text
+    from app.models.database import ADDED_COLUMNS, add_missing_columns
+
+    old = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with old.begin() as conn:
+        conn.execute(text("CREATE TABLE trades (id VARCHAR(50) PRIMARY KEY, symbol VARCHAR(20))"))
+        conn.execute(text("INSERT INTO trades (id, symbol) VALUES ('T-1', 'NIFTY')"))
+
+    added = add_missing_columns(old)
+    assert added == [f"{table}.{column}" for table, column, _ in ADDED_COLUMNS]
+    columns = {c["name"] for c in inspect(old).get_columns("trades")}
+    assert {column for _, column, _ in ADDED_COLUMNS} <= columns
+    # Idempotent, and existing rows survive
+    assert add_missing_columns(old) == []
+    with old.connect() as conn:
+        assert conn.execute(text("SELECT symbol FROM trades")).scalar() == "NIFTY"
+
+
+def test_executor_stores_the_signal_id_on_the_trade():
+    from app.core.trade_executor import TradeExecutor
+
+    class RejectingBroker:
+        def place_order(self, **kwargs):
+            return {"success": False, "error": "market closed"}
+
+    TradeExecutor(RejectingBroker())._execute_signal({
+        "symbol": "NIFTY", "action": "BUY", "price": 100.0, "quantity": 75, "strategy": "CPR",
+        "signal_id": "abc123", "metadata": {"signal_id": "abc123", "model_version": "v0002"}})
+    with get_db_session() as db:
+        trade = db.query(Trade).filter_by(symbol="NIFTY").one()
+        assert trade.signal_id == "abc123" and trade.model_version == "v0002"
+        assert trade.status == TradeStatus.REJECTED
@@ -0,0 +1,81 @@
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from app.services import instrument_cache
+from app.services.instrument_cache import InstrumentCache
+from app.services.trading_calendar import TradingCalendar
+from app.services.utils import weekly_option_symbol
+
+cal = TradingCalendar()
+
+
+def test_trading_days_skip_weekends_and_holidays():
+    assert cal.is_trading_day(date(2025, 8, 20))
+    assert not cal.is_trading_day(date(2025, 8, 27))   # Ganesh Chaturthi
+    assert not cal.is_trading_day(date(2025, 8, 23))   # Saturday
+    assert cal.next_trading_day(date(2025, 8, 26)) == date(2025, 8, 28)
+    assert cal.previous_trading_day(date(2025, 8, 18)) == date(2025, 8, 14)  # Aug 15 holiday
+    assert cal.previous_trading_day(date(2025, 8, 18), include=True) == date(2025, 8, 18)
+    assert cal.session_bounds(date(2025, 8, 15)) is None
+    assert cal.is_market_open("2025-08-20 15:30")
+    assert not cal.is_market_open("2025-08-20 15:31")
+
+
+def test_nifty_expiries_move_from_thursday_to_tuesday():
+    assert cal.next_expiry("NIFTY 50", date(2025, 8, 20)) == date(2025, 8, 21)
+    assert cal.next_expiry("NIFTY 50", date(2025, 8, 22)) == date(2025, 8, 28)
+    assert cal.next_expiry("NIFTY 50", date(2025, 8, 29)) == date(2025, 9, 2)
+    assert cal.is_monthly_expiry("NIFTY", date(2025, 8, 28))
+    assert cal.is_monthly_expiry("NIFTY", date(2025, 9, 30))
+    assert not cal.is_monthly_expiry("NIFTY", date(2025, 9, 23))
+    # Holiday on the scheduled day: the previous trading day
+    assert cal.next_expiry("NIFTY 50", date(2026, 3, 2)) == date(2026, 3, 2)  # Tue Mar 3 is Holi
+
+
+def test_banknifty_has_only_monthly_expiries_after_2024():
+    assert cal.next_expiry("BANKNIFTY", date(2025, 9, 1)) == date(2025, 9, 30)
+    assert cal.next_expiry("BANKNIFTY", date(2025, 8, 1), kind="weekly") is None
+
+
+def test_session_bar_boundaries():
+    bars = cal.session_bars(date(2025, 8, 20), "5min")
+    assert len(bars) == 75
+    assert pd.Timestamp(bars[0]) == pd.Timestamp("2025-08-20 09:20")
+    assert pd.Timestamp(bars[-1]) == pd.Timestamp("2025-08-20 15:30")
+    assert cal.next_boundary(pd.Timestamp("2025-08-20 09:21").value, "5min") == pd.Timestamp("2025-08-20 09:25").value
+    # Overnight (and the Aug 15 holiday) is not a gap in session bars
+    assert cal.bars_between(pd.Timestamp("2025-08-14 15:30").value, pd.Timestamp("2025-08-18 09:20").value, "5min") == 0
+    assert cal.bars_between(pd.Timestamp("2025-08-20 09:30").value, pd.Timestamp("2025-08-20 09:45").value, "5min") == 2
+
+
+class UnlistedKite:
+    def instruments(self, exchange=None):
+        return []
+
+
+@pytest.fixture
+def unlisted(monkeypatch):
+    # No contract is listed, so every symbol is built from the expiry schedule (and no network is used)
+    monkeypatch.setattr(instrument_cache, "_instrument_cache", InstrumentCache(kite_client=UnlistedKite()))
+
+
+def test_option_symbol_format_follows_the_expiry_schedule(unlisted):
+    assert weekly_option_symbol("NIFTY 50", 24700, "CE", date(2025, 8, 28)) == "NIFTY25AUG24700CE"
+    assert weekly_option_symbol("NIFTY 50", 24700, "pe", date(2025, 9, 2)) == "NIFTY2590224700PE"
+    assert weekly_option_symbol("NIFTY 50", 25000, "CE", date(2025, 10, 7)) == "NIFTY25O0725000CE"
+
+
+def test_weekdays_after_the_holiday_table_are_sessions(caplog):
+    assert cal.holidays_until == date(2026, 12, 31)
+    assert cal.is_trading_day(date(2027, 3, 2)) and not cal.is_trading_day(date(2027, 3, 6))
+    assert cal.next_trading_day(date(2026, 12, 31)) == date(2027, 1, 1)
+    assert cal.next_expiry("NIFTY 50", date(2027, 1, 1)) == date(2027, 1, 5)  # Tuesday
+    assert cal.session_bars(date(2027, 1, 4), "5min").size == 75
+
+    assert cal.check_holiday_table(date(2026, 10, 16)) == 76
+    assert "holiday table ends 2026-12-31" in caplog.text
+    caplog.clear()
+    cal.check_holiday_table(date(2026, 6, 1))
+    assert "holiday table" not in caplog.text
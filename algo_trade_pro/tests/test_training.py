@@ -0,0 +1,115 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.feature_store import FeatureStore
+from app.services.inference import EnsembleInference
+from app.services.model_registry import ModelRegistry
+from app.services.training import TrainingPipeline, load_training_matrix
+
+
+def write_signals(name, n, seed=0):
+    rng = np.random.default_rng(seed)
+    x = rng.normal(size=(n, 5))
+    y = (x[:, 0] + 0.5 * x[:, 1] + 0.5 * rng.normal(size=n) > 0).astype(int)
+    for i, (row, label) in enumerate(zip(x, y)):
+        FeatureStore.append(name, {"dt": pd.Timestamp("2025-08-01 09:30") + pd.Timedelta(minutes=5 * i),
+                                   "direction": 0, "entry_price": 24700.0 + i, "features": list(row)},
+                            label=int(label))
+    FeatureStore.flush(name)
+    return x, y
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(FeatureStore, "BASEDIR", str(tmp_path / "store"))
+    return tmp_path
+
+
+def test_training_matrix_skips_unlabelled_rows(store):
+    x, y = write_signals("signals", 60)
+    FeatureStore.append("signals", {"dt": "2025-08-02 09:30", "features": [0.0] * 5})
+    X, labels, info = load_training_matrix("signals")
+    assert info == {"rows": 61, "labelled": 60, "usable": 60, "features": 5}
+    np.testing.assert_allclose(X, x)
+    np.testing.assert_array_equal(labels, y)
+
+
+def test_training_pipeline_oof_meta_and_warm_refit(store):
+    write_signals("signals", 240)
+    registry = ModelRegistry("cpr", root=str(store / "registry"))
+    make = lambda: TrainingPipeline(dataset="signals", cache_dir=str(store / "cache"), workers=1, n_splits=3,
+                                    min_samples=100, registry=registry, reload_service=False)
+
+    first = make().run()
+    assert first["trained"] and first["samples"] > 100 and first["version"] == "v0001"
+    assert {m["mode"] for m in first["models"].values()} == {"full"}
+    assert first["oof_auc"]["meta"] > 0.7
+    assert {"load", "balance", "folds", "base", "meta", "save", "total"} <= set(first["timings"])
+
+    second = make().run()
+    assert second["folds_cached"]
+    assert second["models"]["xgb"]["mode"] == "warm" and second["models"]["lr"]["mode"] == "warm"
+    assert second["models"]["rf"]["mode"] == "full"
+    assert second["models"]["xgb"]["rounds"] == 180 and second["models"]["xgb"]["warm_chain"] == 1
+    assert registry.current() == "v0002"
+    assert registry.manifest("v0002")["feature_schema"]["n_features"] == 5
+
+    service = EnsembleInference({}, budget_ms=0, registry=registry)
+    assert service.load() and service.version == "v0002"
+    decisions, version = service.decide_versioned(np.zeros((3, 5)).tolist())
+    assert len(decisions) == 3 and version == "v0002"
+    service.close()
+
+
+def test_too_few_labels_skips_training(store):
+    write_signals("signals", 40)
+    registry = ModelRegistry("cpr", root=str(store / "registry"))
+    report = TrainingPipeline(dataset="signals", cache_dir=str(store / "cache"), workers=1,
+                              registry=registry, reload_service=False).run()
+    assert not report["trained"] and registry.current() is None
+
+
+def test_warm_starts_are_bounded(store, monkeypatch):
+    from app.services import training
+
+    write_signals("signals", 240)
+    registry = ModelRegistry("cpr", root=str(store / "registry"))
+    make = lambda: TrainingPipeline(dataset="signals", cache_dir=str(store / "cache"), workers=1, n_splits=3,
+                                    min_samples=100, registry=registry, reload_service=False)
+    make().run()
+    monkeypatch.setattr(training.settings, "ML_TRAINING_MAX_BOOST_ROUNDS", 200)
+    monkeypatch.setattr(training.settings, "ML_TRAINING_MAX_WARM_REFITS", 2)
+    second, third = make().run(), make().run()
+    # The booster is continued once (150 + 30 rounds), then refitted from scratch
+    assert second["models"]["xgb"]["mode"] == "warm" and second["models"]["xgb"]["rounds"] == 180
+    assert third["models"]["xgb"]["mode"] == "full" and third["models"]["xgb"]["rounds"] == 150
+    # lr: two warm refits in a row, then a full one
+    assert third["models"]["lr"]["warm_chain"] == 2
+    assert make().run()["models"]["lr"]["mode"] == "full"
+
+    # Much more data than the previous version saw: everything refitted
+    write_signals("signals", 200, seed=3)
+    assert {m["mode"] for m in make().run()["models"].values()} == {"full"}
+
+
+def test_warm_refit_is_calibrated_on_its_own_scores(tmp_path):
+    import joblib
+
+    from app.services.training import _fit_base_model
+
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(240, 5))
+    y = (X[:, 0] + 0.5 * rng.normal(size=240) > 0).astype(int)
+    folds = np.arange(240) % 3
+    for name, array in {"X": X, "y": y, "folds": folds}.items():
+        np.save(tmp_path / f"{name}.npy", array)
+    joblib.dump(_fit_base_model("xgb", str(tmp_path), None, 42, 30)["model"], tmp_path / "xgb.pkl")
+
+    warm = _fit_base_model("xgb", str(tmp_path), str(tmp_path / "xgb.pkl"), 42, 30)
+    assert warm["mode"] == "warm" and warm["rounds"] == 180
+    calibrated = warm["model"].calibrated_classifiers_[0]
+    # The isotonic map was fitted on the wrapped (continued) booster's held-out scores
+    scores = calibrated.estimator.predict_proba(X[folds == 2])[:, 1]
+    isotonic = calibrated.calibrators[0]
+    assert isotonic.X_min_ == pytest.approx(scores.min()) and isotonic.X_max_ == pytest.approx(scores.max())
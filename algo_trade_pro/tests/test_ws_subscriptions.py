@@ -0,0 +1,165 @@
+import threading
+from queue import Queue
+
+from app.brokers.zerodha import ZerodhaBroker
+from app.services.kite import KiteTickerPool
+from app.services.tick_replay import ReplayKite
+
+
+class FakeTicker:
+    MODE_FULL = "full"
+
+    def __init__(self, on_ticks=None, on_connect=None, on_close=None):
+        self.on_ticks = on_ticks
+        self.on_connect = on_connect
+        self.on_close = on_close
+        self.subscribed = []
+        self.unsubscribed = []
+        self.modes = {}
+        self.connected = False
+
+    def connect(self, threaded=False):
+        self.connected = True
+        self.on_connect(self, {})
+
+    def subscribe(self, tokens):
+        self.subscribed.extend(tokens)
+
+    def unsubscribe(self, tokens):
+        self.unsubscribed.extend(tokens)
+
+    def set_mode(self, mode, tokens):
+        for token in tokens:
+            self.modes[token] = mode
+
+    def is_connected(self):
+        return self.connected
+
+    def close(self, code=None, reason=None):
+        self.connected = False
+
+    def push(self, ticks):
+        self.on_ticks(self, ticks)
+
+
+def kite_tick(token, price):
+    return {"instrument_token": token, "last_price": price, "ohlc": {"open": price, "high": price, "low": price}}
+
+
+def test_pool_shards_by_connection_limit():
+    pool = KiteTickerPool(client_factory=FakeTicker, max_per_connection=3, max_connections=3)
+    pool.subscribe(range(1, 8))
+    assert pool.get_stats()["per_connection"] == [3, 3, 1]
+
+    pool.set_mode(pool.MODE_FULL, range(1, 8))
+    pool.connect(threaded=True)
+    assert [shard.client.subscribed for shard in pool.shards] == [[1, 2, 3], [4, 5, 6], [7]]
+    assert pool.shards[2].client.modes == {7: "full"}
+
+    # Live changes go straight to the owning shard
+    pool.unsubscribe([2])
+    pool.subscribe([8])
+    assert pool.shards[0].client.unsubscribed == [2]
+    assert pool.shards[0].client.subscribed[-1] == 8
+
+    pool.subscribe(range(100, 110))
+    stats = pool.get_stats()
+    assert stats["connections"] == 3
+    assert stats["instruments"] == 9
+    assert stats["rejected"] == 8
+
+
+def test_broker_routes_and_subscribes_dynamically():
+    kite = ReplayKite(["NIFTY 50", "RELIANCE", "TCS", "INFY"])
+    pool_holder = {}
+
+    def factory(**callbacks):
+        pool_holder["pool"] = KiteTickerPool(client_factory=FakeTicker, max_per_connection=2, **callbacks)
+        return pool_holder["pool"]
+
+    broker = ZerodhaBroker(kite_client=kite, ws_client_factory=factory)
+    broker.subscribe([kite.token_map["RELIANCE"]])
+    out = Queue()
+    pool = broker.create_ws_client(out)
+    pool.connect(threaded=True)
+    assert set(broker.subscribe_tokens) == {kite.token_map["RELIANCE"], kite.token_map["NIFTY 50"]}
+
+    # Subscribing on the live socket reaches a (new) shard and routing picks it up
+    broker.subscribe([kite.token_map["TCS"]])
+    assert kite.token_map["TCS"] in pool.shards[1].client.subscribed
+    pool.shards[1].client.push([kite_tick(kite.token_map["TCS"], 3500.0), kite_tick(kite.token_map["INFY"], 1.0)])
+    tick = out.get_nowait()
+    assert (tick.symbol, tick.close) == ("TCS", 3500.0)
+    assert out.empty()  # INFY is not subscribed
+
+    broker.unsubscribe([kite.token_map["TCS"]])
+    pool.shards[1].client.push([kite_tick(kite.token_map["TCS"], 3501.0)])
+    assert out.empty()
+    assert pool.shards[1].client.unsubscribed == [kite.token_map["TCS"]]
+
+
+class FakeReactor:
+    """Runs callFromThread calls in order on the thread that called run()."""
+
+    def __init__(self):
+        self.running = False
+        self.runs = 0
+        self.calls = Queue()
+
+    def callFromThread(self, fn, *args, **kwargs):
+        self.calls.put((fn, args, kwargs))
+
+    def run(self, installSignalHandlers=True):
+        self.runs += 1
+        self.running = True
+        while True:
+            fn, args, kwargs = self.calls.get()
+            if fn is None:
+                break
+            fn(*args, **kwargs)
+
+    def stop(self):
+        self.calls.put((None, (), {}))
+
+    def sync(self):
+        done = threading.Event()
+        self.callFromThread(done.set)
+        assert done.wait(5)
+
+
+class ThreadRecordingTicker(FakeTicker):
+    def connect(self, threaded=False):
+        self.connect_thread = threading.current_thread().name
+        super().connect(threaded)
+
+
+def test_pool_connects_every_shard_on_one_reactor_thread(monkeypatch):
+    from app.services import kite as kite_module
+
+    monkeypatch.setattr(kite_module, "_reactor_thread", None)
+    reactor = FakeReactor()
+    pool = KiteTickerPool(client_factory=ThreadRecordingTicker, max_per_connection=2, max_connections=3,
+                          reactor=reactor)
+    pool.subscribe(range(1, 5))
+    pool.connect(threaded=True)
+    pool.connect(threaded=True)  # already started: no second connection per shard
+    # A shard opened after start connects on the reactor thread too
+    pool.subscribe([5, 6, 7, 8])
+    reactor.sync()
+
+    assert reactor.runs == 1
+    assert {shard.client.connect_thread for shard in pool.shards} == {"KiteReactor"}
+    assert pool.shards[0].client.subscribed == [1, 2]
+    assert [shard.client.subscribed for shard in pool.shards][2] == [5, 6]
+    assert pool.get_stats()["rejected"] == 2
+
+    # Rejections are reported per call, not re-reported on every subscribe
+    logged = []
+    monkeypatch.setattr(kite_module.logger, "error", logged.append)
+    pool.unsubscribe([5])
+    pool.subscribe([9])
+    reactor.sync()
+    assert not logged and pool.get_stats()["rejected"] == 2
+    pool.subscribe([10, 11])
+    assert len(logged) == 1 and "2 instruments not subscribed" in logged[0]
+    reactor.stop()